@@ -0,0 +1,26 @@
+"""Add scheduler pause state and interval override to account strategies
+
+Revision ID: 002_add_strategy_schedule_state
+Revises: 001_add_strategy_support
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002_add_strategy_schedule_state'
+down_revision = '001_add_strategy_support'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing and new subscriptions start paused: only an explicit start schedules them
+    op.add_column('account_strategies', sa.Column('is_paused', sa.Boolean(), nullable=True, server_default=sa.true()))
+    op.add_column('account_strategies', sa.Column('schedule_interval', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('account_strategies', 'schedule_interval')
+    op.drop_column('account_strategies', 'is_paused')
@@ -1,21 +1,102 @@
 """
 Base class for broker executors
 """
+import inspect
+import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List
 from datetime import datetime
 
+from app.core.event_bus import event_bus
+from app.core.quotes import Quote, normalize_quote
+
+logger = logging.getLogger(__name__)
+
 
 class BaseExecutor(ABC):
     """Base class for all broker executors"""
 
+    # Whether position changes are streamed to event listeners (otherwise REST only)
+    streams_positions = False
+
+    # Whether subscribe_quotes() opens a streamed quote feed (otherwise get_quote is REST)
+    streams_quotes = False
+
+    # Broker name used when the account config does not carry one
+    broker_name: Optional[str] = None
+
     def __init__(self, account_config: Dict[str, Any]):
         self.account_config = account_config
         self.api_key = account_config.get("api_key")
         self.api_secret = account_config.get("api_secret")
         self.access_token = account_config.get("access_token")
         self.account_number = account_config.get("account_number")
-        self.broker = account_config.get("broker")
+        self.broker = account_config.get("broker") or self.broker_name
+        self._event_listeners: List[Callable[[str, Dict[str, Any]], Any]] = []
+        self._quote_listeners: List[Callable[[Quote], Any]] = []
+        self.last_quotes: Dict[str, Quote] = {}
+
+    def add_event_listener(self, listener: Callable[[str, Dict[str, Any]], Any]):
+        """
+        Register a callback for streamed broker events
+        Called as listener(event_type, data) for account, position,
+        position_close, order and trade events, and with "resync" after
+        the stream was down and streamed state may have been missed
+        """
+        self._event_listeners.append(listener)
+
+    def add_quote_listener(self, listener: Callable[[Quote], Any]):
+        """
+        Register a callback for streamed quotes
+        Called synchronously as listener(quote) for every quote update
+        """
+        self._quote_listeners.append(listener)
+
+    async def subscribe_quotes(self, symbol: str):
+        """Start streaming quotes for a symbol (no-op unless streams_quotes)"""
+
+    async def unsubscribe_quotes(self, symbol: str):
+        """Stop streaming quotes for a symbol (no-op unless streams_quotes)"""
+
+    def _publish_quote(self, data: Dict[str, Any]) -> Optional[Quote]:
+        """Normalize a streamed quote, keep it as the symbol's latest and notify listeners"""
+        quote = normalize_quote(self.broker, data)
+        if quote is None:
+            return None
+        self.last_quotes[quote.symbol] = quote
+        for listener in self._quote_listeners:
+            try:
+                listener(quote)
+            except Exception as e:
+                logger.error(f"Quote listener failed for {quote.symbol}: {e}")
+        return quote
+
+    def get_stream_metrics(self) -> Optional[Dict[str, Any]]:
+        """Health of the broker's real-time stream (None when it has none)"""
+        stream = getattr(self, "stream", None)
+        return stream.get_metrics() if stream is not None else None
+
+    async def _resync_stream(self, gap_seconds: float):
+        """Stream came back after a gap: have listeners reload state over REST"""
+        await self._notify_listeners("resync", {"gap_seconds": gap_seconds})
+
+    async def _publish_event(self, event_type: str, data: Dict[str, Any]):
+        """Hand a streamed event to the listeners, then normalized to the event bus"""
+        await self._notify_listeners(event_type, data)
+        try:
+            event_bus.publish_raw(self.broker, event_type, data)
+        except Exception as e:
+            logger.error(f"Failed to publish {event_type} event from {self.broker}: {e}")
+
+    async def _notify_listeners(self, event_type: str, data: Dict[str, Any]):
+        """Deliver a streamed event to every registered listener"""
+        for listener in getattr(self, "_event_listeners", ()):
+            try:
+                result = listener(event_type, data)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Broker event listener failed for {event_type}: {e}")
 
     @abstractmethod
     async def connect(self) -> bool:
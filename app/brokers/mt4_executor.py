@@ -6,9 +6,9 @@ import asyncio
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import httpx
 from app.brokers.base_executor import BaseExecutor
 from app.core.config import settings
+from app.core.http_transport import http_transports
 from app.models.pydantic_schemas import (
     OrderRequest, OrderResponse, Position, Account, 
     TradeRequest, TradeResponse
@@ -19,6 +19,8 @@ logger = logging.getLogger(__name__)
 class MT4Executor(BaseExecutor):
     """MT4 trading executor using Manager API"""
     
+    broker_name = "mt4"
+    
     def __init__(self):
         config = settings.get_broker_config("mt4")
         super().__init__(config)
@@ -37,9 +39,9 @@ class MT4Executor(BaseExecutor):
     async def initialize(self) -> bool:
         """Initialize MT4 connection"""
         try:
-            self.session = httpx.AsyncClient(
-                base_url=self.api_url,
-                timeout=30.0
+            self.session = http_transports.client(
+                self.api_url,
+                broker=self.broker
             )
             
             # Test connection with auth
@@ -48,7 +50,7 @@ class MT4Executor(BaseExecutor):
                 "password": self.manager_password
             }
             
-            response = await self.session.post("/auth/login", json=auth_data)
+            response = await self.session.post("/auth/login", json=auth_data, timeout=http_transports.timeout("auth"))
             if response.status_code == 200:
                 self.is_connected = True
                 logger.info("MT4 executor initialized successfully")
@@ -179,7 +181,7 @@ class MT4Executor(BaseExecutor):
                 "magic": order.magic_number or 0
             }
             
-            response = await self.session.post("/trades", json=trade_data)
+            response = await self.session.post("/trades", json=trade_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
@@ -222,7 +224,7 @@ class MT4Executor(BaseExecutor):
                 "tp": modifications.get("take_profit", 0)
             }
             
-            response = await self.session.put(f"/orders/{order_id}", json=modify_data)
+            response = await self.session.put(f"/orders/{order_id}", json=modify_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -250,7 +252,7 @@ class MT4Executor(BaseExecutor):
     async def cancel_order(self, order_id: str) -> OrderResponse:
         """Cancel order in MT4"""
         try:
-            response = await self.session.delete(f"/orders/{order_id}")
+            response = await self.session.delete(f"/orders/{order_id}", timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -279,7 +281,7 @@ class MT4Executor(BaseExecutor):
         """Close position in MT4"""
         try:
             # Get position details first
-            response = await self.session.get(f"/trades/{position_id}")
+            response = await self.session.get(f"/trades/{position_id}", timeout=http_transports.timeout("order"))
             if response.status_code != 200:
                 return TradeResponse(
                     success=False,
@@ -301,7 +303,7 @@ class MT4Executor(BaseExecutor):
                 "magic": position.get("magic", 0)
             }
             
-            response = await self.session.delete(f"/trades/{position_id}", json=close_data)
+            response = await self.session.request("DELETE", f"/trades/{position_id}", json=close_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
@@ -428,7 +430,7 @@ class MT4Executor(BaseExecutor):
             if take_profit is not None:
                 modifications["take_profit"] = take_profit
             
-            response = await self.session.put(f"/positions/{position_id}", json=modifications)
+            response = await self.session.put(f"/positions/{position_id}", json=modifications, timeout=http_transports.timeout("order"))
             if response.status_code == 200:
                 return response.json()
             else:
@@ -6,9 +6,9 @@ import asyncio
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import httpx
 from app.brokers.base_executor import BaseExecutor
 from app.core.config import settings
+from app.core.http_transport import http_transports
 from app.models.pydantic_schemas import (
     OrderRequest, OrderResponse, Position, Account, 
     TradeRequest, TradeResponse
@@ -19,6 +19,8 @@ logger = logging.getLogger(__name__)
 class MT5Executor(BaseExecutor):
     """MT5 trading executor using Manager API"""
     
+    broker_name = "mt5"
+    
     def __init__(self):
         config = settings.get_broker_config("mt5")
         super().__init__(config)
@@ -35,9 +37,9 @@ class MT5Executor(BaseExecutor):
     async def initialize(self) -> bool:
         """Initialize MT5 connection"""
         try:
-            self.session = httpx.AsyncClient(
-                base_url=self.api_url,
-                timeout=30.0
+            self.session = http_transports.client(
+                self.api_url,
+                broker=self.broker
             )
             
             # Test connection with auth
@@ -46,7 +48,7 @@ class MT5Executor(BaseExecutor):
                 "password": self.manager_password
             }
             
-            response = await self.session.post("/auth/login", json=auth_data)
+            response = await self.session.post("/auth/login", json=auth_data, timeout=http_transports.timeout("auth"))
             if response.status_code == 200:
                 self.is_connected = True
                 logger.info("MT5 executor initialized successfully")
@@ -177,7 +179,7 @@ class MT5Executor(BaseExecutor):
                 "magic": order.magic_number or 0
             }
             
-            response = await self.session.post("/trades", json=trade_data)
+            response = await self.session.post("/trades", json=trade_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
@@ -220,7 +222,7 @@ class MT5Executor(BaseExecutor):
                 "tp": modifications.get("take_profit", 0)
             }
             
-            response = await self.session.put(f"/orders/{order_id}", json=modify_data)
+            response = await self.session.put(f"/orders/{order_id}", json=modify_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -248,7 +250,7 @@ class MT5Executor(BaseExecutor):
     async def cancel_order(self, order_id: str) -> OrderResponse:
         """Cancel order in MT5"""
         try:
-            response = await self.session.delete(f"/orders/{order_id}")
+            response = await self.session.delete(f"/orders/{order_id}", timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -277,7 +279,7 @@ class MT5Executor(BaseExecutor):
         """Close position in MT5"""
         try:
             # Get position details first
-            response = await self.session.get(f"/trades/{position_id}")
+            response = await self.session.get(f"/trades/{position_id}", timeout=http_transports.timeout("order"))
             if response.status_code != 200:
                 return TradeResponse(
                     success=False,
@@ -299,7 +301,7 @@ class MT5Executor(BaseExecutor):
                 "magic": position.get("magic", 0)
             }
             
-            response = await self.session.delete(f"/trades/{position_id}", json=close_data)
+            response = await self.session.request("DELETE", f"/trades/{position_id}", json=close_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
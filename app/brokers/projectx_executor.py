@@ -3,14 +3,14 @@ ProjectX/TopStep Broker Executor
 Handles all ProjectX and TopStep trading operations via Gateway API
 """
 import asyncio
-import json
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import httpx
 import websockets
 from app.brokers.base_executor import BaseExecutor
 from app.core.config import settings
+from app.core.http_transport import http_transports
+from app.core.stream_supervisor import broker_stream
 from app.models.pydantic_schemas import (
     OrderRequest, OrderResponse, Position, Account, 
     TradeRequest, TradeResponse
@@ -21,6 +21,10 @@ logger = logging.getLogger(__name__)
 class ProjectXExecutor(BaseExecutor):
     """ProjectX/TopStep trading executor using Gateway API"""
     
+    streams_positions = True
+    streams_quotes = True
+    broker_name = "projectx"
+    
     def __init__(self):
         config = settings.get_broker_config("projectx")
         super().__init__(config)
@@ -32,20 +36,25 @@ class ProjectXExecutor(BaseExecutor):
         self.api_token = self.config["api_token"]
         self.environment = self.config["environment"]
         self.session = None
-        self.ws_connection = None
+        self.stream = broker_stream(
+            "projectx",
+            self._open_websocket,
+            self._process_websocket_message,
+            resync=self._resync_stream
+        )
         
     async def initialize(self) -> bool:
         """Initialize ProjectX connection"""
         try:
             # Initialize HTTP client
-            self.session = httpx.AsyncClient(
-                base_url=self.api_url,
-                headers={"Authorization": f"Bearer {self.api_token}"},
-                timeout=30.0
+            self.session = http_transports.client(
+                self.api_url,
+                broker=self.broker,
+                headers={"Authorization": f"Bearer {self.api_token}"}
             )
             
             # Test connection
-            response = await self.session.get("/auth/validate")
+            response = await self.session.get("/auth/validate", timeout=http_transports.timeout("auth"))
             if response.status_code == 200:
                 
                 # Initialize WebSocket connection
@@ -63,27 +72,17 @@ class ProjectXExecutor(BaseExecutor):
             return False
     
     async def _init_websocket(self):
-        """Initialize WebSocket connection"""
-        try:
-            self.ws_connection = await websockets.connect(
-                self.ws_url,
-                extra_headers={"Authorization": f"Bearer {self.api_token}"}
-            )
-            
-            # Start WebSocket message handler
-            asyncio.create_task(self._handle_websocket_messages())
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize ProjectX WebSocket: {e}")
+        """Start the supervised WebSocket stream (reconnects on its own)"""
+        self.stream.start()
     
-    async def _handle_websocket_messages(self):
-        """Handle incoming WebSocket messages"""
-        try:
-            async for message in self.ws_connection:
-                data = json.loads(message)
-                await self._process_websocket_message(data)
-        except Exception as e:
-            logger.error(f"WebSocket message handling error: {e}")
+    async def _open_websocket(self):
+        """Open a WebSocket connection with the current token"""
+        # Heartbeats are driven by the stream supervisor
+        return await websockets.connect(
+            self.ws_url,
+            extra_headers={"Authorization": f"Bearer {self.api_token}"},
+            ping_interval=None
+        )
     
     async def _process_websocket_message(self, data):
         """Process WebSocket message"""
@@ -98,30 +97,42 @@ class ProjectXExecutor(BaseExecutor):
                 await self._handle_order_update(data)
             elif event_type == "trade_update":
                 await self._handle_trade_update(data)
+            elif event_type == "quote":
+                self._publish_quote(data)
                 
         except Exception as e:
             logger.error(f"Error processing WebSocket message: {e}")
     
     async def _handle_account_update(self, data):
         """Handle account updates"""
-        await self.emit_account_update(data)
+        await self._publish_event("account", data)
     
     async def _handle_position_update(self, data):
         """Handle position updates"""
-        await self.emit_position_update(data)
+        await self._publish_event("position", data)
     
     async def _handle_order_update(self, data):
         """Handle order updates"""
-        await self.emit_order_update(data)
+        await self._publish_event("order", data)
     
     async def _handle_trade_update(self, data):
         """Handle trade updates"""
-        await self.emit_trade_update(data)
+        await self._publish_event("trade", data)
+    
+    async def subscribe_quotes(self, symbol: str):
+        """Subscribe to a symbol's quotes on the supervised stream"""
+        await self.stream.subscribe({"type": "subscribe_quote", "symbol": symbol})
+    
+    async def unsubscribe_quotes(self, symbol: str):
+        """Unsubscribe from a symbol's quotes"""
+        await self.stream.unsubscribe(
+            {"type": "subscribe_quote", "symbol": symbol},
+            {"type": "unsubscribe_quote", "symbol": symbol}
+        )
     
     async def disconnect(self):
         """Disconnect from ProjectX"""
-        if self.ws_connection:
-            await self.ws_connection.close()
+        await self.stream.stop()
         if self.session:
             await self.session.aclose()
         self.is_connected = False
@@ -239,7 +250,7 @@ class ProjectXExecutor(BaseExecutor):
                 "magic_number": order.magic_number
             }
             
-            response = await self.session.post("/orders", json=order_data)
+            response = await self.session.post("/orders", json=order_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
@@ -278,7 +289,7 @@ class ProjectXExecutor(BaseExecutor):
                 "take_profit": modifications.get("take_profit")
             }
             
-            response = await self.session.put(f"/orders/{order_id}", json=modify_data)
+            response = await self.session.put(f"/orders/{order_id}", json=modify_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -306,7 +317,7 @@ class ProjectXExecutor(BaseExecutor):
     async def cancel_order(self, order_id: str) -> OrderResponse:
         """Cancel order in ProjectX"""
         try:
-            response = await self.session.delete(f"/orders/{order_id}")
+            response = await self.session.delete(f"/orders/{order_id}", timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -338,7 +349,7 @@ class ProjectXExecutor(BaseExecutor):
                 "quantity": quantity
             }
             
-            response = await self.session.delete(f"/positions/{position_id}", json=close_data)
+            response = await self.session.request("DELETE", f"/positions/{position_id}", json=close_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
@@ -458,8 +469,9 @@ class ProjectXExecutor(BaseExecutor):
         return []
     
     async def get_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
-        """Get quote for symbol"""
-        return None
+        """Latest streamed quote for symbol (None until it has been subscribed)"""
+        quote = self.last_quotes.get(symbol)
+        return quote.to_dict() if quote else None
     
     async def modify_position(
         self,
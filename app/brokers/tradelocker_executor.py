@@ -5,12 +5,13 @@ Handles all TradeLocker trading operations via Brand API and WebSocket
 import asyncio
 import json
 import logging
+import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import httpx
 import socketio
 from app.brokers.base_executor import BaseExecutor
 from app.core.config import settings
+from app.core.http_transport import http_transports
 from app.models.pydantic_schemas import (
     OrderRequest, OrderResponse, Position, Account, 
     TradeRequest, TradeResponse
@@ -21,6 +22,9 @@ logger = logging.getLogger(__name__)
 class TradeLockerExecutor(BaseExecutor):
     """TradeLocker trading executor using Brand API"""
     
+    streams_positions = True
+    broker_name = "tradelocker"
+    
     def __init__(self):
         config = settings.get_broker_config("tradelocker")
         super().__init__(config)
@@ -34,19 +38,29 @@ class TradeLockerExecutor(BaseExecutor):
         self.session = None
         self.sio = None
         self.access_token = None
+        self.stream_connects = 0
+        self.stream_disconnects = 0
+        self.stream_resyncs = 0
+        self._stream_gap_started: Optional[float] = None
         
     async def initialize(self) -> bool:
         """Initialize TradeLocker connection"""
         try:
             # Initialize HTTP client
-            self.session = httpx.AsyncClient(
-                base_url=self.api_url,
-                headers={"brand-api-key": self.api_key},
-                timeout=30.0
+            self.session = http_transports.client(
+                self.api_url,
+                broker=self.broker,
+                headers={"brand-api-key": self.api_key}
             )
             
-            # Initialize WebSocket client
-            self.sio = socketio.AsyncClient()
+            # Initialize WebSocket client; socket.io reconnects with jittered backoff
+            self.sio = socketio.AsyncClient(
+                reconnection=True,
+                reconnection_attempts=0,
+                reconnection_delay=settings.BROKER_STREAM_INITIAL_BACKOFF,
+                reconnection_delay_max=settings.BROKER_STREAM_MAX_BACKOFF,
+                randomization_factor=0.5
+            )
             
             # Set up WebSocket event handlers
             self.sio.on('connect', self._on_connect)
@@ -82,10 +96,29 @@ class TradeLockerExecutor(BaseExecutor):
     async def _on_connect(self):
         """WebSocket connect handler"""
         logger.info("TradeLocker WebSocket connected")
+        self.stream_connects += 1
+        if self._stream_gap_started is not None:
+            gap = time.monotonic() - self._stream_gap_started
+            self._stream_gap_started = None
+            self.stream_resyncs += 1
+            await self._resync_stream(gap)
     
     async def _on_disconnect(self):
         """WebSocket disconnect handler"""
         logger.warning("TradeLocker WebSocket disconnected")
+        self.stream_disconnects += 1
+        if self._stream_gap_started is None:
+            self._stream_gap_started = time.monotonic()
+    
+    def get_stream_metrics(self) -> Optional[Dict[str, Any]]:
+        gap = time.monotonic() - self._stream_gap_started if self._stream_gap_started is not None else 0.0
+        return {
+            "state": "live" if self.sio is not None and self.sio.connected else "reconnecting",
+            "connects": self.stream_connects,
+            "disconnects": self.stream_disconnects,
+            "resyncs": self.stream_resyncs,
+            "gap_seconds": round(gap, 3)
+        }
     
     async def _on_stream(self, data):
         """Handle stream events"""
@@ -112,23 +145,19 @@ class TradeLockerExecutor(BaseExecutor):
     
     async def _handle_account_update(self, data):
         """Handle account status updates"""
-        # Emit WebSocket update to UI
-        await self.emit_account_update(data)
+        await self._publish_event("account", data)
     
     async def _handle_position_update(self, data):
         """Handle position updates"""
-        # Emit WebSocket update to UI
-        await self.emit_position_update(data)
+        await self._publish_event("position", data)
     
     async def _handle_position_close(self, data):
         """Handle position closure"""
-        # Emit WebSocket update to UI
-        await self.emit_position_close(data)
+        await self._publish_event("position_close", data)
     
     async def _handle_order_update(self, data):
         """Handle order updates"""
-        # Emit WebSocket update to UI
-        await self.emit_order_update(data)
+        await self._publish_event("order", data)
     
     async def get_accounts(self) -> List[Account]:
         """Get all TradeLocker accounts"""
@@ -241,7 +270,7 @@ class TradeLockerExecutor(BaseExecutor):
                 "magic_number": order.magic_number
             }
             
-            response = await self.session.post("/trades/market", json=order_data)
+            response = await self.session.post("/trades/market", json=order_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
@@ -280,7 +309,7 @@ class TradeLockerExecutor(BaseExecutor):
                 "take_profit": modifications.get("take_profit")
             }
             
-            response = await self.session.put(f"/orders/{order_id}", json=modify_data)
+            response = await self.session.put(f"/orders/{order_id}", json=modify_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -308,7 +337,7 @@ class TradeLockerExecutor(BaseExecutor):
     async def cancel_order(self, order_id: str) -> OrderResponse:
         """Cancel order in TradeLocker"""
         try:
-            response = await self.session.delete(f"/orders/{order_id}")
+            response = await self.session.delete(f"/orders/{order_id}", timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -340,7 +369,7 @@ class TradeLockerExecutor(BaseExecutor):
                 "quantity": quantity
             }
             
-            response = await self.session.delete(f"/positions/{position_id}", json=close_data)
+            response = await self.session.request("DELETE", f"/positions/{position_id}", json=close_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
@@ -3,14 +3,15 @@ Tradovate Broker Executor
 Handles all Tradovate trading operations via REST API and WebSocket
 """
 import asyncio
-import json
 import logging
 from typing import Dict, List, Optional, Any
-from datetime import datetime
-import httpx
+from datetime import datetime, timezone
 import websockets
 from app.brokers.base_executor import BaseExecutor
 from app.core.config import settings
+from app.core.http_transport import http_transports
+from app.core.stream_supervisor import broker_stream
+from app.core.token_manager import token_manager
 from app.models.pydantic_schemas import (
     OrderRequest, OrderResponse, Position, Account, 
     TradeRequest, TradeResponse
@@ -21,6 +22,10 @@ logger = logging.getLogger(__name__)
 class TradovateExecutor(BaseExecutor):
     """Tradovate trading executor using REST API"""
     
+    streams_positions = True
+    streams_quotes = True
+    broker_name = "tradovate"
+    
     def __init__(self):
         config = settings.get_broker_config("tradovate")
         super().__init__(config)
@@ -37,18 +42,53 @@ class TradovateExecutor(BaseExecutor):
         self.sec = self.config["sec"]
         self.session = None
         self.access_token = None
-        self.ws_connection = None
+        # Market data frames name contracts by id; contractId -> symbol of the subscribed quotes
+        self.contract_symbols: Dict[int, str] = {}
+        self.stream = broker_stream(
+            "tradovate",
+            self._open_websocket,
+            self._process_websocket_message,
+            resync=self._resync_stream
+        )
         
     async def initialize(self) -> bool:
         """Initialize Tradovate connection"""
         try:
             # Initialize HTTP client
-            self.session = httpx.AsyncClient(
-                base_url=self.api_url,
-                timeout=30.0
+            self.session = http_transports.client(
+                self.api_url,
+                broker=self.broker
             )
             
-            # Authenticate and get access token
+            # Authenticate; the token manager renews the token ahead of expiry
+            # and keeps the session's Authorization header current
+            token_manager.register("tradovate", self._fetch_token, clients=[self.session])
+            if not await token_manager.refresh("tradovate"):
+                logger.error(f"Tradovate auth failed: {token_manager.tokens['tradovate'].last_error}")
+                return False
+            
+            # Initialize WebSocket connection
+            await self._init_websocket()
+            
+            self.is_connected = True
+            logger.info("Tradovate executor initialized successfully")
+            return True
+                
+        except Exception as e:
+            logger.error(f"Tradovate initialization failed: {e}")
+            return False
+    
+    async def _fetch_token(self):
+        """Renew the current access token, or request a new one"""
+        response = None
+        if self.access_token and token_manager.tokens["tradovate"].is_valid():
+            renewal = await self.session.get("/auth/renewaccesstoken", timeout=http_transports.timeout("auth"))
+            if renewal.status_code == 200:
+                response = renewal
+            else:
+                logger.warning(f"Tradovate token renewal failed, signing in again: {renewal.text}")
+        
+        if response is None:
             auth_data = {
                 "username": self.user_id,
                 "password": self.password,
@@ -57,53 +97,32 @@ class TradovateExecutor(BaseExecutor):
                 "cid": self.cid,
                 "sec": self.sec
             }
-            
-            response = await self.session.post("/auth/accesstokenrequest", json=auth_data)
-            if response.status_code == 200:
-                auth_result = response.json()
-                self.access_token = auth_result.get("accessToken")
-                
-                # Set authorization header
-                self.session.headers.update({
-                    "Authorization": f"Bearer {self.access_token}"
-                })
-                
-                # Initialize WebSocket connection
-                await self._init_websocket()
-                
-                self.is_connected = True
-                logger.info("Tradovate executor initialized successfully")
-                return True
-            else:
-                logger.error(f"Tradovate auth failed: {response.text}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Tradovate initialization failed: {e}")
-            return False
+            response = await self.session.post("/auth/accesstokenrequest", json=auth_data, timeout=http_transports.timeout("auth"))
+            response.raise_for_status()
+        
+        auth_result = response.json()
+        if auth_result.get("errorText"):
+            raise ValueError(auth_result["errorText"])
+        self.access_token = auth_result.get("accessToken")
+        
+        ttl = None
+        if auth_result.get("expirationTime"):
+            expires_at = datetime.fromisoformat(auth_result["expirationTime"].replace("Z", "+00:00"))
+            ttl = (expires_at - datetime.now(timezone.utc)).total_seconds()
+        return self.access_token, ttl
     
     async def _init_websocket(self):
-        """Initialize WebSocket connection"""
-        try:
-            self.ws_connection = await websockets.connect(
-                self.ws_url,
-                extra_headers={"Authorization": f"Bearer {self.access_token}"}
-            )
-            
-            # Start WebSocket message handler
-            asyncio.create_task(self._handle_websocket_messages())
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize Tradovate WebSocket: {e}")
+        """Start the supervised WebSocket stream (reconnects on its own)"""
+        self.stream.start()
     
-    async def _handle_websocket_messages(self):
-        """Handle incoming WebSocket messages"""
-        try:
-            async for message in self.ws_connection:
-                data = json.loads(message)
-                await self._process_websocket_message(data)
-        except Exception as e:
-            logger.error(f"WebSocket message handling error: {e}")
+    async def _open_websocket(self):
+        """Open a WebSocket connection with the current token"""
+        # Heartbeats are driven by the stream supervisor
+        return await websockets.connect(
+            self.ws_url,
+            extra_headers={"Authorization": f"Bearer {self.access_token}"},
+            ping_interval=None
+        )
     
     async def _process_websocket_message(self, data):
         """Process WebSocket message"""
@@ -118,30 +137,56 @@ class TradovateExecutor(BaseExecutor):
                 await self._handle_account_update(data)
             elif event_type == "fill":
                 await self._handle_fill_update(data)
+            elif event_type == "md":
+                # Market data frames batch quotes for several contracts
+                for quote in data.get("d", {}).get("quotes", []):
+                    symbol = self.contract_symbols.get(quote.get("contractId"))
+                    if symbol is not None:
+                        self._publish_quote({**quote, "symbol": symbol})
                 
         except Exception as e:
             logger.error(f"Error processing WebSocket message: {e}")
     
     async def _handle_order_update(self, data):
         """Handle order updates"""
-        await self.emit_order_update(data)
+        await self._publish_event("order", data)
     
     async def _handle_position_update(self, data):
         """Handle position updates"""
-        await self.emit_position_update(data)
+        await self._publish_event("position", data)
     
     async def _handle_account_update(self, data):
         """Handle account updates"""
-        await self.emit_account_update(data)
+        await self._publish_event("account", data)
     
     async def _handle_fill_update(self, data):
         """Handle fill updates"""
-        await self.emit_trade_update(data)
+        await self._publish_event("trade", data)
+    
+    async def subscribe_quotes(self, symbol: str):
+        """Subscribe to a symbol's quotes on the supervised stream
+
+        The symbol's contract id is looked up first so its quotes, which
+        only carry the id, are filed under the symbol.
+        """
+        if symbol not in self.contract_symbols.values():
+            response = await self.session.get(f"/contract/find?symbol={symbol}")
+            if response.status_code != 200:
+                raise ValueError(f"Symbol {symbol} not found")
+            self.contract_symbols[response.json()[0]["contractId"]] = symbol
+        await self.stream.subscribe({"op": "md/subscribeQuote", "symbol": symbol})
+    
+    async def unsubscribe_quotes(self, symbol: str):
+        """Unsubscribe from a symbol's quotes"""
+        await self.stream.unsubscribe(
+            {"op": "md/subscribeQuote", "symbol": symbol},
+            {"op": "md/unsubscribeQuote", "symbol": symbol}
+        )
     
     async def disconnect(self):
         """Disconnect from Tradovate"""
-        if self.ws_connection:
-            await self.ws_connection.close()
+        token_manager.unregister("tradovate")
+        await self.stream.stop()
         if self.session:
             await self.session.aclose()
         self.is_connected = False
@@ -248,7 +293,8 @@ class TradovateExecutor(BaseExecutor):
             
             # Get contract details
             contract_response = await self.session.get(
-                f"/contract/find?symbol={order.symbol}"
+                f"/contract/find?symbol={order.symbol}",
+                timeout=http_transports.timeout("order")
             )
             if contract_response.status_code != 200:
                 return OrderResponse(
@@ -269,7 +315,7 @@ class TradovateExecutor(BaseExecutor):
                 "isAutomated": True
             }
             
-            response = await self.session.post("/order/placeorder", json=order_data)
+            response = await self.session.post("/order/placeorder", json=order_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
@@ -308,7 +354,7 @@ class TradovateExecutor(BaseExecutor):
                 "stopPrice": modifications.get("stop_loss")
             }
             
-            response = await self.session.post("/order/modifyorder", json=modify_data)
+            response = await self.session.post("/order/modifyorder", json=modify_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -340,7 +386,7 @@ class TradovateExecutor(BaseExecutor):
                 "orderId": int(order_id)
             }
             
-            response = await self.session.post("/order/cancelorder", json=cancel_data)
+            response = await self.session.post("/order/cancelorder", json=cancel_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 return OrderResponse(
@@ -369,7 +415,7 @@ class TradovateExecutor(BaseExecutor):
         """Close position in Tradovate"""
         try:
             # Get position details
-            response = await self.session.get(f"/position/item?id={position_id}")
+            response = await self.session.get(f"/position/item?id={position_id}", timeout=http_transports.timeout("order"))
             if response.status_code != 200:
                 return TradeResponse(
                     success=False,
@@ -391,7 +437,7 @@ class TradovateExecutor(BaseExecutor):
                 "isAutomated": True
             }
             
-            response = await self.session.post("/order/placeorder", json=close_data)
+            response = await self.session.post("/order/placeorder", json=close_data, timeout=http_transports.timeout("order"))
             
             if response.status_code == 200:
                 result = response.json()
@@ -483,8 +529,9 @@ class TradovateExecutor(BaseExecutor):
         return []
     
     async def get_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
-        """Get quote for symbol"""
-        return None
+        """Latest streamed quote for symbol (None until it has been subscribed)"""
+        quote = self.last_quotes.get(symbol)
+        return quote.to_dict() if quote else None
     
     async def modify_position(
         self,
@@ -1,133 +1,258 @@
-import redis
+import asyncio
+import redis.asyncio as redis
 import json
 import logging
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, List, Tuple
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 class RedisClient:
+    """Asyncio Redis client on a shared connection pool
+
+    Writes (set/hset/expire/publish) issued in the same event-loop tick are
+    coalesced into a single non-transactional pipeline round trip when
+    REDIS_PIPELINE_WRITES is enabled.
+    """
+
     def __init__(self):
-        self.redis_client = None
+        self.redis_client: Optional[redis.Redis] = None
+        self.pool: Optional[redis.ConnectionPool] = None
+        self.pipeline_writes = settings.REDIS_PIPELINE_WRITES
+        self._pending_writes: List[Tuple[str, tuple, dict, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
         self._connect()
-    
+
     def _connect(self):
+        """Create the connection pool (no I/O; connections open lazily)"""
+        if self.redis_client is not None:
+            return
         try:
-            self.redis_client = redis.from_url(
+            self.pool = redis.ConnectionPool.from_url(
                 settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
                 decode_responses=True,
                 socket_connect_timeout=5,
                 socket_timeout=5,
-                retry_on_timeout=True
+                socket_keepalive=True,
+                retry_on_timeout=True,
+                health_check_interval=30
             )
-            logger.info("Connected to Redis successfully")
+            self.redis_client = redis.Redis(connection_pool=self.pool)
+            logger.info("Redis connection pool created")
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {e}")
             self.redis_client = None
-    
+
+    async def close(self):
+        """Flush pending writes and close pooled connections"""
+        await self._flush_writes()
+        if self.redis_client:
+            await self.redis_client.aclose()
+            self.redis_client = None
+            self.pool = None
+
     async def ping(self) -> bool:
         """Check Redis connection"""
         if self.redis_client:
             try:
-                return self.redis_client.ping()
+                return await self.redis_client.ping()
             except Exception as e:
                 logger.error(f"Redis ping failed: {e}")
                 return False
         return False
-    
+
+    def _queue_write(self, command: str, *args, **kwargs) -> asyncio.Future:
+        """Queue a write for the next pipelined flush"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_writes.append((command, args, kwargs, future))
+        if self._flush_task is None or self._flush_task.done():
+            # Runs after every task already scheduled this tick has queued its writes
+            self._flush_task = loop.create_task(self._flush_writes())
+        return future
+
+    async def _flush_writes(self):
+        """Send queued writes in pipeline round trips until none are left"""
+        while self._pending_writes:
+            batch, self._pending_writes = self._pending_writes, []
+
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for command, args, kwargs, _ in batch:
+                        getattr(pipe, command)(*args, **kwargs)
+                    results = await pipe.execute(raise_on_error=False)
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for (_, _, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def _write(self, command: str, *args, **kwargs) -> Any:
+        """Run a write directly or through the pipelined write batch"""
+        if self.pipeline_writes:
+            return await self._queue_write(command, *args, **kwargs)
+        return await getattr(self.redis_client, command)(*args, **kwargs)
+
     async def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
         """Set key-value pair with optional expiration"""
         if not self.redis_client:
             return False
-        
+
         try:
             serialized_value = json.dumps(value, default=str)
             ttl = expire or settings.REDIS_CACHE_TTL
-            return self.redis_client.set(key, serialized_value, ex=ttl)
+            return bool(await self._write("set", key, serialized_value, ex=ttl))
         except Exception as e:
             logger.error(f"Redis set error for key {key}: {e}")
             return False
-    
+
     async def get(self, key: str) -> Optional[Any]:
         """Get value by key"""
         if not self.redis_client:
             return None
-        
+
         try:
-            value = self.redis_client.get(key)
+            value = await self.redis_client.get(key)
             if value:
                 return json.loads(value)
             return None
         except Exception as e:
             logger.error(f"Redis get error for key {key}: {e}")
             return None
-    
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get many values in one round trip (None for missing keys)"""
+        if not self.redis_client or not keys:
+            return [None] * len(keys)
+
+        try:
+            values = await self.redis_client.mget(keys)
+            return [json.loads(value) if value else None for value in values]
+        except Exception as e:
+            logger.error(f"Redis mget error for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+
+    async def mset(self, mapping: Dict[str, Any], expire: Optional[int] = None) -> bool:
+        """Set many keys with a shared TTL in one pipelined round trip"""
+        if not self.redis_client:
+            return False
+        if not mapping:
+            return True
+
+        try:
+            ttl = expire or settings.REDIS_CACHE_TTL
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, json.dumps(value, default=str), ex=ttl)
+                results = await pipe.execute()
+            return all(results)
+        except Exception as e:
+            logger.error(f"Redis mset error for {len(mapping)} keys: {e}")
+            return False
+
     async def delete(self, key: str) -> bool:
         """Delete key"""
         if not self.redis_client:
             return False
-        
+
         try:
-            return bool(self.redis_client.delete(key))
+            return bool(await self.redis_client.delete(key))
         except Exception as e:
             logger.error(f"Redis delete error for key {key}: {e}")
             return False
-    
+
     async def exists(self, key: str) -> bool:
         """Check if key exists"""
         if not self.redis_client:
             return False
-        
+
         try:
-            return bool(self.redis_client.exists(key))
+            return bool(await self.redis_client.exists(key))
         except Exception as e:
             logger.error(f"Redis exists error for key {key}: {e}")
             return False
-    
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        """Set expiration on key"""
+        if not self.redis_client:
+            return False
+
+        try:
+            return bool(await self._write("expire", key, seconds))
+        except Exception as e:
+            logger.error(f"Redis expire error for key {key}: {e}")
+            return False
+
     async def keys(self, pattern: str = "*") -> List[str]:
         """Get all keys matching pattern"""
         if not self.redis_client:
             return []
-        
+
         try:
-            return self.redis_client.keys(pattern)
+            return [key async for key in self.redis_client.scan_iter(match=pattern, count=500)]
         except Exception as e:
             logger.error(f"Redis keys error for pattern {pattern}: {e}")
             return []
-    
+
     async def hset(self, name: str, key: str, value: Any) -> bool:
         """Set hash field"""
         if not self.redis_client:
             return False
-        
+
         try:
             serialized_value = json.dumps(value, default=str)
-            return bool(self.redis_client.hset(name, key, serialized_value))
+            await self._write("hset", name, key, serialized_value)
+            return True
         except Exception as e:
             logger.error(f"Redis hset error for {name}.{key}: {e}")
             return False
-    
+
+    async def hset_many(self, name: str, mapping: Dict[str, Any], expire: Optional[int] = None) -> bool:
+        """Set many hash fields and (optionally) the hash TTL in one round trip"""
+        if not self.redis_client:
+            return False
+        if not mapping:
+            return True
+
+        try:
+            serialized = {key: json.dumps(value, default=str) for key, value in mapping.items()}
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hset(name, mapping=serialized)
+                if expire:
+                    pipe.expire(name, expire)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis hset_many error for {name}: {e}")
+            return False
+
     async def hget(self, name: str, key: str) -> Optional[Any]:
         """Get hash field"""
         if not self.redis_client:
             return None
-        
+
         try:
-            value = self.redis_client.hget(name, key)
+            value = await self.redis_client.hget(name, key)
             if value:
                 return json.loads(value)
             return None
         except Exception as e:
             logger.error(f"Redis hget error for {name}.{key}: {e}")
             return None
-    
+
     async def hgetall(self, name: str) -> Dict[str, Any]:
         """Get all hash fields"""
         if not self.redis_client:
             return {}
-        
+
         try:
-            hash_data = self.redis_client.hgetall(name)
+            hash_data = await self.redis_client.hgetall(name)
             result = {}
             for key, value in hash_data.items():
                 try:
@@ -138,31 +263,35 @@ class RedisClient:
         except Exception as e:
             logger.error(f"Redis hgetall error for {name}: {e}")
             return {}
-    
+
+    def pipeline(self, transaction: bool = False):
+        """Raw pipeline for ad-hoc batches (`async with redis_client.pipeline() as pipe`)"""
+        return self.redis_client.pipeline(transaction=transaction)
+
     async def publish(self, channel: str, message: Any) -> bool:
         """Publish message to channel"""
         if not self.redis_client:
             return False
-        
+
         try:
             serialized_message = json.dumps(message, default=str)
-            return bool(self.redis_client.publish(channel, serialized_message))
+            return bool(await self._write("publish", channel, serialized_message))
         except Exception as e:
             logger.error(f"Redis publish error for channel {channel}: {e}")
             return False
-    
+
     async def subscribe(self, channels: List[str]):
         """Subscribe to channels (returns pubsub object)"""
         if not self.redis_client:
             return None
-        
+
         try:
             pubsub = self.redis_client.pubsub()
-            pubsub.subscribe(*channels)
+            await pubsub.subscribe(*channels)
             return pubsub
         except Exception as e:
             logger.error(f"Redis subscribe error for channels {channels}: {e}")
             return None
 
 # Global Redis client instance
-redis_client = RedisClient()
\ No newline at end of file
+redis_client = RedisClient()
@@ -0,0 +1,61 @@
+"""
+Broker Fields
+Field aliases brokers use for the same value in REST and streamed payloads
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+# Broker position ids before a generic "id", which on Position models is the database key
+POSITION_ID_FIELDS = ("position_id", "positionId", "id")
+# Payload fields the brokers use to identify the account an event belongs to
+ACCOUNT_ID_FIELDS = ("accountId", "account_id", "accNum", "accountNumber")
+REALIZED_FIELDS = ("realizedPnl", "realized_pnl", "realizedPnL", "pnl", "profit")
+UNREALIZED_FIELDS = ("unrealizedPnl", "unrealized_pnl", "unrealizedPnL", "openPnl", "profit")
+SIZE_FIELDS = ("size", "qty", "quantity", "volume")
+SHORT_SIDES = {"sell", "short"}
+
+
+def event_payload(data: Any) -> Dict[str, Any]:
+    """Unwrap a streamed broker event to the dict carrying its fields"""
+    if not isinstance(data, dict):
+        return {}
+    for envelope in ("d", "data"):
+        if isinstance(data.get(envelope), dict):
+            return data[envelope]
+    return data
+
+
+def event_account_id(data: Any) -> Optional[str]:
+    """Account id a streamed broker event belongs to, if it names one"""
+    payload = event_payload(data)
+    for field in ACCOUNT_ID_FIELDS:
+        if payload.get(field) is not None:
+            return str(payload[field])
+    return None
+
+
+def first_field(source: Any, *names: str, default: Any = None) -> Any:
+    """First present attribute/key of a position object or dict"""
+    for name in names:
+        value = source.get(name) if isinstance(source, dict) else getattr(source, name, None)
+        if value is not None:
+            return value
+    return default
+
+
+def normalize_position(source: Any) -> Optional[Tuple[str, str, float]]:
+    """(position_id, symbol, signed size) for a REST position or a streamed event payload"""
+    position_id = first_field(source, *POSITION_ID_FIELDS)
+    symbol = first_field(source, "symbol", "instrument", "ticker")
+    if symbol is None:
+        symbol = first_field(first_field(source, "contract", default={}), "symbol")
+    if position_id is None or symbol is None:
+        return None
+
+    net = first_field(source, "netPos")
+    if net is not None:
+        return str(position_id), symbol, float(net)
+
+    size = abs(float(first_field(source, *SIZE_FIELDS, default=0)))
+    side = str(first_field(source, "side", "type", default="")).lower()
+    return str(position_id), symbol, -size if side in SHORT_SIDES else size
@@ -0,0 +1,366 @@
+"""
+Broker Event Bus
+Normalizes streamed order, fill, position and account events and fans them out to bounded subscriber queues
+"""
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from app.core.broker_fields import (
+    POSITION_ID_FIELDS, REALIZED_FIELDS, UNREALIZED_FIELDS, event_account_id, event_payload, normalize_position
+)
+from app.core.config import settings
+from app.core.event_emitter import event_emitter
+from app.core.stream_supervisor import message_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Broker field aliases for the normalized records
+ORDER_ID_FIELDS = ("orderId", "order_id", "id")
+FILL_ID_FIELDS = ("fillId", "fill_id", "tradeId", "trade_id", "id")
+SYMBOL_FIELDS = ("symbol", "instrument", "ticker")
+SIDE_FIELDS = ("side", "action", "direction")
+STATUS_FIELDS = ("ordStatus", "status", "state")
+QUANTITY_FIELDS = ("quantity", "qty", "orderQty", "size", "volume")
+FILLED_FIELDS = ("filledQty", "filled_quantity", "filledQuantity", "cumQty")
+PRICE_FIELDS = ("price", "fillPrice", "limitPrice", "avgPrice")
+AVG_PRICE_FIELDS = ("avgPrice", "avg_price", "averagePrice", "netPrice", "openPrice", "price")
+BALANCE_FIELDS = ("balance", "cashBalance", "totalCashValue")
+EQUITY_FIELDS = ("equity", "netLiquidation", "netLiq")
+MARGIN_FIELDS = ("margin", "usedMargin", "initialMargin")
+FREE_MARGIN_FIELDS = ("freeMargin", "free_margin", "availableFunds", "availableMargin")
+
+BUY_SIDES = {"buy", "long", "bid"}
+SELL_SIDES = {"sell", "short", "ask"}
+
+
+def _value(payload: Dict[str, Any], names: Iterable[str]) -> Any:
+    for name in names:
+        value = payload.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _text(payload: Dict[str, Any], names: Iterable[str]) -> Optional[str]:
+    value = _value(payload, names)
+    return str(value) if value is not None else None
+
+
+def _number(payload: Dict[str, Any], names: Iterable[str]) -> Optional[float]:
+    value = _value(payload, names)
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _symbol(payload: Dict[str, Any]) -> Optional[str]:
+    symbol = _text(payload, SYMBOL_FIELDS)
+    if symbol is None and isinstance(payload.get("contract"), dict):
+        symbol = _text(payload["contract"], ("symbol",))
+    return symbol
+
+
+def _side(payload: Dict[str, Any]) -> Optional[str]:
+    side = str(_value(payload, SIDE_FIELDS) or "").lower()
+    if side in BUY_SIDES:
+        return "buy"
+    if side in SELL_SIDES:
+        return "sell"
+    return None
+
+
+class BrokerEvent:
+    """Fields every normalized broker event carries
+
+    Records are plain __slots__ objects and are treated as read-only once
+    published. Subclasses list their own fields, with defaults, in fields.
+    """
+
+    __slots__ = ("broker", "account_id", "ts")
+
+    kind = "event"
+    fields: Dict[str, Any] = {}
+
+    def __init__(self, broker: str, account_id: Optional[str], ts: float, **values):
+        self.broker = broker
+        self.account_id = account_id
+        self.ts = ts
+        for name, default in self.fields.items():
+            setattr(self, name, values.pop(name, default))
+        if values:
+            raise TypeError(f"{type(self).__name__} has no fields {sorted(values)}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready form, tagged with the event kind"""
+        record = {"kind": self.kind, "broker": self.broker, "account_id": self.account_id, "ts": self.ts}
+        for name in self.fields:
+            record[name] = getattr(self, name)
+        return record
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={value!r}" for name, value in self.to_dict().items() if name != "kind")
+        return f"{type(self).__name__}({values})"
+
+
+class OrderEvent(BrokerEvent):
+    kind = "order"
+    fields = {
+        "order_id": None, "symbol": None, "side": None, "status": None,
+        "quantity": None, "filled_quantity": None, "price": None
+    }
+    __slots__ = tuple(fields)
+
+
+class FillEvent(BrokerEvent):
+    kind = "fill"
+    fields = {
+        "fill_id": None, "order_id": None, "symbol": None, "side": None,
+        "quantity": None, "price": None, "realized_pnl": None, "commission": None
+    }
+    __slots__ = tuple(fields)
+
+
+class PositionEvent(BrokerEvent):
+    kind = "position"
+    fields = {
+        "position_id": None, "symbol": None, "size": 0.0, "avg_price": None,
+        "unrealized_pnl": None, "realized_pnl": None, "closed": False
+    }
+    __slots__ = tuple(fields)
+
+
+class AccountEvent(BrokerEvent):
+    kind = "account"
+    fields = {"balance": None, "equity": None, "margin": None, "free_margin": None}
+    __slots__ = tuple(fields)
+
+
+EVENT_KINDS = ("order", "fill", "position", "account")
+
+
+def normalize_event(broker: str, event_type: str, data: Any) -> Optional[BrokerEvent]:
+    """Typed record for an executor event, or None for types the bus does not carry"""
+    payload = event_payload(data)
+    account_id = event_account_id(data)
+    ts = message_timestamp(data) or time.time()
+
+    if event_type == "order":
+        return OrderEvent(
+            broker, account_id, ts,
+            order_id=_text(payload, ORDER_ID_FIELDS),
+            symbol=_symbol(payload),
+            side=_side(payload),
+            status=_text(payload, STATUS_FIELDS),
+            quantity=_number(payload, QUANTITY_FIELDS),
+            filled_quantity=_number(payload, FILLED_FIELDS),
+            price=_number(payload, PRICE_FIELDS)
+        )
+    if event_type == "trade":
+        return FillEvent(
+            broker, account_id, ts,
+            fill_id=_text(payload, FILL_ID_FIELDS),
+            order_id=_text(payload, ("orderId", "order_id")),
+            symbol=_symbol(payload),
+            side=_side(payload),
+            quantity=_number(payload, QUANTITY_FIELDS),
+            price=_number(payload, PRICE_FIELDS),
+            realized_pnl=_number(payload, REALIZED_FIELDS),
+            commission=_number(payload, ("commission", "fee"))
+        )
+    if event_type in ("position", "position_close"):
+        closed = event_type == "position_close"
+        position = normalize_position(payload)
+        position_id, symbol, size = position if position else (_text(payload, POSITION_ID_FIELDS), _symbol(payload), 0.0)
+        return PositionEvent(
+            broker, account_id, ts,
+            position_id=position_id,
+            symbol=symbol,
+            size=0.0 if closed else size,
+            avg_price=_number(payload, AVG_PRICE_FIELDS),
+            unrealized_pnl=None if closed else _number(payload, UNREALIZED_FIELDS),
+            realized_pnl=_number(payload, ("realizedPnl", "realized_pnl", "realizedPnL") + (REALIZED_FIELDS if closed else ())),
+            closed=closed
+        )
+    if event_type == "account":
+        return AccountEvent(
+            broker, account_id, ts,
+            balance=_number(payload, BALANCE_FIELDS),
+            equity=_number(payload, EQUITY_FIELDS),
+            margin=_number(payload, MARGIN_FIELDS),
+            free_margin=_number(payload, FREE_MARGIN_FIELDS)
+        )
+    return None
+
+
+class Subscription:
+    """Bounded queue of events for one subscriber
+
+    When the subscriber falls maxsize events behind, the oldest queued event
+    is dropped to make room, so publishing never waits on a slow consumer.
+    """
+
+    __slots__ = ("name", "kinds", "maxsize", "queue", "delivered", "dropped", "closed", "_ready")
+
+    def __init__(self, name: str, kinds: Optional[Iterable[str]] = None, maxsize: int = 1000):
+        self.name = name
+        self.kinds = frozenset(kinds or EVENT_KINDS)
+        self.maxsize = maxsize
+        self.queue: Deque[BrokerEvent] = deque(maxlen=maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def put(self, event: BrokerEvent):
+        if len(self.queue) == self.maxsize:
+            self.dropped += 1
+        self.queue.append(event)
+        self._ready.set()
+
+    def get_nowait(self) -> Optional[BrokerEvent]:
+        if not self.queue:
+            return None
+        self.delivered += 1
+        return self.queue.popleft()
+
+    async def get(self) -> BrokerEvent:
+        """Next event, waiting for one if the queue is empty"""
+        while not self.queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        self.delivered += 1
+        return self.queue.popleft()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> BrokerEvent:
+        return await self.get()
+
+    def close(self):
+        """End iteration once the queued events are drained"""
+        self.closed = True
+        self._ready.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kinds": sorted(self.kinds),
+            "queued": len(self.queue),
+            "maxsize": self.maxsize,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+        }
+
+
+class EventBus:
+    """In-process fan-out of normalized broker events
+
+    Executors publish from their stream reader; each event is normalized once
+    and the same immutable record is queued for every subscriber interested in
+    its kind. Subscribers either iterate their Subscription or register a
+    consumer callback that the bus runs in its own task.
+    """
+
+    def __init__(self, default_maxsize: int = 1000):
+        self.default_maxsize = default_maxsize
+        self.subscriptions: Dict[str, Subscription] = {}
+        self._by_kind: Dict[str, List[Subscription]] = {kind: [] for kind in EVENT_KINDS}
+        self._consumers: Dict[str, asyncio.Task] = {}
+        self.published: Dict[str, int] = {kind: 0 for kind in EVENT_KINDS}
+        self.consumer_errors = 0
+
+    def subscribe(self, name: str, kinds: Optional[Iterable[str]] = None, maxsize: Optional[int] = None) -> Subscription:
+        """Open a bounded subscription; replaces any earlier one under the name"""
+        self.unsubscribe(name)
+        subscription = Subscription(name, kinds, maxsize or self.default_maxsize)
+        self.subscriptions[name] = subscription
+        for kind in subscription.kinds:
+            self._by_kind.setdefault(kind, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, name: str) -> Optional[asyncio.Task]:
+        """Remove a subscription; returns its consumer task if one was cancelled"""
+        subscription = self.subscriptions.pop(name, None)
+        if subscription is None:
+            return None
+        subscription.close()
+        for kind in subscription.kinds:
+            self._by_kind[kind].remove(subscription)
+        task = self._consumers.pop(name, None)
+        if task and not task.done():
+            task.cancel()
+            return task
+        return None
+
+    def add_consumer(
+        self,
+        name: str,
+        handler: Callable[[BrokerEvent], Any],
+        kinds: Optional[Iterable[str]] = None,
+        maxsize: Optional[int] = None
+    ) -> Subscription:
+        """Subscribe and feed every event to handler from a background task"""
+        subscription = self.subscribe(name, kinds, maxsize)
+        self._consumers[name] = asyncio.create_task(self._consume(subscription, handler))
+        return subscription
+
+    async def _consume(self, subscription: Subscription, handler: Callable[[BrokerEvent], Any]):
+        async for event in subscription:
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.consumer_errors += 1
+                logger.error(f"Event bus consumer {subscription.name} failed on {event.kind}: {e}")
+
+    def publish(self, event: BrokerEvent) -> int:
+        """Queue an event for its subscribers without waiting; returns how many received it"""
+        subscribers = self._by_kind.get(event.kind, ())
+        for subscription in subscribers:
+            subscription.put(event)
+        self.published[event.kind] = self.published.get(event.kind, 0) + 1
+        return len(subscribers)
+
+    def publish_raw(self, broker: str, event_type: str, data: Any) -> Optional[BrokerEvent]:
+        """Normalize an executor event and publish it"""
+        event = normalize_event(broker, event_type, data)
+        if event is not None:
+            self.publish(event)
+        return event
+
+    async def close(self):
+        """Stop every consumer task"""
+        cancelled = [task for task in (self.unsubscribe(name) for name in list(self.subscriptions)) if task]
+        await asyncio.gather(*cancelled, return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "published": dict(self.published),
+            "consumer_errors": self.consumer_errors,
+            "subscribers": {name: sub.to_dict() for name, sub in self.subscriptions.items()}
+        }
+
+
+def ws_update(event: BrokerEvent) -> Dict[str, Any]:
+    """UI message for an event, matching the ConnectionManager notify_* shapes"""
+    return {"type": f"{event.kind}_update", "data": event.to_dict()}
+
+
+async def forward_to_nats(event: BrokerEvent):
+    """Consumer publishing events as empire.<kind>.update (logged when NATS is down)"""
+    await event_emitter.emit(f"empire.{event.kind}.update", "update", event.to_dict())
+
+
+# Global event bus shared by the broker executors
+event_bus = EventBus(default_maxsize=settings.EVENT_BUS_QUEUE_SIZE)
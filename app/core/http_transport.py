@@ -0,0 +1,228 @@
+"""
+HTTP Transport Registry
+Shared, tuned httpx connection pools per broker host with timeout budgets and pool metrics
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (httpx[http2]); fall back to HTTP/1.1 without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+    logger.info("h2 not installed, broker HTTP pools will use HTTP/1.1")
+
+
+def origin_of(url: str) -> str:
+    """scheme://host[:port] for a URL (the unit connections are pooled by)"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """Per-origin transport shared by every client that talks to the host
+
+    Clients may close freely; the pool itself is only closed by the registry.
+    Records request latency, errors, HTTP versions and newly opened
+    connections (each one a TCP/TLS handshake paid by a request).
+    """
+
+    def __init__(self, origin: str, limits: httpx.Limits, http2: bool):
+        self.origin = origin
+        self.http2 = http2
+        self.transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2, retries=1)
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.connections_opened = 0
+        self.http_versions: Dict[str, int] = {}
+        self.last_used = time.monotonic()
+        self.keepwarm = False
+        self._known_connections: Set[int] = set()
+
+    @property
+    def pool(self):
+        return self.transport._pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        self.in_flight += 1
+        self.requests += 1
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+            self.latency.observe(time.perf_counter() - started)
+            self._track_connections()
+
+        version = response.extensions.get("http_version", b"HTTP/1.1")
+        version = version.decode() if isinstance(version, bytes) else str(version)
+        self.http_versions[version] = self.http_versions.get(version, 0) + 1
+        return response
+
+    def _track_connections(self):
+        current = {id(connection) for connection in self.pool.connections}
+        self.connections_opened += len(current - self._known_connections)
+        self._known_connections = current
+
+    async def aclose(self):
+        """Client close: keep the shared pool open"""
+
+    async def close_pool(self):
+        await self.transport.aclose()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        connections = self.pool.connections
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "http2": self.http2,
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "connections_opened": self.connections_opened,
+            "http_versions": dict(self.http_versions),
+            "latency": self.latency.snapshot()
+        }
+
+
+class TransportRegistry:
+    """Hands out httpx clients backed by one shared connection pool per host
+
+    Hosts of brokers listed in keepwarm_brokers have their keep-alive
+    connections kept warm with a lightweight HEAD request whenever they have
+    been idle for keepwarm_interval, so the next order reuses an open
+    connection instead of paying a fresh handshake. Other hosts never see
+    requests the broker integration did not make.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 120.0,
+        http2: bool = True,
+        keepwarm_interval: float = 0.0,
+        keepwarm_brokers: Iterable[str] = (),
+        timeouts: Optional[Dict[str, Dict[str, float]]] = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.keepwarm_interval = keepwarm_interval
+        self.keepwarm_brokers = {broker.lower() for broker in keepwarm_brokers}
+        self.timeouts = {
+            name: httpx.Timeout(
+                budget.get("total", 30.0),
+                **{phase: budget[phase] for phase in ("connect", "read", "write", "pool") if phase in budget}
+            )
+            for name, budget in (timeouts or {}).items()
+        }
+        self.transports: Dict[str, PooledTransport] = {}
+        self.keepwarm_pings = 0
+        self._keepwarm_task: Optional[asyncio.Task] = None
+
+    def transport_for(self, url: str) -> PooledTransport:
+        """Shared transport for the URL's origin, created on first use"""
+        origin = origin_of(url)
+        transport = self.transports.get(origin)
+        if transport is None:
+            # h2 is only negotiated over TLS (ALPN); plain-HTTP bridges stay on HTTP/1.1
+            transport = PooledTransport(origin, self.limits, self.http2 and origin.startswith("https"))
+            self.transports[origin] = transport
+        return transport
+
+    def timeout(self, operation: str) -> httpx.Timeout:
+        """Timeout budget for an operation class (order, auth, query...)"""
+        return self.timeouts.get(operation) or self.timeouts.get("default") or httpx.Timeout(30.0)
+
+    def client(self, base_url: str, operation: str = "query", broker: Optional[str] = None, **kwargs) -> httpx.AsyncClient:
+        """httpx client for a broker API on the shared pool for its host"""
+        transport = self.transport_for(base_url)
+        if broker is not None and broker.lower() in self.keepwarm_brokers:
+            transport.keepwarm = True
+        return httpx.AsyncClient(
+            base_url=base_url,
+            transport=transport,
+            timeout=kwargs.pop("timeout", self.timeout(operation)),
+            **kwargs
+        )
+
+    async def start(self):
+        """Start keeping idle host pools warm"""
+        if self.keepwarm_interval > 0 and self.keepwarm_brokers and (self._keepwarm_task is None or self._keepwarm_task.done()):
+            self._keepwarm_task = asyncio.create_task(self._keepwarm_loop())
+
+    async def _keepwarm_loop(self):
+        while True:
+            await asyncio.sleep(self.keepwarm_interval)
+            idle_since = time.monotonic() - self.keepwarm_interval
+            idle = [
+                transport for transport in self.transports.values()
+                if transport.keepwarm and transport.last_used <= idle_since
+            ]
+            await asyncio.gather(*(self._ping(transport) for transport in idle), return_exceptions=True)
+
+    async def _ping(self, transport: PooledTransport):
+        """Any response keeps the connection alive; errors just mean the next call reconnects"""
+        request = httpx.Request("HEAD", transport.origin + "/", extensions={"timeout": self.timeout("keepwarm").as_dict()})
+        response = await transport.handle_async_request(request)
+        # Drain to the end of the message so the connection goes back to the pool
+        await response.aread()
+        await response.aclose()
+        self.keepwarm_pings += 1
+
+    async def close(self):
+        """Stop keep-warm and close every pooled connection"""
+        if self._keepwarm_task:
+            self._keepwarm_task.cancel()
+            await asyncio.gather(self._keepwarm_task, return_exceptions=True)
+            self._keepwarm_task = None
+        for transport in self.transports.values():
+            await transport.close_pool()
+        self.transports.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "http2_available": HTTP2_AVAILABLE,
+            "keepwarm_pings": self.keepwarm_pings,
+            "limits": {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "keepalive_expiry": self.limits.keepalive_expiry
+            },
+            "hosts": {origin: transport.get_metrics() for origin, transport in self.transports.items()}
+        }
+
+
+# Global transport registry shared by all broker executors
+http_transports = TransportRegistry(
+    max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    http2=settings.HTTP2_ENABLED,
+    keepwarm_interval=settings.HTTP_KEEPWARM_INTERVAL,
+    keepwarm_brokers=settings.HTTP_KEEPWARM_BROKERS,
+    timeouts=settings.HTTP_TIMEOUT_BUDGETS
+)
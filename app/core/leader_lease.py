@@ -0,0 +1,101 @@
+"""
+Leader Lease
+Cluster-wide single-holder lease on a Redis key, for work only one process may run
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Extend the key's expiry only while it still carries our token
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Delete the key only while it still carries our token
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    """Lease held by at most one process at a time
+
+    keep() takes the key with SET NX PX, or extends it while this process
+    still owns it, at most every ttl / 3 seconds. The lease counts as held
+    only until ttl after the last successful call was sent, so a process
+    cut off from Redis stops leading before another one can take over.
+    """
+
+    def __init__(self, client: Any, key: str, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.key = key
+        self.ttl = ttl
+        self.clock = clock
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.expires_at = float("-inf")
+        self._next_attempt = float("-inf")
+        self.acquired = 0
+        self.lost = 0
+        self.errors = 0
+
+    @property
+    def held(self) -> bool:
+        return self.clock() < self.expires_at
+
+    async def keep(self) -> bool:
+        """Take or renew the lease when due; True while this process holds it"""
+        now = self.clock()
+        if now < self._next_attempt:
+            return self.held
+        self._next_attempt = now + self.ttl / 3
+        was_held = self.held
+        ttl_ms = int(self.ttl * 1000)
+        try:
+            ok = was_held and await self.client.eval(RENEW_SCRIPT, 1, self.key, self.token, ttl_ms)
+            if not ok:
+                ok = await self.client.set(self.key, self.token, nx=True, px=ttl_ms)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Lease {self.key} renewal failed: {e}")
+            return self.held
+
+        if ok:
+            self.expires_at = now + self.ttl
+            if not was_held:
+                self.acquired += 1
+                logger.info(f"Acquired lease {self.key} as {self.token}")
+        elif was_held:
+            self.expires_at = float("-inf")
+            self.lost += 1
+            logger.warning(f"Lost lease {self.key}")
+        return self.held
+
+    async def release(self):
+        """Give the lease up so another process can take it without waiting for expiry"""
+        if not self.held:
+            return
+        self.expires_at = float("-inf")
+        try:
+            await self.client.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+        except Exception as e:
+            logger.warning(f"Lease {self.key} release failed: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "held": self.held,
+            "acquired": self.acquired,
+            "lost": self.lost,
+            "errors": self.errors
+        }
@@ -0,0 +1,82 @@
+"""
+Quotes
+Top-of-book records normalized from streamed and REST broker quote payloads
+"""
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.broker_fields import event_payload
+from app.core.stream_supervisor import message_timestamp
+
+# Broker field aliases for quote payloads
+# (Tradovate quotes only carry a contractId; the executor adds the symbol)
+SYMBOL_FIELDS = ("symbol", "instrument", "ticker")
+BID_FIELDS = ("bid", "bidPrice", "Bid")
+ASK_FIELDS = ("ask", "askPrice", "offer", "Offer")
+LAST_FIELDS = ("last", "lastPrice", "price", "Trade")
+
+
+def _price(payload: Dict[str, Any], names: Iterable[str]) -> Optional[float]:
+    entries = payload.get("entries") if isinstance(payload.get("entries"), dict) else {}
+    for name in names:
+        value = payload.get(name, entries.get(name))
+        if isinstance(value, dict):
+            # Tradovate md entries: {"Bid": {"price": ..., "size": ...}}
+            value = value.get("price")
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+class Quote:
+    """Top of book for one symbol at one broker"""
+
+    __slots__ = ("broker", "symbol", "bid", "ask", "last", "ts")
+
+    def __init__(self, broker: str, symbol: str, bid: Optional[float] = None, ask: Optional[float] = None,
+                 last: Optional[float] = None, ts: float = 0.0):
+        self.broker = broker
+        self.symbol = symbol
+        self.bid = bid
+        self.ask = ask
+        self.last = last
+        self.ts = ts
+
+    @property
+    def mid(self) -> Optional[float]:
+        if self.bid is not None and self.ask is not None:
+            return (self.bid + self.ask) / 2
+        return self.last
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.ts
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Shape of BaseExecutor.get_quote"""
+        return {
+            "broker": self.broker,
+            "symbol": self.symbol,
+            "bid": self.bid,
+            "ask": self.ask,
+            "last": self.last,
+            "timestamp": self.ts
+        }
+
+    def __repr__(self) -> str:
+        return f"Quote({self.broker!r}, {self.symbol!r}, bid={self.bid}, ask={self.ask}, last={self.last}, ts={self.ts})"
+
+
+def normalize_quote(broker: str, data: Any) -> Optional[Quote]:
+    """Quote for a streamed or REST quote payload, or None if it names no symbol or price"""
+    payload = event_payload(data)
+    symbol = next((payload[name] for name in SYMBOL_FIELDS if payload.get(name) is not None), None)
+    if symbol is None:
+        return None
+    bid, ask, last = _price(payload, BID_FIELDS), _price(payload, ASK_FIELDS), _price(payload, LAST_FIELDS)
+    if bid is None and ask is None and last is None:
+        return None
+    return Quote(broker, str(symbol), bid, ask, last, message_timestamp(payload) or time.time())
@@ -0,0 +1,282 @@
+"""
+Stream Supervisor
+Keeps a broker WebSocket feed alive: jittered reconnect, resubscribe, heartbeats and gap resync
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.broker_fields import event_payload
+from app.core.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Stream states reported in /metrics
+CONNECTING = "connecting"
+LIVE = "live"
+RECONNECTING = "reconnecting"
+STOPPED = "stopped"
+
+# Fields brokers use for the time an event was produced (epoch s/ms or ISO 8601)
+TIMESTAMP_FIELDS = ("timestamp", "ts", "time", "eventTime")
+
+
+def message_timestamp(data: Any) -> Optional[float]:
+    """Epoch seconds an event was produced at, if the message says"""
+    payload = event_payload(data)
+    for name in TIMESTAMP_FIELDS:
+        value = payload.get(name) if isinstance(payload, dict) else None
+        if value is None:
+            continue
+        if isinstance(value, (int, float)):
+            return value / 1000.0 if value > 1e11 else float(value)
+        try:
+            return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+class StreamStale(Exception):
+    """No message or pong arrived within the allowed window"""
+
+
+class StreamSupervisor:
+    """Runs one broker stream for as long as the executor is up
+
+    connect() opens a fresh connection (re-reading credentials each time);
+    every subscription message is replayed on it before messages flow. A
+    dead socket, a missed pong or a silent feed ends the connection and the
+    supervisor reconnects with jittered exponential backoff. The backoff
+    only starts over once a connection has stayed up for stable_after
+    seconds, so a server that accepts and then drops every connection (auth
+    rejected, rate limited, maintenance) is retried ever more slowly. After
+    any gap resync(gap_seconds) is awaited so listeners can reload state
+    over REST.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], Awaitable[Any]],
+        on_message: Callable[[Dict[str, Any]], Awaitable[Any]],
+        resync: Optional[Callable[[float], Awaitable[Any]]] = None,
+        event_time: Optional[Callable[[Dict[str, Any]], Optional[float]]] = message_timestamp,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        ping_interval: float = 20.0,
+        ping_timeout: float = 10.0,
+        stale_after: Optional[float] = None,
+        connect_timeout: float = 10.0,
+        stable_after: float = 30.0
+    ):
+        self.name = name
+        self.connect = connect
+        self.on_message = on_message
+        self.resync = resync
+        self.event_time = event_time
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.stale_after = stale_after
+        self.connect_timeout = connect_timeout
+        self.stable_after = stable_after
+        self.subscriptions: List[Any] = []
+        self.connection: Any = None
+        self.state = STOPPED
+        self.connects = 0
+        self.disconnects = 0
+        self.resyncs = 0
+        self.messages = 0
+        self.message_errors = 0
+        self.last_error: Optional[str] = None
+        self.last_message_at: Optional[float] = None
+        self.connected_at: Optional[float] = None
+        self.ping_rtt: Optional[float] = None
+        self.lag = LatencyHistogram()
+        self._gap_started: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_live(self) -> bool:
+        return self.state == LIVE
+
+    def start(self):
+        """Start supervising the stream in the background"""
+        if self._task is None or self._task.done():
+            self.state = CONNECTING
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop reconnecting and close the current connection"""
+        self.state = STOPPED
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._close()
+
+    async def subscribe(self, message: Any):
+        """Send a subscription now (if live) and replay it after every reconnect"""
+        self.subscriptions.append(message)
+        if self.is_live:
+            await self._send(self.connection, message)
+
+    async def unsubscribe(self, message: Any, unsubscribe_message: Any = None):
+        """Stop replaying a subscription, sending unsubscribe_message now if live"""
+        if message in self.subscriptions:
+            self.subscriptions.remove(message)
+        if unsubscribe_message is not None and self.is_live:
+            await self._send(self.connection, unsubscribe_message)
+
+    async def _send(self, connection: Any, message: Any):
+        await connection.send(message if isinstance(message, str) else json.dumps(message))
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            live_since = None
+            try:
+                self.connection = await asyncio.wait_for(self.connect(), timeout=self.connect_timeout)
+                for message in self.subscriptions:
+                    await self._send(self.connection, message)
+
+                self.state = LIVE
+                self.connects += 1
+                self.connected_at = time.time()
+                live_since = time.monotonic()
+                if self._gap_started is not None:
+                    await self._resync(time.monotonic() - self._gap_started)
+                logger.info(f"{self.name} stream live")
+
+                await self._pump(self.connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+                logger.warning(f"{self.name} stream dropped: {self.last_error}")
+            finally:
+                await self._close()
+
+            if self.state == LIVE:
+                self.disconnects += 1
+            if live_since is not None and time.monotonic() - live_since >= self.stable_after:
+                attempt = 0
+            if self._gap_started is None:
+                self._gap_started = time.monotonic()
+            self.state = RECONNECTING
+
+            # Full jitter keeps a fleet of workers from reconnecting in lockstep
+            delay = random.uniform(0, min(self.max_backoff, self.initial_backoff * 2 ** attempt))
+            attempt = min(attempt + 1, 32)  # past max_backoff anyway; keeps 2 ** attempt a sane float
+            await asyncio.sleep(delay)
+
+    async def _resync(self, gap: float):
+        self._gap_started = None
+        if self.resync is None:
+            return
+        try:
+            await self.resync(gap)
+            self.resyncs += 1
+            logger.info(f"{self.name} stream resynced after {gap:.1f}s gap")
+        except Exception as e:
+            logger.error(f"{self.name} stream resync failed: {e}")
+
+    async def _pump(self, connection: Any):
+        """Deliver messages until the connection drops or goes quiet"""
+        heartbeat = asyncio.create_task(self._heartbeat(connection)) if self.ping_interval else None
+        receive = None
+        try:
+            while True:
+                receive = asyncio.ensure_future(connection.recv())
+                waiting = [receive] + ([heartbeat] if heartbeat else [])
+                done, _ = await asyncio.wait(waiting, timeout=self.stale_after, return_when=asyncio.FIRST_COMPLETED)
+                if heartbeat in done:
+                    heartbeat.result()  # raises StreamStale
+                if receive not in done:
+                    raise StreamStale(f"no message for {self.stale_after}s")
+                await self._dispatch(receive.result())
+        finally:
+            for task in (receive, heartbeat):
+                if task and not task.done():
+                    task.cancel()
+            await asyncio.gather(*(task for task in (receive, heartbeat) if task), return_exceptions=True)
+
+    async def _dispatch(self, raw: Any):
+        self.messages += 1
+        self.last_message_at = time.monotonic()
+        try:
+            data = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+            if self.event_time:
+                sent_at = self.event_time(data)
+                if sent_at:
+                    self.lag.observe(max(time.time() - sent_at, 0.0))
+            await self.on_message(data)
+        except Exception as e:
+            # A bad message must not take the feed down
+            self.message_errors += 1
+            logger.error(f"{self.name} stream message failed: {e}")
+
+    async def _heartbeat(self, connection: Any):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            started = time.monotonic()
+            try:
+                pong = await connection.ping()
+                await asyncio.wait_for(pong, timeout=self.ping_timeout)
+            except asyncio.TimeoutError:
+                raise StreamStale(f"no pong within {self.ping_timeout}s")
+            self.ping_rtt = time.monotonic() - started
+
+    async def _close(self):
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            try:
+                await connection.close()
+            except Exception:
+                pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        idle = time.monotonic() - self.last_message_at if self.last_message_at else None
+        return {
+            "state": self.state,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "resyncs": self.resyncs,
+            "messages": self.messages,
+            "message_errors": self.message_errors,
+            "last_error": self.last_error,
+            "seconds_since_message": round(idle, 3) if idle is not None else None,
+            "gap_seconds": round(time.monotonic() - self._gap_started, 3) if self._gap_started else 0.0,
+            "ping_rtt": round(self.ping_rtt, 4) if self.ping_rtt is not None else None,
+            "lag": self.lag.snapshot(),
+            "subscriptions": len(self.subscriptions)
+        }
+
+
+def broker_stream(
+    name: str,
+    connect: Callable[[], Awaitable[Any]],
+    on_message: Callable[[Dict[str, Any]], Awaitable[Any]],
+    resync: Optional[Callable[[float], Awaitable[Any]]] = None
+) -> StreamSupervisor:
+    """Supervisor for an executor stream, tuned from settings"""
+    return StreamSupervisor(
+        name,
+        connect,
+        on_message,
+        resync=resync,
+        initial_backoff=settings.BROKER_STREAM_INITIAL_BACKOFF,
+        max_backoff=settings.BROKER_STREAM_MAX_BACKOFF,
+        ping_interval=settings.BROKER_STREAM_PING_INTERVAL,
+        ping_timeout=settings.BROKER_STREAM_PING_TIMEOUT,
+        stale_after=settings.BROKER_STREAM_STALE_AFTER,
+        stable_after=settings.BROKER_STREAM_STABLE_AFTER,
+        connect_timeout=settings.BROKER_CONNECT_TIMEOUT
+    )
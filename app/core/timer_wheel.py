@@ -0,0 +1,61 @@
+"""
+Timer Wheel
+Hashed timing wheel for large numbers of cheap, cancellable deadlines
+"""
+import math
+import time
+from typing import Dict, Hashable, List, Optional
+
+
+class TimerWheel:
+    """Hashed timing wheel of keys due at absolute times
+
+    Each slot covers tick seconds. A key due more than one revolution ahead
+    carries the number of revolutions left and is passed over until they run
+    out, so scheduling, cancelling and expiring are O(1) per key however many
+    keys are pending.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 3600, now: Optional[float] = None):
+        self.tick = tick
+        self.slots = slots
+        self._wheel: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[Hashable, int] = {}
+        self._cursor = math.floor((time.time() if now is None else now) / tick)
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
+
+    def schedule(self, key: Hashable, due: float):
+        """(Re)schedule key to expire on the first advance() at or after due"""
+        self.cancel(key)
+        tick = max(math.ceil(due / self.tick), self._cursor + 1)
+        slot = tick % self.slots
+        self._wheel[slot][key] = (tick - self._cursor - 1) // self.slots
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        del self._wheel[slot][key]
+        return True
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Move the wheel up to now and return the keys that came due"""
+        expired = []
+        target = math.floor(now / self.tick)
+        while self._cursor < target:
+            self._cursor += 1
+            bucket = self._wheel[self._cursor % self.slots]
+            for key, rounds in list(bucket.items()):
+                if rounds:
+                    bucket[key] = rounds - 1
+                else:
+                    del bucket[key]
+                    del self._slot_of[key]
+                    expired.append(key)
+        return expired
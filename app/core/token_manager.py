@@ -0,0 +1,176 @@
+"""
+Token Manager
+Tracks broker access-token expiry and refreshes tokens in the background before they lapse
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# fetch() returns the new token and its lifetime in seconds (None = unknown)
+TokenFetcher = Callable[[], Awaitable[Tuple[str, Optional[float]]]]
+
+
+class ManagedToken:
+    """One broker's current token and refresh bookkeeping"""
+
+    __slots__ = (
+        "name", "fetch", "clients", "value", "expires_at", "refreshed_at",
+        "refreshes", "failures", "last_error", "task", "timer"
+    )
+
+    def __init__(self, name: str, fetch: TokenFetcher):
+        self.name = name
+        self.fetch = fetch
+        self.clients: List[httpx.AsyncClient] = []
+        self.value: Optional[str] = None
+        self.expires_at = 0.0
+        self.refreshed_at: Optional[float] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.timer: Optional[asyncio.Task] = None
+
+    @property
+    def expires_in(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def is_valid(self, margin: float = 0.0) -> bool:
+        return self.value is not None and self.expires_in > margin
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "valid": self.is_valid(),
+            "expires_in": round(self.expires_in, 1) if self.value else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "refreshing": self.task is not None and not self.task.done()
+        }
+
+
+class TokenManager:
+    """Keeps broker tokens fresh off the order path
+
+    Each token is refreshed refresh_margin seconds before it expires by a
+    background timer, so requests always find a valid Authorization header
+    on their pooled client. Concurrent refreshes share one fetch, and a new
+    token is swapped into every bound client's headers in a single step;
+    requests already in flight keep the header they were built with.
+    """
+
+    def __init__(
+        self,
+        refresh_margin: float = 300.0,
+        default_ttl: float = 3600.0,
+        retry_backoff: float = 10.0
+    ):
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.retry_backoff = retry_backoff
+        self.tokens: Dict[str, ManagedToken] = {}
+
+    def register(self, name: str, fetch: TokenFetcher, clients: Optional[List[httpx.AsyncClient]] = None) -> ManagedToken:
+        """Manage a token; replaces any earlier registration under the name"""
+        self.unregister(name)
+        token = ManagedToken(name, fetch)
+        token.clients.extend(clients or [])
+        self.tokens[name] = token
+        return token
+
+    def bind(self, name: str, client: httpx.AsyncClient):
+        """Keep another client's Authorization header in step with the token"""
+        token = self.tokens[name]
+        token.clients.append(client)
+        if token.value:
+            client.headers["Authorization"] = f"Bearer {token.value}"
+
+    def unregister(self, name: str) -> List[asyncio.Task]:
+        """Stop managing a token; returns the refresh tasks it cancelled"""
+        token = self.tokens.pop(name, None)
+        if token is None:
+            return []
+        cancelled = [task for task in (token.task, token.timer) if task and not task.done()]
+        for task in cancelled:
+            task.cancel()
+        return cancelled
+
+    def current(self, name: str) -> Optional[str]:
+        """Token as it stands, without waiting on a refresh"""
+        token = self.tokens.get(name)
+        return token.value if token else None
+
+    async def get(self, name: str) -> Optional[str]:
+        """A valid token, refreshing first only if the current one has lapsed"""
+        token = self.tokens[name]
+        if token.is_valid():
+            return token.value
+        await self.refresh(name)
+        return token.value
+
+    def refresh(self, name: str) -> Awaitable[bool]:
+        """Refresh a token, sharing any refresh already in flight"""
+        token = self.tokens[name]
+        if token.task is None or token.task.done():
+            token.task = asyncio.create_task(self._refresh(token))
+        return asyncio.shield(token.task)
+
+    async def _refresh(self, token: ManagedToken) -> bool:
+        try:
+            value, ttl = await token.fetch()
+            if not value:
+                raise ValueError("no token returned")
+        except Exception as e:
+            token.failures += 1
+            token.last_error = str(e)
+            logger.warning(f"Token refresh failed for {token.name}: {e}")
+            self._schedule(token, self.retry_backoff)
+            return False
+
+        token.value = value
+        token.expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        token.refreshed_at = time.time()
+        token.refreshes += 1
+        token.last_error = None
+        for client in token.clients:
+            client.headers["Authorization"] = f"Bearer {value}"
+
+        # Short-lived tokens (under the margin) are renewed at half-life instead
+        self._schedule(token, max(token.expires_in - self.refresh_margin, token.expires_in / 2))
+        logger.info(f"Refreshed {token.name} token, expires in {token.expires_in:.0f}s")
+        return True
+
+    def _schedule(self, token: ManagedToken, delay: float):
+        if token.timer and not token.timer.done():
+            token.timer.cancel()
+        token.timer = asyncio.create_task(self._refresh_after(token.name, delay))
+
+    async def _refresh_after(self, name: str, delay: float):
+        await asyncio.sleep(delay)
+        if name in self.tokens:
+            await self.refresh(name)
+
+    async def close(self):
+        """Cancel every pending refresh"""
+        cancelled = []
+        for name in list(self.tokens):
+            cancelled.extend(self.unregister(name))
+        await asyncio.gather(*cancelled, return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {name: token.to_dict() for name, token in self.tokens.items()}
+
+
+# Global token manager shared by the broker executors
+token_manager = TokenManager(
+    refresh_margin=settings.TOKEN_REFRESH_MARGIN,
+    default_ttl=settings.TOKEN_DEFAULT_TTL,
+    retry_backoff=settings.TOKEN_RETRY_BACKOFF
+)
@@ -1,106 +1,266 @@
 """
 WebSocket connection manager for real-time updates
 """
-from fastapi import WebSocket
-from typing import Dict, List, Set, Optional
-import json
+from fastapi import WebSocket, WebSocketDisconnect
+from typing import Any, Dict, Iterable, List, Set, Optional, Tuple
 import logging
 import asyncio
-from datetime import datetime
+import time
+
+from app.core.config import settings
+from app.core.ws_cluster import WebSocketCluster
+from app.core.ws_fanout import JSON, OVERLOADED_CLOSE_CODE, Connection, Frame, Message, encode, loads, negotiate
+from app.core.ws_liveness import LivenessMonitor
+from app.core.ws_topics import TopicHub
 
 logger = logging.getLogger(__name__)
 
+# Update message types published per user by notify_update -> TopicHub kind
+TOPIC_UPDATE_TYPES = {f"{kind}_update": kind for kind in ("account", "position", "order", "fill")}
+
 
 class ConnectionManager:
-    def __init__(self):
-        # user_id -> Set of WebSocket connections
-        self.active_connections: Dict[int, Set[WebSocket]] = {}
+    """Tracks client sockets and fans messages out to them
+
+    Each message is serialized once and handed to every target connection's
+    send queue; per-connection writer tasks do the network I/O, so sending
+    never waits on a client. With a cluster attached, messages are also
+    published for users and broadcast clients connected to other workers.
+    Data updates belong to one user and only reach that user's connections;
+    connections that subscribe to topics get them as snapshots and deltas
+    from the TopicHub instead of every full update. Idle clients that
+    heartbeat are pinged and silent ones reaped by the LivenessMonitor, and
+    handshakes past max_connections are refused.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = settings.WS_SEND_QUEUE_SIZE,
+        policy: str = settings.WS_SLOW_CONSUMER_POLICY,
+        send_timeout: float = settings.WS_SEND_TIMEOUT,
+        tick_interval: float = settings.WS_TOPIC_TICK_INTERVAL,
+        max_subscriptions: int = settings.WS_MAX_SUBSCRIPTIONS,
+        max_connections: int = settings.WS_MAX_CONNECTIONS,
+        ping_interval: float = settings.WS_HEARTBEAT_INTERVAL,
+        ping_timeout: float = settings.WS_PING_TIMEOUT
+    ):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.max_connections = max_connections
+        # user_id -> that user's connections
+        self.active_connections: Dict[int, Set[Connection]] = {}
         # Global broadcast connections
-        self.broadcast_connections: Set[WebSocket] = set()
+        self.broadcast_connections: Set[Connection] = set()
+        self.connections: Dict[WebSocket, Connection] = {}
+        # Cross-worker delivery (None: this process only)
+        self.cluster: Optional[WebSocketCluster] = None
+        self.topics = TopicHub(tick_interval, max_subscriptions)
+        self.liveness = LivenessMonitor(ping_interval, ping_timeout)
+        self.messages = 0
+        self.frames_queued = 0
+        self.slow_disconnects = 0
+        # Connection churn
+        self.opened = 0
+        self.rejected = 0
+        self.close_reasons: Dict[str, int] = {}
+        self.lifetime_total = 0.0
 
-    async def connect(self, websocket: WebSocket, user_id: Optional[int] = None):
-        """Accept websocket connection"""
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, user_id: Optional[int] = None) -> Optional[Connection]:
+        """Accept websocket connection in its negotiated wire format and start its writer
 
+        Returns None when the worker is at max_connections; the handshake is
+        refused before any per-connection state is created.
+        """
+        if len(self.connections) >= self.max_connections:
+            self.rejected += 1
+            await websocket.close(code=OVERLOADED_CLOSE_CODE)
+            return None
+
+        fmt, subprotocol = negotiate(websocket)
+        if subprotocol is not None:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
+
+        connection = Connection(
+            websocket, user_id, self.queue_size, self.policy, self.send_timeout, on_close=self._closed, fmt=fmt
+        )
+        self.connections[websocket] = connection
         if user_id:
-            if user_id not in self.active_connections:
-                self.active_connections[user_id] = set()
-            self.active_connections[user_id].add(websocket)
+            self.active_connections.setdefault(user_id, set()).add(connection)
         else:
-            self.broadcast_connections.add(websocket)
+            self.broadcast_connections.add(connection)
+        if self.cluster is not None:
+            self.cluster.track(user_id, 1)
+        self.liveness.watch(connection)
+        self.opened += 1
+        connection.start()
+        return connection
 
     def disconnect(self, websocket: WebSocket, user_id: Optional[int] = None):
         """Remove websocket connection"""
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.discard()
+            self._remove(connection)
+
+    async def close(self, code: int = 1001):
+        """Close every connection (1001: going away) and stop their writers"""
+        connections = list(self.connections.values())
+        for connection in connections:
+            connection.close(code, "server shutdown")
+        await asyncio.gather(*(connection.wait_closed() for connection in connections))
+        await self.topics.stop()
+        await self.liveness.stop()
+
+    def _closed(self, connection: Connection):
+        """A connection was closed (slow consumer, failed send, ping timeout or shutdown)"""
+        if connection.close_reason in ("slow consumer", "send timeout"):
+            self.slow_disconnects += 1
+            logger.warning(f"Disconnected slow WebSocket client (user {connection.user_id}): {connection.close_reason}")
+        elif connection.close_reason == "ping timeout":
+            logger.info(f"Reaped unresponsive WebSocket client (user {connection.user_id})")
+        self._remove(connection)
+
+    def _remove(self, connection: Connection):
+        if self.connections.pop(connection.websocket, None) is None:
+            return
+        self.topics.drop(connection)
+        self.liveness.forget(connection)
+        # "send failed: <error>" counts as "send failed"
+        reason = (connection.close_reason or "closed").split(":")[0]
+        self.close_reasons[reason] = self.close_reasons.get(reason, 0) + 1
+        self.lifetime_total += time.time() - connection.connected_at
+        user_id = connection.user_id
+        if self.cluster is not None:
+            self.cluster.track(user_id, -1)
         if user_id and user_id in self.active_connections:
-            self.active_connections[user_id].discard(websocket)
+            self.active_connections[user_id].discard(connection)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
         else:
-            self.broadcast_connections.discard(websocket)
+            self.broadcast_connections.discard(connection)
+
+    def _fanout(self, message: Message, connections: Iterable[Connection]) -> int:
+        self.messages += 1
+        queued = 0
+        for connection in list(connections):
+            queued += connection.enqueue(message)
+        self.frames_queued += queued
+        return queued
+
+    async def receive(self, websocket: WebSocket) -> Any:
+        """Next client message, decoded in the socket's wire format"""
+        data = await websocket.receive()
+        if data["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(data.get("code", 1000))
+        connection = self.connections.get(websocket)
+        payload = data["bytes"] if data.get("bytes") is not None else data.get("text")
+        message = loads(payload, connection.format if connection is not None else JSON)
+        if connection is not None:
+            heartbeat = isinstance(message, dict) and message.get("type") in ("ping", "pong")
+            self.liveness.seen(connection, heartbeat)
+        return message
+
+    def send(self, websocket: WebSocket, message: Dict[str, Any]) -> bool:
+        """Queue a message on one socket (replies from the endpoint)"""
+        connection = self.connections.get(websocket)
+        return connection is not None and connection.enqueue(encode(message))
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[Any]) -> List[str]:
+        """Subscribe a socket to topics; each accepted topic starts with a snapshot"""
+        connection = self.connections.get(websocket)
+        return self.topics.subscribe(connection, topics) if connection is not None else []
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[Any]) -> List[str]:
+        """Unsubscribe a socket from topics"""
+        connection = self.connections.get(websocket)
+        return self.topics.unsubscribe(connection, topics) if connection is not None else []
+
+    def publish_update(self, kind: str, record: Dict[str, Any], user_id: int) -> int:
+        """Route a user's data update on this worker: deltas to its topic subscribers,
+        the full update to the user's connections without subscriptions
+        """
+        self.topics.publish(kind, record, user_id)
+        unsubscribed = [connection for connection in self.active_connections.get(user_id, ()) if not connection.topics]
+        if not unsubscribed:
+            return 0
+        return self._fanout(encode({"type": f"{kind}_update", "data": record}), unsubscribed)
+
+    def publish_quote(self, quote: Any):
+        """Quote listener feeding symbol topics (quotes are never sent unsubscribed)"""
+        self.topics.publish("quote", quote.to_dict())
+
+    async def notify_update(self, kind: str, user_id: int, data: dict):
+        """Publish a user's data update here and on the workers their other connections use"""
+        self.publish_update(kind, data, user_id)
+        if self.cluster is not None:
+            self.cluster.publish_user(user_id, encode({"type": f"{kind}_update", "data": data}).frame(JSON))
+
+    def deliver(self, frame: Frame, user_id: Optional[int] = None) -> int:
+        """Queue a JSON frame from another worker on this worker's connections for a user (None: all)"""
+        message = Message.from_frame(frame)
+        connections = self._targets(user_id)
+        # Only a user's own updates feed topics; broadcasts never carry account data
+        update = self._topic_update(frame) if user_id is not None and self.topics.subscribers else None
+        if update is None:
+            return self._fanout(message, connections)
+        # Route like publish_update: subscribers get deltas, not the full update
+        self.topics.publish(*update, user_id)
+        return self._fanout(message, [connection for connection in connections if not connection.topics])
+
+    def _targets(self, user_id: Optional[int]) -> Iterable[Connection]:
+        if user_id is None:
+            return self.connections.values()
+        return self.active_connections.get(user_id, ())
+
+    @staticmethod
+    def _topic_update(frame: Frame) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(kind, record) when a relayed frame is a data update the TopicHub routes"""
+        if frame.key is not None and frame.key[0] not in TOPIC_UPDATE_TYPES:
+            return None
+        try:
+            body = loads(frame.payload)
+        except ValueError:
+            return None
+        kind = TOPIC_UPDATE_TYPES.get(body.get("type")) if isinstance(body, dict) else None
+        data = body.get("data") if kind is not None else None
+        return (kind, data) if isinstance(data, dict) else None
 
     async def send_personal_message(self, message: dict, user_id: int):
         """Send message to specific user's all connections"""
-        if user_id in self.active_connections:
-            message_str = json.dumps({
-                **message,
-                "timestamp": datetime.utcnow().isoformat()
-            })
-
-            disconnected = set()
-            for websocket in self.active_connections[user_id]:
-                try:
-                    await websocket.send_text(message_str)
-                except Exception as e:
-                    print(f"Error sending to user {user_id}: {e}")
-                    disconnected.add(websocket)
-
-            # Clean up disconnected websockets
-            for ws in disconnected:
-                self.disconnect(ws, user_id)
+        connections = self.active_connections.get(user_id)
+        if not connections and self.cluster is None:
+            return
+        outgoing = encode(message)
+        if connections:
+            self._fanout(outgoing, connections)
+        if self.cluster is not None:
+            self.cluster.publish_user(user_id, outgoing.frame(JSON))
+
+    async def send_to_user(self, user_id: int, message: dict):
+        """Send message to specific user's all connections"""
+        await self.send_personal_message(message, user_id)
 
     async def broadcast(self, message: dict):
         """Broadcast message to all connected clients"""
-        message_str = json.dumps({
-            **message,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-
-        # Broadcast to global connections
-        disconnected = set()
-        for websocket in self.broadcast_connections:
-            try:
-                await websocket.send_text(message_str)
-            except Exception as e:
-                print(f"Error broadcasting: {e}")
-                disconnected.add(websocket)
-
-        for ws in disconnected:
-            self.disconnect(ws)
-
-        # Broadcast to all user connections
-        for user_id, connections in list(self.active_connections.items()):
-            await self.send_personal_message(message, user_id)
+        outgoing = encode(message)
+        self._fanout(outgoing, self.connections.values())
+        if self.cluster is not None:
+            self.cluster.publish_broadcast(outgoing.frame(JSON))
 
     async def notify_account_update(self, user_id: int, account_data: dict):
         """Notify user of account update"""
-        await self.send_personal_message({
-            "type": "account_update",
-            "data": account_data
-        }, user_id)
+        await self.notify_update("account", user_id, account_data)
 
     async def notify_position_update(self, user_id: int, position_data: dict):
         """Notify user of position update"""
-        await self.send_personal_message({
-            "type": "position_update",
-            "data": position_data
-        }, user_id)
+        await self.notify_update("position", user_id, position_data)
 
     async def notify_order_update(self, user_id: int, order_data: dict):
         """Notify user of order update"""
-        await self.send_personal_message({
-            "type": "order_update",
-            "data": order_data
-        }, user_id)
+        await self.notify_update("order", user_id, order_data)
 
     async def notify_signal_update(self, user_id: int, signal_data: dict):
         """Notify user of signal processing update"""
@@ -122,19 +282,36 @@ class ConnectionManager:
 
     def get_connection_count(self) -> int:
         """Get total number of active connections"""
-        user_connections = sum(len(conns) for conns in self.active_connections.values())
-        return user_connections + len(self.broadcast_connections)
-    
-    async def start_heartbeat(self):
-        """Start heartbeat task to keep connections alive"""
-        while True:
-            try:
-                await asyncio.sleep(30)  # Send heartbeat every 30 seconds
-                heartbeat_msg = {"type": "heartbeat", "timestamp": datetime.now().isoformat()}
-                await self.broadcast(heartbeat_msg)
-            except Exception as e:
-                logger.error(f"Heartbeat error: {e}")
-                await asyncio.sleep(5)
+        return len(self.connections)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        connections = list(self.connections.values())
+        closed = sum(self.close_reasons.values())
+        return {
+            "connections": len(connections),
+            "max_connections": self.max_connections,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "closed": closed,
+            "close_reasons": dict(self.close_reasons),
+            "avg_lifetime": self.lifetime_total / closed if closed else 0.0,
+            "users": len(self.active_connections),
+            "policy": self.policy,
+            "messages": self.messages,
+            "frames_queued": self.frames_queued,
+            "queued": sum(connection.depth for connection in connections),
+            "sent": sum(connection.sent for connection in connections),
+            "bytes_sent": sum(connection.bytes_sent for connection in connections),
+            "formats": {
+                fmt: sum(1 for connection in connections if connection.format == fmt)
+                for fmt in {connection.format for connection in connections}
+            },
+            "dropped": sum(connection.dropped for connection in connections),
+            "conflated": sum(connection.conflated for connection in connections),
+            "slow_disconnects": self.slow_disconnects,
+            "topics": self.topics.get_metrics(),
+            "liveness": self.liveness.get_metrics()
+        }
 
 
 # Global WebSocket manager instance
@@ -0,0 +1,387 @@
+"""
+WebSocket Cluster
+Cross-worker WebSocket delivery over Redis or NATS pub/sub with interest-based routing and a presence registry
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.ws_fanout import Frame
+
+logger = logging.getLogger(__name__)
+
+# Most outbound frames buffered while the transport is slow or down
+OUTBOX_SIZE = 10000
+
+# Most frames sent to the transport per round trip
+PUBLISH_BATCH = 500
+
+Handler = Callable[[str, bytes], None]
+
+
+def pack(origin: str, frame: Frame) -> bytes:
+    """Envelope a serialized frame: a one-line JSON header, then the payload as is"""
+    binary = isinstance(frame.payload, bytes)
+    header = json.dumps([origin, frame.key, binary], separators=(",", ":"), default=str).encode()
+    return header + b"\n" + (frame.payload if binary else frame.payload.encode())
+
+
+def unpack(data: bytes) -> Tuple[str, Frame]:
+    header, _, body = data.partition(b"\n")
+    origin, key, binary = json.loads(header)
+    return origin, Frame(body if binary else body.decode(), tuple(key) if isinstance(key, list) else key)
+
+
+class RedisTransport:
+    """Redis pub/sub on its own binary-safe connection"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self.client = redis.Redis.from_url(url, decode_responses=False, socket_keepalive=True, health_check_interval=30)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._reader: Optional[asyncio.Task] = None
+        self._handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler):
+        self._handler = handler
+
+    async def subscribe(self, channel: str):
+        await self.pubsub.subscribe(channel)
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, channel: str):
+        await self.pubsub.unsubscribe(channel)
+
+    async def _read(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None and message["type"] == "message":
+                    self._handler(message["channel"].decode(), message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py resubscribes every channel when the connection comes back
+                logger.warning(f"WebSocket cluster Redis read failed: {e}")
+                await asyncio.sleep(1.0)
+
+    async def publish_many(self, messages: List[Tuple[str, bytes]]):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for channel, data in messages:
+                pipe.publish(channel, data)
+            await pipe.execute()
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class NatsTransport:
+    """NATS subjects on the event emitter's connection"""
+
+    def __init__(self, client: Any):
+        self.client = client
+        self._subscriptions: Dict[str, Any] = {}
+        self._handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler):
+        self._handler = handler
+
+    async def subscribe(self, channel: str):
+        async def deliver(message):
+            self._handler(message.subject, message.data)
+        self._subscriptions[channel] = await self.client.subscribe(channel, cb=deliver)
+
+    async def unsubscribe(self, channel: str):
+        subscription = self._subscriptions.pop(channel, None)
+        if subscription is not None:
+            await subscription.unsubscribe()
+
+    async def publish_many(self, messages: List[Tuple[str, bytes]]):
+        # The client buffers publishes and flushes them together
+        for channel, data in messages:
+            await self.client.publish(channel, data)
+
+    async def close(self):
+        for channel in list(self._subscriptions):
+            await self.unsubscribe(channel)
+
+
+class PresenceRegistry:
+    """Cluster-wide record of which workers hold connections for which users
+
+    Each user has a hash of worker id -> connection count, and every worker
+    heartbeats its id into a sorted set. Fields of workers that stopped
+    heartbeating for ttl seconds are ignored, so a crashed worker's users
+    age out without anyone cleaning up after it.
+    """
+
+    def __init__(self, client: Any, worker_id: str, prefix: str = "ws", ttl: float = 30.0):
+        self.client = client
+        self.worker_id = worker_id
+        self.prefix = prefix
+        self.ttl = ttl
+        self._published: Dict[int, int] = {}
+
+    def _user_key(self, user_id: Any) -> str:
+        return f"{self.prefix}:presence:{user_id}"
+
+    @property
+    def _workers_key(self) -> str:
+        return f"{self.prefix}:workers"
+
+    async def sync(self, counts: Dict[int, int]):
+        """Publish this worker's per-user connection counts and heartbeat"""
+        await self.client.zadd(self._workers_key, {self.worker_id: time.time()})
+        for user_id in self._published.keys() - counts.keys():
+            await self.client.hdel(self._user_key(user_id), self.worker_id)
+        for user_id, count in counts.items():
+            if self._published.get(user_id) != count:
+                await self.client.hset(self._user_key(user_id), self.worker_id, count)
+            await self.client.expire(self._user_key(user_id), int(self.ttl * 2))
+        self._published = dict(counts)
+
+    async def live_workers(self) -> Set[str]:
+        workers = await self.client.zrangebyscore(self._workers_key, time.time() - self.ttl, "+inf")
+        return {w.decode() if isinstance(w, bytes) else w for w in workers}
+
+    async def connections(self, user_id: Any) -> Dict[str, int]:
+        """Live workers holding connections for user_id, with their counts"""
+        fields = await self.client.hgetall(self._user_key(user_id))
+        live = await self.live_workers()
+        counts = {}
+        for worker, count in fields.items():
+            worker = worker.decode() if isinstance(worker, bytes) else worker
+            if worker in live and int(count) > 0:
+                counts[worker] = int(count)
+        return counts
+
+    async def is_online(self, user_id: Any) -> bool:
+        return bool(await self.connections(user_id))
+
+    async def clear(self):
+        """Withdraw this worker on shutdown"""
+        for user_id in self._published:
+            await self.client.hdel(self._user_key(user_id), self.worker_id)
+        self._published = {}
+        await self.client.zrem(self._workers_key, self.worker_id)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class WebSocketCluster:
+    """Delivers frames to users and broadcast clients connected to any worker
+
+    Every worker subscribes to the broadcast channel and to <prefix>.user.<id>
+    only while it holds a connection for that user, so a message reaches
+    just the workers interested in it. Frames cross the transport already
+    serialized; a worker skips its own messages, since it delivered those
+    locally when sending.
+    """
+
+    def __init__(
+        self,
+        transport: Any,
+        deliver: Callable[[Frame, Optional[int]], int],
+        presence: Optional[PresenceRegistry] = None,
+        worker_id: Optional[str] = None,
+        prefix: str = "ws",
+        presence_interval: float = 10.0
+    ):
+        self.transport = transport
+        self.deliver = deliver
+        self.presence = presence
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.prefix = prefix
+        self.presence_interval = presence_interval
+        self.user_counts: Dict[int, int] = {}
+        self.subscribed: Set[str] = set()
+        self._outbox: Deque[Tuple[str, bytes]] = deque()
+        self._outbox_ready = asyncio.Event()
+        self._interest_changed = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.published = 0
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @property
+    def broadcast_channel(self) -> str:
+        return f"{self.prefix}.broadcast"
+
+    def user_channel(self, user_id: Any) -> str:
+        return f"{self.prefix}.user.{user_id}"
+
+    async def start(self):
+        await self.transport.start(self._receive)
+        await self._sync_interest()
+        self._tasks = [
+            asyncio.create_task(self._publish_loop()),
+            asyncio.create_task(self._interest_loop())
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._outbox:
+            await self._flush()
+        if self.presence is not None:
+            try:
+                await self.presence.clear()
+                await self.presence.close()
+            except Exception as e:
+                logger.warning(f"Failed to clear WebSocket presence: {e}")
+        await self.transport.close()
+
+    # Interest
+
+    def track(self, user_id: Optional[int], delta: int):
+        """Count a local connection opening (+1) or closing (-1) for a user"""
+        if not user_id:
+            return
+        count = self.user_counts.get(user_id, 0) + delta
+        if count > 0:
+            self.user_counts[user_id] = count
+        else:
+            self.user_counts.pop(user_id, None)
+        self._interest_changed.set()
+
+    async def _sync_interest(self):
+        """Bring transport subscriptions and presence in line with the connections held"""
+        wanted = {self.broadcast_channel} | {self.user_channel(user_id) for user_id in self.user_counts}
+        for channel in wanted - self.subscribed:
+            await self.transport.subscribe(channel)
+            self.subscribed.add(channel)
+        for channel in self.subscribed - wanted:
+            await self.transport.unsubscribe(channel)
+            self.subscribed.discard(channel)
+        if self.presence is not None:
+            await self.presence.sync(dict(self.user_counts))
+
+    async def _interest_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._interest_changed.wait(), self.presence_interval)
+            except asyncio.TimeoutError:
+                pass  # periodic presence heartbeat
+            self._interest_changed.clear()
+            try:
+                await self._sync_interest()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"WebSocket cluster subscription sync failed: {e}")
+                await asyncio.sleep(1.0)
+                self._interest_changed.set()
+
+    # Outbound
+
+    def publish_user(self, user_id: Any, frame: Frame):
+        self._enqueue(self.user_channel(user_id), frame)
+
+    def publish_broadcast(self, frame: Frame):
+        self._enqueue(self.broadcast_channel, frame)
+
+    def _enqueue(self, channel: str, frame: Frame):
+        if len(self._outbox) >= OUTBOX_SIZE:
+            self._outbox.popleft()
+            self.dropped += 1
+        self._outbox.append((channel, pack(self.worker_id, frame)))
+        self._outbox_ready.set()
+
+    async def _flush(self):
+        batch = [self._outbox.popleft() for _ in range(min(len(self._outbox), PUBLISH_BATCH))]
+        await self.transport.publish_many(batch)
+        self.published += len(batch)
+
+    async def _publish_loop(self):
+        while True:
+            while not self._outbox:
+                self._outbox_ready.clear()
+                await self._outbox_ready.wait()
+            try:
+                await self._flush()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"WebSocket cluster publish failed: {e}")
+                await asyncio.sleep(1.0)
+
+    # Inbound
+
+    def _receive(self, channel: str, data: bytes):
+        try:
+            origin, frame = unpack(data)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Malformed WebSocket cluster message on {channel}: {e}")
+            return
+        if origin == self.worker_id:
+            return
+        self.received += 1
+        if channel == self.broadcast_channel:
+            self.delivered += self.deliver(frame, None)
+        else:
+            user_id = channel.rsplit(".", 1)[-1]
+            self.delivered += self.deliver(frame, int(user_id) if user_id.isdigit() else user_id)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "subscriptions": len(self.subscribed),
+            "users": len(self.user_counts),
+            "outbox": len(self._outbox),
+            "published": self.published,
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+
+async def start_cluster(deliver: Callable[[Frame, Optional[int]], int], nats_client: Any = None) -> Optional[WebSocketCluster]:
+    """Cluster delivery for WS_CLUSTER_BACKEND ("redis" or "nats"); None when disabled or unavailable"""
+    backend = settings.WS_CLUSTER_BACKEND
+    if not backend:
+        return None
+    if backend == "nats":
+        if nats_client is None:
+            logger.warning("WS_CLUSTER_BACKEND is nats but NATS is not connected; WebSocket delivery stays local")
+            return None
+        transport = NatsTransport(nats_client)
+    elif backend == "redis":
+        transport = RedisTransport(settings.REDIS_URL)
+    else:
+        raise ValueError(f"Unknown WS_CLUSTER_BACKEND: {backend}")
+
+    cluster = WebSocketCluster(transport, deliver, prefix=settings.WS_CLUSTER_PREFIX)
+    if settings.WS_PRESENCE_TTL:
+        import redis.asyncio as redis
+        cluster.presence = PresenceRegistry(
+            redis.Redis.from_url(settings.REDIS_URL, decode_responses=True),
+            cluster.worker_id,
+            settings.WS_CLUSTER_PREFIX,
+            settings.WS_PRESENCE_TTL
+        )
+        cluster.presence_interval = settings.WS_PRESENCE_TTL / 3
+    try:
+        await cluster.start()
+    except Exception as e:
+        logger.error(f"WebSocket cluster unavailable, delivery stays local: {e}")
+        await cluster.transport.close()
+        return None
+    logger.info(f"WebSocket cluster delivery over {backend} as {cluster.worker_id}")
+    return cluster
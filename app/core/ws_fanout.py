@@ -0,0 +1,346 @@
+"""
+WebSocket Fan-out
+Serialize-once frames delivered through per-connection bounded send queues and writer tasks
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple, Union
+
+from fastapi import WebSocket
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import cbor2
+    CBOR_AVAILABLE = True
+except ImportError:
+    CBOR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Wire formats; JSON goes out as text frames with ISO timestamps, the binary
+# formats as binary frames with integer epoch-millisecond timestamps
+JSON = "json"
+MSGPACK = "msgpack"
+CBOR = "cbor"
+
+# What a connection does when its send queue is full
+DROP_OLDEST = "drop_oldest"  # discard the oldest queued frame
+CONFLATE = "conflate"  # replace queued frames of the same stream, else drop the oldest
+DISCONNECT = "disconnect"  # close the connection
+SLOW_CONSUMER_POLICIES = (DROP_OLDEST, CONFLATE, DISCONNECT)
+
+# Close code for clients cut off for falling behind (1013: try again later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Close code for handshakes refused because the worker is full
+OVERLOADED_CLOSE_CODE = 1013
+
+# Message types where only the latest value per stream matters
+CONFLATED_TYPES = {"position_update", "account_update", "quote", "heartbeat"}
+
+# Payload fields identifying the stream a conflatable message belongs to
+STREAM_KEY_FIELDS = ("position_id", "account_id", "symbol", "id")
+
+
+class Frame:
+    """A message serialized in one wire format, shared by every connection using it"""
+
+    __slots__ = ("payload", "key")
+
+    def __init__(self, payload: Union[str, bytes], key: Optional[Hashable] = None):
+        self.payload = payload
+        self.key = key  # conflation key; None never conflates
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Frame) and (self.payload, self.key) == (other.payload, other.key)
+
+    def __hash__(self) -> int:
+        return hash((self.payload, self.key))
+
+    def __repr__(self) -> str:
+        return f"Frame({self.payload!r}, key={self.key!r})"
+
+
+def conflation_key(message: Dict[str, Any]) -> Optional[Hashable]:
+    """(type, stream id) for messages that can be conflated, else None"""
+    message_type = message.get("type")
+    if message_type not in CONFLATED_TYPES:
+        return None
+    data = message.get("data")
+    if isinstance(data, dict):
+        for field in STREAM_KEY_FIELDS:
+            if data.get(field) is not None:
+                return (message_type, data[field])
+    return (message_type,)
+
+
+def available_formats() -> List[str]:
+    """Wire formats this process can encode, in order of preference"""
+    formats = [MSGPACK] if MSGPACK_AVAILABLE else []
+    if CBOR_AVAILABLE:
+        formats.append(CBOR)
+    return formats + [JSON]
+
+
+def _cbor_default(encoder, value):
+    encoder.encode(str(value))
+
+
+def dumps(body: Dict[str, Any], fmt: str = JSON) -> Union[str, bytes]:
+    if fmt == MSGPACK:
+        return msgpack.packb(body, default=str, use_bin_type=True)
+    if fmt == CBOR:
+        return cbor2.dumps(body, default=_cbor_default)
+    return json.dumps(body, default=str)
+
+
+def loads(payload: Union[str, bytes], fmt: str = JSON) -> Any:
+    """Decode a client frame; text frames are always JSON"""
+    if isinstance(payload, str) or fmt == JSON:
+        return json.loads(payload)
+    if fmt == MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    return cbor2.loads(payload)
+
+
+def negotiate(websocket: WebSocket) -> Tuple[str, Optional[str]]:
+    """(wire format, subprotocol to accept) for a connecting socket
+
+    The first offered Sec-WebSocket-Protocol naming a format we can encode
+    wins, else an ?encoding= query parameter; anything else gets JSON.
+    """
+    scope = getattr(websocket, "scope", None) or {}
+    formats = available_formats()
+    for subprotocol in scope.get("subprotocols") or ():
+        if subprotocol in formats:
+            return subprotocol, subprotocol
+    query = getattr(websocket, "query_params", None) or {}
+    encoding = query.get("encoding")
+    return (encoding if encoding in formats else JSON), None
+
+
+class Message:
+    """A message to fan out, serialized at most once for each wire format
+
+    The send time is kept as a float and written per format: an ISO string in
+    JSON, epoch milliseconds in the binary formats.
+    """
+
+    __slots__ = ("body", "key", "ts", "_frames")
+
+    def __init__(self, body: Optional[Dict[str, Any]], key: Optional[Hashable] = None, ts: Optional[float] = None):
+        self.body = body
+        self.key = key
+        self.ts = time.time() if ts is None else ts
+        self._frames: Dict[str, Frame] = {}
+
+    @classmethod
+    def from_frame(cls, frame: Frame) -> "Message":
+        """Wrap a JSON frame published by another worker"""
+        message = cls(None, frame.key)
+        message._frames[JSON] = frame
+        return message
+
+    def frame(self, fmt: str = JSON) -> Frame:
+        frame = self._frames.get(fmt)
+        if frame is None:
+            if self.body is None:
+                self._load()
+            if fmt == JSON:
+                stamp = datetime.utcfromtimestamp(self.ts).isoformat()
+            else:
+                stamp = int(self.ts * 1000)
+            frame = self._frames[fmt] = Frame(dumps({**self.body, "timestamp": stamp}, fmt), self.key)
+        return frame
+
+    def _load(self):
+        body = json.loads(self._frames[JSON].payload)
+        stamp = body.pop("timestamp", None)
+        if isinstance(stamp, str):
+            try:
+                self.ts = datetime.fromisoformat(stamp).replace(tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                pass
+        self.body = body
+
+
+def encode(message: Dict[str, Any]) -> Message:
+    """Stamp a message with the send time for fan-out; each format is serialized on first use"""
+    return Message(message, conflation_key(message))
+
+
+class Connection:
+    """One client socket with a bounded send queue drained by its own writer task
+
+    enqueue() never awaits, so fanning a frame out to many connections costs
+    one append each; the network writes happen concurrently in the writers,
+    and a slow client only ever backs up its own queue.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: Optional[int] = None,
+        max_queue: int = 256,
+        policy: str = DROP_OLDEST,
+        send_timeout: float = 10.0,
+        on_close: Optional[Callable[["Connection"], None]] = None,
+        fmt: str = JSON
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+        self.format = fmt
+        # Topics subscribed through the TopicHub; none means every update is sent
+        self.topics: Set[str] = set()
+        # Frames, or conflation keys whose latest frame is held in _latest
+        self._queue: Deque[Union[Frame, Hashable]] = deque()
+        self._latest: Dict[Hashable, Frame] = {}
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._closer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        self.connected_at = time.time()
+        # Liveness clock readings: last inbound message and unanswered ping
+        self.last_seen = 0.0
+        self.heartbeats = False  # sent ping/pong, so app-level pings may reap it
+        self.pinged_at: Optional[float] = None
+        self.sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.peak_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write())
+
+    def enqueue(self, item: Union[Message, Frame]) -> bool:
+        """Queue a message (in this connection's format) or frame without waiting; False when it was not queued"""
+        if self.closed:
+            return False
+
+        frame = item.frame(self.format) if isinstance(item, Message) else item
+        conflate = self.policy == CONFLATE and frame.key is not None
+        if conflate and frame.key in self._latest:
+            # Still waiting to be sent; the newer frame takes its place in line
+            self._latest[frame.key] = frame
+            self.conflated += 1
+            return True
+
+        if len(self._queue) >= self.max_queue:
+            if self.policy == DISCONNECT:
+                self.close(SLOW_CONSUMER_CLOSE_CODE, "slow consumer")
+                return False
+            self._drop_oldest()
+
+        if conflate:
+            self._latest[frame.key] = frame
+            self._queue.append(frame.key)
+        else:
+            self._queue.append(frame)
+        self.peak_depth = max(self.peak_depth, len(self._queue))
+        self._wakeup.set()
+        return True
+
+    def _drop_oldest(self):
+        oldest = self._queue.popleft()
+        if not isinstance(oldest, Frame):
+            del self._latest[oldest]
+        self.dropped += 1
+
+    def _next(self) -> Frame:
+        item = self._queue.popleft()
+        return item if isinstance(item, Frame) else self._latest.pop(item)
+
+    async def _write(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                frame = self._next()
+                if isinstance(frame.payload, bytes):
+                    await asyncio.wait_for(self.websocket.send_bytes(frame.payload), self.send_timeout)
+                else:
+                    await asyncio.wait_for(self.websocket.send_text(frame.payload), self.send_timeout)
+                self.sent += 1
+                self.bytes_sent += len(frame.payload)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.close(SLOW_CONSUMER_CLOSE_CODE, "send timeout")
+        except Exception as e:
+            # The socket is gone; nothing left to tell the client
+            self.close(None, f"send failed: {e}")
+
+    def close(self, code: Optional[int] = 1000, reason: str = "closed"):
+        """Stop delivery and close the socket (code None: just drop it)"""
+        if self.closed:
+            return
+        self.closed = True
+        self.close_reason = reason
+        self._queue.clear()
+        self._latest.clear()
+        self._closer = asyncio.create_task(self._shutdown(code))
+        if self.on_close is not None:
+            self.on_close(self)
+
+    async def _shutdown(self, code: Optional[int]):
+        writer = self._writer
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+        if code is not None:
+            try:
+                await asyncio.wait_for(self.websocket.close(code=code), self.send_timeout)
+            except Exception:
+                pass
+
+    async def wait_closed(self):
+        """Wait for a close() to finish shutting the socket"""
+        if self._closer is not None:
+            await asyncio.gather(self._closer, return_exceptions=True)
+
+    def discard(self):
+        """Stop the writer of a socket the client already closed"""
+        if self.closed:
+            return
+        self.closed = True
+        self.close_reason = "client disconnected"
+        self._queue.clear()
+        self._latest.clear()
+        if self._writer is not None:
+            self._writer.cancel()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "format": self.format,
+            "depth": len(self._queue),
+            "peak_depth": self.peak_depth,
+            "sent": self.sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "topics": len(self.topics)
+        }
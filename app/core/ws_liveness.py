@@ -0,0 +1,115 @@
+"""
+WebSocket Liveness
+Pings for idle heartbeating connections and a timer-wheel reaper for the ones that stop answering
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.core.timer_wheel import TimerWheel
+from app.core.ws_fanout import Connection, Message, encode
+
+logger = logging.getLogger(__name__)
+
+# Close code for connections that stopped answering pings (1001: going away)
+PING_TIMEOUT_CLOSE_CODE = 1001
+
+
+class LivenessMonitor:
+    """Tracks when each connection was last heard from and reaps dead ones
+
+    App-level pings are opt-in: a connection joins the timer wheel the first
+    time it sends a "ping" or "pong", so listen-only clients are left to the
+    server's protocol-level ping frames. Inbound messages only stamp
+    last_seen. When a deadline comes due, a connection heard from within
+    ping_interval is rescheduled, an idle one is sent a ping, and one that
+    has not answered its ping within ping_timeout is closed. Busy clients
+    are never pinged, and a tick costs only the connections due. The tick
+    task runs only while some connection is on the wheel.
+    """
+
+    def __init__(
+        self,
+        ping_interval: float = 30.0,
+        ping_timeout: float = 10.0,
+        tick: float = 1.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.tick = tick
+        self.clock = clock
+        slots = max(64, math.ceil((ping_interval + ping_timeout) / tick) + 1)
+        self.wheel = TimerWheel(tick, slots, now=clock())
+        self._task: Optional[asyncio.Task] = None
+        self.pings = 0
+        self.reaped = 0
+
+    def watch(self, connection: Connection):
+        """Start tracking a new connection"""
+        connection.last_seen = self.clock()
+        connection.pinged_at = None
+
+    def seen(self, connection: Connection, heartbeat: bool = False):
+        """The client sent something, so it is alive; a ping or pong opts it into pings"""
+        connection.last_seen = self.clock()
+        if heartbeat and not connection.heartbeats:
+            connection.heartbeats = True
+            self.wheel.schedule(connection, connection.last_seen + self.ping_interval)
+            if self._task is None:
+                self._task = asyncio.create_task(self._run())
+
+    def forget(self, connection: Connection):
+        self.wheel.cancel(connection)
+        if self._task is not None and not len(self.wheel):
+            self._task.cancel()
+            self._task = None
+
+    def check(self, now: Optional[float] = None) -> int:
+        """Handle the connections due by now; returns how many were reaped"""
+        now = self.clock() if now is None else now
+        ping: Optional[Message] = None
+        reaped = 0
+        for connection in self.wheel.advance(now):
+            if connection.closed:
+                continue
+            if connection.pinged_at is not None and connection.last_seen < connection.pinged_at:
+                reaped += 1
+                connection.close(PING_TIMEOUT_CLOSE_CODE, "ping timeout")
+            elif now - connection.last_seen < self.ping_interval:
+                connection.pinged_at = None
+                self.wheel.schedule(connection, connection.last_seen + self.ping_interval)
+            else:
+                if ping is None:
+                    ping = encode({"type": "ping"})
+                connection.pinged_at = now
+                connection.enqueue(ping)
+                self.pings += 1
+                self.wheel.schedule(connection, now + self.ping_timeout)
+        self.reaped += reaped
+        return reaped
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"WebSocket liveness check failed: {e}")
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self.wheel),
+            "ping_interval": self.ping_interval,
+            "ping_timeout": self.ping_timeout,
+            "pings": self.pings,
+            "reaped": self.reaped
+        }
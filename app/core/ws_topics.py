@@ -0,0 +1,331 @@
+"""
+WebSocket Topics
+Topic subscriptions answered with a snapshot, then sequenced deltas with price and P&L ticks conflated
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.ws_fanout import Connection, Message, encode
+
+logger = logging.getLogger(__name__)
+
+# Topic kinds clients can subscribe to ("<kind>:<value>") and the record field they match
+TOPIC_FIELDS = {
+    "account": "account_id",
+    "symbol": "symbol",
+    "strategy": "strategy_id",
+    "broker": "broker"
+}
+
+# Record kinds kept for snapshots, with the fields identifying one entity;
+# other kinds (fills, signals) are passed through as events
+ENTITY_FIELDS = {
+    "position": ("position_id", "symbol"),
+    "order": ("order_id",),
+    "account": ("account_id",),
+    "quote": ("symbol",)
+}
+
+# Fields whose changes are ticks, sent at most once per tick interval
+TICK_FIELDS = {
+    "position": {"unrealized_pnl"},
+    "account": {"equity", "margin", "free_margin"},
+    "quote": {"bid", "ask", "last"}
+}
+
+# Fields that change on every update without making it worth sending
+VOLATILE_FIELDS = {"ts", "timestamp"}
+
+# (user id, topic): a user's view of a topic. Records published without a
+# user (quotes) are shared and held under (None, topic).
+Channel = Tuple[Any, str]
+
+# Order statuses after which an order leaves the snapshot
+TERMINAL_ORDER_STATUSES = {"filled", "cancelled", "canceled", "rejected", "expired"}
+
+
+def parse_topic(topic: Any) -> Optional[str]:
+    """The topic name when it is a valid "<kind>:<value>", else None"""
+    if not isinstance(topic, str):
+        return None
+    kind, _, value = topic.partition(":")
+    if kind not in TOPIC_FIELDS or not value:
+        return None
+    return topic
+
+
+def topics_for(record: Dict[str, Any]) -> List[str]:
+    """Every topic a record belongs to"""
+    return [
+        f"{kind}:{record[field]}"
+        for kind, field in TOPIC_FIELDS.items()
+        if record.get(field) is not None
+    ]
+
+
+def entity_key(kind: str, record: Dict[str, Any]) -> Optional[str]:
+    """"<kind>:<broker>:<account>:<id>" for retained kinds, None for events"""
+    for field in ENTITY_FIELDS.get(kind, ()):
+        if record.get(field) is not None:
+            scope = [record.get("broker"), record.get("account_id"), record[field]]
+            return ":".join([kind] + ["" if part is None else str(part) for part in scope])
+    return None
+
+
+def is_removal(kind: str, record: Dict[str, Any]) -> bool:
+    if kind == "position":
+        return bool(record.get("closed"))
+    if kind == "order":
+        return str(record.get("status") or "").lower() in TERMINAL_ORDER_STATUSES
+    return False
+
+
+class TopicHub:
+    """Topic subscriptions over the fan-out connections
+
+    The latest record of every position, order, account and quote is kept so a
+    subscription starts with a snapshot of its topic. After that, subscribers
+    get "delta" messages carrying only the fields that changed, keyed by entity
+    id, and "event" messages for fills and signals. Every message on a topic
+    has the next sequence number; a client that sees a gap (its queue dropped a
+    frame) subscribes again for a fresh snapshot. Updates that only move
+    prices or P&L are merged and sent once per tick interval, anything else
+    goes out at once with whatever ticks were pending on the topic.
+
+    Topics are per user: a record published for a user only reaches that
+    user's subscribers, and shared records (quotes) reach every user
+    subscribed to their topics. Only connections with a user may subscribe,
+    and authorize(user_id, topic), when set, vets each topic.
+    """
+
+    def __init__(
+        self,
+        tick_interval: float = 0.25,
+        max_subscriptions: int = 256,
+        authorize: Optional[Callable[[Any, str], bool]] = None
+    ):
+        self.tick_interval = tick_interval
+        self.max_subscriptions = max_subscriptions
+        self.authorize = authorize
+        # entity key -> latest record
+        self.records: Dict[str, Dict[str, Any]] = {}
+        # channel -> entity keys in its snapshot
+        self.members: Dict[Channel, Set[str]] = {}
+        self.subscribers: Dict[Channel, Set[Connection]] = {}
+        # topic -> its subscribed channels, which shared records go to
+        self.channels: Dict[str, Set[Channel]] = {}
+        self.seq: Dict[Channel, int] = {}
+        # channel -> entity key -> changes merged since the last delta
+        self.pending: Dict[Channel, Dict[str, Dict[str, Any]]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self.updates = 0
+        self.snapshots = 0
+        self.deltas = 0
+        self.events = 0
+        self.conflated = 0
+        self.frames_queued = 0
+        self.unauthorized = 0
+
+    def _allowed(self, user_id: Any, topic: str) -> bool:
+        if not user_id or (self.authorize is not None and not self.authorize(user_id, topic)):
+            self.unauthorized += 1
+            return False
+        return True
+
+    def subscribe(self, connection: Connection, topics: Iterable[Any]) -> List[str]:
+        """Acknowledge topics, then queue a snapshot of each; returns the topics accepted
+
+        Subscribing to a topic again sends a new snapshot.
+        """
+        user_id = connection.user_id
+        accepted, rejected = [], []
+        for topic in topics:
+            name = parse_topic(topic)
+            full = name not in connection.topics and len(connection.topics) + len(accepted) >= self.max_subscriptions
+            if name is None or full or name in accepted or not self._allowed(user_id, name):
+                rejected.append(topic)
+            else:
+                accepted.append(name)
+
+        connection.enqueue(encode({"type": "subscribed", "topics": accepted, "rejected": rejected}))
+        for topic in accepted:
+            channel = (user_id, topic)
+            # Bring current subscribers up to date so the snapshot and seq line up
+            self._flush(channel)
+            self.subscribers.setdefault(channel, set()).add(connection)
+            self.channels.setdefault(topic, set()).add(channel)
+            connection.topics.add(topic)
+            keys = self.members.get(channel, set()) | self.members.get((None, topic), set())
+            snapshot = [{"id": key, **self.records[key]} for key in keys]
+            connection.enqueue(encode({
+                "type": "snapshot",
+                "topic": topic,
+                "seq": self.seq.get(channel, 0),
+                "data": snapshot
+            }))
+            self.snapshots += 1
+
+        if accepted and self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+        return accepted
+
+    def unsubscribe(self, connection: Connection, topics: Iterable[Any]) -> List[str]:
+        """Stop topics for a connection and acknowledge the ones it had"""
+        removed = [topic for topic in dict.fromkeys(map(parse_topic, topics)) if topic in connection.topics]
+        for topic in removed:
+            self._leave(connection, topic)
+        connection.enqueue(encode({"type": "unsubscribed", "topics": removed}))
+        return removed
+
+    def drop(self, connection: Connection):
+        """Forget a closed connection's subscriptions"""
+        for topic in list(connection.topics):
+            self._leave(connection, topic)
+
+    def _leave(self, connection: Connection, topic: str):
+        connection.topics.discard(topic)
+        channel = (connection.user_id, topic)
+        subscribers = self.subscribers.get(channel)
+        if subscribers is None:
+            return
+        subscribers.discard(connection)
+        if not subscribers:
+            del self.subscribers[channel]
+            self.pending.pop(channel, None)
+            channels = self.channels[topic]
+            channels.discard(channel)
+            if not channels:
+                del self.channels[topic]
+
+    def _subscribed(self, user_id: Any, topics: List[str]) -> List[Channel]:
+        """Subscribed channels a record of user_id (None: shared) goes to"""
+        if user_id is None:
+            return [channel for topic in topics for channel in self.channels.get(topic, ())]
+        return [(user_id, topic) for topic in topics if (user_id, topic) in self.subscribers]
+
+    def publish(self, kind: str, record: Dict[str, Any], user_id: Any = None):
+        """Apply an update and route it to the subscribers of its topics
+
+        user_id is the record's owner; None shares it with every subscriber,
+        so account data must always be published with its owner.
+        """
+        self.updates += 1
+        topics = topics_for(record)
+        key = entity_key(kind, record)
+        if key is None:
+            self._event(kind, record, self._subscribed(user_id, topics))
+            return
+
+        previous = self.records.get(key)
+        removed = is_removal(kind, record)
+        if removed:
+            if previous is None:
+                return
+            del self.records[key]
+            for topic in topics_for(previous):
+                members = self.members.get((user_id, topic))
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del self.members[(user_id, topic)]
+        else:
+            self.records[key] = record
+            for topic in topics:
+                self.members.setdefault((user_id, topic), set()).add(key)
+
+        subscribed = self._subscribed(user_id, topics)
+        if not subscribed:
+            return
+
+        if removed:
+            change, urgent = {"removed": True}, True
+        elif previous is None:
+            change, urgent = record, True
+        else:
+            change = {field: value for field, value in record.items() if previous.get(field) != value}
+            moved = change.keys() - VOLATILE_FIELDS
+            if not moved:
+                return
+            urgent = not moved <= TICK_FIELDS.get(kind, set())
+
+        for channel in subscribed:
+            entries = self.pending.setdefault(channel, {})
+            if removed or previous is None or key not in entries:
+                entries[key] = dict(change)
+            else:
+                entries[key].update(change)
+            if urgent:
+                self._flush(channel)
+        if not urgent:
+            self.conflated += 1
+
+    def _event(self, kind: str, record: Dict[str, Any], channels: List[Channel]):
+        for channel in channels:
+            # Ticks pending on the channel go first so the seq order is the real order
+            self._flush(channel)
+            self._send(channel, encode({
+                "type": "event",
+                "topic": channel[1],
+                "seq": self._next_seq(channel),
+                "kind": kind,
+                "data": record
+            }))
+            self.events += 1
+
+    def _next_seq(self, channel: Channel) -> int:
+        seq = self.seq.get(channel, 0) + 1
+        self.seq[channel] = seq
+        return seq
+
+    def _flush(self, channel: Channel):
+        entries = self.pending.pop(channel, None)
+        if not entries:
+            return
+        self._send(channel, encode({
+            "type": "delta",
+            "topic": channel[1],
+            "seq": self._next_seq(channel),
+            "changes": [{"id": key, **changes} for key, changes in entries.items()]
+        }))
+        self.deltas += 1
+
+    def _send(self, channel: Channel, message: Message):
+        for connection in list(self.subscribers.get(channel, ())):
+            self.frames_queued += connection.enqueue(message)
+
+    def flush(self):
+        """Send every channel's pending ticks"""
+        for channel in list(self.pending):
+            self._flush(channel)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Topic tick flush failed: {e}")
+
+    async def stop(self):
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "topics": len(self.channels),
+            "channels": len(self.subscribers),
+            "subscriptions": sum(len(subscribers) for subscribers in self.subscribers.values()),
+            "unauthorized": self.unauthorized,
+            "records": len(self.records),
+            "tick_interval": self.tick_interval,
+            "updates": self.updates,
+            "snapshots": self.snapshots,
+            "deltas": self.deltas,
+            "events": self.events,
+            "conflated": self.conflated,
+            "pending": sum(len(entries) for entries in self.pending.values()),
+            "frames_queued": self.frames_queued
+        }
@@ -1,4 +1,6 @@
+from typing import AsyncGenerator, Optional
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -6,16 +8,57 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Async driver for each sync URL scheme
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _pool_kwargs(url: str) -> dict:
+    """Connection pool sizing (SQLite uses its own single-file pool)"""
+    if "sqlite" in url:
+        return {}
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+def get_async_database_url(url: str) -> str:
+    """Translate a sync DATABASE_URL to its asyncio driver equivalent"""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=settings.DEBUG
+    echo=settings.DEBUG,
+    **_pool_kwargs(settings.DATABASE_URL)
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async engine for hot paths running on the event loop
+try:
+    async_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL),
+        echo=settings.DEBUG,
+        **_pool_kwargs(settings.DATABASE_URL)
+    )
+    AsyncSessionLocal: Optional[async_sessionmaker] = async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+except Exception as e:
+    logger.warning(f"Async database engine unavailable, async sessions disabled: {e}")
+    async_engine = None
+    AsyncSessionLocal = None
+
 # Create base class for models
 Base = declarative_base()
 
@@ -30,6 +73,22 @@ def get_db():
     finally:
         db.close()
 
+def get_async_session() -> AsyncSession:
+    """Create a new async session (use as `async with get_async_session() as db`)"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database engine is not configured")
+    return AsyncSessionLocal()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Async database dependency for FastAPI"""
+    async with get_async_session() as db:
+        yield db
+
+async def dispose_async_engine():
+    """Close pooled async connections"""
+    if async_engine is not None:
+        await async_engine.dispose()
+
 def init_db():
     """Initialize database with all tables"""
     try:
@@ -46,4 +105,4 @@ def drop_db():
         logger.info("Database tables dropped successfully")
     except Exception as e:
         logger.error(f"Database drop failed: {e}")
-        raise
\ No newline at end of file
+        raise
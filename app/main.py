@@ -6,7 +6,7 @@ import asyncio
 import logging
 from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
@@ -17,11 +17,15 @@ import uvicorn
 from app.core.config import settings
 from app.core.websocket_manager import ws_manager as websocket_manager
 from app.services.signal_processor import signal_processor
+from app.services.strategy_runner import strategy_runner
+from app.services.account_directory import account_directory
 from app.cache.redis_client import redis_client
-from app.db.database import engine, Base
+from app.core.http_transport import http_transports
+from app.core.token_manager import token_manager
+from app.db.database import engine, Base, SessionLocal, dispose_async_engine
 
 # Router imports
-from app.routers.auth import router as auth_router
+from app.routers.auth import router as auth_router, get_user_from_token
 from app.routers.accounts import router as accounts_router
 from app.routers.positions import router as positions_router
 from app.routers.trades import router as trades_router
@@ -39,6 +43,8 @@ from app.routers.oauth import router as oauth_router
 from app.routers.analytics import router as analytics_router
 from app.routers.notifications import router as notifications_router
 from app.core.event_emitter import event_emitter
+from app.core.event_bus import event_bus, forward_to_nats
+from app.core.ws_cluster import start_cluster
 
 # Configure structured logging
 from app.core.logging_config import setup_logging
@@ -50,6 +56,12 @@ setup_logging(
 logger = logging.getLogger(__name__)
 logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION} in {settings.ENVIRONMENT} mode")
 
+async def route_broker_event(event):
+    """Event bus consumer delivering a broker event to its account's owner (dropped while the owner is unknown)"""
+    user_id = account_directory.owner(event.account_id)
+    if user_id is not None:
+        await websocket_manager.notify_update(event.kind, user_id, event.to_dict())
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
@@ -69,12 +81,33 @@ async def lifespan(app: FastAPI):
         await event_emitter.initialize()
         logger.info("✅ Event emitter initialized")
         
+        # Deliver WebSocket messages to clients connected to other workers
+        websocket_manager.cluster = await start_cluster(
+            websocket_manager.deliver,
+            event_emitter.nats_client if event_emitter.nats_connected else None
+        )
+        
+        # Start keep-warm for the shared broker HTTP pools
+        await http_transports.start()
+        
         # Initialize signal processor and broker connections
         await signal_processor.initialize()
         logger.info("✅ Signal processor initialized")
         
+        # Schedule enabled in-house strategies
+        await strategy_runner.initialize()
+        
+        # Fan normalized broker events out to the UI and NATS; UI updates go
+        # only to the user owning the event's account, on whichever worker
+        await account_directory.start()
+        websocket_manager.topics.authorize = account_directory.authorize
+        event_bus.add_consumer("websocket", route_broker_event)
+        event_bus.add_consumer("nats", forward_to_nats)
+        # Quotes feed the WebSocket symbol topics
+        for broker in signal_processor.brokers.values():
+            broker.add_quote_listener(websocket_manager.publish_quote)
+        
         # Start background tasks
-        asyncio.create_task(websocket_manager.start_heartbeat())
         asyncio.create_task(monitor_system_health())
         
         logger.info("🎉 Unified Trading Engine started successfully!")
@@ -89,15 +122,37 @@ async def lifespan(app: FastAPI):
     logger.info("🛑 Shutting down Unified Trading Engine...")
     
     try:
+        # Stop strategy scheduling before the signal path it emits into
+        await strategy_runner.shutdown()
+        
         # Shutdown signal processor
         await signal_processor.shutdown()
         logger.info("✅ Signal processor shutdown")
         
-        # Shutdown event emitter
+        # Stop background token refreshes and close shared broker HTTP pools
+        await token_manager.close()
+        await http_transports.close()
+        logger.info("✅ Broker HTTP pools closed")
+        
+        # Stop event bus consumers and cross-worker delivery, then the event emitter they publish through
+        await event_bus.close()
+        await account_directory.stop()
+        if websocket_manager.cluster is not None:
+            await websocket_manager.cluster.stop()
+            websocket_manager.cluster = None
         await event_emitter.shutdown()
         logger.info("✅ Event emitter shutdown")
         
+        # Flush pipelined Redis writes and close the pool
+        await redis_client.close()
+        logger.info("✅ Redis connections closed")
+        
+        # Close pooled async database connections
+        await dispose_async_engine()
+        logger.info("✅ Database connections closed")
+        
         # Close WebSocket connections
+        await websocket_manager.close()
         logger.info("✅ WebSocket connections closed")
         
         logger.info("👋 Unified Trading Engine shutdown complete")
@@ -157,30 +212,53 @@ app.include_router(notifications_router, tags=["notifications"])
 # WebSocket endpoint
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time updates"""
-    await websocket_manager.connect(websocket)
+    """WebSocket endpoint for real-time updates
+
+    Clients authenticate with their access token as ?token= (or an
+    Authorization: Bearer header) and only get their own accounts' data;
+    handshakes without a valid token are refused with 1008.
+    Clients pick the encoding with a "msgpack", "cbor" or "json" subprotocol
+    (or ?encoding=); binary encodings use binary frames and epoch-ms timestamps.
+    Clients that have sent a "ping" or "pong" and then stay silent for
+    WS_HEARTBEAT_INTERVAL get a "ping" and are closed unless they send
+    something within WS_PING_TIMEOUT; other clients rely on protocol pings.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    token = websocket.query_params.get("token") or (authorization[7:] if authorization.lower().startswith("bearer ") else None)
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(db, token)
+    finally:
+        db.close()
+    if user is None or not user.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    if await websocket_manager.connect(websocket, user_id=user.id) is None:
+        return  # worker at WS_MAX_CONNECTIONS
     
     try:
         while True:
-            # Receive message from client
-            data = await websocket.receive_json()
+            # Receive message from client, in the encoding negotiated at connect
+            data = await websocket_manager.receive(websocket)
             
             # Handle different message types
             message_type = data.get("type")
             
             if message_type == "subscribe":
-                # Subscribe to specific updates (handled by connection manager)
-                channels = data.get("channels", [])
-                await websocket.send_json({"type": "subscribed", "channels": channels})
+                # Topics like "account:<id>", "symbol:<symbol>", "strategy:<id>"; each starts with a snapshot
+                websocket_manager.subscribe(websocket, data.get("topics") or data.get("channels") or [])
                 
             elif message_type == "unsubscribe":
-                # Unsubscribe from specific updates (handled by connection manager)
-                channels = data.get("channels", [])
-                await websocket.send_json({"type": "unsubscribed", "channels": channels})
+                websocket_manager.unsubscribe(websocket, data.get("topics") or data.get("channels") or [])
                 
             elif message_type == "ping":
                 # Respond to ping
-                await websocket.send_json({"type": "pong"})
+                websocket_manager.send(websocket, {"type": "pong"})
+                
+            elif message_type == "pong":
+                # Answer to a server ping; receive() already marked the client alive
+                pass
                 
             else:
                 logger.warning(f"Unknown WebSocket message type: {message_type}")
@@ -215,11 +293,8 @@ async def health_check():
         
         # Check broker connections
         broker_status = {}
-        for name, broker in signal_processor.brokers.items():
-            try:
-                broker_status[name] = broker.is_connected()
-            except:
-                broker_status[name] = False
+        for name in signal_processor.brokers:
+            broker_status[name] = signal_processor.connector.is_ready(name)
         
         # Overall health
         is_healthy = redis_status and any(broker_status.values())
@@ -251,22 +326,44 @@ async def get_metrics():
     """Get system metrics"""
     try:
         # Get WebSocket connections
-        ws_connections = len(websocket_manager.active_connections)
+        ws_connections = websocket_manager.get_connection_count()
         
         # Get signal queue size
         signal_queue_size = signal_processor.signal_queue.qsize()
         
         # Get broker status
         broker_metrics = {}
-        for name, broker in signal_processor.brokers.items():
+        for name, readiness in signal_processor.connector.readiness().items():
             broker_metrics[name] = {
-                "connected": broker.is_connected,
+                "connected": readiness["ready"],
+                "state": readiness["state"],
+                "connect_seconds": readiness["connect_seconds"],
                 "type": name
             }
         
         return {
             "websocket_connections": ws_connections,
             "signal_queue_size": signal_queue_size,
+            "signal_pipeline": signal_processor.pipeline.get_metrics(),
+            "execution_lanes": signal_processor.lanes.get_metrics(),
+            "write_behind": signal_processor.persistence.get_metrics(),
+            "reference_cache": signal_processor.reference_cache.get_metrics(),
+            "position_book": signal_processor.position_book.get_metrics(),
+            "pnl_tracker": signal_processor.pnl_tracker.get_metrics(),
+            "market_data": signal_processor.market_data.get_metrics(),
+            "tick_store": signal_processor.tick_store.get_metrics() if signal_processor.tick_store else None,
+            "strategy_scheduler": strategy_runner.scheduler.get_metrics(),
+            "http_pools": http_transports.get_metrics(),
+            "broker_tokens": token_manager.get_metrics(),
+            "event_bus": event_bus.get_metrics(),
+            "websocket": websocket_manager.get_metrics(),
+            "websocket_cluster": websocket_manager.cluster.get_metrics() if websocket_manager.cluster else None,
+            "account_directory": account_directory.get_metrics(),
+            "broker_streams": {
+                name: broker.get_stream_metrics()
+                for name, broker in signal_processor.brokers.items()
+                if broker.streams_positions
+            },
             "brokers": broker_metrics,
             "timestamp": asyncio.get_event_loop().time()
         }
@@ -279,8 +376,28 @@ async def get_metrics():
 
 @app.get("/healthz")
 async def healthz_check():
-    """Kubernetes-style health check"""
-    return {"status": "ok", "service": "unified-trading-engine"}
+    """Kubernetes-style health check with per-broker readiness
+    
+    Returns 200 as soon as any broker is ready (or, in lazy mode, can connect
+    on demand), so traffic for healthy brokers is not held up by others.
+    """
+    brokers = signal_processor.connector.readiness()
+    states = {broker["state"] for broker in brokers.values()}
+    if all(broker["ready"] for broker in brokers.values()):
+        status = "ok"
+    elif "ready" in states or "idle" in states:
+        status = "degraded"
+    else:
+        status = "unavailable"
+    
+    return JSONResponse(
+        status_code=503 if status == "unavailable" else 200,
+        content={
+            "status": status,
+            "service": "unified-trading-engine",
+            "brokers": brokers
+        }
+    )
 
 @app.get("/status")
 async def get_status():
@@ -288,11 +405,8 @@ async def get_status():
     try:
         redis_status = await redis_client.ping()
         broker_status = {}
-        for name, broker in signal_processor.brokers.items():
-            try:
-                broker_status[name] = broker.is_connected()
-            except:
-                broker_status[name] = False
+        for name in signal_processor.brokers:
+            broker_status[name] = signal_processor.connector.is_ready(name)
         
         return {
             "service": "unified-trading-engine",
@@ -302,7 +416,7 @@ async def get_status():
             "components": {
                 "redis": "connected" if redis_status else "disconnected",
                 "brokers": broker_status,
-                "websocket_connections": len(websocket_manager.active_connections)
+                "websocket_connections": websocket_manager.get_connection_count()
             }
         }
     except Exception as e:
@@ -408,20 +522,22 @@ async def monitor_system_health():
                 logger.warning("Redis connection lost, attempting to reconnect...")
                 redis_client._connect()
             
-            # Check broker connections
+            # Check broker connections; reconnects are deadline-bounded and run in parallel
+            connector = signal_processor.connector
+            reconnects = []
             for name, broker in signal_processor.brokers.items():
-                try:
-                    if not broker.is_connected():
-                        logger.warning(f"Broker {name} disconnected, attempting to reconnect...")
-                        await broker.connect()
-                except:
-                    logger.warning(f"Broker {name} check failed")
-                    logger.warning(f"Broker {name} disconnected, attempting to reconnect...")
-                    try:
-                        await broker.initialize()
-                        logger.info(f"✅ Reconnected to {name}")
-                    except Exception as e:
-                        logger.error(f"❌ Failed to reconnect to {name}: {e}")
+                state = connector.states[name].state
+                if state == "ready":
+                    connected = broker.is_connected() if callable(broker.is_connected) else broker.is_connected
+                    if connected:
+                        continue
+                    connector.mark_failed(name, "connection lost")
+                elif state != "failed":
+                    continue
+                logger.warning(f"Broker {name} disconnected, attempting to reconnect...")
+                reconnects.append(connector.ensure_ready(name))
+            if reconnects:
+                await asyncio.gather(*reconnects)
             
             # Wait before next check
             await asyncio.sleep(settings.HEALTH_CHECK_INTERVAL)
@@ -449,7 +565,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "path": request.url.path,
             "request_id": request_id,
             "timestamp": datetime.utcnow().isoformat()
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -491,5 +608,8 @@ if __name__ == "__main__":
         port=port,
         reload=reload,
         log_level=settings.LOG_LEVEL.lower(),
-        access_log=True
+        access_log=True,
+        # Protocol-level ping frames; a peer missing a pong is dropped by the server
+        ws_ping_interval=settings.WS_HEARTBEAT_INTERVAL,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT
     )
\ No newline at end of file
@@ -358,6 +358,8 @@ class AccountStrategy(Base):
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     strategy_id = Column(Integer, ForeignKey("strategies.id"), nullable=False)
     is_enabled = Column(Boolean, default=False)
+    is_paused = Column(Boolean, default=True)  # Enabled but not run by the scheduler until explicitly started
+    schedule_interval = Column(String)  # Bar interval override for scheduled runs (e.g. "300s")
     parameters = Column(JSON)  # Account-specific strategy parameters
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
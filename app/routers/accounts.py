@@ -7,6 +7,8 @@ from app.models.models import Account, User
 from app.models.schemas import Account as AccountSchema, AccountCreate, AccountUpdate
 from app.routers.auth import get_current_user
 from app.core.event_emitter import emit_account_event
+from app.services.strategy_runner import strategy_runner
+from app.services.account_directory import account_directory
 
 router = APIRouter()
 
@@ -37,6 +39,8 @@ async def create_account(
     db.add(db_account)
     db.commit()
     db.refresh(db_account)
+    # Route the new account's updates to its owner without waiting for the periodic reload
+    await account_directory.refresh()
     
     # Emit event
     await emit_account_event("created", db_account.id, {
@@ -90,6 +94,7 @@ async def update_account(
     
     db.commit()
     db.refresh(account)
+    await strategy_runner.invalidate(account_id=account_id)
     return account
 
 @router.delete("/{account_id}")
@@ -112,6 +117,8 @@ async def delete_account(
     
     db.delete(account)
     db.commit()
+    await strategy_runner.invalidate(account_id=account_id)
+    await account_directory.refresh()
     return {"message": "Account deleted successfully"}
 
 @router.post("/{account_id}/sync")
@@ -53,6 +53,16 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
         return None
     return user
 
+def get_user_from_token(db: Session, token: Optional[str]) -> Optional[User]:
+    """User named by a valid access token, or None (for sockets, which can't use the HTTPBearer dependency)"""
+    if not token:
+        return None
+    try:
+        username = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+    return get_user_by_username(db, username) if username else None
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -21,8 +21,7 @@ async def health_check(db: Session = Depends(get_db)):
     
     try:
         # Check Redis
-        redis_client._connect()
-        redis_status = "healthy"
+        redis_status = "healthy" if await redis_client.ping() else "unhealthy: ping failed"
     except Exception as e:
         redis_status = f"unhealthy: {str(e)}"
     
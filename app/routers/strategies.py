@@ -11,6 +11,7 @@ from sqlalchemy import func, and_
 from app.db.database import get_db
 from app.models.models import Strategy, AccountStrategy, Account, Signal, User
 from app.routers.auth import get_current_user
+from app.services.strategy_runner import strategy_runner
 
 router = APIRouter(prefix="/strategies", tags=["strategies"])
 
@@ -172,6 +173,7 @@ async def enable_strategy(
         db.add(account_strategy)
     
     db.commit()
+    await strategy_runner.invalidate(strategy_id=strategy_id, account_id=account_id)
     
     return {
         "message": f"Strategy {strategy_id} enabled for account {account_id}",
@@ -220,6 +222,7 @@ async def disable_strategy(
     if account_strategy:
         account_strategy.is_enabled = False
         db.commit()
+        await strategy_runner.invalidate(strategy_id=strategy_id, account_id=account_id)
     
     return {
         "message": f"Strategy {strategy_id} disabled for account {account_id}",
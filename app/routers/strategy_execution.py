@@ -67,7 +67,11 @@ async def start_periodic_strategy(
             detail="Account not found"
         )
     
-    await strategy_runner.start_periodic_execution(strategy_id, account_id, interval_seconds)
+    if not await strategy_runner.start_periodic_execution(strategy_id, account_id, interval_seconds):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Strategy not enabled"
+        )
     
     return {
         "message": f"Started periodic execution of {strategy_id} for account {account_id}",
@@ -43,7 +43,7 @@ class UnifiedRouter:
             )
         
         broker = self.brokers[broker_name]
-        if not broker.is_connected:
+        if not await signal_processor.connector.ensure_ready(broker_name):
             raise HTTPException(
                 status_code=503,
                 detail=f"Broker {broker_name} is not connected"
@@ -56,7 +56,7 @@ class UnifiedRouter:
         results = []
         
         for broker_name, broker in self.brokers.items():
-            if not broker.is_connected:
+            if not signal_processor.connector.is_ready(broker_name):
                 continue
             
             try:
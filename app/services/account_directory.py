@@ -0,0 +1,112 @@
+"""
+Account Directory
+Which user owns each trading account, kept in memory for routing account data to its owner
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import get_async_session
+from app.models.models import Account
+
+logger = logging.getLogger(__name__)
+
+# (account primary key, broker account id, owning user id)
+AccountRow = Tuple[int, str, int]
+
+
+async def load_account_owners() -> Iterable[AccountRow]:
+    """Every account's owner, in one query"""
+    async with get_async_session() as db:
+        return (await db.execute(select(Account.id, Account.account_id, Account.user_id))).all()
+
+
+class AccountDirectory:
+    """Account ownership for routing broker events and authorizing WebSocket topics
+
+    The whole table is loaded at start, reloaded every refresh_interval and
+    on refresh() after accounts change, so lookups on the event path are
+    dict reads. Accounts are known by their broker account id (what broker
+    events carry) and by primary key (what strategy signals carry). An
+    account not loaded yet has no owner, so its data reaches nobody.
+    """
+
+    def __init__(self, load: Callable[[], Awaitable[Iterable[AccountRow]]] = load_account_owners, refresh_interval: float = 60.0):
+        self.load = load
+        self.refresh_interval = refresh_interval
+        # broker account id -> user id
+        self.owners: Dict[str, int] = {}
+        # account primary key -> user id
+        self.pk_owners: Dict[int, int] = {}
+        # user id -> "account:<value>" topic values the user may subscribe to
+        self.topic_values: Dict[int, Set[str]] = {}
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load the directory and start the background reload loop"""
+        await self.refresh()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def refresh(self) -> bool:
+        """Reload ownership, keeping the previous maps if the load fails"""
+        try:
+            rows = list(await self.load())
+        except Exception as e:
+            self.refresh_errors += 1
+            logger.warning(f"Account directory reload failed: {e}")
+            return False
+
+        # Built aside and swapped in whole, so lookups never see a partial table
+        owners, pk_owners, topic_values = {}, {}, {}
+        for pk, account_id, user_id in rows:
+            owners[str(account_id)] = user_id
+            pk_owners[pk] = user_id
+            topic_values.setdefault(user_id, set()).update((str(account_id), str(pk)))
+        self.owners, self.pk_owners, self.topic_values = owners, pk_owners, topic_values
+        self.refreshes += 1
+        return True
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    def owner(self, account_id: Any) -> Optional[int]:
+        """User owning a broker account id, or None if unknown"""
+        return self.owners.get(str(account_id)) if account_id is not None else None
+
+    def owner_by_pk(self, pk: Any) -> Optional[int]:
+        """User owning an account primary key, or None if unknown"""
+        return self.pk_owners.get(pk)
+
+    def authorize(self, user_id: Any, topic: str) -> bool:
+        """TopicHub check: account topics only for the user's own accounts
+
+        Other topics are scoped to the user's records by the hub itself.
+        """
+        kind, _, value = topic.partition(":")
+        return kind != "account" or value in self.topic_values.get(user_id, ())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "accounts": len(self.pk_owners),
+            "users": len(self.topic_values),
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors
+        }
+
+
+# Global account directory
+account_directory = AccountDirectory(refresh_interval=settings.WS_ACCOUNT_OWNERS_REFRESH)
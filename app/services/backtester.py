@@ -0,0 +1,523 @@
+"""
+Backtester
+Replays stored bars or ticks through strategy code against a simulated executor, with vectorized parameter sweeps
+"""
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.brokers.base_executor import BaseExecutor
+from app.services.indicators import NUMPY_AVAILABLE, ma_cross_grid
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _time(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+class SimPosition:
+    """Net position in one symbol"""
+
+    __slots__ = ("position_id", "symbol", "quantity", "entry_price", "open_time", "stop_loss", "take_profit", "commission")
+
+    def __init__(self, position_id: str, symbol: str, quantity: float, entry_price: float, open_time: float):
+        self.position_id = position_id
+        self.symbol = symbol
+        self.quantity = quantity  # signed: > 0 long, < 0 short
+        self.entry_price = entry_price
+        self.open_time = open_time
+        self.stop_loss: Optional[float] = None
+        self.take_profit: Optional[float] = None
+        self.commission = 0.0  # entry commission not yet booked against a closed trade
+
+
+class SimulatedExecutor(BaseExecutor):
+    """BaseExecutor that fills against replayed prices
+
+    Market orders fill at the current price moved against the order by
+    slippage; limit orders rest until the price reaches them. Positions net
+    per symbol. Every reduction books a Trade-shaped record whose profit is
+    net of the entry and exit commission it carries.
+    """
+
+    broker_name = "backtest"
+
+    def __init__(
+        self,
+        initial_balance: float = 100000.0,
+        commission: float = 0.0,
+        slippage: float = 0.0,
+        contract_size: float = 1.0
+    ):
+        super().__init__({})
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.commission = commission
+        self.slippage = slippage
+        self.contract_size = contract_size
+        self.now = 0.0
+        self.prices: Dict[str, float] = {}
+        self.positions: Dict[str, SimPosition] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.trades: List[Dict[str, Any]] = []
+        self.fills = 0
+        self._ids = itertools.count(1)
+
+    # Market replay
+
+    def set_price(self, symbol: str, price: float, ts: float):
+        """Advance the market: fill resting orders and stops, then mark to market"""
+        self.now = ts
+        self.prices[symbol] = price
+        for order_id, order in list(self.orders.items()):
+            if order["symbol"] != symbol:
+                continue
+            if (order["side"] == "buy" and price <= order["price"]) or (order["side"] == "sell" and price >= order["price"]):
+                del self.orders[order_id]
+                self._fill(symbol, order["side"], order["quantity"], order["price"], order["stop_loss"], order["take_profit"])
+
+        position = self.positions.get(symbol)
+        if position is None:
+            return
+        long = position.quantity > 0
+        exit_side = "sell" if long else "buy"
+        if position.stop_loss is not None and (price <= position.stop_loss if long else price >= position.stop_loss):
+            self._fill(symbol, exit_side, abs(position.quantity), self._slipped(exit_side, price))
+        elif position.take_profit is not None and (price >= position.take_profit if long else price <= position.take_profit):
+            self._fill(symbol, exit_side, abs(position.quantity), position.take_profit)
+
+    @property
+    def equity(self) -> float:
+        open_pnl = 0.0
+        for position in self.positions.values():
+            mark = self.prices.get(position.symbol, position.entry_price)
+            open_pnl += (mark - position.entry_price) * position.quantity * self.contract_size - position.commission
+        return self.balance + open_pnl
+
+    def _slipped(self, side: str, price: float) -> float:
+        return price + self.slippage if side == "buy" else price - self.slippage
+
+    def _fill(
+        self,
+        symbol: str,
+        side: str,
+        quantity: float,
+        price: float,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None
+    ) -> float:
+        self.fills += 1
+        signed = quantity if side == "buy" else -quantity
+        fee = self.commission * quantity
+        position = self.positions.get(symbol)
+
+        if position is not None and position.quantity * signed < 0:
+            closing = min(abs(signed), abs(position.quantity))
+            share = closing / abs(position.quantity)
+            entry_fee = position.commission * share
+            exit_fee = fee * closing / quantity
+            gross = (price - position.entry_price) * closing * (1 if position.quantity > 0 else -1) * self.contract_size
+            self.balance += gross - entry_fee - exit_fee
+            self.trades.append({
+                "trade_id": f"bt-{len(self.trades) + 1}",
+                "broker_trade_id": position.position_id,
+                "symbol": symbol,
+                "type": "buy" if position.quantity > 0 else "sell",
+                "volume": closing,
+                "open_price": position.entry_price,
+                "close_price": price,
+                "stop_loss": position.stop_loss,
+                "take_profit": position.take_profit,
+                "commission": entry_fee + exit_fee,
+                "swap": 0.0,
+                "profit": gross - entry_fee - exit_fee,
+                "status": "closed",
+                "open_time": _time(position.open_time),
+                "close_time": _time(self.now),
+                "comment": "backtest"
+            })
+            position.commission -= entry_fee
+            position.quantity += closing if position.quantity < 0 else -closing
+            signed += closing if signed < 0 else -closing
+            fee -= exit_fee
+            if position.quantity == 0:
+                del self.positions[symbol]
+                position = None
+            if signed == 0:
+                return price
+
+        if position is None:
+            position = SimPosition(f"bt-pos-{next(self._ids)}", symbol, 0.0, price, self.now)
+            self.positions[symbol] = position
+        total = position.quantity + signed
+        position.entry_price = (position.entry_price * position.quantity + price * signed) / total
+        position.quantity = total
+        position.commission += fee
+        if stop_loss is not None:
+            position.stop_loss = stop_loss
+        if take_profit is not None:
+            position.take_profit = take_profit
+        return price
+
+    def _position(self, position_id: str) -> Optional[SimPosition]:
+        return next((p for p in self.positions.values() if p.position_id == position_id), None)
+
+    # BaseExecutor interface
+
+    async def connect(self) -> bool:
+        return True
+
+    async def disconnect(self):
+        pass
+
+    async def authenticate(self) -> bool:
+        return True
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def get_account_info(self) -> Dict[str, Any]:
+        equity = self.equity
+        return {"balance": self.balance, "equity": equity, "margin": 0.0, "free_margin": equity, "margin_level": 0.0}
+
+    async def get_positions(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "position_id": p.position_id,
+                "symbol": p.symbol,
+                "side": "buy" if p.quantity > 0 else "sell",
+                "size": abs(p.quantity),
+                "entry_price": p.entry_price,
+                "stop_loss": p.stop_loss,
+                "take_profit": p.take_profit,
+                "unrealized_pnl": (self.prices.get(p.symbol, p.entry_price) - p.entry_price) * p.quantity * self.contract_size
+            }
+            for p in self.positions.values()
+        ]
+
+    async def get_orders(self) -> List[Dict[str, Any]]:
+        return [{"order_id": order_id, **order} for order_id, order in self.orders.items()]
+
+    async def place_order(
+        self,
+        symbol: str,
+        side: str,
+        quantity: float,
+        order_type: str = "market",
+        price: Optional[float] = None,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        side = side.lower()
+        market = self.prices.get(symbol)
+        if market is None:
+            return {"order_id": None, "status": "rejected", "message": f"No price for {symbol}"}
+        order_id = f"bt-ord-{next(self._ids)}"
+        if order_type == "market" or price is None:
+            fill_price = self._fill(symbol, side, quantity, self._slipped(side, market), stop_loss, take_profit)
+            return {"order_id": order_id, "status": "filled", "message": "Filled", "fill_price": fill_price}
+        self.orders[order_id] = {
+            "symbol": symbol, "side": side, "quantity": quantity, "price": price,
+            "stop_loss": stop_loss, "take_profit": take_profit
+        }
+        # A marketable limit fills on the spot
+        self.set_price(symbol, market, self.now)
+        status = "working" if order_id in self.orders else "filled"
+        return {"order_id": order_id, "status": status, "message": status.capitalize()}
+
+    async def modify_order(
+        self,
+        order_id: str,
+        quantity: Optional[float] = None,
+        price: Optional[float] = None,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        order = self.orders.get(order_id)
+        if order is None:
+            return {"success": False, "message": "Order not found"}
+        for name, value in (("quantity", quantity), ("price", price), ("stop_loss", stop_loss), ("take_profit", take_profit)):
+            if value is not None:
+                order[name] = value
+        return {"success": True, "message": "Modified"}
+
+    async def cancel_order(self, order_id: str) -> Dict[str, Any]:
+        if self.orders.pop(order_id, None) is None:
+            return {"success": False, "message": "Order not found"}
+        return {"success": True, "message": "Cancelled"}
+
+    async def close_position(self, position_id: str, quantity: Optional[float] = None) -> Dict[str, Any]:
+        position = self._position(position_id)
+        if position is None:
+            return {"success": False, "closed_quantity": 0.0, "message": "Position not found"}
+        size = min(quantity or abs(position.quantity), abs(position.quantity))
+        side = "sell" if position.quantity > 0 else "buy"
+        self._fill(position.symbol, side, size, self._slipped(side, self.prices[position.symbol]))
+        return {"success": True, "closed_quantity": size, "message": "Closed"}
+
+    async def modify_position(
+        self,
+        position_id: str,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        position = self._position(position_id)
+        if position is None:
+            return {"success": False, "message": "Position not found"}
+        if stop_loss is not None:
+            position.stop_loss = stop_loss
+        if take_profit is not None:
+            position.take_profit = take_profit
+        return {"success": True, "message": "Modified"}
+
+    async def get_quote(self, symbol: str) -> Dict[str, Any]:
+        price = self.prices.get(symbol)
+        if price is None:
+            return {}
+        return {"symbol": symbol, "bid": price - self.slippage, "ask": price + self.slippage, "last": price, "timestamp": self.now}
+
+
+def equity_metrics(equity: Any, initial_balance: float) -> Dict[str, Any]:
+    """Net P&L, drawdown and per-step Sharpe for one curve or a (rows, steps) block"""
+    equity = np.atleast_2d(np.asarray(equity, dtype=float))
+    if equity.shape[-1] == 0:
+        equity = np.full((equity.shape[0], 1), initial_balance)
+    peak = np.maximum.accumulate(np.maximum(equity, initial_balance), axis=-1)
+    drawdown = peak - equity
+    changes = np.diff(equity, axis=-1, prepend=initial_balance)
+    deviation = changes.std(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(deviation > 0, changes.mean(axis=-1) / deviation, 0.0)
+    return {
+        "net_pnl": equity[:, -1] - initial_balance,
+        "return_pct": (equity[:, -1] / initial_balance - 1.0) * 100.0,
+        "max_drawdown": drawdown.max(axis=-1),
+        "max_drawdown_pct": (drawdown / peak).max(axis=-1) * 100.0,
+        "sharpe": sharpe
+    }
+
+
+class BacktestResult:
+    """Closed trades, the equity curve and summary metrics of one run"""
+
+    __slots__ = ("trades", "ts", "equity", "metrics")
+
+    def __init__(self, trades: List[Dict[str, Any]], ts: Any, equity: Any, metrics: Optional[Dict[str, float]] = None):
+        self.trades = trades
+        self.ts = ts
+        self.equity = equity
+        self.metrics = metrics if metrics is not None else {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "metrics": self.metrics,
+            "trades": self.trades,
+            "equity_curve": {"ts": self.ts.tolist(), "equity": self.equity.tolist()}
+        }
+
+
+class Backtest:
+    """Event-driven replay of one or more symbols' price series
+
+    Series are merged into a single time-ordered stream. At each step the
+    executor sees the new price (filling resting orders and stops) before
+    the step callback runs, and history() exposes only prices up to the
+    current step, so strategy code cannot look ahead.
+    """
+
+    def __init__(self, executor: SimulatedExecutor, series: Dict[str, Dict[str, Any]]):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("Backtest requires numpy")
+        self.executor = executor
+        self.symbols = list(series)
+        self.prices = {symbol: self._price(columns) for symbol, columns in series.items()}
+        ts = [np.asarray(series[symbol]["ts"], dtype=float) for symbol in self.symbols]
+        self._ts = np.concatenate(ts) if ts else np.empty(0)
+        self._symbol = np.concatenate([np.full(len(t), i) for i, t in enumerate(ts)]) if ts else np.empty(0, dtype=int)
+        self._row = np.concatenate([np.arange(len(t)) for t in ts]) if ts else np.empty(0, dtype=int)
+        self._order = np.lexsort((self._symbol, self._ts))
+        self.cursor: Dict[str, int] = {}
+        self.signals = 0
+
+    @staticmethod
+    def _price(columns: Dict[str, Any]) -> "np.ndarray":
+        """Bar close, else tick last falling back to the mid"""
+        if "close" in columns:
+            return np.asarray(columns["close"], dtype=float)
+        last = np.asarray(columns["last"], dtype=float)
+        if "bid" in columns and "ask" in columns:
+            mid = (np.asarray(columns["bid"], dtype=float) + np.asarray(columns["ask"], dtype=float)) / 2
+            last = np.where(np.isnan(last), mid, last)
+        return last
+
+    @classmethod
+    def from_store(
+        cls,
+        executor: SimulatedExecutor,
+        store: Any,
+        symbols: Sequence[str],
+        start: float,
+        end: float,
+        interval: Optional[str] = None
+    ) -> "Backtest":
+        """Replay stored bars of interval, or raw ticks when interval is None"""
+        series = {
+            symbol: store.bars(symbol, interval, start, end) if interval else store.ticks(symbol, start, end)
+            for symbol in symbols
+        }
+        return cls(executor, series)
+
+    def history(self, symbol: str, interval: Optional[str] = None, bars: Optional[int] = None, broker: Optional[str] = None):
+        """Prices of symbol up to the current step (StrategyRunner history_source)"""
+        cursor = self.cursor.get(symbol)
+        if cursor is None:
+            return None
+        prices = self.prices[symbol][:cursor + 1]
+        if bars is None:
+            return prices
+        return prices[-bars:] if len(prices) >= bars else None
+
+    async def execute(self, signal_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill a strategy signal on the simulated executor (StrategyRunner signal_sink)"""
+        self.signals += 1
+        result = await self.executor.execute_signal({
+            "action": str(signal_data.get("action", "")).lower(),
+            "symbol": signal_data.get("symbol"),
+            "quantity": signal_data.get("volume", signal_data.get("quantity", 1.0)),
+            "price": signal_data.get("price"),
+            "stop_loss": signal_data.get("stop_loss"),
+            "take_profit": signal_data.get("take_profit")
+        })
+        return {"signal_id": f"bt-signal-{self.signals}", "success": result.get("success", False)}
+
+    async def run(self, on_step: Callable[[str], Awaitable[Any]]) -> BacktestResult:
+        """Replay every step, awaiting on_step(symbol) after each price update"""
+        equity = np.empty(len(self._order))
+        for step, index in enumerate(self._order):
+            symbol = self.symbols[self._symbol[index]]
+            row = int(self._row[index])
+            self.cursor[symbol] = row
+            self.executor.set_price(symbol, float(self.prices[symbol][row]), float(self._ts[index]))
+            await on_step(symbol)
+            equity[step] = self.executor.equity
+
+        metrics = {name: float(value[0]) for name, value in equity_metrics(equity, self.executor.initial_balance).items()}
+        wins = sum(1 for trade in self.executor.trades if trade["profit"] > 0)
+        metrics.update({
+            "trades": len(self.executor.trades),
+            "win_rate": wins / len(self.executor.trades) if self.executor.trades else 0.0,
+            "fills": self.executor.fills,
+            "signals": self.signals
+        })
+        return BacktestResult(self.executor.trades, self._ts[self._order], equity, metrics)
+
+
+async def backtest_strategy(
+    strategy_id: str,
+    series: Dict[str, Dict[str, Any]],
+    params: Optional[Dict[str, Any]] = None,
+    **executor_options: Any
+) -> BacktestResult:
+    """Run an in-house strategy over replayed series exactly as the live runner would"""
+    # Imported here: the runner module pulls in the live signal processor
+    from app.services.strategy_runner import StrategyRunner
+
+    backtest = Backtest(SimulatedExecutor(**executor_options), series)
+    runner = StrategyRunner(history_source=backtest.history, signal_sink=backtest.execute)
+    strategy = runner.strategies[strategy_id]
+    params = params or {}
+
+    async def step(symbol: str):
+        if params.get("symbol", symbol) == symbol:
+            await strategy(0, {**params, "symbol": symbol})
+
+    return await backtest.run(step)
+
+
+# Vectorized fast path for bar strategies whose position is a function of closes
+
+
+def vectorized_backtest(
+    close: Any,
+    positions: Any,
+    initial_balance: float = 100000.0,
+    commission: float = 0.0,
+    slippage: float = 0.0,
+    contract_size: float = 1.0
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Equity curves and fill counts for target positions held from each bar's close
+
+    Costs match SimulatedExecutor filling market orders at the close: every
+    unit traded pays commission plus slippage.
+    """
+    close = np.asarray(close, dtype=float)
+    positions = np.asarray(positions, dtype=float)
+    close = np.broadcast_to(close, positions.shape)
+    held = np.concatenate([np.zeros(positions.shape[:-1] + (1,)), positions[..., :-1]], axis=-1)
+    moves = np.diff(close, axis=-1, prepend=close[..., :1])
+    traded = np.abs(np.diff(positions, axis=-1, prepend=0.0))
+    pnl = held * moves * contract_size - traded * (commission + slippage * contract_size)
+    return initial_balance + np.cumsum(pnl, axis=-1), np.count_nonzero(traded, axis=-1)
+
+
+def ma_cross_positions(close: Any, fast_periods: Sequence[int], slow_periods: Sequence[int], volume: float = 1.0) -> "np.ndarray":
+    """Positions the live ma_cross strategy ends up holding: +/-volume per cross, netted"""
+    return np.cumsum(ma_cross_grid(close, fast_periods, slow_periods), axis=-1) * volume
+
+
+_worker_close: Optional["np.ndarray"] = None
+
+
+def _init_worker(close: "np.ndarray"):
+    global _worker_close
+    _worker_close = close
+
+
+def _sweep_chunk(task: Tuple[List[Tuple[int, int]], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    pairs, options = task
+    options = dict(options)
+    volume = options.pop("volume", 1.0)
+    fast, slow = [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+    equity, fills = vectorized_backtest(_worker_close, ma_cross_positions(_worker_close, fast, slow, volume), **options)
+    metrics = equity_metrics(equity, options.get("initial_balance", 100000.0))
+    return [
+        {"fast_period": f, "slow_period": s, "fills": int(fills[row]), **{name: float(values[row]) for name, values in metrics.items()}}
+        for row, (f, s) in enumerate(pairs)
+    ]
+
+
+def sweep_ma_cross(
+    close: Any,
+    fast_periods: Sequence[int],
+    slow_periods: Sequence[int],
+    processes: Optional[int] = None,
+    chunk_size: int = 32,
+    **options: Any
+) -> List[Dict[str, Any]]:
+    """Grid-search ma_cross over fast < slow pairs, best net P&L first
+
+    Each worker receives the closes once and evaluates chunk_size pairs per
+    task as one vectorized block; processes=1 runs in this process.
+    """
+    close = np.asarray(close, dtype=float)
+    pairs = [(f, s) for f in fast_periods for s in slow_periods if f < s]
+    tasks = [(pairs[i:i + chunk_size], options) for i in range(0, len(pairs), chunk_size)]
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or len(tasks) <= 1:
+        _init_worker(close)
+        chunks = [_sweep_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes, len(tasks)), initializer=_init_worker, initargs=(close,)) as pool:
+            chunks = list(pool.map(_sweep_chunk, tasks))
+    results = [result for chunk in chunks for result in chunk]
+    results.sort(key=lambda result: result["net_pnl"], reverse=True)
+    logger.info(f"ma_cross sweep evaluated {len(results)} parameter pairs over {close.shape[-1]} bars")
+    return results
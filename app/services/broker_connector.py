@@ -0,0 +1,161 @@
+"""
+Broker Connector
+Parallel, deadline-bounded broker initialization with lazy connect and per-broker readiness
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Readiness states reported through /healthz
+IDLE = "idle"            # lazy broker, connects on first use
+CONNECTING = "connecting"
+READY = "ready"
+FAILED = "failed"
+STOPPED = "stopped"
+
+
+class BrokerState:
+    """Connection bookkeeping for one broker"""
+
+    __slots__ = ("state", "error", "attempts", "last_attempt", "connected_at", "connect_seconds", "task")
+
+    def __init__(self, state: str):
+        self.state = state
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.last_attempt = 0.0
+        self.connected_at: Optional[float] = None
+        self.connect_seconds: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "ready": self.state == READY,
+            "error": self.error,
+            "attempts": self.attempts,
+            "connect_seconds": round(self.connect_seconds, 3) if self.connect_seconds is not None else None
+        }
+
+
+class BrokerConnector:
+    """Connects brokers concurrently, each bounded by its own deadline
+
+    Eager brokers connect in parallel at startup; a broker that misses its
+    deadline is marked failed instead of holding up the others. Lazy brokers
+    connect on first use. Failed brokers are retried on demand no more often
+    than retry_backoff seconds, so a dead broker fails signals fast.
+    """
+
+    def __init__(
+        self,
+        brokers: Dict[str, Any],
+        connect_timeout: float = 10.0,
+        lazy: bool = False,
+        retry_backoff: float = 30.0
+    ):
+        self.brokers = brokers
+        self.connect_timeout = connect_timeout
+        self.lazy = lazy
+        self.retry_backoff = retry_backoff
+        self.states: Dict[str, BrokerState] = {name: BrokerState(IDLE) for name in brokers}
+        self.on_ready: List[Callable[[str], Awaitable[Any]]] = []
+
+    async def initialize(self) -> Dict[str, bool]:
+        """Connect every eager broker in parallel (no-op in lazy mode)"""
+        if self.lazy:
+            logger.info(f"Lazy broker connect enabled; deferring {', '.join(self.brokers)}")
+            return {}
+
+        names = list(self.brokers)
+        results = await asyncio.gather(*(self.connect(name) for name in names))
+        return dict(zip(names, results))
+
+    def is_ready(self, name: str) -> bool:
+        state = self.states.get(name)
+        return state is not None and state.state == READY
+
+    async def ensure_ready(self, name: str) -> bool:
+        """Ready the broker for use, connecting lazily or after the retry backoff"""
+        state = self.states.get(name)
+        if state is None:
+            return False
+        if state.state == READY:
+            return True
+        if state.state == FAILED and time.monotonic() - state.last_attempt < self.retry_backoff:
+            return False
+        return await self.connect(name)
+
+    def connect(self, name: str) -> Awaitable[bool]:
+        """Connect a broker, sharing any attempt already in flight"""
+        state = self.states[name]
+        if state.task is None or state.task.done():
+            state.task = asyncio.create_task(self._connect(name))
+        return asyncio.shield(state.task)
+
+    async def _connect(self, name: str) -> bool:
+        broker = self.brokers[name]
+        state = self.states[name]
+        state.state = CONNECTING
+        state.attempts += 1
+        state.last_attempt = started = time.monotonic()
+
+        try:
+            success = await asyncio.wait_for(broker.initialize(), timeout=self.connect_timeout)
+            error = None if success else "initialization failed"
+        except asyncio.TimeoutError:
+            success, error = False, f"timed out after {self.connect_timeout}s"
+        except Exception as e:
+            success, error = False, str(e)
+
+        state.connect_seconds = time.monotonic() - started
+        if not success:
+            state.state = FAILED
+            state.error = error
+            logger.warning(f"Broker {name} not ready: {error}")
+            try:
+                # Release sockets a cancelled or half-finished initialize left open
+                await broker.disconnect()
+            except Exception:
+                pass
+            return False
+
+        state.state = READY
+        state.error = None
+        state.connected_at = time.time()
+        logger.info(f"Initialized {name} broker in {state.connect_seconds:.2f}s")
+
+        for callback in self.on_ready:
+            try:
+                await callback(name)
+            except Exception as e:
+                logger.error(f"Broker ready hook failed for {name}: {e}")
+        return True
+
+    def mark_failed(self, name: str, error: str):
+        """Record a broker found disconnected after it was ready"""
+        state = self.states.get(name)
+        if state is not None and state.state == READY:
+            state.state = FAILED
+            state.error = error
+            state.last_attempt = 0.0
+
+    async def shutdown(self):
+        """Cancel pending connects and disconnect every broker"""
+        for name, broker in self.brokers.items():
+            state = self.states[name]
+            if state.task and not state.task.done():
+                state.task.cancel()
+                await asyncio.gather(state.task, return_exceptions=True)
+            try:
+                await broker.disconnect()
+                logger.info(f"Disconnected {name} broker")
+            except Exception as e:
+                logger.error(f"Error disconnecting {name}: {e}")
+            state.state = STOPPED
+
+    def readiness(self) -> Dict[str, Dict[str, Any]]:
+        return {name: state.to_dict() for name, state in self.states.items()}
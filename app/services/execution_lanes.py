@@ -0,0 +1,215 @@
+"""
+Execution Lanes
+Per-(broker, account) FIFO execution with parallelism across lanes
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.core.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+LaneKey = Tuple[str, str]
+
+
+class LaneFullError(Exception):
+    """Raised when a lane's queue is at capacity"""
+
+
+class ExecutionLane:
+    """Single FIFO lane with its own worker pool and queue
+
+    Admission can reserve() a slot ahead of submit(reserved=True), so work
+    accepted upstream (a webhook answered 202) always fits when it arrives.
+    """
+
+    def __init__(self, key: Hashable, concurrency: int = 1, max_depth: int = 100, idle_timeout: float = 300.0):
+        self.key = key
+        self.concurrency = max(1, concurrency)
+        self.max_depth = max_depth
+        self.idle_timeout = idle_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_depth)
+        self.workers: List[asyncio.Task] = []
+        self.in_flight = 0
+        self.reserved = 0
+        self.processed = 0
+        self.failed = 0
+        self.peak_depth = 0
+        self.latency = LatencyHistogram()
+        self.on_idle: Optional[Callable[["ExecutionLane"], None]] = None
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def reserve(self):
+        """Hold a slot for a later submit(reserved=True); LaneFullError when none is free"""
+        if self.depth + self.reserved >= self.max_depth:
+            raise LaneFullError(f"Execution lane {self.key} is full ({self.max_depth})")
+        self.reserved += 1
+
+    def release(self):
+        """Give back a reserved slot that will not be submitted"""
+        self.reserved = max(0, self.reserved - 1)
+        if self.on_idle and not self.reserved and not self.workers and self.queue.empty():
+            self.on_idle(self)
+
+    def submit(self, func: Callable[..., Awaitable[Any]], *args, reserved: bool = False, **kwargs) -> asyncio.Future:
+        """Enqueue a call at the tail of the lane and return its future"""
+        if reserved:
+            self.reserved = max(0, self.reserved - 1)
+        elif self.depth + self.reserved >= self.max_depth:
+            raise LaneFullError(f"Execution lane {self.key} is full ({self.max_depth})")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((func, args, kwargs, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise LaneFullError(f"Execution lane {self.key} is full ({self.max_depth})")
+
+        self.peak_depth = max(self.peak_depth, self.queue.qsize())
+        self._ensure_workers()
+        return future
+
+    def _ensure_workers(self):
+        self.workers = [worker for worker in self.workers if not worker.done()]
+        while len(self.workers) < min(self.concurrency, self.queue.qsize() + self.in_flight):
+            self.workers.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self):
+        """Run queued calls in order; exit after sitting idle"""
+        while True:
+            try:
+                func, args, kwargs, future, enqueued_at = await asyncio.wait_for(
+                    self.queue.get(), timeout=self.idle_timeout
+                )
+            except asyncio.TimeoutError:
+                if self.queue.empty():
+                    break
+                continue
+
+            self.in_flight += 1
+            try:
+                if not future.cancelled():
+                    result = await func(*args, **kwargs)
+                    if not future.done():
+                        future.set_result(result)
+                self.processed += 1
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Execution lane {self.key} task failed: {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.in_flight -= 1
+                self.latency.observe(time.perf_counter() - enqueued_at)
+                self.queue.task_done()
+
+        self.workers = [worker for worker in self.workers if worker is not asyncio.current_task()]
+        # A lane holding reservations stays registered so their work lands on it
+        if self.on_idle and not self.workers and not self.reserved:
+            self.on_idle(self)
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Drain pending work, then cancel workers"""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Execution lane {self.key} drain timed out with {self.depth} pending")
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def get_metrics(self) -> Dict[str, Any]:
+        latency = self.latency.snapshot()
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "peak_depth": self.peak_depth,
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "reserved": self.reserved,
+            "processed": self.processed,
+            "failed": self.failed,
+            "latency_p50": latency["p50"],
+            "latency_p99": latency["p99"]
+        }
+
+
+class ExecutionLanes:
+    """Registry of execution lanes keyed by (broker, account_id)"""
+
+    def __init__(
+        self,
+        default_concurrency: int = 1,
+        broker_concurrency: Optional[Dict[str, int]] = None,
+        max_depth: int = 100,
+        idle_timeout: float = 300.0
+    ):
+        self.default_concurrency = default_concurrency
+        self.broker_concurrency = broker_concurrency or {}
+        self.max_depth = max_depth
+        self.idle_timeout = idle_timeout
+        self.lanes: Dict[LaneKey, ExecutionLane] = {}
+
+    @staticmethod
+    def key_for(broker: str, account_id: Any) -> LaneKey:
+        return (str(broker).lower(), str(account_id))
+
+    def get_lane(self, broker: str, account_id: Any) -> ExecutionLane:
+        """Get or lazily create the lane for a broker account"""
+        key = self.key_for(broker, account_id)
+        lane = self.lanes.get(key)
+        if lane is None:
+            lane = ExecutionLane(
+                key,
+                concurrency=self.broker_concurrency.get(key[0], self.default_concurrency),
+                max_depth=self.max_depth,
+                idle_timeout=self.idle_timeout
+            )
+            lane.on_idle = self._reap
+            self.lanes[key] = lane
+        return lane
+
+    def submit(self, broker: str, account_id: Any, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> asyncio.Future:
+        """Enqueue a call on the lane for (broker, account_id)"""
+        return self.get_lane(broker, account_id).submit(func, *args, **kwargs)
+
+    def reserve(self, broker: str, account_id: Any) -> ExecutionLane:
+        """Reserve a slot on the lane for (broker, account_id) and return the lane"""
+        lane = self.get_lane(broker, account_id)
+        lane.reserve()
+        return lane
+
+    def _reap(self, lane: ExecutionLane):
+        """Drop a lane whose workers have all gone idle"""
+        if self.lanes.get(lane.key) is lane:
+            del self.lanes[lane.key]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Drain and stop every lane"""
+        await asyncio.gather(
+            *(lane.stop(drain_timeout) for lane in list(self.lanes.values())),
+            return_exceptions=True
+        )
+        self.lanes.clear()
+
+    def total_depth(self) -> int:
+        return sum(lane.depth for lane in self.lanes.values())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-lane queue depth and throughput"""
+        return {
+            "lanes": len(self.lanes),
+            "total_depth": self.total_depth(),
+            "by_lane": {
+                f"{broker}:{account_id}": lane.get_metrics()
+                for (broker, account_id), lane in self.lanes.items()
+            }
+        }
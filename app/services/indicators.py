@@ -0,0 +1,340 @@
+"""
+Indicators
+NumPy-vectorized technical indicators with incremental O(1)-per-tick counterparts
+"""
+import logging
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Try to import NumPy
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("NumPy not available, indicators disabled")
+
+# Largest growth factor allowed inside one _ewm block before rescaling
+_EWM_BLOCK_RANGE = 1e6
+
+# Vectorized indicators work along the last axis: a 1-D series, or a 2-D
+# (rows, bars) block where each row is one symbol x parameter combination.
+# Periods may be an int or one per row. Warm-up positions are NaN.
+
+
+def _rows(period: Any, ndim: int) -> Any:
+    """Period as a scalar or a (rows, 1) column that broadcasts over bars"""
+    period = np.asarray(period, dtype=float)
+    return period.reshape(-1, 1) if period.ndim and ndim > 1 else period
+
+
+def _ewm(values: "np.ndarray", alpha: Any) -> "np.ndarray":
+    """y[t] = y[t-1] + alpha * (x[t] - y[t-1]), seeded with x[0]
+
+    The recurrence is solved in closed form over blocks of bars, short
+    enough that the (1 - alpha) ** -k scaling stays well inside float64,
+    so the only Python loop is over blocks rather than bars.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[-1]
+    out = np.empty_like(values)
+    if n == 0:
+        return out
+    alpha = _rows(alpha, values.ndim)
+    decay = 1.0 - alpha
+    min_decay = float(np.min(decay))
+    block = n if min_decay <= 0.0 else max(1, min(n, int(math.log(_EWM_BLOCK_RANGE) / -math.log(min_decay))))
+
+    steps = np.arange(1, block + 1, dtype=float)
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        grow = np.power(decay, -steps) if min_decay > 0.0 else None
+        shrink = np.power(decay, steps)
+    previous = values[..., 0]
+    out[..., 0] = previous
+    start = 1
+    while start < n:
+        stop = min(start + block, n)
+        size = stop - start
+        chunk = values[..., start:stop]
+        if grow is None:
+            # alpha == 1 somewhere: the average is just the latest value
+            out[..., start:stop] = chunk
+        else:
+            weighted = np.cumsum(alpha * chunk * grow[..., :size], axis=-1)
+            out[..., start:stop] = shrink[..., :size] * (previous[..., None] + weighted)
+        previous = out[..., stop - 1]
+        start = stop
+    return out
+
+
+def sma(values: Any, period: Any) -> "np.ndarray":
+    """Simple moving average"""
+    values = np.asarray(values, dtype=float)
+    p = _rows(np.asarray(period, dtype=int), values.ndim).astype(int)
+    zero = np.zeros(values.shape[:-1] + (1,))
+    csum = np.concatenate([zero, np.cumsum(values, axis=-1)], axis=-1)
+    index = np.arange(values.shape[-1])
+    lagged = np.take_along_axis(csum, np.broadcast_to(np.clip(index + 1 - p, 0, None), values.shape), axis=-1)
+    out = (csum[..., 1:] - lagged) / p
+    return np.where(index + 1 >= p, out, np.nan)
+
+
+def ema(values: Any, period: Any) -> "np.ndarray":
+    """Exponential moving average, alpha = 2 / (period + 1)"""
+    return _ewm(values, 2.0 / (_rows(period, np.ndim(values)) + 1.0))
+
+
+def rsi(close: Any, period: Any = 14) -> "np.ndarray":
+    """Wilder's relative strength index (0-100)"""
+    close = np.asarray(close, dtype=float)
+    change = np.diff(close, axis=-1)
+    alpha = 1.0 / _rows(period, close.ndim)
+    gain = _ewm(np.clip(change, 0, None), alpha)
+    loss = _ewm(np.clip(-change, 0, None), alpha)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    value = np.where((gain == 0) & (loss == 0), 50.0, value)
+    return np.concatenate([np.full(close.shape[:-1] + (1,), np.nan), value], axis=-1)
+
+
+def true_range(high: Any, low: Any, close: Any) -> "np.ndarray":
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    previous = np.concatenate([close[..., :1], close[..., :-1]], axis=-1)
+    return np.maximum(high - low, np.maximum(np.abs(high - previous), np.abs(low - previous)))
+
+
+def atr(high: Any, low: Any, close: Any, period: Any = 14) -> "np.ndarray":
+    """Wilder's average true range"""
+    return _ewm(true_range(high, low, close), 1.0 / _rows(period, np.ndim(close)))
+
+
+def bollinger(close: Any, period: Any = 20, width: float = 2.0) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """(middle, upper, lower) bands at width population standard deviations"""
+    close = np.asarray(close, dtype=float)
+    middle = sma(close, period)
+    variance = np.clip(sma(close * close, period) - middle * middle, 0, None)
+    deviation = width * np.sqrt(variance)
+    return middle, middle + deviation, middle - deviation
+
+
+def vwap(price: Any, volume: Any, session_start: Optional[Any] = None) -> "np.ndarray":
+    """Volume-weighted average price, restarting wherever session_start is True"""
+    price, volume = np.asarray(price, dtype=float), np.asarray(volume, dtype=float)
+    pv = np.cumsum(price * volume, axis=-1)
+    vv = np.cumsum(volume, axis=-1)
+    if session_start is not None:
+        starts = np.asarray(session_start, dtype=bool)
+        index = np.broadcast_to(np.arange(price.shape[-1]), price.shape)
+        # Index of the bar each session began at, carried forward
+        first = np.maximum.accumulate(np.where(starts, index, 0), axis=-1)
+        before = np.where(first > 0, first - 1, 0)
+        pv = pv - np.where(first > 0, np.take_along_axis(pv, before, axis=-1), 0.0)
+        vv = vv - np.where(first > 0, np.take_along_axis(vv, before, axis=-1), 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(vv > 0, pv / vv, np.nan)
+
+
+def crossover(fast: Any, slow: Any) -> "np.ndarray":
+    """+1 where fast crosses above slow, -1 where it crosses below, else 0
+
+    A cross is a change of side; touching (fast == slow) or warm-up NaNs keep
+    the last side, so the first valid bar and a touch-and-return are not crosses.
+    """
+    side = np.nan_to_num(np.sign(np.asarray(fast, dtype=float) - np.asarray(slow, dtype=float)))
+    index = np.broadcast_to(np.arange(side.shape[-1]), side.shape)
+    last = np.maximum.accumulate(np.where(side != 0, index, -1), axis=-1)
+    carried = np.where(last >= 0, np.take_along_axis(side, np.clip(last, 0, None), axis=-1), 0)
+    out = np.zeros(side.shape, dtype=np.int8)
+    previous, current = carried[..., :-1], carried[..., 1:]
+    out[..., 1:] = np.where((previous < 0) & (current > 0), 1, np.where((previous > 0) & (current < 0), -1, 0))
+    return out
+
+
+def ma_cross_grid(close: Any, fast_periods: Any, slow_periods: Any) -> "np.ndarray":
+    """Crossover signals for every (fast, slow) pair over the same closes
+
+    close is (bars,) or (symbols, bars); the result is (symbols * pairs, bars)
+    with the pairs varying fastest.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=float))
+    fast_periods, slow_periods = np.asarray(fast_periods), np.asarray(slow_periods)
+    block = np.repeat(close, len(fast_periods), axis=0)
+    fast = np.tile(fast_periods, close.shape[0])
+    slow = np.tile(slow_periods, close.shape[0])
+    return crossover(sma(block, fast), sma(block, slow))
+
+
+def ma_cross_latest(close: Any, pairs: Sequence[Tuple[int, int]]) -> List[int]:
+    """Crossover on the last bar for each (fast, slow) pair: 1 up, -1 down, 0 none"""
+    if not pairs:
+        return []
+    fast, slow = zip(*pairs)
+    window = max(slow) + 1
+    return ma_cross_grid(np.asarray(close, dtype=float)[-window:], fast, slow)[:, -1].astype(int).tolist()
+
+
+def resample_ohlcv(ts: Any, price: Any, volume: Optional[Any] = None, interval: float = 60.0) -> Dict[str, "np.ndarray"]:
+    """Aggregate time-ordered ticks into bars stamped with their open time"""
+    ts, price = np.asarray(ts, dtype=float), np.asarray(price, dtype=float)
+    volume = np.zeros_like(price) if volume is None else np.nan_to_num(np.asarray(volume, dtype=float))
+    keep = ~np.isnan(price)
+    ts, price, volume = ts[keep], price[keep], volume[keep]
+    if not len(ts):
+        return {name: np.empty(0) for name in ("ts", "open", "high", "low", "close", "volume")}
+    bucket = np.floor(ts / interval) * interval
+    starts = np.flatnonzero(np.concatenate([[True], bucket[1:] != bucket[:-1]]))
+    ends = np.concatenate([starts[1:], [len(ts)]]) - 1
+    return {
+        "ts": bucket[starts],
+        "open": price[starts],
+        "high": np.maximum.reduceat(price, starts),
+        "low": np.minimum.reduceat(price, starts),
+        "close": price[ends],
+        "volume": np.add.reduceat(volume, starts)
+    }
+
+
+# Incremental variants keep per-row state and take one new value per row per
+# update(), so a single call advances every symbol x parameter combination.
+
+
+class RollingSMA:
+    """Simple moving average over the last period values"""
+
+    __slots__ = ("period", "window", "sum", "count", "position")
+
+    def __init__(self, period: Any):
+        self.period = np.atleast_1d(np.asarray(period, dtype=int))
+        self.window = np.zeros((len(self.period), int(self.period.max())))
+        self.sum = np.zeros(len(self.period))
+        self.count = 0
+        self.position = 0
+
+    def update(self, value: Any) -> "np.ndarray":
+        value = np.broadcast_to(np.asarray(value, dtype=float), self.sum.shape)
+        rows = np.arange(len(self.period))
+        size = self.window.shape[1]
+        leaving = self.window[rows, (self.position - self.period) % size]
+        self.sum += value - np.where(self.count >= self.period, leaving, 0.0)
+        self.window[:, self.position % size] = value
+        self.position += 1
+        self.count += 1
+        return np.where(self.count >= self.period, self.sum / self.period, np.nan)
+
+
+class RollingEMA:
+    """Exponential moving average seeded with the first value"""
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, period: Any = None, alpha: Any = None):
+        self.alpha = np.atleast_1d(np.asarray(alpha if alpha is not None else 2.0 / (np.asarray(period) + 1.0), dtype=float))
+        self.value: Optional["np.ndarray"] = None
+
+    def update(self, value: Any) -> "np.ndarray":
+        value = np.broadcast_to(np.asarray(value, dtype=float), self.alpha.shape)
+        if self.value is None:
+            self.value = value.copy()
+        else:
+            self.value = self.value + self.alpha * (value - self.value)
+        return self.value
+
+
+class RollingRSI:
+    """Wilder's RSI; NaN until the second value"""
+
+    __slots__ = ("gain", "loss", "previous")
+
+    def __init__(self, period: Any = 14):
+        alpha = 1.0 / np.atleast_1d(np.asarray(period, dtype=float))
+        self.gain = RollingEMA(alpha=alpha)
+        self.loss = RollingEMA(alpha=alpha)
+        self.previous: Optional["np.ndarray"] = None
+
+    def update(self, close: Any) -> "np.ndarray":
+        close = np.broadcast_to(np.asarray(close, dtype=float), self.gain.alpha.shape)
+        previous, self.previous = self.previous, close.copy()
+        if previous is None:
+            return np.full(close.shape, np.nan)
+        change = close - previous
+        gain = self.gain.update(np.clip(change, 0, None))
+        loss = self.loss.update(np.clip(-change, 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+        return np.where((gain == 0) & (loss == 0), 50.0, value)
+
+
+class RollingATR:
+    """Wilder's ATR from high/low/close bars"""
+
+    __slots__ = ("average", "previous_close")
+
+    def __init__(self, period: Any = 14):
+        self.average = RollingEMA(alpha=1.0 / np.atleast_1d(np.asarray(period, dtype=float)))
+        self.previous_close: Optional["np.ndarray"] = None
+
+    def update(self, high: Any, low: Any, close: Any) -> "np.ndarray":
+        shape = self.average.alpha.shape
+        high, low, close = (np.broadcast_to(np.asarray(a, dtype=float), shape) for a in (high, low, close))
+        previous = close if self.previous_close is None else self.previous_close
+        self.previous_close = close.copy()
+        tr = np.maximum(high - low, np.maximum(np.abs(high - previous), np.abs(low - previous)))
+        return self.average.update(tr)
+
+
+class RollingBollinger:
+    """(middle, upper, lower) bands over the last period values"""
+
+    __slots__ = ("mean", "square", "width")
+
+    def __init__(self, period: Any = 20, width: float = 2.0):
+        self.mean = RollingSMA(period)
+        self.square = RollingSMA(period)
+        self.width = width
+
+    def update(self, close: Any) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        close = np.asarray(close, dtype=float)
+        middle = self.mean.update(close)
+        variance = np.clip(self.square.update(close * close) - middle * middle, 0, None)
+        deviation = self.width * np.sqrt(variance)
+        return middle, middle + deviation, middle - deviation
+
+
+class RollingVWAP:
+    """Session VWAP; call reset() at the session boundary"""
+
+    __slots__ = ("pv", "volume")
+
+    def __init__(self, rows: int = 1):
+        self.pv = np.zeros(rows)
+        self.volume = np.zeros(rows)
+
+    def reset(self):
+        self.pv[:] = 0.0
+        self.volume[:] = 0.0
+
+    def update(self, price: Any, volume: Any) -> "np.ndarray":
+        self.pv += np.asarray(price, dtype=float) * np.asarray(volume, dtype=float)
+        self.volume += np.asarray(volume, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.volume > 0, self.pv / self.volume, np.nan)
+
+
+class RollingCrossover:
+    """+1 / -1 on the update where fast crosses above / below slow, else 0"""
+
+    __slots__ = ("side",)
+
+    def __init__(self):
+        self.side: Optional["np.ndarray"] = None
+
+    def update(self, fast: Any, slow: Any) -> "np.ndarray":
+        side = np.nan_to_num(np.sign(np.asarray(fast, dtype=float) - np.asarray(slow, dtype=float)))
+        previous = np.zeros(side.shape) if self.side is None else self.side
+        # Keep the last side through touches and NaNs, as crossover() does
+        self.side = np.where(side != 0, side, previous)
+        up = (previous < 0) & (self.side > 0)
+        down = (previous > 0) & (self.side < 0)
+        return np.where(up, 1, np.where(down, -1, 0)).astype(np.int8)
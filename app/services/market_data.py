@@ -0,0 +1,272 @@
+"""
+Market Data Service
+Latest-quote table fed by broker quote streams, with shared upstream subscriptions and conflated watches
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.quotes import Quote, normalize_quote
+
+logger = logging.getLogger(__name__)
+
+QuoteKey = Tuple[str, str]
+
+
+class QuoteWatch:
+    """Conflated view of a set of symbols for one consumer
+
+    Only the newest quote per symbol is held; a consumer that reads slower
+    than quotes arrive skips the intermediate values instead of queueing them.
+    """
+
+    __slots__ = ("name", "broker", "symbols", "pending", "delivered", "conflated", "closed", "_ready")
+
+    def __init__(self, name: str, broker: str, symbols: Iterable[str]):
+        self.name = name
+        self.broker = broker
+        self.symbols = frozenset(symbols)
+        self.pending: Dict[str, Quote] = {}
+        self.delivered = 0
+        self.conflated = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, quote: Quote):
+        if quote.symbol in self.pending:
+            self.conflated += 1
+        self.pending[quote.symbol] = quote
+        self._ready.set()
+
+    async def get(self) -> Dict[str, Quote]:
+        """Latest quote of every symbol that changed since the last read"""
+        while not self.pending:
+            if self.closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        changed, self.pending = self.pending, {}
+        self.delivered += len(changed)
+        return changed
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Quote]:
+        return await self.get()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "broker": self.broker,
+            "symbols": len(self.symbols),
+            "pending": len(self.pending),
+            "delivered": self.delivered,
+            "conflated": self.conflated
+        }
+
+
+class MarketDataService:
+    """Current prices across brokers for risk, P&L and strategies
+
+    Streamed quotes replace the table entry for their symbol with a new
+    immutable Quote, so readers never see a half-written value and lookups
+    are a single dict access. Upstream quote subscriptions are reference
+    counted per (broker, symbol): every account or strategy trading a symbol
+    shares the one broker subscription. Brokers without a quote stream are
+    read over REST on a miss and cached for max_age seconds. Streamed quotes
+    are current for stream_max_age seconds (quiet symbols tick rarely) and
+    only while the broker's stream is up. Position books and the strategy
+    scheduler declare the symbols they need with track().
+    """
+
+    def __init__(self, brokers: Dict[str, Any], max_age: float = 5.0, stream_max_age: float = 60.0):
+        self.brokers = brokers
+        self.max_age = max_age
+        self.stream_max_age = stream_max_age
+        self.quotes: Dict[QuoteKey, Quote] = {}
+        self.watches: Dict[str, QuoteWatch] = {}
+        self._owners: Dict[QuoteKey, Set[str]] = {}
+        self._watchers: Dict[QuoteKey, List[QuoteWatch]] = {}
+        self._fetching: Dict[QuoteKey, asyncio.Task] = {}
+        self._wanted: Dict[str, Set[QuoteKey]] = {}
+        self._tracked: Dict[str, Set[QuoteKey]] = {}
+        self._tracking: Optional[asyncio.Task] = None
+        self.updates = 0
+        self.rest_fetches = 0
+        self.upstream_subscribes = 0
+
+    def handle_quote(self, broker_name: str, quote: Quote):
+        """Executor quote listener: swap in the new quote and wake its watchers"""
+        key = (broker_name, quote.symbol)
+        self.quotes[key] = quote
+        self.updates += 1
+        for watch in self._watchers.get(key, ()):
+            watch.offer(quote)
+
+    def latest(self, broker_name: str, symbol: str) -> Optional[Quote]:
+        """Current quote without waiting, or None once it is too old to trust"""
+        key = (broker_name, symbol)
+        quote = self.quotes.get(key)
+        if quote is None:
+            return None
+        if key in self._owners:
+            current = quote.age <= self.stream_max_age and self._streaming(broker_name)
+        else:
+            current = quote.age <= self.max_age
+        return quote if current else None
+
+    def _streaming(self, broker_name: str) -> bool:
+        stream = getattr(self.brokers[broker_name], "stream", None)
+        return stream is None or stream.is_live
+
+    async def get_quote(self, broker_name: str, symbol: str) -> Optional[Quote]:
+        """Current quote, read from the broker over REST only on a miss
+
+        Streamed symbols are never read over REST: the broker would answer
+        with the same stale quote its stream last delivered.
+        """
+        quote = self.latest(broker_name, symbol)
+        if quote is not None or (broker_name, symbol) in self._owners:
+            return quote
+
+        # Concurrent misses for a symbol share one REST call
+        key = (broker_name, symbol)
+        task = self._fetching.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(broker_name, symbol))
+            self._fetching[key] = task
+            task.add_done_callback(lambda _: self._fetching.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, broker_name: str, symbol: str) -> Optional[Quote]:
+        self.rest_fetches += 1
+        try:
+            data = await self.brokers[broker_name].get_quote(symbol)
+        except Exception as e:
+            logger.warning(f"Quote fetch failed for {broker_name}/{symbol}: {e}")
+            return None
+        quote = normalize_quote(broker_name, {"symbol": symbol, **data}) if data else None
+        if quote is not None:
+            # Stamp with fetch time so max_age measures how long we have held it
+            quote = Quote(broker_name, symbol, quote.bid, quote.ask, quote.last, time.time())
+            self.handle_quote(broker_name, quote)
+        return quote
+
+    async def subscribe(self, broker_name: str, symbol: str, owner: str) -> bool:
+        """Share (or open) the broker's quote stream for a symbol; True if it streams"""
+        key = (broker_name, symbol)
+        owners = self._owners.get(key)
+        if owners is None:
+            broker = self.brokers[broker_name]
+            if not getattr(broker, "streams_quotes", False):
+                return False
+            owners = self._owners[key] = set()
+            try:
+                await broker.subscribe_quotes(symbol)
+                self.upstream_subscribes += 1
+            except Exception:
+                del self._owners[key]
+                raise
+        owners.add(owner)
+        return True
+
+    async def unsubscribe(self, broker_name: str, symbol: str, owner: str):
+        """Drop an owner; the broker subscription closes with the last one"""
+        key = (broker_name, symbol)
+        owners = self._owners.get(key)
+        if owners is None:
+            return
+        owners.discard(owner)
+        if not owners:
+            del self._owners[key]
+            try:
+                await self.brokers[broker_name].unsubscribe_quotes(symbol)
+            except Exception as e:
+                logger.warning(f"Quote unsubscribe failed for {broker_name}/{symbol}: {e}")
+
+    def track(self, owner: str, keys: Iterable[QuoteKey]):
+        """Keep exactly these (broker, symbol) quotes subscribed under owner
+
+        Safe to call from synchronous listeners: the upstream subscribe and
+        unsubscribe calls run in one background task, which applies only the
+        newest set each owner asked for.
+        """
+        self._wanted[owner] = {key for key in keys if key[0] in self.brokers}
+        if self._tracking is None or self._tracking.done():
+            self._tracking = asyncio.create_task(self._apply_tracking())
+
+    async def _apply_tracking(self):
+        while True:
+            changed = [owner for owner, wanted in self._wanted.items() if wanted != self._tracked.get(owner, set())]
+            if not changed:
+                return
+            for owner in changed:
+                wanted = self._wanted[owner]
+                held = self._tracked.setdefault(owner, set())
+                for key in wanted - held:
+                    try:
+                        await self.subscribe(*key, owner)
+                    except Exception as e:
+                        logger.warning(f"Quote subscribe failed for {key[0]}/{key[1]}: {e}")
+                    held.add(key)
+                for key in held - wanted:
+                    await self.unsubscribe(*key, owner)
+                    held.discard(key)
+
+    async def watch(self, name: str, broker_name: str, symbols: Iterable[str]) -> QuoteWatch:
+        """Conflated feed of the symbols' quotes, subscribed upstream under the watch name"""
+        await self.unwatch(name)
+        watch = QuoteWatch(name, broker_name, symbols)
+        self.watches[name] = watch
+        for symbol in watch.symbols:
+            await self.subscribe(broker_name, symbol, name)
+            self._watchers.setdefault((broker_name, symbol), []).append(watch)
+            if (broker_name, symbol) in self.quotes:
+                watch.offer(self.quotes[(broker_name, symbol)])
+        return watch
+
+    async def unwatch(self, name: str):
+        watch = self.watches.pop(name, None)
+        if watch is None:
+            return
+        watch.close()
+        for symbol in watch.symbols:
+            key = (watch.broker, symbol)
+            watchers = self._watchers.get(key, [])
+            if watch in watchers:
+                watchers.remove(watch)
+            if not watchers:
+                self._watchers.pop(key, None)
+            await self.unsubscribe(watch.broker, symbol, name)
+
+    async def stop(self):
+        """Close every watch and release the upstream subscriptions"""
+        if self._tracking is not None:
+            self._tracking.cancel()
+            await asyncio.gather(self._tracking, return_exceptions=True)
+            self._tracking = None
+        for owner, held in self._tracked.items():
+            for broker_name, symbol in held:
+                await self.unsubscribe(broker_name, symbol, owner)
+        self._wanted.clear()
+        self._tracked.clear()
+        for name in list(self.watches):
+            await self.unwatch(name)
+        for task in list(self._fetching.values()):
+            task.cancel()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self.quotes),
+            "updates": self.updates,
+            "rest_fetches": self.rest_fetches,
+            "upstream_subscriptions": len(self._owners),
+            "upstream_subscribes": self.upstream_subscribes,
+            "tracked": {owner: len(held) for owner, held in self._tracked.items()},
+            "watches": {name: watch.to_dict() for name, watch in self.watches.items()}
+        }
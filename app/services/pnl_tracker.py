@@ -0,0 +1,369 @@
+"""
+Daily P&L Tracker
+Incremental per-account realized/unrealized P&L with session rollover,
+loss-limit checks and compact Redis snapshots
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.broker_fields import (
+    POSITION_ID_FIELDS, REALIZED_FIELDS, UNREALIZED_FIELDS, event_account_id, event_payload
+)
+
+logger = logging.getLogger(__name__)
+
+PnLKey = Tuple[str, str]
+
+FILL_ID_FIELDS = ("fillId", "fill_id", "tradeId", "trade_id", "id")
+
+# Placeholder position holding restored open P&L until live marks arrive
+RESTORED_POSITION = "__restored__"
+
+# Where a broker's realized P&L is booked from: fill P&L or cumulative position realized
+REALIZED_FROM_FILLS = "fills"
+REALIZED_FROM_POSITIONS = "positions"
+POSITION_REALIZED_FIELDS = ("realizedPnl", "realized_pnl", "realizedPnL")
+
+
+def _number(source: Any, fields: Iterable[str]) -> Optional[float]:
+    for name in fields:
+        value = source.get(name) if isinstance(source, dict) else getattr(source, name, None)
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _identifier(source: Any, fields: Iterable[str]) -> Optional[str]:
+    for name in fields:
+        value = source.get(name) if isinstance(source, dict) else getattr(source, name, None)
+        if value is not None:
+            return str(value)
+    return None
+
+
+class AccountPnL:
+    """Running P&L for one account within one trading session
+
+    daily_pnl = realized + (unrealized - unrealized_baseline), where the
+    baseline is the open P&L carried over from the previous session.
+    realized_positions holds each position's last cumulative realized P&L
+    and is kept across roll(), so only realized P&L reported after the
+    rollover counts toward the new session.
+    """
+
+    __slots__ = (
+        "session", "realized_fills", "realized_positions", "realized",
+        "unrealized_positions", "unrealized", "unrealized_baseline",
+        "peak", "trades", "seen", "updated_at"
+    )
+
+    def __init__(self, session: str):
+        self.session = session
+        self.realized_fills = 0.0
+        self.realized_positions: Dict[str, float] = {}
+        self.realized = 0.0
+        self.unrealized_positions: Dict[str, float] = {}
+        self.unrealized = 0.0
+        self.unrealized_baseline = 0.0
+        self.peak = 0.0
+        self.trades = 0
+        self.seen: Set[str] = set()
+        self.updated_at = 0.0
+
+    @property
+    def daily_pnl(self) -> float:
+        return self.realized + self.unrealized - self.unrealized_baseline
+
+    @property
+    def drawdown(self) -> float:
+        """Drop from the session's best daily P&L"""
+        return self.peak - self.daily_pnl
+
+    def _touch(self):
+        self.peak = max(self.peak, self.daily_pnl)
+        self.updated_at = time.time()
+
+    def add_fill(self, pnl: float, fill_id: Optional[str] = None) -> bool:
+        """Add realized P&L from a fill once (duplicate fill ids are ignored)"""
+        if fill_id is not None:
+            if fill_id in self.seen:
+                return False
+            self.seen.add(fill_id)
+        self.realized_fills += pnl
+        self.realized += pnl
+        self.trades += 1
+        self._touch()
+        return True
+
+    def set_position(self, position_id: str, unrealized: Optional[float] = None, realized: Optional[float] = None):
+        """Record a position's latest open and cumulative realized P&L"""
+        if unrealized is not None and RESTORED_POSITION in self.unrealized_positions:
+            self.unrealized -= self.unrealized_positions.pop(RESTORED_POSITION)
+        if unrealized is not None:
+            self.unrealized += unrealized - self.unrealized_positions.get(position_id, 0.0)
+            self.unrealized_positions[position_id] = unrealized
+        if realized is not None:
+            self.realized += realized - self.realized_positions.get(position_id, 0.0)
+            self.realized_positions[position_id] = realized
+        self._touch()
+
+    def close_position(self, position_id: str, realized: Optional[float] = None):
+        """Drop a closed position's open P&L, booking its realized P&L if reported"""
+        self.unrealized -= self.unrealized_positions.pop(position_id, 0.0)
+        if realized is not None and position_id not in self.realized_positions:
+            self.add_fill(realized, f"close:{position_id}")
+        else:
+            self._touch()
+
+    def roll(self, session: str):
+        """Start a new session, carrying open P&L and position realized P&L forward as baselines"""
+        self.session = session
+        self.realized_fills = 0.0
+        self.realized = 0.0
+        self.unrealized_baseline = self.unrealized
+        self.peak = 0.0
+        self.trades = 0
+        self.seen = set()
+        self._touch()
+
+    def snapshot(self) -> list:
+        """Compact Redis form: [realized, unrealized, baseline, peak, trades, updated_at, realized_positions]"""
+        return [
+            round(self.realized, 2), round(self.unrealized, 2),
+            round(self.unrealized_baseline, 2), round(self.peak, 2),
+            self.trades, int(self.updated_at), self.realized_positions
+        ]
+
+    @classmethod
+    def restore(cls, session: str, snapshot: list) -> "AccountPnL":
+        """Rebuild from a snapshot; per-position open P&L is refilled by the next events"""
+        realized, unrealized, baseline, peak, trades, updated_at, *rest = snapshot
+        pnl = cls(session)
+        pnl.realized_fills = pnl.realized = realized
+        pnl.realized_positions = dict(rest[0]) if rest else {}
+        pnl.unrealized_positions = {RESTORED_POSITION: unrealized}
+        pnl.unrealized = unrealized
+        pnl.unrealized_baseline = baseline
+        pnl.peak = peak
+        pnl.trades = trades
+        pnl.updated_at = updated_at
+        return pnl
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session": self.session,
+            "realized": round(self.realized, 2),
+            "unrealized": round(self.unrealized, 2),
+            "daily_pnl": round(self.daily_pnl, 2),
+            "peak": round(self.peak, 2),
+            "drawdown": round(self.drawdown, 2),
+            "trades": self.trades
+        }
+
+
+class PnLTracker:
+    """Per-account daily P&L fed by broker fill and position streams
+
+    Sessions roll over at session_reset_hour (UTC). Dirty accounts are
+    written to a Redis hash per session every snapshot_interval seconds and
+    restored from it on start, so limits survive restarts without querying
+    the trades table. Each broker books realized P&L from one source, fills
+    or position updates, fixed by the first of them that reports it, so a
+    broker streaming both is not counted twice.
+    """
+
+    def __init__(
+        self,
+        redis,
+        session_reset_hour: int = 0,
+        max_daily_loss: Optional[float] = None,
+        max_drawdown: Optional[float] = None,
+        snapshot_interval: float = 5.0,
+        snapshot_ttl: int = 172800
+    ):
+        self.redis = redis
+        self.session_reset_hour = session_reset_hour
+        self.max_daily_loss = max_daily_loss
+        self.max_drawdown = max_drawdown
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_ttl = snapshot_ttl
+        self.accounts: Dict[PnLKey, AccountPnL] = {}
+        # broker -> REALIZED_FROM_FILLS or REALIZED_FROM_POSITIONS
+        self.realized_sources: Dict[str, str] = {}
+        self.events_applied = 0
+        self.snapshots_written = 0
+        self.rejections = 0
+        self._dirty: Set[PnLKey] = set()
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    def session_for(self, now: Optional[datetime] = None) -> str:
+        """Trading session id (date the session started) for a UTC time"""
+        now = now or datetime.now(timezone.utc)
+        return (now - timedelta(hours=self.session_reset_hour)).strftime("%Y-%m-%d")
+
+    def _redis_key(self, session: str) -> str:
+        return f"pnl:{session}"
+
+    async def start(self):
+        """Restore this session's snapshots and start the snapshot loop"""
+        session = self.session_for()
+        try:
+            snapshots = await self.redis.hgetall(self._redis_key(session))
+        except Exception as e:
+            logger.warning(f"Could not restore P&L snapshots: {e}")
+            snapshots = {}
+
+        for field, snapshot in snapshots.items():
+            broker_name, _, account_id = field.partition(":")
+            try:
+                self.accounts[(broker_name, account_id)] = AccountPnL.restore(session, snapshot)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping malformed P&L snapshot {field}: {e}")
+
+        if self._snapshot_task is None or self._snapshot_task.done():
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self):
+        """Stop the snapshot loop and write a final snapshot"""
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+            await asyncio.gather(self._snapshot_task, return_exceptions=True)
+            self._snapshot_task = None
+        await self.flush()
+
+    def get_account(self, broker_name: str, account_id: str) -> AccountPnL:
+        """Current-session P&L for an account, rolling it over if the session ended"""
+        key = (broker_name, str(account_id))
+        session = self.session_for()
+        pnl = self.accounts.get(key)
+        if pnl is None:
+            pnl = self.accounts[key] = AccountPnL(session)
+        elif pnl.session != session:
+            pnl.roll(session)
+            self._dirty.add(key)
+        return pnl
+
+    def handle_broker_event(self, broker_name: str, event_type: str, data: Any):
+        """Executor event listener: fold fills and position marks into the account P&L"""
+        if event_type not in ("trade", "position", "position_close"):
+            return
+        account_id = event_account_id(data)
+        if account_id is None:
+            return
+
+        payload = event_payload(data)
+        pnl = self.get_account(broker_name, account_id)
+        if event_type == "trade":
+            realized = _number(payload, REALIZED_FIELDS)
+            if realized is None:
+                return
+            if self._realized_source(broker_name, REALIZED_FROM_FILLS) == REALIZED_FROM_FILLS:
+                commission = _number(payload, ("commission", "fee")) or 0.0
+                realized -= abs(commission)
+            else:
+                realized = 0.0  # still counted as a trade; the position stream books the P&L
+            if not pnl.add_fill(realized, _identifier(payload, FILL_ID_FIELDS)):
+                return
+        else:
+            position_id = _identifier(payload, POSITION_ID_FIELDS)
+            if position_id is None:
+                return
+            if event_type == "position_close":
+                realized = _number(payload, REALIZED_FIELDS)
+            else:
+                realized = _number(payload, POSITION_REALIZED_FIELDS)
+            if realized is not None and self._realized_source(broker_name, REALIZED_FROM_POSITIONS) != REALIZED_FROM_POSITIONS:
+                realized = None
+            if event_type == "position_close":
+                pnl.close_position(position_id, realized)
+            else:
+                pnl.set_position(position_id, unrealized=_number(payload, UNREALIZED_FIELDS), realized=realized)
+
+        self.events_applied += 1
+        self._dirty.add((broker_name, str(account_id)))
+
+    def _realized_source(self, broker_name: str, source: str) -> str:
+        """The broker's realized P&L source, taking source if none is fixed yet"""
+        return self.realized_sources.setdefault(broker_name, source)
+
+    def sync_positions(self, broker_name: str, account_id: str, positions: Iterable[Any]):
+        """Refresh open P&L from a REST position snapshot (covers non-streaming brokers)"""
+        pnl = self.get_account(broker_name, account_id)
+        open_ids = set()
+        for position in positions:
+            position_id = _identifier(position, POSITION_ID_FIELDS)
+            if position_id is None:
+                continue
+            open_ids.add(position_id)
+            pnl.set_position(position_id, unrealized=_number(position, ("unrealized_pnl", "unrealizedPnl")))
+        for position_id in set(pnl.unrealized_positions) - open_ids:
+            pnl.close_position(position_id)
+        self._dirty.add((broker_name, str(account_id)))
+
+    def check(self, broker_name: str, account_id: str) -> Dict[str, Any]:
+        """Daily loss and drawdown rules for an account (in-memory, O(1))"""
+        pnl = self.get_account(broker_name, account_id)
+
+        if self.max_daily_loss is not None and pnl.daily_pnl <= -self.max_daily_loss:
+            self.rejections += 1
+            return {
+                "passed": False,
+                "error": f"Daily loss {-pnl.daily_pnl:.2f} reached limit {self.max_daily_loss}"
+            }
+
+        if self.max_drawdown is not None and pnl.drawdown >= self.max_drawdown:
+            self.rejections += 1
+            return {
+                "passed": False,
+                "error": f"Daily drawdown {pnl.drawdown:.2f} reached limit {self.max_drawdown}"
+            }
+
+        return {"passed": True}
+
+    async def flush(self) -> int:
+        """Write snapshots of every account changed since the last flush"""
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, set()
+
+        by_session: Dict[str, Dict[PnLKey, list]] = {}
+        for key in dirty:
+            pnl = self.accounts.get(key)
+            if pnl is not None:
+                by_session.setdefault(pnl.session, {})[key] = pnl.snapshot()
+
+        written = 0
+        for session, snapshots in by_session.items():
+            mapping = {f"{broker_name}:{account_id}": snapshot for (broker_name, account_id), snapshot in snapshots.items()}
+            if await self.redis.hset_many(self._redis_key(session), mapping, expire=self.snapshot_ttl):
+                written += len(mapping)
+            else:
+                # Retry on the next flush
+                self._dirty.update(snapshots)
+        self.snapshots_written += written
+        return written
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"P&L snapshot failed: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "accounts": len(self.accounts),
+            "session": self.session_for(),
+            "events_applied": self.events_applied,
+            "snapshots_written": self.snapshots_written,
+            "pending_snapshots": len(self._dirty),
+            "realized_sources": dict(self.realized_sources),
+            "rejections": self.rejections
+        }
@@ -0,0 +1,244 @@
+"""
+Position Book
+Live per-account position index kept current from broker streams for O(1) risk checks
+"""
+import asyncio
+import logging
+import time
+from typing import AbstractSet, Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.broker_fields import (
+    POSITION_ID_FIELDS, event_account_id, event_payload, first_field, normalize_position
+)
+
+logger = logging.getLogger(__name__)
+
+BookKey = Tuple[str, str]
+
+
+class AccountBook:
+    """Open positions of one account with per-symbol gross and net exposure"""
+
+    __slots__ = ("positions", "gross", "net", "updated_at", "reconciled_at", "stale")
+
+    def __init__(self):
+        self.positions: Dict[str, Tuple[str, float]] = {}
+        self.gross: Dict[str, float] = {}
+        self.net: Dict[str, float] = {}
+        self.updated_at = 0.0
+        self.reconciled_at = 0.0
+        self.stale = False
+
+    def _adjust(self, symbol: str, size: float, sign: int):
+        gross = self.gross.get(symbol, 0.0) + sign * abs(size)
+        if abs(gross) < 1e-12:
+            self.gross.pop(symbol, None)
+            self.net.pop(symbol, None)
+            return
+        self.gross[symbol] = gross
+        self.net[symbol] = self.net.get(symbol, 0.0) + sign * size
+
+    def apply(self, position_id: str, symbol: str, size: float):
+        """Set a position to its latest signed size (0 closes it)"""
+        previous = self.positions.pop(position_id, None)
+        if previous is not None:
+            self._adjust(previous[0], previous[1], -1)
+        if size:
+            self.positions[position_id] = (symbol, size)
+            self._adjust(symbol, size, 1)
+        self.updated_at = time.monotonic()
+
+    def remove(self, position_id: str):
+        self.apply(position_id, "", 0.0)
+
+    def replace(self, positions: Iterable[Tuple[str, str, float]]) -> int:
+        """Replace the book with a REST snapshot; returns how many positions differed"""
+        snapshot = {position_id: (symbol, size) for position_id, symbol, size in positions if size}
+        drift = len(set(snapshot.items()) ^ set(self.positions.items()))
+
+        self.positions = {}
+        self.gross = {}
+        self.net = {}
+        for position_id, (symbol, size) in snapshot.items():
+            self.positions[position_id] = (symbol, size)
+            self._adjust(symbol, size, 1)
+
+        self.updated_at = self.reconciled_at = time.monotonic()
+        self.stale = False
+        return drift
+
+    def exposure(self, symbol: str) -> float:
+        """Gross open size on symbol"""
+        return self.gross.get(symbol, 0.0)
+
+    def net_exposure(self, symbol: str) -> float:
+        """Signed open size on symbol (long positive)"""
+        return self.net.get(symbol, 0.0)
+
+
+class PositionBook:
+    """Position books for every (broker, account) seen by the signal path
+
+    A book is loaded from REST on first use, updated in place from streamed
+    position events and reconciled against REST every reconcile_interval.
+    Fills and locally executed orders mark a book stale, which schedules a
+    background reconcile instead of blocking the next risk check. When the
+    set of symbols with open positions changes, on_symbols receives the new
+    (broker, symbol) set.
+    """
+
+    def __init__(
+        self,
+        brokers: Dict[str, Any],
+        reconcile_interval: float = 60.0,
+        on_snapshot: Optional[Callable[[str, str, List[Any]], None]] = None,
+        on_symbols: Optional[Callable[[Set[Tuple[str, str]]], None]] = None
+    ):
+        self.brokers = brokers
+        self.reconcile_interval = reconcile_interval
+        self.on_snapshot = on_snapshot
+        self.on_symbols = on_symbols
+        self.books: Dict[BookKey, AccountBook] = {}
+        self.events_applied = 0
+        self.reconciles = 0
+        self.reconcile_errors = 0
+        self.drift_corrections = 0
+        self._reconciling: Dict[BookKey, asyncio.Task] = {}
+        self._reconcile_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the periodic REST reconcile loop"""
+        if self._reconcile_task is None or self._reconcile_task.done():
+            self._reconcile_task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        """Stop reconciling"""
+        tasks = list(self._reconciling.values())
+        if self._reconcile_task:
+            tasks.append(self._reconcile_task)
+            self._reconcile_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_book(self, broker_name: str, account_id: str) -> AccountBook:
+        """Book for an account, loading it from REST the first time"""
+        key = (broker_name, str(account_id))
+        book = self.books.get(key)
+        if book is not None:
+            return book
+        if not await self._schedule_reconcile(key):
+            # Serve an empty book rather than fail the signal; the next reconcile fills it
+            self.books.setdefault(key, AccountBook()).stale = True
+        return self.books[key]
+
+    def _schedule_reconcile(self, key: BookKey) -> asyncio.Task:
+        """Reconcile an account, sharing any reconcile already in flight"""
+        task = self._reconciling.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self.reconcile(*key))
+            self._reconciling[key] = task
+        return task
+
+    async def reconcile(self, broker_name: str, account_id: str) -> bool:
+        """Replace an account's book with the broker's REST view"""
+        key = (broker_name, str(account_id))
+        try:
+            positions = await self.brokers[broker_name].get_positions(account_id)
+        except Exception as e:
+            self.reconcile_errors += 1
+            logger.warning(f"Position reconcile failed for {broker_name}:{account_id}: {e}")
+            return False
+
+        positions = list(positions or ())
+        if self.on_snapshot:
+            try:
+                self.on_snapshot(broker_name, str(account_id), positions)
+            except Exception as e:
+                logger.error(f"Position snapshot listener failed for {broker_name}:{account_id}: {e}")
+
+        snapshot = [entry for entry in map(normalize_position, positions) if entry]
+        book = self.books.setdefault(key, AccountBook())
+        first_load = not book.reconciled_at
+        symbols = set(book.gross)
+        drift = book.replace(snapshot)
+        self._check_symbols(book, symbols)
+        self.reconciles += 1
+        if not first_load:
+            self.drift_corrections += drift
+        return True
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            await asyncio.gather(
+                *(self._schedule_reconcile(key) for key in list(self.books)),
+                return_exceptions=True
+            )
+
+    def mark_stale(self, broker_name: str, account_id: str):
+        """Schedule a background reconcile for an account with a tracked book"""
+        key = (broker_name, str(account_id))
+        book = self.books.get(key)
+        if book is None:
+            return
+        book.stale = True
+        self._schedule_reconcile(key)
+
+    def handle_broker_event(self, broker_name: str, event_type: str, data: Any):
+        """Executor event listener: apply streamed position changes to the book"""
+        if event_type not in ("position", "position_close", "trade", "resync"):
+            return
+
+        account_id = event_account_id(data)
+        if account_id is None:
+            # Stream gaps and unattributed fills: reload the broker's books from REST
+            for book_broker, book_account in list(self.books):
+                if book_broker == broker_name:
+                    self.mark_stale(book_broker, book_account)
+            return
+
+        book = self.books.get((broker_name, account_id))
+        if book is None:
+            return
+
+        payload = event_payload(data)
+        symbols = set(book.gross)
+        if event_type == "position_close" and first_field(payload, *POSITION_ID_FIELDS) is not None:
+            book.remove(str(first_field(payload, *POSITION_ID_FIELDS)))
+            self.events_applied += 1
+            self._check_symbols(book, symbols)
+            return
+
+        entry = normalize_position(payload) if event_type == "position" else None
+        if entry is None:
+            # Fills don't carry the resulting position; let REST settle it
+            self.mark_stale(broker_name, account_id)
+            return
+
+        book.apply(*entry)
+        self.events_applied += 1
+        self._check_symbols(book, symbols)
+
+    def open_symbols(self) -> Set[Tuple[str, str]]:
+        """(broker, symbol) of every open position across the books"""
+        return {(broker_name, symbol) for (broker_name, _), book in self.books.items() for symbol in book.gross}
+
+    def _check_symbols(self, book: AccountBook, before: AbstractSet[str]):
+        if self.on_symbols is None or book.gross.keys() == before:
+            return
+        try:
+            self.on_symbols(self.open_symbols())
+        except Exception as e:
+            logger.error(f"Position symbols listener failed: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "accounts": len(self.books),
+            "positions": sum(len(book.positions) for book in self.books.values()),
+            "stale": sum(1 for book in self.books.values() if book.stale),
+            "events_applied": self.events_applied,
+            "reconciles": self.reconciles,
+            "reconcile_errors": self.reconcile_errors,
+            "drift_corrections": self.drift_corrections
+        }
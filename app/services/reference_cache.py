@@ -0,0 +1,244 @@
+"""
+Reference Data Cache
+TTL caches for broker symbol universes and account metadata used by signal validation
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Optional, Tuple
+
+from app.core.broker_fields import event_account_id
+
+logger = logging.getLogger(__name__)
+
+# Executor event types that can change an account's balance, margin or status
+ACCOUNT_EVENTS = {"account", "position", "position_close", "trade", "resync"}
+
+_MISSING = object()
+
+
+class TTLCache:
+    """In-memory TTL cache with single-flight loading
+
+    Concurrent misses for the same key share one loader call instead of each
+    issuing their own remote request.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Cache a value for ttl seconds (defaults to the cache TTL)"""
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            self._evict()
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one key; returns True if it was cached"""
+        return self._entries.pop(key, None) is not None
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every key matching predicate; returns the number dropped"""
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+
+    def keys(self):
+        return list(self._entries)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        cache_if: Callable[[Any], bool] = lambda value: value is not None
+    ) -> Any:
+        """Return the cached value or load it once for all concurrent callers"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            self.loads += 1
+            value = await loader()
+            if cache_if(value):
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception retrieved
+            future.exception()
+            raise
+        finally:
+            self._loading.pop(key, None)
+
+    def _evict(self):
+        """Drop expired entries, then the entry closest to expiry if still full"""
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            oldest = min(self._entries, key=lambda key: self._entries[key][0])
+            del self._entries[oldest]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class BrokerReferenceCache:
+    """Cached symbol universes and account metadata for every broker
+
+    Symbol sets are refreshed in the background before they expire so
+    validation never waits on a remote call once warm. Account info uses a
+    short TTL and is dropped as soon as the broker streams an account,
+    position or fill event for that account.
+    """
+
+    def __init__(
+        self,
+        brokers: Dict[str, Any],
+        symbol_ttl: float = 900.0,
+        account_ttl: float = 5.0,
+        refresh_interval: Optional[float] = None
+    ):
+        self.brokers = brokers
+        self.symbols = TTLCache(symbol_ttl, max_entries=max(16, len(brokers)))
+        self.accounts = TTLCache(account_ttl)
+        self.refresh_interval = refresh_interval or symbol_ttl * 0.8
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.invalidations = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background symbol refresh loop"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the background symbol refresh loop"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def get_symbols(self, broker_name: str) -> FrozenSet[str]:
+        """Symbol universe for a broker as a set (loaded on first use)"""
+        return await self.symbols.get_or_load(
+            broker_name,
+            lambda: self._load_symbols(broker_name),
+            cache_if=bool
+        )
+
+    async def has_symbol(self, broker_name: str, symbol: str) -> bool:
+        """Whether the broker lists symbol (an in-memory set lookup once warm)"""
+        return symbol in await self.get_symbols(broker_name)
+
+    async def get_account(self, broker_name: str, account_id: str) -> Optional[Any]:
+        """Account info for (broker, account), cached for the account TTL"""
+        broker = self.brokers[broker_name]
+        return await self.accounts.get_or_load(
+            (broker_name, str(account_id)),
+            lambda: broker.get_account_info(account_id)
+        )
+
+    async def _load_symbols(self, broker_name: str) -> FrozenSet[str]:
+        return frozenset(await self.brokers[broker_name].get_symbols() or ())
+
+    async def refresh_symbols(self, broker_name: str) -> bool:
+        """Reload a broker's symbols, keeping the old set if the reload fails"""
+        try:
+            symbols = await self._load_symbols(broker_name)
+        except Exception as e:
+            self.refresh_errors += 1
+            logger.warning(f"Symbol refresh failed for {broker_name}: {e}")
+            return False
+
+        if not symbols:
+            self.refresh_errors += 1
+            return False
+
+        self.symbols.set(broker_name, symbols)
+        self.refreshes += 1
+        return True
+
+    async def _refresh_loop(self):
+        """Refresh every broker's symbols that has been loaded at least once"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            broker_names = self.symbols.keys()
+            if broker_names:
+                await asyncio.gather(*(self.refresh_symbols(name) for name in broker_names))
+
+    def invalidate_symbols(self, broker_name: str):
+        if self.symbols.invalidate(broker_name):
+            self.invalidations += 1
+
+    def invalidate_account(self, broker_name: str, account_id: Optional[str] = None):
+        """Drop one account, or every account of the broker when account_id is None"""
+        if account_id is None:
+            dropped = self.accounts.invalidate_where(lambda key: key[0] == broker_name)
+        else:
+            dropped = int(self.accounts.invalidate((broker_name, str(account_id))))
+        self.invalidations += dropped
+
+    def handle_broker_event(self, broker_name: str, event_type: str, data: Any):
+        """Executor event listener: invalidate account metadata touched by the event"""
+        if event_type not in ACCOUNT_EVENTS:
+            return
+
+        self.invalidate_account(broker_name, event_account_id(data))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "symbols": {
+                **self.symbols.get_metrics(),
+                "by_broker": {name: len(self.symbols.get(name, ())) for name in self.symbols.keys()},
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors
+            },
+            "accounts": self.accounts.get_metrics(),
+            "invalidations": self.invalidations
+        }
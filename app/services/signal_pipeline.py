@@ -0,0 +1,160 @@
+"""
+Signal Ingestion Pipeline
+Bounded, staged queue between webhook ingress and the signal processor
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+class PipelineFullError(Exception):
+    """Raised when the pipeline queue is at capacity and the item is shed"""
+
+
+class PipelineUnavailableError(Exception):
+    """Raised when the pipeline is not accepting work (not started or stopping)"""
+
+
+class PipelineMetrics:
+    """Per-stage latency histograms and ingress counters"""
+
+    def __init__(self):
+        self.stages: Dict[str, LatencyHistogram] = {}
+        self.accepted = 0
+        self.shed = 0
+        self.processed = 0
+        self.failed = 0
+
+    def observe(self, stage: str, seconds: float):
+        """Record latency for a stage"""
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as a pipeline stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Export counters and histograms"""
+        return {
+            "accepted": self.accepted,
+            "shed": self.shed,
+            "processed": self.processed,
+            "failed": self.failed,
+            "stages": {name: hist.snapshot() for name, hist in self.stages.items()}
+        }
+
+
+class SignalPipeline:
+    """Bounded queue feeding a fixed pool of worker coroutines"""
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        max_size: int = 1000,
+        worker_count: int = 8,
+        name: str = "signals"
+    ):
+        self.handler = handler
+        self.max_size = max_size
+        self.worker_count = worker_count
+        self.name = name
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.metrics = PipelineMetrics()
+        self.workers: List[asyncio.Task] = []
+        self.accepting = False
+        self.busy_workers = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.accepting and bool(self.workers)
+
+    async def start(self):
+        """Start worker coroutines"""
+        if self.workers:
+            return
+        self.accepting = True
+        self.workers = [
+            asyncio.create_task(self._worker(index), name=f"{self.name}-worker-{index}")
+            for index in range(self.worker_count)
+        ]
+        logger.info(f"Started {self.name} pipeline with {self.worker_count} workers (queue size {self.max_size})")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Stop accepting work, drain the queue, then cancel workers"""
+        self.accepting = False
+        if not self.workers:
+            return
+
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} pipeline drain timed out with {self.queue.qsize()} items pending")
+
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        logger.info(f"Stopped {self.name} pipeline")
+
+    def submit(self, item: Any):
+        """Enqueue an item without waiting; sheds load when the queue is full"""
+        if not self.is_running:
+            raise PipelineUnavailableError(f"{self.name} pipeline is not accepting work")
+
+        try:
+            self.queue.put_nowait((time.perf_counter(), item))
+        except asyncio.QueueFull:
+            self.metrics.shed += 1
+            raise PipelineFullError(f"{self.name} pipeline queue is full ({self.max_size})")
+
+        self.metrics.accepted += 1
+
+    def retry_after(self) -> int:
+        """Suggested Retry-After seconds for shed requests"""
+        processed = self.metrics.stages.get("total")
+        avg = processed.total / processed.count if processed and processed.count else 1.0
+        return max(1, int(avg * self.queue.qsize() / max(1, self.worker_count)))
+
+    async def _worker(self, index: int):
+        """Pull items from the queue and run them through the handler"""
+        while True:
+            enqueued_at, item = await self.queue.get()
+            started = time.perf_counter()
+            self.metrics.observe("queue_wait", started - enqueued_at)
+            self.busy_workers += 1
+            try:
+                await self.handler(item)
+                self.metrics.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.metrics.failed += 1
+                logger.error(f"{self.name} pipeline worker {index} failed: {e}")
+            finally:
+                self.busy_workers -= 1
+                self.metrics.observe("total", time.perf_counter() - enqueued_at)
+                self.queue.task_done()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth, worker utilisation and stage latencies"""
+        return {
+            "running": self.is_running,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.max_size,
+            "workers": len(self.workers),
+            "busy_workers": self.busy_workers,
+            **self.metrics.snapshot()
+        }
@@ -5,12 +5,15 @@ Handles signal processing, routing, and execution across all brokers
 import asyncio
 import json
 import logging
+import uuid
+from functools import partial
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.cache.redis_client import redis_client
-from app.models.models import Signal, WebhookLog, Account as AccountModel
+from app.models.models import Signal, SignalSource, WebhookLog, Account as AccountModel
 from app.models.pydantic_schemas import (
     SignalRequest, SignalResponse, OrderRequest, OrderResponse,
     TradeRequest, TradeResponse, WebhookRequest
@@ -20,10 +23,21 @@ from app.brokers.mt5_executor import MT5Executor
 from app.brokers.tradelocker_executor import TradeLockerExecutor
 from app.brokers.tradovate_executor import TradovateExecutor
 from app.brokers.projectx_executor import ProjectXExecutor
-from app.db.database import get_db
+from app.db.database import get_async_session
+from app.services.signal_pipeline import SignalPipeline
+from app.services.execution_lanes import ExecutionLane, ExecutionLanes, LaneFullError
+from app.services.write_behind import WriteBehindBuffer
+from app.services.reference_cache import BrokerReferenceCache
+from app.services.position_book import PositionBook
+from app.services.pnl_tracker import PnLTracker
+from app.services.market_data import MarketDataService
+from app.services.tick_store import NUMPY_AVAILABLE, TickStore
+from app.services.broker_connector import BrokerConnector
 
 logger = logging.getLogger(__name__)
 
+SIGNAL_SOURCES = {source.value for source in SignalSource}
+
 class SignalProcessor:
     """Unified signal processor for all brokers"""
     
@@ -36,37 +50,193 @@ class SignalProcessor:
             "projectx": ProjectXExecutor()
         }
         self.active_connections = {}
-        self.signal_queue = asyncio.Queue()
+        self.connector = BrokerConnector(
+            self.brokers,
+            connect_timeout=settings.BROKER_CONNECT_TIMEOUT,
+            lazy=settings.BROKER_LAZY_CONNECT,
+            retry_backoff=settings.BROKER_RETRY_BACKOFF
+        )
+        self.reference_cache = BrokerReferenceCache(
+            self.brokers,
+            symbol_ttl=settings.SYMBOL_CACHE_TTL,
+            account_ttl=settings.ACCOUNT_CACHE_TTL,
+            refresh_interval=settings.SYMBOL_CACHE_REFRESH_INTERVAL
+        )
+        self.pnl_tracker = PnLTracker(
+            redis_client,
+            session_reset_hour=settings.PNL_SESSION_RESET_HOUR_UTC,
+            max_daily_loss=settings.MAX_DAILY_LOSS,
+            max_drawdown=settings.MAX_DAILY_DRAWDOWN,
+            snapshot_interval=settings.PNL_SNAPSHOT_INTERVAL
+        )
+        self.market_data = MarketDataService(
+            self.brokers, max_age=settings.QUOTE_MAX_AGE, stream_max_age=settings.QUOTE_STREAM_MAX_AGE
+        )
+        # Symbols with open positions keep a streamed quote for risk and P&L
+        self.position_book = PositionBook(
+            self.brokers,
+            reconcile_interval=settings.POSITION_RECONCILE_INTERVAL,
+            on_snapshot=self.pnl_tracker.sync_positions,
+            on_symbols=partial(self.market_data.track, "positions")
+        )
+        # Streamed quotes are recorded for strategies and backtests when a store dir is set
+        self.tick_store = TickStore(
+            settings.TICK_STORE_DIR,
+            flush_rows=settings.TICK_STORE_FLUSH_ROWS,
+            flush_interval=settings.TICK_STORE_FLUSH_INTERVAL
+        ) if NUMPY_AVAILABLE and settings.TICK_STORE_DIR else None
+        for broker_name, broker in self.brokers.items():
+            broker.add_event_listener(partial(self.reference_cache.handle_broker_event, broker_name))
+            broker.add_event_listener(partial(self.position_book.handle_broker_event, broker_name))
+            broker.add_event_listener(partial(self.pnl_tracker.handle_broker_event, broker_name))
+            broker.add_quote_listener(partial(self.market_data.handle_quote, broker_name))
+            if self.tick_store:
+                broker.add_quote_listener(self.tick_store.append_quote)
+        self.persistence = WriteBehindBuffer(
+            get_async_session,
+            flush_interval_ms=settings.WRITE_BEHIND_FLUSH_INTERVAL_MS,
+            max_batch=settings.WRITE_BEHIND_MAX_BATCH,
+            journal_dir=settings.WRITE_BEHIND_JOURNAL_DIR or None
+        )
+        self.persistence.register(Signal.__table__, "signal_id")
+        self.persistence.register(WebhookLog.__table__, "webhook_id")
+        self.lanes = ExecutionLanes(
+            default_concurrency=settings.EXECUTION_LANE_CONCURRENCY,
+            broker_concurrency=settings.EXECUTION_LANE_BROKER_CONCURRENCY,
+            max_depth=settings.EXECUTION_LANE_MAX_DEPTH,
+            idle_timeout=settings.EXECUTION_LANE_IDLE_TIMEOUT
+        )
+        self.pipeline = SignalPipeline(
+            self._process_admitted,
+            max_size=settings.SIGNAL_QUEUE_MAX_SIZE,
+            worker_count=settings.SIGNAL_WORKER_COUNT
+        )
+        self.signal_queue = self.pipeline.queue
+        # Warm the symbol cache so the first signal skips the remote lookup
+        self.connector.on_ready.append(self.reference_cache.refresh_symbols)
         
     async def initialize(self):
-        """Initialize all broker connections"""
-        for broker_name, broker in self.brokers.items():
-            try:
-                success = await broker.initialize()
-                if success:
-                    logger.info(f"Initialized {broker_name} broker")
-                else:
-                    logger.warning(f"Failed to initialize {broker_name} broker")
-            except Exception as e:
-                logger.error(f"Error initializing {broker_name}: {e}")
+        """Initialize all broker connections and start the ingestion pipeline"""
+        await self.persistence.start()
+        await self.pipeline.start()
+        await self.reference_cache.start()
+        await self.position_book.start()
+        await self.pnl_tracker.start()
+        if self.tick_store:
+            await self.tick_store.start()
+        
+        # Brokers connect in parallel, each bounded by BROKER_CONNECT_TIMEOUT
+        await self.connector.initialize()
     
     async def shutdown(self):
-        """Shutdown all broker connections"""
-        for broker_name, broker in self.brokers.items():
-            try:
-                await broker.disconnect()
-                logger.info(f"Disconnected {broker_name} broker")
-            except Exception as e:
-                logger.error(f"Error disconnecting {broker_name}: {e}")
+        """Drain the ingestion pipeline and shutdown all broker connections"""
+        await self.pipeline.stop(drain_timeout=settings.SIGNAL_DRAIN_TIMEOUT)
+        await self.lanes.stop(drain_timeout=settings.SIGNAL_DRAIN_TIMEOUT)
+        await self.persistence.stop()
+        await self.reference_cache.stop()
+        await self.position_book.stop()
+        await self.pnl_tracker.stop()
+        await self.market_data.stop()
+        if self.tick_store:
+            await self.tick_store.stop()
+        
+        await self.connector.shutdown()
+    
+    async def admit_webhook(self, webhook_request: WebhookRequest):
+        """Queue a webhook on the ingestion pipeline, holding a slot on its execution lane
+        
+        Raises PipelineFullError/PipelineUnavailableError when the pipeline can't
+        take it and LaneFullError when its (broker, account) lane is full, so
+        overload is refused before the webhook is acknowledged.
+        """
+        signal_request = await self._parse_webhook_payload(webhook_request.payload)
+        lane = None
+        if signal_request is not None:
+            lane = self.lanes.reserve(signal_request.broker, signal_request.account_id)
+        try:
+            self.pipeline.submit((webhook_request, signal_request, lane))
+        except Exception:
+            if lane is not None:
+                lane.release()
+            raise
     
-    async def process_signal(self, signal_request: SignalRequest) -> SignalResponse:
-        """Process trading signal and route to appropriate broker"""
+    async def _process_admitted(self, item):
+        """Pipeline handler for webhooks accepted by admit_webhook"""
+        webhook_request, signal_request, lane = item
+        await self.process_webhook(webhook_request, wait=False, signal_request=signal_request, lane=lane)
+    
+    async def process_signal(
+        self,
+        signal_request: SignalRequest,
+        wait: bool = True,
+        lane: Optional[ExecutionLane] = None
+    ) -> SignalResponse:
+        """Process trading signal and route to appropriate broker
+        
+        Validation and execution run on the (broker, account) execution lane, so
+        signals for one account execute in arrival order while other accounts
+        and brokers proceed in parallel. With wait=False the signal is queued on
+        its lane and a "queued" response is returned immediately. lane is one
+        the caller already reserved a slot on.
+        """
         try:
             # Log signal
-            signal_id = await self._log_signal(signal_request)
+            with self.pipeline.metrics.stage("log_signal"):
+                signal_id = await self._log_signal(signal_request)
+            
+            try:
+                if lane is not None:
+                    lane_result = lane.submit(self._run_signal, signal_request, signal_id, reserved=True)
+                    lane = None
+                else:
+                    lane_result = self.lanes.submit(
+                        signal_request.broker,
+                        signal_request.account_id,
+                        self._run_signal,
+                        signal_request,
+                        signal_id
+                    )
+            except LaneFullError as e:
+                logger.warning(str(e))
+                await self._update_signal_status(signal_id, {"success": False, "error": str(e)})
+                return SignalResponse(
+                    success=False,
+                    signal_id=signal_id,
+                    error=str(e),
+                    timestamp=datetime.now()
+                )
+            
+            if not wait:
+                return SignalResponse(
+                    success=True,
+                    signal_id=signal_id,
+                    broker=signal_request.broker,
+                    status="queued",
+                    timestamp=datetime.now()
+                )
+            
+            return await lane_result
+            
+        except Exception as e:
+            logger.error(f"Error processing signal: {e}")
+            return SignalResponse(
+                success=False,
+                error=str(e),
+                timestamp=datetime.now()
+            )
+        finally:
+            # A reservation not handed to its lane is given back
+            if lane is not None:
+                lane.release()
+    
+    async def _run_signal(self, signal_request: SignalRequest, signal_id: str) -> SignalResponse:
+        """Validate, execute and record a signal (runs inside its execution lane)"""
+        try:
+            stage = self.pipeline.metrics.stage
             
             # Validate signal
-            validation_result = await self._validate_signal(signal_request)
+            with stage("validate"):
+                validation_result = await self._validate_signal(signal_request)
             if not validation_result["valid"]:
                 return SignalResponse(
                     success=False,
@@ -76,10 +246,16 @@ class SignalProcessor:
                 )
             
             # Route signal to broker
-            execution_result = await self._execute_signal(signal_request, signal_id)
+            with stage("execute"):
+                execution_result = await self._execute_signal(signal_request, signal_id)
+            
+            # Brokers without position streams only learn about the fill over REST
+            if execution_result["success"] and not self.brokers[signal_request.broker].streams_positions:
+                self.position_book.mark_stale(signal_request.broker, signal_request.account_id)
             
             # Update signal status
-            await self._update_signal_status(signal_id, execution_result)
+            with stage("update_status"):
+                await self._update_signal_status(signal_id, execution_result)
             
             return SignalResponse(
                 success=execution_result["success"],
@@ -92,61 +268,64 @@ class SignalProcessor:
             )
             
         except Exception as e:
-            logger.error(f"Error processing signal: {e}")
+            logger.error(f"Error processing signal {signal_id}: {e}")
             return SignalResponse(
                 success=False,
+                signal_id=signal_id,
                 error=str(e),
                 timestamp=datetime.now()
             )
     
     async def _log_signal(self, signal_request: SignalRequest) -> str:
-        """Log signal to database"""
+        """Log signal to database (buffered by the write-behind persistence layer)"""
         try:
-            db = next(get_db())
+            def field(name, default=None):
+                if isinstance(signal_request, dict):
+                    return signal_request.get(name, default)
+                return getattr(signal_request, name, default)
             
             # Extract strategy info if present
-            strategy_info = {}
-            if isinstance(signal_request, dict) and "strategy_info" in signal_request:
-                strategy_info = signal_request["strategy_info"]
-            elif hasattr(signal_request, "strategy_info"):
-                strategy_info = signal_request.strategy_info or {}
-            
-            signal = Signal(
-                broker=signal_request.broker if hasattr(signal_request, "broker") else signal_request.get("broker"),
-                account_id=signal_request.account_id if hasattr(signal_request, "account_id") else signal_request.get("account_id"),
-                symbol=signal_request.symbol if hasattr(signal_request, "symbol") else signal_request.get("symbol"),
-                action=signal_request.action if hasattr(signal_request, "action") else signal_request.get("action"),
-                quantity=signal_request.quantity if hasattr(signal_request, "quantity") else signal_request.get("quantity"),
-                price=signal_request.price if hasattr(signal_request, "price") else signal_request.get("price"),
-                stop_loss=signal_request.stop_loss if hasattr(signal_request, "stop_loss") else signal_request.get("stop_loss"),
-                take_profit=signal_request.take_profit if hasattr(signal_request, "take_profit") else signal_request.get("take_profit"),
-                magic_number=signal_request.magic_number if hasattr(signal_request, "magic_number") else signal_request.get("magic_number"),
-                comment=signal_request.comment if hasattr(signal_request, "comment") else signal_request.get("comment"),
-                source=signal_request.source if hasattr(signal_request, "source") else signal_request.get("source", "unknown"),
-                status="pending",
+            strategy_info = field("strategy_info") or {}
+            
+            signal_id = f"sig_{uuid.uuid4().hex}"
+            created_at = datetime.now()
+            source = field("source") or "unknown"
+            
+            self.persistence.insert(Signal.__table__, {
+                "signal_id": signal_id,
+                "source": source if source in SIGNAL_SOURCES else SignalSource.API.value,
+                "symbol": field("symbol"),
+                "action": field("action"),
+                "volume": field("quantity"),
+                "price": field("price"),
+                "stop_loss": field("stop_loss"),
+                "take_profit": field("take_profit"),
+                "comment": field("comment"),
+                "status": "pending",
+                "target_accounts": [field("account_id")],
+                "signal_data": {
+                    "broker": field("broker"),
+                    "account_id": field("account_id"),
+                    "magic_number": field("magic_number"),
+                    "source": source
+                },
                 # Strategy tracking fields
-                strategy_id=strategy_info.get("strategy_id"),
-                strategy_version=strategy_info.get("strategy_version"),
-                strategy_name=strategy_info.get("strategy_name"),
-                strategy_source="tradingview" if strategy_info else "manual",
-                created_at=datetime.now()
-            )
-            
-            db.add(signal)
-            db.commit()
-            db.refresh(signal)
-            
-            signal_id = str(signal.id)
+                "strategy_id": strategy_info.get("strategy_id") or field("strategy_id"),
+                "strategy_version": strategy_info.get("strategy_version") or field("strategy_version"),
+                "strategy_name": strategy_info.get("strategy_name") or field("strategy_name"),
+                "strategy_source": "tradingview" if strategy_info else "manual",
+                "created_at": created_at
+            })
             
             # Also cache to Redis
             await redis_client.set(
                 f"signal:{signal_id}",
-                json.dumps({
+                {
                     "id": signal_id,
                     "status": "pending",
-                    "created_at": signal.created_at.isoformat()
-                }),
-                ex=3600
+                    "created_at": created_at.isoformat()
+                },
+                expire=3600
             )
             
             return signal_id
@@ -165,25 +344,23 @@ class SignalProcessor:
                     "error": f"Unsupported broker: {signal_request.broker}"
                 }
             
-            # Check if broker is connected
-            broker = self.brokers[signal_request.broker]
-            if not broker.is_connected:
+            # Check if broker is connected (lazy brokers connect here on first use)
+            if not await self.connector.ensure_ready(signal_request.broker):
                 return {
                     "valid": False,
                     "error": f"Broker {signal_request.broker} is not connected"
                 }
             
-            # Validate account
-            account = await broker.get_account_info(signal_request.account_id)
+            # Validate account (short-TTL cache, dropped on streamed account events)
+            account = await self.reference_cache.get_account(signal_request.broker, signal_request.account_id)
             if not account:
                 return {
                     "valid": False,
                     "error": f"Account {signal_request.account_id} not found"
                 }
             
-            # Validate symbol
-            symbols = await broker.get_symbols()
-            if signal_request.symbol not in symbols:
+            # Validate symbol against the cached symbol universe
+            if not await self.reference_cache.has_symbol(signal_request.broker, signal_request.symbol):
                 return {
                     "valid": False,
                     "error": f"Symbol {signal_request.symbol} not available"
@@ -212,12 +389,11 @@ class SignalProcessor:
             if not settings.RISK_MANAGEMENT_ENABLED:
                 return {"passed": True}
             
-            # Get current positions
-            broker = self.brokers[signal_request.broker]
-            positions = await broker.get_positions(signal_request.account_id)
+            # Current positions from the live position book (REST only on first use)
+            book = await self.position_book.get_book(signal_request.broker, signal_request.account_id)
             
-            # Calculate total exposure
-            total_exposure = sum(pos.size for pos in positions if pos.symbol == signal_request.symbol)
+            # Total exposure on the symbol
+            total_exposure = book.exposure(signal_request.symbol)
             
             # Check maximum position size
             if signal_request.quantity > settings.MAX_POSITION_SIZE:
@@ -226,8 +402,17 @@ class SignalProcessor:
                     "error": f"Position size {signal_request.quantity} exceeds maximum {settings.MAX_POSITION_SIZE}"
                 }
             
-            # Check daily loss limits (would need to implement daily P&L tracking)
-            # This is a placeholder for more sophisticated risk management
+            # Check per-symbol exposure
+            if settings.MAX_SYMBOL_EXPOSURE is not None and total_exposure + signal_request.quantity > settings.MAX_SYMBOL_EXPOSURE:
+                return {
+                    "passed": False,
+                    "error": f"Exposure on {signal_request.symbol} would reach {total_exposure + signal_request.quantity}, maximum is {settings.MAX_SYMBOL_EXPOSURE}"
+                }
+            
+            # Check daily loss and drawdown limits against the running session P&L
+            pnl_check = self.pnl_tracker.check(signal_request.broker, signal_request.account_id)
+            if not pnl_check["passed"]:
+                return pnl_check
             
             return {"passed": True}
             
@@ -291,40 +476,49 @@ class SignalProcessor:
     async def _update_signal_status(self, signal_id: str, execution_result: Dict[str, Any]):
         """Update signal status in database and cache"""
         try:
-            db = next(get_db())
-            
-            signal = db.query(Signal).filter(Signal.id == int(signal_id)).first()
-            if signal:
-                signal.status = "executed" if execution_result["success"] else "failed"
-                signal.order_id = execution_result.get("order_id")
-                signal.error_message = execution_result.get("error")
-                signal.executed_at = datetime.now()
-                
-                db.commit()
+            status = "executed" if execution_result["success"] else "failed"
+            
+            # Merged into the pending insert when the signal row has not been flushed yet
+            self.persistence.update(Signal.__table__, signal_id, {
+                "status": status,
+                "error_message": execution_result.get("error"),
+                "processed_at": datetime.now()
+            })
             
             # Update Redis cache
             await redis_client.set(
                 f"signal:{signal_id}",
-                json.dumps({
+                {
                     "id": signal_id,
-                    "status": signal.status,
+                    "status": status,
                     "order_id": execution_result.get("order_id"),
                     "updated_at": datetime.now().isoformat()
-                }),
-                ex=3600
+                },
+                expire=3600
             )
             
         except Exception as e:
             logger.error(f"Error updating signal status: {e}")
     
-    async def process_webhook(self, webhook_request: WebhookRequest) -> Dict[str, Any]:
-        """Process webhook signal"""
+    async def process_webhook(
+        self,
+        webhook_request: WebhookRequest,
+        wait: bool = True,
+        signal_request: Optional[SignalRequest] = None,
+        lane: Optional[ExecutionLane] = None
+    ) -> Dict[str, Any]:
+        """Process webhook signal (signal_request and lane come from admit_webhook)"""
         try:
+            stage = self.pipeline.metrics.stage
+            
             # Log webhook
-            webhook_id = await self._log_webhook(webhook_request)
+            with stage("log_webhook"):
+                webhook_id = await self._log_webhook(webhook_request)
             
             # Parse webhook payload
-            signal_request = await self._parse_webhook_payload(webhook_request.payload)
+            if signal_request is None:
+                with stage("parse"):
+                    signal_request = await self._parse_webhook_payload(webhook_request.payload)
             
             if not signal_request:
                 return {
@@ -333,8 +527,9 @@ class SignalProcessor:
                     "error": "Failed to parse webhook payload"
                 }
             
-            # Process the signal
-            signal_response = await self.process_signal(signal_request)
+            # Process the signal (which takes over the lane reservation)
+            lane, reserved = None, lane
+            signal_response = await self.process_signal(signal_request, wait=wait, lane=reserved)
             
             return {
                 "success": signal_response.success,
@@ -350,27 +545,26 @@ class SignalProcessor:
                 "success": False,
                 "error": str(e)
             }
+        finally:
+            if lane is not None:
+                lane.release()
     
     async def _log_webhook(self, webhook_request: WebhookRequest) -> str:
-        """Log webhook to database"""
+        """Log webhook to database (buffered by the write-behind persistence layer)"""
         try:
-            db = next(get_db())
-            
-            webhook_log = WebhookLog(
-                source=webhook_request.source,
-                payload=json.dumps(webhook_request.payload),
-                headers=json.dumps(webhook_request.headers),
-                ip_address=webhook_request.ip_address,
-                user_agent=webhook_request.user_agent,
-                status="received",
-                created_at=datetime.now()
-            )
+            webhook_id = f"wh_{uuid.uuid4().hex}"
             
-            db.add(webhook_log)
-            db.commit()
-            db.refresh(webhook_log)
+            self.persistence.insert(WebhookLog.__table__, {
+                "webhook_id": webhook_id,
+                "source": webhook_request.source,
+                "payload": json.dumps(webhook_request.payload),
+                "source_ip": getattr(webhook_request, "ip_address", None),
+                "user_agent": getattr(webhook_request, "user_agent", None),
+                "processed": False,
+                "created_at": datetime.now()
+            })
             
-            return str(webhook_log.id)
+            return webhook_id
             
         except Exception as e:
             logger.error(f"Error logging webhook: {e}")
@@ -436,23 +630,30 @@ class SignalProcessor:
     async def get_signal_history(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get signal history"""
         try:
-            db = next(get_db())
-            
-            signals = db.query(Signal).order_by(Signal.created_at.desc()).limit(limit).all()
+            async with get_async_session() as db:
+                result = await db.execute(
+                    select(Signal).order_by(Signal.created_at.desc()).limit(limit)
+                )
+                signals = result.scalars().all()
             
+            # Broker and account are kept in signal_data (see _log_signal)
             return [
                 {
-                    "id": str(signal.id),
-                    "broker": signal.broker,
-                    "account_id": signal.account_id,
+                    "id": signal.signal_id,
+                    "broker": (signal.signal_data or {}).get("broker"),
+                    "account_id": (signal.signal_data or {}).get("account_id"),
+                    "source": signal.source.value if signal.source else None,
                     "symbol": signal.symbol,
                     "action": signal.action,
-                    "quantity": signal.quantity,
+                    "volume": signal.volume,
                     "price": signal.price,
+                    "stop_loss": signal.stop_loss,
+                    "take_profit": signal.take_profit,
                     "status": signal.status,
-                    "order_id": signal.order_id,
-                    "created_at": signal.created_at.isoformat(),
-                    "executed_at": signal.executed_at.isoformat() if signal.executed_at else None
+                    "error_message": signal.error_message,
+                    "strategy_id": signal.strategy_id,
+                    "created_at": signal.created_at.isoformat() if signal.created_at else None,
+                    "processed_at": signal.processed_at.isoformat() if signal.processed_at else None
                 }
                 for signal in signals
             ]
@@ -464,17 +665,22 @@ class SignalProcessor:
     async def get_webhook_history(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get webhook history"""
         try:
-            db = next(get_db())
-            
-            webhooks = db.query(WebhookLog).order_by(WebhookLog.created_at.desc()).limit(limit).all()
+            async with get_async_session() as db:
+                result = await db.execute(
+                    select(WebhookLog).order_by(WebhookLog.created_at.desc()).limit(limit)
+                )
+                webhooks = result.scalars().all()
             
             return [
                 {
-                    "id": str(webhook.id),
+                    "id": webhook.webhook_id,
                     "source": webhook.source,
-                    "status": webhook.status,
-                    "ip_address": webhook.ip_address,
-                    "created_at": webhook.created_at.isoformat()
+                    "source_ip": webhook.source_ip,
+                    "response_status": webhook.response_status,
+                    "processed": webhook.processed,
+                    "error_message": webhook.error_message,
+                    "processing_time_ms": webhook.processing_time_ms,
+                    "created_at": webhook.created_at.isoformat() if webhook.created_at else None
                 }
                 for webhook in webhooks
             ]
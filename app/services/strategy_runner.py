@@ -2,88 +2,182 @@
 In-House Strategy Runner Service
 Runs trading strategies and emits signals using the same schema as webhooks
 """
-import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+import math
+import time
+import uuid
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.db.database import get_async_session
 from app.models.models import AccountStrategy, Strategy, Account, Signal
 from app.models.pydantic_schemas import SignalRequest
 from app.services.signal_processor import signal_processor
+from app.services.account_directory import account_directory
+from app.services.indicators import NUMPY_AVAILABLE, ma_cross_grid, ma_cross_latest, resample_ohlcv
+from app.services.strategy_scheduler import GroupEvaluator, StrategyScheduler, StrategySubscription
+from app.services.tick_store import interval_seconds
+from app.cache.redis_client import redis_client
 from app.core.config import settings
+from app.core.leader_lease import LeaderLease
+from app.core.websocket_manager import ws_manager
+
+if NUMPY_AVAILABLE:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Redis key of the lease that picks the one process running scheduled strategies
+SCHEDULER_LEASE_KEY = "strategy_scheduler:leader"
+# Redis key bumped on every strategy config change so every process drops its cache
+CONFIG_VERSION_KEY = "strategy_scheduler:config_version"
+
 class StrategyRunner:
     """Runs in-house trading strategies"""
     
-    def __init__(self):
-        self.running_strategies = {}
-        self.enabled_accounts = set()
+    def __init__(
+        self,
+        history_source: Optional[Callable[..., Any]] = None,
+        signal_sink: Optional[Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = None
+    ):
+        # Strategy id -> coroutine(account_id, params); shared with the backtester
+        self.strategies = {
+            "ma_cross": self._run_ma_cross_strategy
+        }
+        # Backtests replace where prices come from and where signals go
+        self.history_source = history_source
+        self.signal_sink = signal_sink
+        # Periodic execution: one evaluation per strategy, symbol and bar for all enabled accounts
+        self.scheduler = StrategyScheduler(
+            load=self._load_subscriptions,
+            history=self._price_history,
+            emit=self._emit_signal,
+            tick=settings.STRATEGY_SCHEDULER_TICK,
+            settle=settings.STRATEGY_BAR_SETTLE,
+            config_ttl=settings.STRATEGY_CONFIG_TTL,
+            workers=settings.STRATEGY_EVAL_WORKERS,
+            # Live runs keep the scheduled symbols' quotes streaming; backtests replay history
+            on_symbols=partial(signal_processor.market_data.track, "strategies") if history_source is None else None,
+            config_version=partial(redis_client.get, CONFIG_VERSION_KEY) if history_source is None else None
+        )
+        self.scheduler.register("ma_cross", GroupEvaluator(
+            window=lambda params: params.get("slow_period", 20) + 1,
+            key=lambda params: (params.get("fast_period", 10), params.get("slow_period", 20)),
+            evaluate=ma_cross_latest,
+            signal=lambda subscription, cross: self._ma_cross_signal(
+                subscription.account_id, subscription.symbol, "BUY" if cross > 0 else "SELL", subscription.params
+            )
+        ))
         
     async def initialize(self):
         """Initialize strategy runner"""
         logger.info("Initializing strategy runner...")
-        # Load enabled strategies from database
-        await self._load_enabled_strategies()
-        logger.info("Strategy runner initialized")
+        # Every replica serves on-demand runs; scheduled runs need the cluster-wide lease
+        if settings.STRATEGY_LEADER_LEASE_TTL > 0:
+            if redis_client.redis_client is not None:
+                self.scheduler.lease = LeaderLease(
+                    redis_client.redis_client, SCHEDULER_LEASE_KEY, settings.STRATEGY_LEADER_LEASE_TTL
+                )
+                self.scheduler.leader = False
+            else:
+                logger.warning("Redis unavailable: running scheduled strategies without a leader lease")
+        # Load enabled strategies from database and start scheduling them
+        await self.scheduler.start()
+        logger.info(f"Strategy runner initialized with {len(self.scheduler.subscriptions)} enabled strategies")
     
-    async def _load_enabled_strategies(self):
-        """Load enabled strategies from database"""
-        try:
-            db = next(get_db())
-            enabled = db.query(AccountStrategy).filter(
-                AccountStrategy.is_enabled == True
-            ).all()
-            
-            for account_strategy in enabled:
-                account_id = account_strategy.account_id
-                strategy = db.query(Strategy).filter(
-                    Strategy.id == account_strategy.strategy_id
-                ).first()
-                
-                if strategy and strategy.is_active:
-                    self.enabled_accounts.add(account_id)
-                    logger.info(f"Loaded enabled strategy {strategy.strategy_id} for account {account_id}")
-        except Exception as e:
-            logger.error(f"Error loading enabled strategies: {e}")
+    async def shutdown(self):
+        """Stop periodic strategy execution"""
+        await self.scheduler.stop()
+    
+    async def _load_subscriptions(
+        self,
+        strategy_id: Optional[str] = None,
+        account_id: Optional[int] = None
+    ) -> List[StrategySubscription]:
+        """Enabled, active strategy subscriptions of active accounts, in one query"""
+        query = select(AccountStrategy, Strategy, Account).join(
+            Strategy, AccountStrategy.strategy_id == Strategy.id
+        ).join(
+            Account, AccountStrategy.account_id == Account.id
+        ).where(
+            AccountStrategy.is_enabled == True,
+            Strategy.is_active == True,
+            Account.is_active == True
+        )
+        if strategy_id is not None:
+            query = query.where(Strategy.strategy_id == strategy_id)
+        if account_id is not None:
+            query = query.where(AccountStrategy.account_id == account_id)
+        
+        async with get_async_session() as db:
+            rows = (await db.execute(query)).all()
+        
+        subscriptions = []
+        for account_strategy, strategy, account in rows:
+            broker = account.broker.value if hasattr(account.broker, "value") else str(account.broker)
+            params = {**(strategy.parameters or {}), **(account_strategy.parameters or {}), "broker": broker}
+            if account_strategy.schedule_interval:
+                params["interval"] = account_strategy.schedule_interval
+            subscriptions.append(StrategySubscription(
+                strategy_id=strategy.strategy_id,
+                account_id=account.id,
+                broker=broker,
+                symbol=params.get("symbol", "EURUSD"),
+                interval=params.get("interval", "1m"),
+                params=params,
+                paused=account_strategy.is_paused is not False  # unset rows never trade on their own
+            ))
+        return subscriptions
+    
+    async def invalidate(self, strategy_id: Optional[str] = None, account_id: Optional[int] = None):
+        """Drop cached strategy config in this process and, through Redis, in every other"""
+        self.scheduler.invalidate(strategy_id, account_id)
+        await redis_client.set(CONFIG_VERSION_KEY, uuid.uuid4().hex, expire=int(settings.STRATEGY_CONFIG_TTL))
+    
+    async def _set_schedule(
+        self,
+        strategy_id: str,
+        account_id: int,
+        paused: bool,
+        interval: Optional[str] = None
+    ) -> bool:
+        """Store a subscription's paused state and interval override on its AccountStrategy row"""
+        if interval is not None:
+            interval_seconds(interval)  # ValueError for intervals the scheduler can't run
+        query = select(AccountStrategy).join(
+            Strategy, AccountStrategy.strategy_id == Strategy.id
+        ).where(
+            Strategy.strategy_id == strategy_id,
+            AccountStrategy.account_id == account_id
+        )
+        async with get_async_session() as db:
+            account_strategy = (await db.execute(query)).scalars().first()
+            if account_strategy is None:
+                return False
+            account_strategy.is_paused = paused
+            if interval is not None:
+                account_strategy.schedule_interval = interval
+            await db.commit()
+        await self.invalidate(strategy_id, account_id)
+        return True
     
     async def run_strategy(self, strategy_id: str, account_id: int, params: Optional[Dict[str, Any]] = None):
         """Run a specific strategy for an account"""
         try:
-            db = next(get_db())
-            
-            # Verify strategy is enabled for account
-            account_strategy = db.query(AccountStrategy).filter(
-                AccountStrategy.account_id == account_id,
-                AccountStrategy.is_enabled == True
-            ).join(Strategy).filter(
-                Strategy.strategy_id == strategy_id
-            ).first()
-            
-            if not account_strategy:
+            # Enabled/active checks and stored parameters come from the scheduler's config cache
+            subscription = await self.scheduler.get_subscription(strategy_id, account_id)
+            if subscription is None:
                 logger.warning(f"Strategy {strategy_id} not enabled for account {account_id}")
                 return {"success": False, "error": "Strategy not enabled"}
             
-            strategy = db.query(Strategy).filter(
-                Strategy.strategy_id == strategy_id
-            ).first()
-            
-            if not strategy or not strategy.is_active:
-                return {"success": False, "error": "Strategy not active"}
-            
-            # Get account
-            account = db.query(Account).filter(Account.id == account_id).first()
-            if not account:
-                return {"success": False, "error": "Account not found"}
-            
             # Run strategy based on type
-            if strategy.strategy_id == "ma_cross":
-                return await self._run_ma_cross_strategy(account_id, params or {})
-            else:
+            handler = self.strategies.get(strategy_id)
+            if handler is None:
                 return {"success": False, "error": f"Unknown strategy: {strategy_id}"}
+            return await handler(account_id, {**subscription.params, **(params or {})})
                 
         except Exception as e:
             logger.error(f"Error running strategy {strategy_id}: {e}")
@@ -97,32 +191,17 @@ class StrategyRunner:
             slow_period = params.get("slow_period", 20)
             symbol = params.get("symbol", "EURUSD")
             
-            logger.info(f"Running MA Cross strategy for account {account_id}: {symbol}, fast={fast_period}, slow={slow_period}")
+            logger.debug(f"Running MA Cross strategy for account {account_id}: {symbol}, fast={fast_period}, slow={slow_period}")
             
-            # In a real implementation, this would:
-            # 1. Fetch historical price data
-            # 2. Calculate moving averages
-            # 3. Detect crossovers
-            # 4. Generate signals
+            closes = self._price_history(symbol, params.get("interval", "1m"), slow_period + 1, params.get("broker"))
+            if closes is None:
+                return {"success": False, "error": f"Insufficient price history for {symbol}"}
             
-            # For now, this is a placeholder that generates a test signal
-            # In production, this would connect to market data feeds
+            crosses = self.evaluate_ma_cross({symbol: closes}, [fast_period], [slow_period])
+            if not crosses:
+                return {"success": True, "strategy_id": "ma_cross", "message": "No crossover"}
             
-            # Simulate signal generation
-            signal_data = {
-                "strategy_id": "ma_cross",
-                "strategy_version": "1.0.0",
-                "strategy_name": "Moving Average Cross",
-                "strategy_source": "inhouse",
-                "symbol": symbol,
-                "action": "BUY",  # Would be determined by crossover logic
-                "volume": params.get("volume", 0.01),
-                "price": None,  # Market price
-                "stop_loss": params.get("stop_loss"),
-                "take_profit": params.get("take_profit"),
-                "account_id": account_id,
-                "source": "inhouse"
-            }
+            signal_data = self._ma_cross_signal(account_id, symbol, crosses[0][3], params)
             
             # Emit signal through signal processor
             result = await self._emit_signal(signal_data)
@@ -138,17 +217,88 @@ class StrategyRunner:
             logger.error(f"Error in MA Cross strategy: {e}")
             return {"success": False, "error": str(e)}
     
+    def _ma_cross_signal(self, account_id: int, symbol: str, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """MA Cross signal in the webhook signal schema"""
+        return {
+            "strategy_id": "ma_cross",
+            "strategy_version": "1.0.0",
+            "strategy_name": "Moving Average Cross",
+            "strategy_source": "inhouse",
+            "symbol": symbol,
+            "action": action,
+            "volume": params.get("volume", 0.01),
+            "price": None,  # Market price
+            "stop_loss": params.get("stop_loss"),
+            "take_profit": params.get("take_profit"),
+            "account_id": account_id,
+            "broker": params.get("broker"),
+            "source": "inhouse"
+        }
+    
+    def evaluate_ma_cross(
+        self,
+        closes: Dict[str, Any],
+        fast_periods: Sequence[int],
+        slow_periods: Sequence[int]
+    ) -> List[Tuple[str, int, int, str]]:
+        """
+        Crossovers on the latest bar for every symbol x (fast, slow) pair
+        All combinations are evaluated in one vectorized pass over the last
+        max(slow) + 1 closes of each symbol; returns (symbol, fast, slow, action)
+        """
+        if not NUMPY_AVAILABLE or not closes:
+            return []
+        
+        window = max(slow_periods) + 1
+        symbols = [symbol for symbol, series in closes.items() if len(series) >= window]
+        if not symbols:
+            return []
+        block = np.vstack([np.asarray(closes[symbol], dtype=float)[-window:] for symbol in symbols])
+        latest = ma_cross_grid(block, fast_periods, slow_periods)[:, -1]
+        
+        pairs = len(fast_periods)
+        return [
+            (symbols[row // pairs], fast_periods[row % pairs], slow_periods[row % pairs], "BUY" if latest[row] > 0 else "SELL")
+            for row in np.flatnonzero(latest)
+        ]
+    
+    def _price_history(self, symbol: str, interval: str, bars: int, broker: Optional[str] = None):
+        """
+        Last closes for symbol from the tick store
+        Uses stored bars, else bars resampled from the broker's recorded ticks,
+        ending at the last closed bar so the bar still forming is never used;
+        None when the store is disabled or holds fewer than bars closes
+        """
+        if self.history_source is not None:
+            return self.history_source(symbol, interval, bars, broker)
+        store = signal_processor.tick_store
+        if store is None:
+            return None
+        seconds = interval_seconds(interval)
+        end = math.floor(time.time() / seconds) * seconds
+        start = end - seconds * bars * 3  # headroom for gaps in trading
+        
+        closes = store.bars(symbol, interval, start, end)["close"]
+        if len(closes) < bars and broker:
+            ticks = store.ticks(f"{broker}:{symbol}", start, end)
+            price = np.where(np.isnan(ticks["last"]), (ticks["bid"] + ticks["ask"]) / 2, ticks["last"])
+            closes = resample_ohlcv(ticks["ts"], price, ticks["size"], seconds)["close"]
+        return closes[-bars:] if len(closes) >= bars else None
+    
     async def _emit_signal(self, signal_data: Dict[str, Any]):
         """Emit signal using the same path as webhook execution"""
+        if self.signal_sink is not None:
+            return await self.signal_sink(signal_data)
         try:
-            db = next(get_db())
-            
             # Create signal request compatible with signal processor
             from app.models.pydantic_schemas import SignalRequest
             
-            # Get account to determine broker
-            account = db.query(Account).filter(Account.id == signal_data.get("account_id")).first()
-            broker = account.broker.value if account else "mt4"
+            # Scheduled signals carry the broker from the config cache; otherwise look it up
+            broker = signal_data.get("broker")
+            if not broker:
+                async with get_async_session() as db:
+                    account = await db.get(Account, signal_data.get("account_id"))
+                broker = account.broker.value if account else "mt4"
             
             signal_request = SignalRequest(
                 broker=broker,
@@ -167,48 +317,40 @@ class StrategyRunner:
             
             # Process signal
             result = await signal_processor.process_signal(signal_request)
-            
-            return {
+            outcome = {
                 "signal_id": result.signal_id if hasattr(result, "signal_id") else None,
                 "success": result.success if hasattr(result, "success") else False
             }
+            # Shown to clients subscribed to the strategy, account or symbol topics, with the market
+            # it fired at when a current quote is cached (never a REST call on the signal path)
+            quote = signal_processor.market_data.latest(broker, signal_request.symbol)
+            reference_price = quote.mid if quote is not None else None
+            owner = account_directory.owner_by_pk(signal_data.get("account_id"))
+            if owner is not None:
+                ws_manager.topics.publish("signal", {**signal_data, "broker": broker, "reference_price": reference_price, **outcome}, owner)
+            
+            return outcome
             
         except Exception as e:
             logger.error(f"Error emitting signal: {e}")
             return {"success": False, "error": str(e)}
     
-    async def start_periodic_execution(self, strategy_id: str, account_id: int, interval_seconds: int = 60):
-        """Start periodic execution of a strategy"""
-        task_key = f"{strategy_id}_{account_id}"
-        
-        if task_key in self.running_strategies:
-            logger.warning(f"Strategy {strategy_id} already running for account {account_id}")
-            return
+    async def start_periodic_execution(self, strategy_id: str, account_id: int, interval_seconds: int = 60) -> bool:
+        """Schedule an enabled strategy for an account on interval_seconds bars"""
+        subscription = await self.scheduler.get_subscription(strategy_id, account_id)
+        if subscription is None:
+            logger.warning(f"Strategy {strategy_id} not enabled for account {account_id}")
+            return False
         
-        async def periodic_task():
-            while True:
-                try:
-                    await self.run_strategy(strategy_id, account_id)
-                    await asyncio.sleep(interval_seconds)
-                except asyncio.CancelledError:
-                    break
-                except Exception as e:
-                    logger.error(f"Error in periodic strategy execution: {e}")
-                    await asyncio.sleep(interval_seconds)
-        
-        task = asyncio.create_task(periodic_task())
-        self.running_strategies[task_key] = task
+        if not await self._set_schedule(strategy_id, account_id, paused=False, interval=f"{interval_seconds}s"):
+            return False
         logger.info(f"Started periodic execution of {strategy_id} for account {account_id}")
+        return True
     
     async def stop_periodic_execution(self, strategy_id: str, account_id: int):
-        """Stop periodic execution of a strategy"""
-        task_key = f"{strategy_id}_{account_id}"
-        
-        if task_key in self.running_strategies:
-            task = self.running_strategies[task_key]
-            task.cancel()
-            del self.running_strategies[task_key]
-            logger.info(f"Stopped periodic execution of {strategy_id} for account {account_id}")
+        """Stop periodic execution of a strategy (on-demand runs still work)"""
+        await self._set_schedule(strategy_id, account_id, paused=True)
+        logger.info(f"Stopped periodic execution of {strategy_id} for account {account_id}")
 
 # Global strategy runner instance
 strategy_runner = StrategyRunner()
@@ -0,0 +1,369 @@
+"""
+Strategy Scheduler
+Timer-wheel scheduling that evaluates each strategy once per bar per symbol for every subscribed account
+"""
+import asyncio
+import logging
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from app.core.leader_lease import LeaderLease
+from app.core.timer_wheel import TimerWheel
+from app.services.tick_store import interval_seconds
+
+logger = logging.getLogger(__name__)
+
+# Seconds before retrying a failed subscription load
+RELOAD_RETRY = 30.0
+
+# (strategy_id, symbol, interval): the unit of evaluation
+GroupKey = Tuple[str, str, str]
+SubscriptionKey = Tuple[str, int]
+
+
+class StrategySubscription:
+    """An account's enabled strategy with its resolved configuration"""
+
+    __slots__ = ("strategy_id", "account_id", "broker", "symbol", "interval", "params", "paused")
+
+    def __init__(self, strategy_id: str, account_id: int, broker: str, symbol: str, interval: str,
+                 params: Dict[str, Any], paused: bool = False):
+        self.strategy_id = strategy_id
+        self.account_id = account_id
+        self.broker = broker
+        self.symbol = symbol
+        self.interval = interval
+        self.params = params  # strategy defaults overlaid with the account's parameters
+        self.paused = paused  # kept for on-demand runs but not scheduled
+
+    @property
+    def key(self) -> SubscriptionKey:
+        return (self.strategy_id, self.account_id)
+
+    @property
+    def group(self) -> GroupKey:
+        return (self.strategy_id, self.symbol, self.interval)
+
+
+class GroupEvaluator:
+    """How a strategy is evaluated once for all accounts trading one symbol
+
+    Accounts whose params map to the same key share one result. evaluate
+    receives the closes and the distinct keys and returns one result per
+    key; it may run in a worker process, so it must be a picklable
+    module-level function. signal turns a truthy result into signal data.
+    """
+
+    __slots__ = ("window", "key", "evaluate", "signal")
+
+    def __init__(
+        self,
+        window: Callable[[Dict[str, Any]], int],
+        key: Callable[[Dict[str, Any]], Hashable],
+        evaluate: Callable[[Any, List[Hashable]], Sequence[Any]],
+        signal: Callable[[StrategySubscription, Any], Dict[str, Any]]
+    ):
+        self.window = window
+        self.key = key
+        self.evaluate = evaluate
+        self.signal = signal
+
+
+class StrategyScheduler:
+    """Runs every enabled strategy subscription from a single timer loop
+
+    Subscriptions are grouped by (strategy, symbol, interval). When a group's
+    bar closes it is evaluated once, with the distinct parameter sets of its
+    accounts batched into a single call. The call runs in the worker pool
+    when one is configured, and the results fan out as one signal per
+    account. Subscriptions are cached in memory: load() is called for a
+    full refresh every config_ttl seconds and for targeted reloads after
+    invalidate(). on_symbols receives the (broker, symbol) pairs of the
+    scheduled groups whenever they are reindexed.
+
+    With a lease only the process holding it evaluates groups, so replicas
+    don't emit the same signal once each; the others keep their config
+    cache for on-demand runs. config_version, when given, is polled every
+    tick and a changed value invalidates the whole cache, which lets a
+    change made through another process take effect here immediately.
+    """
+
+    def __init__(
+        self,
+        load: Callable[..., Awaitable[List[StrategySubscription]]],
+        history: Callable[[str, str, int, Optional[str]], Any],
+        emit: Callable[[Dict[str, Any]], Awaitable[Any]],
+        tick: float = 1.0,
+        slots: int = 3600,
+        settle: float = 1.0,
+        config_ttl: float = 300.0,
+        workers: int = 0,
+        on_symbols: Optional[Callable[[Set[Tuple[str, str]]], None]] = None,
+        lease: Optional[LeaderLease] = None,
+        config_version: Optional[Callable[[], Awaitable[Any]]] = None
+    ):
+        self.load = load
+        self.history = history
+        self.emit = emit
+        self.tick = tick
+        self.slots = slots
+        self.settle = settle
+        self.config_ttl = config_ttl
+        self.workers = workers
+        self.on_symbols = on_symbols
+        self.lease = lease
+        self.config_version = config_version
+        self.leader = lease is None
+        self.evaluators: Dict[str, GroupEvaluator] = {}
+        self.subscriptions: Dict[SubscriptionKey, StrategySubscription] = {}
+        self.groups: Dict[GroupKey, Dict[int, StrategySubscription]] = {}
+        self.wheel = TimerWheel(tick, slots)
+        self._invalidated: List[Tuple[Optional[str], Optional[int]]] = []
+        self._evaluating: Dict[GroupKey, asyncio.Task] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._next_reload = float("-inf")
+        self._seen_version: Any = None
+        self.evaluations = 0
+        self.signals = 0
+        self.no_history = 0
+        self.overruns = 0
+        self.errors = 0
+        self.reloads = 0
+        self.config_hits = 0
+        self.config_misses = 0
+        self.leadership_changes = 0
+
+    def register(self, strategy_id: str, evaluator: GroupEvaluator):
+        self.evaluators[strategy_id] = evaluator
+
+    # Lifecycle
+
+    async def start(self):
+        """Load every enabled subscription and start the timer loop"""
+        if self._loop_task is not None:
+            return
+        if self.workers > 0:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            await self.reload()
+            await self._lead()
+        except Exception as e:
+            # The loop keeps retrying; on-demand runs load their own config
+            self.errors += 1
+            logger.error(f"Failed to load strategy subscriptions: {e}")
+        self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = [task for task in (self._loop_task, *self._evaluating.values()) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        self._evaluating.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self.lease is not None:
+            await self.lease.release()
+            self.leader = False
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            await asyncio.sleep((math.floor(now / self.tick) + 1) * self.tick - now)
+            try:
+                await self._check_config_version()
+                if time.monotonic() >= self._next_reload:
+                    await self.reload()
+                elif self._invalidated:
+                    await self._apply_invalidations()
+                if await self._lead():
+                    self.run_due(time.time())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Strategy scheduler tick failed: {e}")
+
+    async def _lead(self) -> bool:
+        """Take or renew the lease; True while this process runs the schedule"""
+        if self.lease is None:
+            return True
+        leader = await self.lease.keep()
+        if leader != self.leader:
+            self.leader = leader
+            self.leadership_changes += 1
+            logger.info(f"Strategy scheduler {'leading' if leader else 'standing by'}")
+            # Start from the next bar close: the previous leader already evaluated the current one
+            self.wheel = TimerWheel(self.tick, self.slots)
+            self.groups = {}
+            self._reindex()
+        return leader
+
+    async def _check_config_version(self):
+        if self.config_version is None:
+            return
+        version = await self.config_version()
+        if version is None or version == self._seen_version:
+            return
+        if self._seen_version is not None:
+            self.invalidate()
+        self._seen_version = version
+
+    def run_due(self, now: float) -> List[GroupKey]:
+        """Start evaluating every group whose bar has closed by now"""
+        due = self.wheel.advance(now)
+        for group in due:
+            self._schedule(group, now)
+            if group in self._evaluating:
+                # Still evaluating the previous bar
+                self.overruns += 1
+                continue
+            task = asyncio.create_task(self.evaluate(group))
+            self._evaluating[group] = task
+            task.add_done_callback(lambda _, group=group: self._evaluating.pop(group, None))
+        return due
+
+    def _schedule(self, group: GroupKey, now: float):
+        seconds = interval_seconds(group[2])
+        self.wheel.schedule(group, (math.floor(now / seconds) + 1) * seconds + self.settle)
+
+    # Subscription cache
+
+    async def reload(self):
+        """Replace the cached subscriptions with a fresh full load"""
+        self._invalidated.clear()
+        self._next_reload = time.monotonic() + min(self.config_ttl, RELOAD_RETRY)
+        subscriptions = await self.load()
+        self.subscriptions = {subscription.key: subscription for subscription in subscriptions}
+        self._next_reload = time.monotonic() + self.config_ttl
+        self.reloads += 1
+        self._reindex()
+
+    def invalidate(self, strategy_id: Optional[str] = None, account_id: Optional[int] = None):
+        """Mark cached config stale after a strategy, account or enablement change"""
+        self._invalidated.append((strategy_id, account_id))
+
+    async def _apply_invalidations(self):
+        pending, self._invalidated = self._invalidated, []
+        if any(strategy_id is None and account_id is None for strategy_id, account_id in pending):
+            await self.reload()
+            return
+        for strategy_id, account_id in pending:
+            fresh = await self.load(strategy_id=strategy_id, account_id=account_id)
+            for key in [
+                key for key in self.subscriptions
+                if strategy_id in (None, key[0]) and account_id in (None, key[1])
+            ]:
+                del self.subscriptions[key]
+            self.subscriptions.update((subscription.key, subscription) for subscription in fresh)
+        self._reindex()
+
+    async def get_subscription(self, strategy_id: str, account_id: int) -> Optional[StrategySubscription]:
+        """Cached config for an enabled subscription; None when it is not enabled"""
+        if self._invalidated:
+            await self._apply_invalidations()
+        subscription = self.subscriptions.get((strategy_id, account_id))
+        if subscription is not None:
+            self.config_hits += 1
+            return subscription
+        self.config_misses += 1
+        fresh = await self.load(strategy_id=strategy_id, account_id=account_id)
+        if not fresh:
+            return None
+        self.subscriptions.update((s.key, s) for s in fresh)
+        self._reindex()
+        return self.subscriptions.get((strategy_id, account_id))
+
+    def _reindex(self):
+        groups: Dict[GroupKey, Dict[int, StrategySubscription]] = {}
+        if self.leader:
+            for subscription in self.subscriptions.values():
+                if subscription.paused or subscription.strategy_id not in self.evaluators:
+                    continue
+                groups.setdefault(subscription.group, {})[subscription.account_id] = subscription
+
+        now = time.time()
+        for group in self.groups.keys() - groups.keys():
+            self.wheel.cancel(group)
+        for group in groups.keys() - self.groups.keys():
+            try:
+                self._schedule(group, now)
+            except ValueError as e:
+                logger.error(f"Not scheduling {group[0]} on {group[1]}: {e}")
+        self.groups = groups
+        if self.on_symbols is not None:
+            self.on_symbols({
+                (subscription.broker, subscription.symbol)
+                for members in groups.values() for subscription in members.values()
+            })
+
+    # Evaluation
+
+    async def evaluate(self, group: GroupKey) -> int:
+        """Evaluate one group for the latest bar and emit its signals; returns signals emitted"""
+        members = list(self.groups.get(group, {}).values())
+        evaluator = self.evaluators.get(group[0])
+        if not members or evaluator is None:
+            return 0
+        strategy_id, symbol, interval = group
+
+        by_key: Dict[Hashable, List[StrategySubscription]] = {}
+        for subscription in members:
+            by_key.setdefault(evaluator.key(subscription.params), []).append(subscription)
+        keys = list(by_key)
+
+        try:
+            window = max(evaluator.window(subscription.params) for subscription in members)
+            # Stored bars are shared across brokers; the tick fallback uses one subscriber's feed
+            closes = self.history(symbol, interval, window, members[0].broker)
+            if closes is None:
+                self.no_history += 1
+                return 0
+            if self._pool is not None:
+                results = await asyncio.get_running_loop().run_in_executor(self._pool, evaluator.evaluate, closes, keys)
+            else:
+                results = evaluator.evaluate(closes, keys)
+            self.evaluations += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error evaluating {strategy_id} on {symbol} {interval}: {e}")
+            return 0
+
+        signals = [
+            evaluator.signal(subscription, result)
+            for key, result in zip(keys, results) if result
+            for subscription in by_key[key]
+        ]
+        outcomes = await asyncio.gather(*(self.emit(signal) for signal in signals), return_exceptions=True)
+        for signal, outcome in zip(signals, outcomes):
+            if isinstance(outcome, Exception):
+                self.errors += 1
+                logger.error(f"Error emitting {strategy_id} signal for account {signal.get('account_id')}: {outcome}")
+        self.signals += len(signals)
+        return len(signals)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "subscriptions": len(self.subscriptions),
+            "groups": len(self.groups),
+            "paused": sum(1 for subscription in self.subscriptions.values() if subscription.paused),
+            "leader": self.leader,
+            "leadership_changes": self.leadership_changes,
+            "lease": self.lease.get_metrics() if self.lease is not None else None,
+            "evaluating": len(self._evaluating),
+            "workers": self.workers if self._pool is not None else 0,
+            "evaluations": self.evaluations,
+            "signals": self.signals,
+            "no_history": self.no_history,
+            "overruns": self.overruns,
+            "errors": self.errors,
+            "reloads": self.reloads,
+            "config_hits": self.config_hits,
+            "config_misses": self.config_misses
+        }
@@ -0,0 +1,249 @@
+"""
+Tick Store
+Append-only columnar tick and OHLCV bar files, partitioned by symbol and day and read back through memory maps
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Try to import NumPy
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("NumPy not available, tick store disabled")
+
+# Column layouts; every column is a flat little-endian float64 file
+TICK_COLUMNS = ("ts", "bid", "ask", "last", "size")
+BAR_COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+DTYPE = "<f8"
+
+Columns = Dict[str, "np.ndarray"]
+PartitionKey = Tuple[str, str, str]
+
+
+# Seconds per bar interval unit ("1m", "15m", "4h", "1d")
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def interval_seconds(interval: str) -> int:
+    """Length of a bar interval such as "5m" in seconds"""
+    try:
+        return int(interval[:-1]) * INTERVAL_UNITS[interval[-1]]
+    except (KeyError, ValueError, IndexError):
+        raise ValueError(f"Invalid bar interval: {interval!r}")
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _safe(symbol: str) -> str:
+    """Symbol as a single path component (EUR/USD -> EUR_USD)"""
+    return symbol.replace("/", "_").replace("\\", "_")
+
+
+class Partition:
+    """Buffered rows for one (series, symbol, day) awaiting append"""
+
+    __slots__ = ("columns", "rows", "last_ts")
+
+    def __init__(self, columns: Sequence[str], last_ts: float):
+        self.columns = columns
+        self.rows: List[Tuple[float, ...]] = []
+        self.last_ts = last_ts
+
+
+class TickStore:
+    """Local time-series store for ticks and bars
+
+    Layout is root/<series>/<symbol>/<YYYY-MM-DD>/<column>.f8, where series
+    is "ticks" or "bars_<interval>". Rows are buffered and appended to the
+    column files in batches; timestamps within a partition only move forward
+    so a time range is located with a binary search over the mapped ts
+    column, and the returned column arrays are views onto the mapped files.
+    """
+
+    def __init__(self, root: str, flush_rows: int = 1000, flush_interval: float = 1.0):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("TickStore requires numpy")
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._pending: Dict[PartitionKey, Partition] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self.rows_written = 0
+        self.rows_rejected = 0
+        self.flushes = 0
+        os.makedirs(root, exist_ok=True)
+
+    # Writing
+
+    def append_tick(
+        self,
+        symbol: str,
+        ts: float,
+        bid: Optional[float] = None,
+        ask: Optional[float] = None,
+        last: Optional[float] = None,
+        size: Optional[float] = None
+    ) -> bool:
+        """Buffer a tick; False if it is older than the partition's newest row"""
+        return self._append("ticks", TICK_COLUMNS, symbol, ts, (bid, ask, last, size))
+
+    def append_quote(self, quote: Any) -> bool:
+        """Quote listener: record a market data Quote under broker:symbol"""
+        return self.append_tick(f"{quote.broker}:{quote.symbol}", quote.ts, quote.bid, quote.ask, quote.last)
+
+    def append_bar(
+        self,
+        symbol: str,
+        interval: str,
+        ts: float,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float = 0.0
+    ) -> bool:
+        """Buffer an OHLCV bar stamped with its open time"""
+        return self._append(f"bars_{interval}", BAR_COLUMNS, symbol, ts, (open, high, low, close, volume))
+
+    def _append(self, series: str, columns: Sequence[str], symbol: str, ts: float, values: Tuple) -> bool:
+        key = (series, _safe(symbol), _day(ts))
+        partition = self._pending.get(key)
+        if partition is None:
+            partition = self._pending[key] = Partition(columns, self._stored_last_ts(key))
+        if ts < partition.last_ts:
+            self.rows_rejected += 1
+            return False
+        partition.last_ts = ts
+        partition.rows.append((ts, *(float("nan") if value is None else value for value in values)))
+        if len(partition.rows) >= self.flush_rows:
+            self._write(key, partition)
+        return True
+
+    def _path(self, key: PartitionKey) -> str:
+        return os.path.join(self.root, *key)
+
+    def _stored_last_ts(self, key: PartitionKey) -> float:
+        ts = self._map(self._path(key), "ts")
+        return float(ts[-1]) if ts is not None and len(ts) else float("-inf")
+
+    def _write(self, key: PartitionKey, partition: Partition):
+        if not partition.rows:
+            return
+        directory = self._path(key)
+        os.makedirs(directory, exist_ok=True)
+        block = np.asarray(partition.rows, dtype=DTYPE)
+        for index, column in enumerate(partition.columns):
+            with open(os.path.join(directory, f"{column}.f8"), "ab") as handle:
+                handle.write(np.ascontiguousarray(block[:, index]).tobytes())
+        self.rows_written += len(partition.rows)
+        partition.rows = []
+
+    def flush(self) -> int:
+        """Append every buffered row to disk; returns rows written"""
+        before = self.rows_written
+        for key, partition in list(self._pending.items()):
+            if partition.rows:
+                self._write(key, partition)
+            else:
+                # Idle for a whole flush interval; its last_ts is reloaded from disk if it resumes
+                del self._pending[key]
+        self.flushes += 1
+        return self.rows_written - before
+
+    async def start(self):
+        """Start the periodic flusher"""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flusher and write out everything still buffered"""
+        if self._flusher:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error(f"Tick store flush failed: {e}")
+
+    # Reading
+
+    def _map(self, directory: str, column: str) -> Optional["np.ndarray"]:
+        path = os.path.join(directory, f"{column}.f8")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        return np.memmap(path, dtype=DTYPE, mode="r")
+
+    def _read_partition(self, directory: str, columns: Sequence[str], start: float, end: float) -> Optional[Columns]:
+        mapped = {column: self._map(directory, column) for column in columns}
+        if any(array is None for array in mapped.values()):
+            return None
+        # A crash mid-append can leave columns of unequal length; trust the shortest
+        rows = min(len(array) for array in mapped.values())
+        ts = mapped["ts"][:rows]
+        lo = int(np.searchsorted(ts, start, side="left"))
+        hi = int(np.searchsorted(ts, end, side="left"))
+        if lo >= hi:
+            return None
+        return {column: array[lo:hi] for column, array in mapped.items()}
+
+    def _days(self, start: float, end: float) -> Iterator[str]:
+        day = datetime.fromtimestamp(start, tz=timezone.utc).date()
+        last = datetime.fromtimestamp(max(end - 1e-9, start), tz=timezone.utc).date()
+        while day <= last:
+            yield day.isoformat()
+            day += timedelta(days=1)
+
+    def iter_range(self, series: str, symbol: str, start: float, end: float) -> Iterator[Columns]:
+        """Per-day column views for start <= ts < end, oldest first (no copies)"""
+        columns = TICK_COLUMNS if series == "ticks" else BAR_COLUMNS
+        base = os.path.join(self.root, series, _safe(symbol))
+        for day in self._days(start, end):
+            directory = os.path.join(base, day)
+            if os.path.isdir(directory):
+                chunk = self._read_partition(directory, columns, start, end)
+                if chunk is not None:
+                    yield chunk
+
+    def _range(self, series: str, symbol: str, start: float, end: float) -> Columns:
+        chunks = list(self.iter_range(series, symbol, start, end))
+        columns = TICK_COLUMNS if series == "ticks" else BAR_COLUMNS
+        if not chunks:
+            return {column: np.empty(0, dtype=DTYPE) for column in columns}
+        if len(chunks) == 1:
+            return chunks[0]
+        return {column: np.concatenate([chunk[column] for chunk in chunks]) for column in columns}
+
+    def ticks(self, symbol: str, start: float, end: float) -> Columns:
+        """Tick columns for start <= ts < end; a view when the range sits within one day"""
+        return self._range("ticks", symbol, start, end)
+
+    def bars(self, symbol: str, interval: str, start: float, end: float) -> Columns:
+        """Bar columns for start <= ts < end; a view when the range sits within one day"""
+        return self._range(f"bars_{interval}", symbol, start, end)
+
+    def symbols(self, series: str = "ticks") -> List[str]:
+        directory = os.path.join(self.root, series)
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "pending_rows": sum(len(partition.rows) for partition in self._pending.values()),
+            "rows_written": self.rows_written,
+            "rows_rejected": self.rows_rejected,
+            "flushes": self.flushes
+        }
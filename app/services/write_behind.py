@@ -0,0 +1,461 @@
+"""
+Write-Behind Persistence
+Buffers row inserts/updates and flushes them to the database in batches
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Table, bindparam, insert, update
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying the whole batch for; anything else is treated as a bad row
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    return str(value)
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if "__datetime__" in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+# Lock file held by the process that owns a journal directory
+LOCK_FILE = ".lock"
+
+
+def _lock(directory: str) -> Optional[IO]:
+    """Exclusive lock on a journal directory; None while another process holds it"""
+    handle = open(os.path.join(directory, LOCK_FILE), "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+
+def _segment_numbers(directory: str) -> List[int]:
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith("wal-") and name.endswith(".jsonl"):
+            try:
+                numbers.append(int(name[4:-6]))
+            except ValueError:
+                continue
+    return sorted(numbers)
+
+
+def _segments(directory: str) -> List[str]:
+    return [os.path.join(directory, f"wal-{number:012d}.jsonl") for number in _segment_numbers(directory)]
+
+
+class WriteAheadJournal:
+    """Append-only JSONL segments that survive a crash between flushes
+
+    Every process writes to its own subdirectory of root and holds an
+    exclusive flock on it, so replicas and workers sharing root never touch
+    each other's segments. Directories whose lock can be taken belong to
+    processes that are gone: their segments are adopted for replay and the
+    directory is removed once they are released.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # Locked under a name _adopt() skips, so no other process can claim it first
+        name = f"proc-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        staging = os.path.join(root, f".{name}")
+        os.makedirs(staging)
+        self.lock = _lock(staging)
+        self.directory = os.path.join(root, name)
+        os.rename(staging, self.directory)
+        # Locks held on directories of dead processes until their segments are released
+        self.adopted: Dict[str, IO] = {}
+        self.sequence = 0
+        self.closed: List[str] = self._adopt()
+        self.file = None
+        self._open_next()
+
+    def _adopt(self) -> List[str]:
+        """Segments of every journal directory no live process holds (root itself: pre-subdirectory layout)"""
+        candidates = [self.root] + sorted(
+            os.path.join(self.root, name) for name in os.listdir(self.root)
+            if name.startswith("proc-") and os.path.join(self.root, name) != self.directory
+        )
+        segments = []
+        for directory in candidates:
+            if not os.path.isdir(directory):
+                continue
+            lock = _lock(directory)
+            if lock is None:
+                continue
+            self.adopted[directory] = lock
+            segments.extend(_segments(directory))
+        return segments
+
+    def segments(self) -> List[str]:
+        return _segments(self.directory)
+
+    def _open_next(self):
+        self.sequence += 1
+        path = os.path.join(self.directory, f"wal-{self.sequence:012d}.jsonl")
+        # Line-buffered: every record reaches the OS before append() returns
+        self.file = open(path, "a", buffering=1, encoding="utf-8")
+        self.current = path
+
+    def append(self, record: Dict[str, Any]):
+        self.file.write(json.dumps(record, default=_encode, separators=(",", ":")) + "\n")
+
+    def rotate(self) -> List[str]:
+        """Close the active segment; returns every closed, not yet released segment"""
+        self.file.close()
+        self.closed.append(self.current)
+        self._open_next()
+        return list(self.closed)
+
+    def release(self, segments: List[str]):
+        """Delete segments whose rows are committed"""
+        for path in segments:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            if path in self.closed:
+                self.closed.remove(path)
+        self._drop_adopted()
+
+    def _drop_adopted(self):
+        """Remove adopted directories whose segments are all released"""
+        for directory in list(self.adopted):
+            if any(os.path.dirname(path) == directory for path in self.closed):
+                continue
+            lock = self.adopted.pop(directory)
+            if directory != self.root:
+                try:
+                    os.remove(os.path.join(directory, LOCK_FILE))
+                    os.rmdir(directory)
+                except OSError:
+                    pass  # not empty or already gone; the next start adopts it again
+            lock.close()
+
+    def replay(self) -> List[Dict[str, Any]]:
+        """Read records from closed segments (oldest first)"""
+        records = []
+        for path in self.closed:
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line, object_hook=_decode))
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping torn write-behind record in {path}")
+        return records
+
+    def close(self):
+        """Close the active segment; a journal with nothing left to replay is removed"""
+        if self.file:
+            self.file.close()
+            self.file = None
+        if self.lock is None:
+            return
+        if not self.closed and os.path.getsize(self.current) == 0:
+            os.remove(self.current)
+            os.remove(os.path.join(self.directory, LOCK_FILE))
+            os.rmdir(self.directory)
+        for lock in self.adopted.values():
+            lock.close()
+        self.adopted.clear()
+        self.lock.close()
+        self.lock = None
+
+
+class WriteBehindBuffer:
+    """Coalesces inserts and updates keyed by a natural key and flushes them in batches
+
+    An update for a row whose insert has not been flushed yet is merged into the
+    pending insert, so the common insert-then-update pattern costs one row in one
+    multi-row INSERT. Remaining updates are sent as grouped executemany UPDATEs.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Any],
+        flush_interval_ms: int = 50,
+        max_batch: int = 500,
+        journal_dir: Optional[str] = None
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_batch = max_batch
+        self.journal_dir = journal_dir
+        self.journal: Optional[WriteAheadJournal] = None
+        self.tables: Dict[str, Tuple[Table, str]] = {}
+        self.inserts: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self.updates: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self.flush_lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.flusher: Optional[asyncio.Task] = None
+        self.stats = {
+            "flushes": 0,
+            "rows_inserted": 0,
+            "rows_updated": 0,
+            "updates_coalesced": 0,
+            "round_trips": 0,
+            "failures": 0,
+            "rows_dropped": 0,
+            "last_flush_ms": 0.0
+        }
+
+    def register(self, table: Table, key_column: str):
+        """Register a table and the unique column used to address its rows"""
+        self.tables[table.name] = (table, key_column)
+        self.inserts.setdefault(table.name, {})
+        self.updates.setdefault(table.name, {})
+
+    @property
+    def pending(self) -> int:
+        return sum(len(rows) for rows in self.inserts.values()) + sum(len(rows) for rows in self.updates.values())
+
+    def _columns(self, table_name: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        table, _ = self.tables[table_name]
+        return {key: value for key, value in values.items() if key in table.c}
+
+    def insert(self, table: Table, row: Dict[str, Any]):
+        """Buffer a row insert (the key column must be set by the caller)"""
+        _, key_column = self.tables[table.name]
+        row = self._columns(table.name, row)
+        if self.journal:
+            self.journal.append({"op": "insert", "table": table.name, "row": row})
+        self._apply_insert(table.name, row[key_column], row)
+        self._maybe_wake()
+
+    def update(self, table: Table, key: Any, values: Dict[str, Any]):
+        """Buffer an update for the row addressed by key"""
+        values = self._columns(table.name, values)
+        if self.journal:
+            self.journal.append({"op": "update", "table": table.name, "key": key, "values": values})
+        self._apply_update(table.name, key, values)
+        self._maybe_wake()
+
+    def _apply_insert(self, table_name: str, key: Any, row: Dict[str, Any]):
+        self.inserts[table_name][key] = row
+
+    def _apply_update(self, table_name: str, key: Any, values: Dict[str, Any]):
+        pending_insert = self.inserts[table_name].get(key)
+        if pending_insert is not None:
+            pending_insert.update(values)
+            self.stats["updates_coalesced"] += 1
+        else:
+            self.updates[table_name].setdefault(key, {}).update(values)
+
+    def _maybe_wake(self):
+        if self.pending >= self.max_batch:
+            self.wakeup.set()
+
+    async def start(self):
+        """Replay any journal left by a previous run and start the flusher"""
+        if self.journal_dir:
+            self.journal = WriteAheadJournal(self.journal_dir)
+            records = self.journal.replay()
+            for record in records:
+                if record.get("table") not in self.tables:
+                    continue
+                if record["op"] == "insert":
+                    _, key_column = self.tables[record["table"]]
+                    self._apply_insert(record["table"], record["row"][key_column], record["row"])
+                elif record["op"] == "update":
+                    self._apply_update(record["table"], record["key"], record["values"])
+            if records:
+                logger.warning(f"Replaying {len(records)} write-behind records from journal")
+                await self.flush()
+            else:
+                self.journal.release(list(self.journal.closed))
+
+        if self.flusher is None:
+            self.flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flusher and write out everything still buffered"""
+        if self.flusher:
+            self.flusher.cancel()
+            await asyncio.gather(self.flusher, return_exceptions=True)
+            self.flusher = None
+        await self.flush()
+        if self.journal:
+            self.journal.close()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Write-behind flush loop error: {e}")
+
+    async def flush(self) -> bool:
+        """Write all buffered rows in one transaction"""
+        async with self.flush_lock:
+            if not self.pending:
+                return True
+
+            inserts, self.inserts = self.inserts, {name: {} for name in self.tables}
+            updates, self.updates = self.updates, {name: {} for name in self.tables}
+            segments = self.journal.rotate() if self.journal else []
+            started = time.perf_counter()
+
+            try:
+                round_trips = await self._write(inserts, updates)
+            except TRANSIENT_ERRORS as e:
+                self.stats["failures"] += 1
+                logger.error(f"Write-behind flush failed, {sum(map(len, inserts.values()))} inserts re-queued: {e}")
+                self._restore(inserts, updates)
+                return False
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.error(f"Write-behind batch rejected, isolating bad rows: {e}")
+                round_trips = await self._write_row_by_row(inserts, updates)
+
+            if self.journal:
+                self.journal.release(segments)
+
+            self.stats["flushes"] += 1
+            self.stats["round_trips"] += round_trips
+            self.stats["rows_inserted"] += sum(len(rows) for rows in inserts.values())
+            self.stats["rows_updated"] += sum(len(rows) for rows in updates.values())
+            self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            return True
+
+    async def _write(self, inserts: Dict[str, Dict[Any, Dict[str, Any]]], updates: Dict[str, Dict[Any, Dict[str, Any]]]) -> int:
+        """Execute inserts then updates in a single transaction; returns statement count"""
+        round_trips = 0
+        async with self.session_factory() as db:
+            for table_name, rows in inserts.items():
+                if rows:
+                    for statement, batch in self._insert_batches(db, table_name, list(rows.values())):
+                        await db.execute(statement, batch)
+                        round_trips += 1
+            for table_name, rows in updates.items():
+                if rows:
+                    for statement, batch in self._update_batches(table_name, rows):
+                        await db.execute(statement, batch)
+                        round_trips += 1
+            await db.commit()
+        return round_trips
+
+    async def _write_row_by_row(self, inserts: Dict[str, Dict[Any, Dict[str, Any]]], updates: Dict[str, Dict[Any, Dict[str, Any]]]) -> int:
+        """Retry each row on its own so one bad row cannot block the rest"""
+        round_trips = 0
+        single_ops = [
+            ({table_name: {key: row}}, {}) for table_name, rows in inserts.items() for key, row in rows.items()
+        ] + [
+            ({}, {table_name: {key: values}}) for table_name, rows in updates.items() for key, values in rows.items()
+        ]
+        for single_inserts, single_updates in single_ops:
+            try:
+                round_trips += await self._write(single_inserts, single_updates)
+            except Exception as e:
+                self.stats["rows_dropped"] += 1
+                self._dead_letter(single_inserts, single_updates, e)
+        return round_trips
+
+    def _dead_letter(self, inserts: Dict[str, Dict[Any, Dict[str, Any]]], updates: Dict[str, Dict[Any, Dict[str, Any]]], error: Exception):
+        """Keep rejected rows on disk for manual inspection"""
+        logger.error(f"Dropping write-behind row after error: {error}")
+        if not self.journal_dir:
+            return
+        record = {"error": str(error), "inserts": inserts, "updates": updates, "at": datetime.now()}
+        with open(os.path.join(self.journal_dir, "dead-letter.jsonl"), "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, default=_encode) + "\n")
+
+    def _insert_batches(self, db, table_name: str, rows: List[Dict[str, Any]]):
+        """Group rows by column set; duplicate keys (journal replay) are ignored"""
+        table, key_column = self.tables[table_name]
+        dialect = db.bind.dialect.name if db.bind is not None else ""
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+
+        statement = insert(table)
+        if dialect_insert is not None:
+            statement = dialect_insert(table).on_conflict_do_nothing(index_elements=[key_column])
+
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(self._coerce(table, row))
+        for batch in groups.values():
+            yield statement, batch
+
+    def _update_batches(self, table_name: str, rows: Dict[Any, Dict[str, Any]]):
+        """One executemany UPDATE per distinct set of updated columns"""
+        table, key_column = self.tables[table_name]
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for key, values in rows.items():
+            if not values:
+                continue
+            groups.setdefault(tuple(sorted(values)), []).append({"_key": key, **self._coerce(table, values)})
+        for columns, batch in groups.items():
+            statement = (
+                update(table)
+                .where(table.c[key_column] == bindparam("_key"))
+                .values({column: bindparam(column) for column in columns})
+                .execution_options(synchronize_session=False)
+            )
+            yield statement, batch
+
+    @staticmethod
+    def _coerce(table: Table, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Restore datetime values read back from the JSON journal"""
+        coerced = dict(row)
+        for column, value in row.items():
+            if isinstance(value, str) and isinstance(table.c[column].type, DateTime):
+                coerced[column] = datetime.fromisoformat(value)
+        return coerced
+
+    def _restore(self, inserts: Dict[str, Dict[Any, Dict[str, Any]]], updates: Dict[str, Dict[Any, Dict[str, Any]]]):
+        """Put a failed batch back in front of anything buffered since"""
+        for table_name, rows in inserts.items():
+            newer_updates = self.updates[table_name]
+            restored = {}
+            for key, row in rows.items():
+                if key in newer_updates:
+                    row.update(newer_updates.pop(key))
+                restored[key] = row
+            restored.update(self.inserts[table_name])
+            self.inserts[table_name] = restored
+
+        for table_name, rows in updates.items():
+            newer_updates = self.updates[table_name]
+            for key, values in rows.items():
+                newer_updates[key] = {**values, **newer_updates.get(key, {})}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "journal_segments": len(self.journal.closed) + 1 if self.journal else 0,
+            **self.stats
+        }
@@ -7,10 +7,12 @@ import json
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-from fastapi import APIRouter, Request, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.services.signal_processor import signal_processor
+from app.services.signal_pipeline import PipelineFullError, PipelineUnavailableError
+from app.services.execution_lanes import LaneFullError
 from app.models.pydantic_schemas import WebhookRequest, WebhookResponse
 from app.db.database import get_db
 from app.core.config import settings
@@ -30,7 +32,6 @@ class WebhookSignalRouter:
         self,
         request: Request,
         source: str,
-        background_tasks: BackgroundTasks,
         db: Session
     ) -> JSONResponse:
         """Process incoming webhook request"""
@@ -50,11 +51,30 @@ class WebhookSignalRouter:
                 user_agent=user_agent
             )
             
-            # Add to background processing
-            background_tasks.add_task(
-                self._process_webhook_background,
-                webhook_request
-            )
+            # Hand off to the bounded ingestion pipeline (sheds load when it or the account's lane is full)
+            pipeline = signal_processor.pipeline
+            try:
+                await signal_processor.admit_webhook(webhook_request)
+            except PipelineFullError:
+                logger.warning(f"Shedding {source} webhook: signal queue full ({pipeline.queue.qsize()})")
+                raise HTTPException(
+                    status_code=429,
+                    detail="Signal queue is full, retry later",
+                    headers={"Retry-After": str(pipeline.retry_after())}
+                )
+            except LaneFullError as e:
+                logger.warning(f"Shedding {source} webhook: {e}")
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many pending signals for this account, retry later",
+                    headers={"Retry-After": str(pipeline.retry_after())}
+                )
+            except PipelineUnavailableError:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Signal processing is not available",
+                    headers={"Retry-After": "5"}
+                )
             
             return JSONResponse(
                 status_code=202,
@@ -62,26 +82,17 @@ class WebhookSignalRouter:
                     "status": "accepted",
                     "message": "Webhook received for processing",
                     "source": source,
+                    "queue_depth": pipeline.queue.qsize(),
                     "timestamp": datetime.now().isoformat()
                 }
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error processing webhook from {source}: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    async def _process_webhook_background(self, webhook_request: WebhookRequest):
-        """Process webhook in background"""
-        try:
-            # Process webhook through signal processor
-            result = await signal_processor.process_webhook(webhook_request)
-            
-            # Log result
-            logger.info(f"Webhook processed: {result}")
-            
-        except Exception as e:
-            logger.error(f"Error in background webhook processing: {e}")
-    
     def validate_webhook_source(self, source: str) -> bool:
         """Validate webhook source"""
         return source.lower() in self.supported_sources
@@ -116,7 +127,6 @@ webhook_router = WebhookSignalRouter()
 async def tradingview_webhook(
     webhook_key: str,
     request: Request,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Handle TradingView webhook signals"""
@@ -137,7 +147,7 @@ async def tradingview_webhook(
         
         # Process webhook
         return await webhook_router.process_webhook_request(
-            request, "tradingview", background_tasks, db
+            request, "tradingview", db
         )
         
     except HTTPException:
@@ -150,7 +160,6 @@ async def tradingview_webhook(
 async def trailhacker_webhook(
     webhook_key: str,
     request: Request,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Handle TrailHacker webhook signals"""
@@ -171,7 +180,7 @@ async def trailhacker_webhook(
         
         # Process webhook
         return await webhook_router.process_webhook_request(
-            request, "trailhacker", background_tasks, db
+            request, "trailhacker", db
         )
         
     except HTTPException:
@@ -185,7 +194,6 @@ async def custom_webhook(
     source: str,
     webhook_key: str,
     request: Request,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Handle custom webhook signals"""
@@ -210,7 +218,7 @@ async def custom_webhook(
         
         # Process webhook
         return await webhook_router.process_webhook_request(
-            request, source, background_tasks, db
+            request, source, db
         )
         
     except HTTPException:
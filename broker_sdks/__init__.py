@@ -0,0 +1 @@
+"""Broker REST SDKs (async clients with blocking facades for scripts)"""
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Shared plumbing for the broker SDK clients.
+
+AsyncBrokerClient owns a pooled httpx.AsyncClient (or uses one handed in by
+the caller) and authenticates lazily on the first request that needs it.
+SyncBrokerClient wraps an async client for blocking scripts.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+
+# Order states that can no longer be cancelled
+FINAL_ORDER_STATES = {"filled", "canceled", "cancelled", "rejected", "expired", "completed"}
+
+# Fields a batch response entry may use to name the position or order it is about
+BATCH_ID_FIELDS = ("id", "positionId", "orderId", "position_id", "order_id")
+# Envelopes batch endpoints wrap their per-item entries in
+BATCH_ENVELOPES = ("results", "positions", "orders", "data", "d")
+# Per-item statuses that mean the item was not processed
+BATCH_FAILED_STATES = {"error", "failed", "rejected"}
+
+
+def is_working_order(order: Dict[str, Any]) -> bool:
+    status = order.get("ordStatus") or order.get("status") or ""
+    return str(status).lower() not in FINAL_ORDER_STATES
+
+
+class AsyncBrokerClient:
+    """
+    Base async REST client
+
+    Subclasses set base_url, override _authenticate() when the API needs a
+    token, and call _request() for everything else. Authentication runs once,
+    on first use, even under concurrent calls; a failed sign-in raises to every
+    caller waiting on it and is tried again on the next call, and a 401 drops
+    the token, signs in again (unless another request already replaced that
+    token) and retries the request once. Tokens with a known lifetime (see _set_token)
+    are renewed in the background once they get within refresh_margin of
+    expiry, so requests keep going on the old token meanwhile.
+    """
+
+    name = "Broker"
+    # Parallel requests per bulk operation when there is no batch endpoint
+    bulk_concurrency = 8
+    # Seconds before token expiry to start a background renewal
+    refresh_margin = 300.0
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10.0,
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        """
+        Args:
+            base_url: API base URL, endpoints are appended to it
+            headers: Headers sent with every request
+            timeout: Request timeout in seconds
+            client: Shared httpx client to use instead of a private pool
+        """
+        self.base_url = base_url
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self._client = client
+        self._owns_client = client is None
+        self._auth_headers: Dict[str, str] = {}
+        self._authenticated = False
+        self._auth_attempts = 0
+        self._auth_error: Optional[Exception] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._token_expires_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._unsupported_batches = set()
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        """Pooled HTTP session, created on first use inside the running loop"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=DEFAULT_LIMITS)
+        return self._client
+
+    @property
+    def auth_lock(self) -> asyncio.Lock:
+        """Sign-in lock, created on first use so it binds to the loop the client runs on"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _authenticate(self) -> None:
+        """Sign in and fill self._auth_headers (no-op for key-only APIs)"""
+
+    def _set_token(self, token: str, ttl: Optional[float] = None) -> None:
+        """Swap in a new bearer token (and its lifetime in seconds, if known)"""
+        self._auth_headers = {"Authorization": f"Bearer {token}"}
+        self._token_expires_at = time.monotonic() + ttl if ttl is not None else None
+
+    async def ensure_authenticated(self) -> None:
+        """Authenticate once; concurrent callers wait on the same attempt"""
+        if self._authenticated:
+            if self._token_expires_at is None:
+                return
+            remaining = self._token_expires_at - time.monotonic()
+            if remaining > self.refresh_margin:
+                return
+            if remaining > 0:
+                # Still usable: renew off the request path
+                if self._refresh_task is None or self._refresh_task.done():
+                    self._refresh_task = asyncio.create_task(self._renew())
+                return
+            self.invalidate_auth()
+        await self._sign_in()
+
+    async def _sign_in(self, rejected: Optional[Dict[str, str]] = None) -> None:
+        """Sign in once for every caller waiting; rejected is the auth a 401 came back for"""
+        attempt = self._auth_attempts
+        async with self.auth_lock:
+            if self._auth_attempts != attempt:
+                # Someone else tried while we waited: share their outcome
+                if self._auth_error is not None:
+                    raise self._auth_error
+                return
+            if rejected is not None:
+                if self._authenticated and self._auth_headers is not rejected:
+                    return  # the rejected token was already replaced
+                self.invalidate_auth()
+            try:
+                await self._authenticate()
+            except Exception as e:
+                # Stay unauthenticated so the next call signs in again
+                self._auth_error = e
+                logger.warning(f"{self.name} authentication failed: {e}")
+                raise
+            else:
+                self._auth_error = None
+                self._authenticated = True
+            finally:
+                self._auth_attempts += 1
+
+    async def _renew(self) -> None:
+        """Background renewal; the current token stays in use if it fails"""
+        try:
+            await self._sign_in()
+        except Exception:
+            pass  # logged by _sign_in, retried by the next request near expiry
+
+    def invalidate_auth(self) -> None:
+        self._auth_headers = {}
+        self._token_expires_at = None
+        self._authenticated = False
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+        **kwargs
+    ) -> httpx.Response:
+        headers = {**self.headers, **self._auth_headers, **kwargs.pop("headers", {})}
+        return await self.session.request(
+            method.upper(),
+            f"{self.base_url}{endpoint}",
+            json=data,
+            params=params,
+            headers=headers,
+            timeout=kwargs.pop("timeout", self.timeout),
+            **kwargs
+        )
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+        authenticate: bool = True,
+        **kwargs
+    ) -> Any:
+        """Make an HTTP request and return the decoded JSON body"""
+        if method.upper() not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        try:
+            if authenticate:
+                await self.ensure_authenticated()
+            sent_auth = self._auth_headers
+            response = await self._send(method, endpoint, data, params, **kwargs)
+            if response.status_code == 401 and authenticate:
+                # Token expired or never issued: sign in again and retry once
+                await self._sign_in(rejected=sent_auth)
+                response = await self._send(method, endpoint, data, params, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"{self.name} API error: {e}")
+            raise
+
+    async def _fan_out(
+        self,
+        item_ids: Iterable[Any],
+        operation: Callable[[Any], Awaitable[Any]]
+    ) -> List[Dict[str, Any]]:
+        """Run operation for every id, at most bulk_concurrency at a time"""
+        semaphore = asyncio.Semaphore(self.bulk_concurrency)
+
+        async def run(item_id):
+            async with semaphore:
+                try:
+                    return {"id": item_id, "ok": True, "result": await operation(item_id)}
+                except Exception as e:
+                    logger.error(f"{self.name} bulk operation failed for {item_id}: {e}")
+                    return {"id": item_id, "ok": False, "error": str(e)}
+
+        return list(await asyncio.gather(*(run(item_id) for item_id in item_ids)))
+
+    async def _bulk(
+        self,
+        kind: str,
+        item_ids: Iterable[Any],
+        operation: Callable[[Any], Awaitable[Any]],
+        native: Optional[Callable[[List[Any]], Awaitable[Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Per-item results from the broker's batch endpoint, or a bounded fan-out
+
+        A batch endpoint the server doesn't know (404/405/501) is remembered
+        and the operation falls back to one call per item. A batch response
+        is mapped to per-item results by _batch_outcomes; items it does not
+        account for are reported as failed with "unknown": True.
+        """
+        item_ids = list(item_ids)
+        if not item_ids:
+            return []
+        if native is None or kind in self._unsupported_batches:
+            return await self._fan_out(item_ids, operation)
+
+        try:
+            response = await native(item_ids)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in (404, 405, 501):
+                return [{"id": item_id, "ok": False, "error": str(e)} for item_id in item_ids]
+            logger.info(f"{self.name} has no batch {kind} endpoint, falling back to per-item calls")
+            self._unsupported_batches.add(kind)
+            return await self._fan_out(item_ids, operation)
+        except Exception as e:
+            return [{"id": item_id, "ok": False, "error": str(e)} for item_id in item_ids]
+
+        outcomes = self._batch_outcomes(kind, item_ids, response)
+        return [
+            {"id": item_id, **outcomes[item_id]} if item_id in outcomes
+            else {"id": item_id, "ok": False, "unknown": True, "error": f"not confirmed by batch {kind} response"}
+            for item_id in item_ids
+        ]
+
+    def _batch_outcomes(self, kind: str, item_ids: List[Any], response: Any) -> Dict[Any, Dict[str, Any]]:
+        """Map a batch response to {item id: {"ok": ..., "result"/"error": ...}}
+
+        Override for brokers whose batch endpoints answer in their own shape.
+        The default reads a list of per-item entries (bare or in a common
+        envelope) keyed by one of BATCH_ID_FIELDS; ids the response does not
+        mention are left out and reported by _bulk as unknown.
+        """
+        if isinstance(response, dict):
+            response = next((response[k] for k in BATCH_ENVELOPES if isinstance(response.get(k), list)), None)
+        if not isinstance(response, list):
+            return {}
+        wanted = {str(item_id): item_id for item_id in item_ids}
+        outcomes = {}
+        for entry in response:
+            if not isinstance(entry, dict):
+                continue
+            key = next((str(entry[f]) for f in BATCH_ID_FIELDS if entry.get(f) is not None), None)
+            if key not in wanted:
+                continue
+            error = entry.get("error") or entry.get("errorMessage") or entry.get("failureText")
+            status = str(entry.get("status") or "").lower()
+            if error or status in BATCH_FAILED_STATES:
+                outcomes[wanted[key]] = {"ok": False, "error": str(error or status)}
+            else:
+                outcomes[wanted[key]] = {"ok": True, "result": entry}
+        return outcomes
+
+    @staticmethod
+    def _summarize(verb: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        succeeded = [r for r in results if r["ok"]]
+        return {
+            verb: len(succeeded),
+            "failed": len(results) - len(succeeded),
+            "unknown": sum(1 for r in results if r.get("unknown")),
+            "results": results
+        }
+
+    async def modify_all(self, modifications: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Modify several orders at once
+        
+        Args:
+            modifications: One dict per order with "order_id" plus the
+                modify_order arguments to change (price, stop_loss, ...)
+        
+        Returns:
+            {"modified": n, "failed": n, "results": [per-order result]}
+        """
+        changes = {m["order_id"]: {k: v for k, v in m.items() if k != "order_id"} for m in modifications}
+        results = await self._fan_out(
+            changes,
+            lambda order_id: self.modify_order(order_id, **changes[order_id])
+        )
+        return self._summarize("modified", results)
+
+    async def aclose(self) -> None:
+        """Close the private connection pool (shared clients are left open)"""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class SyncBrokerClient:
+    """
+    Blocking facade over an async client, for scripts and notebooks
+
+    Every coroutine method of the async client is exposed as a plain method
+    that runs on a private event loop, so the connection pool is reused
+    between calls. Not for use inside a running event loop; use the async
+    client there.
+    """
+
+    async_client_class = AsyncBrokerClient
+
+    def __init__(self, *args, **kwargs):
+        self._loop = asyncio.new_event_loop()
+        self._async = self.async_client_class(*args, **kwargs)
+
+    @property
+    def async_client(self) -> AsyncBrokerClient:
+        return self._async
+
+    def __getattr__(self, name: str):
+        if name.startswith("__") or name in ("_loop", "_async"):
+            raise AttributeError(name)
+        attr = getattr(self._async, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._loop.run_until_complete(attr(*args, **kwargs))
+
+        call.__name__ = name
+        call.__doc__ = attr.__doc__
+        return call
+
+    def close(self) -> None:
+        if not self._loop.is_closed():
+            self._loop.run_until_complete(self._async.aclose())
+            self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,4 +1,4 @@
 """TopStep/ProjectX SDK"""
-from .projectx_client import ProjectXClient
+from .projectx_client import AsyncProjectXClient, ProjectXClient
 
-__all__ = ["ProjectXClient"]
+__all__ = ["AsyncProjectXClient", "ProjectXClient"]
@@ -8,33 +8,38 @@ Aligned with official ProjectX Gateway API documentation:
 TopStepX is accessed through the ProjectX Gateway API.
 """
 
-import requests
-import json
-import os
+import asyncio
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 import logging
 
+import httpx
+
+from ..base import AsyncBrokerClient, SyncBrokerClient, is_working_order
+
 logger = logging.getLogger(__name__)
 
 
-class ProjectXClient:
+class AsyncProjectXClient(AsyncBrokerClient):
     """
-    ProjectX Gateway API Client for TopStepX
+    ProjectX Gateway API Client for TopStepX (async)
     
     Official API Base URL:
     - Gateway API: https://gateway.projectx.com/api (or environment-specific)
     
     Authentication:
     - Username and API Key
-    - JWT token after authentication
+    - JWT token, requested on the first call
     """
     
+    name = "ProjectX"
+    
     def __init__(
         self,
         username: str,
         api_key: str,
-        environment: str = "TopstepX"  # Can be "Demo", "TopstepX", etc.
+        environment: str = "TopstepX",  # Can be "Demo", "TopstepX", etc.
+        client: Optional[httpx.AsyncClient] = None
     ):
         """
         Initialize ProjectX client
@@ -43,92 +48,61 @@ class ProjectXClient:
             username: TopStep username/email
             api_key: TopStep API key
             environment: Trading platform name (default: "TopstepX")
+            client: Shared httpx client (optional, a private pool is used otherwise)
         """
-        self.username = username
-        self.api_key = api_key
-        self.environment = environment
-        
         # Base URL - ProjectX Gateway API
         # Demo: https://gateway-api-demo.s2f.projectx.com/api
         # Live: https://gateway-api.s2f.projectx.com/api or https://gateway.projectx.com/api
         if "demo" in environment.lower():
-            self.base_url = "https://gateway-api-demo.s2f.projectx.com/api"
+            base_url = "https://gateway-api-demo.s2f.projectx.com/api"
         else:
-            self.base_url = "https://gateway-api.s2f.projectx.com/api"
-        
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Content-Type": "application/json",
-            "X-API-Key": self.api_key,
-            "X-Username": self.username
-        })
+            base_url = "https://gateway-api.s2f.projectx.com/api"
+        
+        super().__init__(
+            base_url,
+            headers={
+                "Content-Type": "application/json",
+                "X-API-Key": api_key,
+                "X-Username": username
+            },
+            client=client
+        )
         
+        self.username = username
+        self.api_key = api_key
+        self.environment = environment
         self.token = None
-        self._authenticate()
     
-    def _authenticate(self) -> None:
+    async def _authenticate(self) -> None:
         """Authenticate and get JWT token
         
         Uses ProjectX Gateway API authentication endpoint:
         POST /Auth/loginKey
         """
-        try:
-            # ProjectX Gateway API uses /Auth/loginKey endpoint
-            auth_data = {
-                "userName": self.username,
-                "apiKey": self.api_key
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/Auth/loginKey",
-                json=auth_data,
-                headers={"Content-Type": "application/json", "Accept": "text/plain"},
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            # Response is typically plain text token or JSON with token field
-            auth_response = response.json() if response.headers.get("content-type", "").startswith("application/json") else {"token": response.text.strip()}
-            self.token = auth_response.get("token") or auth_response.get("accessToken")
-            
-            if self.token:
-                self.session.headers.update({
-                    "Authorization": f"Bearer {self.token}"
-                })
-        except Exception as e:
-            logger.warning(f"Authentication failed, continuing without token: {e}")
-    
-    def _request(
-        self,
-        method: str,
-        endpoint: str,
-        data: Optional[Dict] = None,
-        params: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """Make HTTP request to ProjectX Gateway API"""
-        url = f"{self.base_url}{endpoint}"
-        
-        try:
-            if method.upper() == "GET":
-                response = self.session.get(url, params=params, timeout=10)
-            elif method.upper() == "POST":
-                response = self.session.post(url, json=data, timeout=10)
-            elif method.upper() == "PUT":
-                response = self.session.put(url, json=data, timeout=10)
-            elif method.upper() == "DELETE":
-                response = self.session.delete(url, timeout=10)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"ProjectX API error: {e}")
-            raise
+        # ProjectX Gateway API uses /Auth/loginKey endpoint
+        auth_data = {
+            "userName": self.username,
+            "apiKey": self.api_key
+        }
+        
+        response = await self._send(
+            "POST",
+            "/Auth/loginKey",
+            data=auth_data,
+            headers={"Accept": "text/plain"}
+        )
+        response.raise_for_status()
+        
+        # Response is typically plain text token or JSON with token field
+        auth_response = response.json() if response.headers.get("content-type", "").startswith("application/json") else {"token": response.text.strip()}
+        self.token = auth_response.get("token") or auth_response.get("accessToken")
+        
+        if self.token:
+            self._set_token(self.token)
     
     # Account Management
     
-    def list_accounts(self) -> List[Dict[str, Any]]:
+    async def list_accounts(self) -> List[Dict[str, Any]]:
         """
         List all accounts for the authenticated user
         
@@ -138,13 +112,13 @@ class ProjectXClient:
             List of account dictionaries with account_id, acc_num, account_name, etc.
         """
         # ProjectX Gateway uses POST for search endpoints
-        response = self._request("POST", "/Account/search", data={})
+        response = await self._request("POST", "/Account/search", data={})
         # Response may be a list directly or wrapped in a data/accounts field
         if isinstance(response, list):
             return response
         return response.get("accounts", response.get("data", []))
     
-    def get_account(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_account(self, account_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get account information
         
@@ -154,7 +128,7 @@ class ProjectXClient:
         Returns:
             Account dictionary
         """
-        accounts = self.list_accounts()
+        accounts = await self.list_accounts()
         if not accounts:
             raise ValueError("No accounts found")
         
@@ -166,19 +140,19 @@ class ProjectXClient:
         
         return accounts[0]
     
-    def get_account_balance(self, account_id: Optional[str] = None) -> float:
+    async def get_account_balance(self, account_id: Optional[str] = None) -> float:
         """Get account balance"""
-        account = self.get_account(account_id)
+        account = await self.get_account(account_id)
         return account.get("balance", 0.0)
     
-    def get_account_equity(self, account_id: Optional[str] = None) -> float:
+    async def get_account_equity(self, account_id: Optional[str] = None) -> float:
         """Get account equity"""
-        account = self.get_account(account_id)
+        account = await self.get_account(account_id)
         return account.get("equity", 0.0)
     
     # Contract/Instrument Management
     
-    def search_contracts(self, symbol: str) -> List[Dict[str, Any]]:
+    async def search_contracts(self, symbol: str) -> List[Dict[str, Any]]:
         """
         Search for contracts by symbol
         
@@ -191,13 +165,13 @@ class ProjectXClient:
             List of contract dictionaries
         """
         # ProjectX Gateway uses POST for search endpoints
-        response = self._request("POST", "/Contract/search", data={"symbol": symbol})
+        response = await self._request("POST", "/Contract/search", data={"symbol": symbol})
         # Response may be a list directly or wrapped
         if isinstance(response, list):
             return response
         return response.get("contracts", response.get("data", []))
     
-    def get_contract(self, symbol: str) -> Dict[str, Any]:
+    async def get_contract(self, symbol: str) -> Dict[str, Any]:
         """
         Get contract details for symbol
         
@@ -207,19 +181,19 @@ class ProjectXClient:
         Returns:
             Contract dictionary with id, symbol, name, etc.
         """
-        contracts = self.search_contracts(symbol)
+        contracts = await self.search_contracts(symbol)
         if not contracts:
             raise ValueError(f"Contract not found: {symbol}")
         return contracts[0]
     
-    def get_contract_id(self, symbol: str) -> str:
+    async def get_contract_id(self, symbol: str) -> str:
         """Get contract ID for symbol"""
-        contract = self.get_contract(symbol)
+        contract = await self.get_contract(symbol)
         return contract.get("id") or contract.get("contract_id")
     
     # Order Management
     
-    def place_order(
+    async def place_order(
         self,
         account_id: str,
         symbol: str,
@@ -248,7 +222,7 @@ class ProjectXClient:
         Returns:
             Order dictionary with order_id, status, etc.
         """
-        contract = self.get_contract(symbol)
+        contract = await self.get_contract(symbol)
         contract_id = contract.get("id") or contract.get("contract_id")
         
         order_data = {
@@ -272,10 +246,10 @@ class ProjectXClient:
             order_data["takeProfit2"] = take_profit_2
         
         # ProjectX Gateway API uses /Order/place endpoint
-        response = self._request("POST", "/Order/place", data=order_data)
+        response = await self._request("POST", "/Order/place", data=order_data)
         return response
     
-    def modify_order(
+    async def modify_order(
         self,
         order_id: str,
         price: Optional[float] = None,
@@ -309,10 +283,10 @@ class ProjectXClient:
         
         # ProjectX Gateway API uses /Order/modify endpoint
         update_data["orderId"] = order_id
-        response = self._request("POST", "/Order/modify", data=update_data)
+        response = await self._request("POST", "/Order/modify", data=update_data)
         return response
     
-    def cancel_order(self, order_id: str) -> Dict[str, Any]:
+    async def cancel_order(self, order_id: str) -> Dict[str, Any]:
         """
         Cancel an order
         
@@ -324,10 +298,10 @@ class ProjectXClient:
         """
         # ProjectX Gateway API uses /Order/cancel endpoint
         cancel_data = {"orderId": order_id}
-        response = self._request("POST", "/Order/cancel", data=cancel_data)
+        response = await self._request("POST", "/Order/cancel", data=cancel_data)
         return response
     
-    def get_orders(
+    async def get_orders(
         self,
         account_id: Optional[str] = None,
         status: Optional[str] = None
@@ -356,14 +330,14 @@ class ProjectXClient:
             search_data["status"] = status
         
         endpoint = "/Order/searchOpen" if status == "open" else "/Order/search"
-        response = self._request("POST", endpoint, data=search_data)
+        response = await self._request("POST", endpoint, data=search_data)
         if isinstance(response, list):
             return response
         return response.get("orders", response.get("data", []))
     
     # Position Management
     
-    def get_positions(
+    async def get_positions(
         self,
         account_id: Optional[str] = None,
         symbol: Optional[str] = None
@@ -391,15 +365,16 @@ class ProjectXClient:
         if symbol:
             search_data["symbol"] = symbol
         
-        response = self._request("POST", "/Position/searchOpen", data=search_data)
+        response = await self._request("POST", "/Position/searchOpen", data=search_data)
         if isinstance(response, list):
             return response
         return response.get("positions", response.get("data", []))
     
-    def close_position(
+    async def close_position(
         self,
         position_id: str,
-        size: Optional[int] = None  # None = full close, int = partial close
+        size: Optional[int] = None,  # None = full close, int = partial close
+        account_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Close a position (full or partial)
@@ -407,6 +382,7 @@ class ProjectXClient:
         Args:
             position_id: Position ID to close
             size: Size to close (None = full close)
+            account_id: Account ID (defaults to the first account)
         
         Returns:
             Closure confirmation
@@ -416,45 +392,88 @@ class ProjectXClient:
             close_data["size"] = size
         
         # ProjectX Gateway API uses /Position/closeContract endpoint
-        close_data["accountId"] = account_id if account_id else self.get_account().get("id")
+        close_data["accountId"] = account_id if account_id else (await self.get_account()).get("id")
         close_data["contractId"] = position_id  # In ProjectX, position_id is typically contractId
-        response = self._request("POST", "/Position/closeContract", data=close_data)
+        response = await self._request("POST", "/Position/closeContract", data=close_data)
         return response
     
-    def close_all_positions(
+    async def close_all(
         self,
         account_id: Optional[str] = None,
         symbol: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Close all positions (optionally filtered by symbol)
+        Flatten all positions (optionally filtered by symbol)
+        
+        The Gateway API closes one contract per call, so the closes are
+        sent concurrently.
         
         Args:
             account_id: Account ID
             symbol: Optional symbol filter
         
         Returns:
-            Closure confirmation
+            {"closed": n, "failed": n, "results": [per-contract result], "positions": [...]}
         """
-        positions = self.get_positions(account_id, symbol)
-        results = []
-        
-        if not account_id:
-            account = self.get_account()
+        if account_id:
+            positions = await self.get_positions(account_id, symbol)
+        else:
+            positions, account = await asyncio.gather(
+                self.get_positions(account_id, symbol),
+                self.get_account()
+            )
             account_id = account.get("id") or account.get("accountId")
         
-        for position in positions:
-            try:
-                # ProjectX uses contractId for closing
-                contract_id = position.get("contractId") or position.get("id")
-                result = self.close_position(contract_id, account_id=account_id)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error closing position {position.get('id')}: {e}")
+        # ProjectX uses contractId for closing
+        results = await self._bulk(
+            "close",
+            (position.get("contractId") or position.get("id") for position in positions),
+            lambda contract_id: self.close_position(contract_id, account_id=account_id)
+        )
+        summary = self._summarize("closed", results)
+        summary["positions"] = [r["result"] for r in results if r["ok"]]
+        return summary
+    
+    async def close_all_positions(
+        self,
+        account_id: Optional[str] = None,
+        symbol: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Close all positions (optionally filtered by symbol), see close_all"""
+        return await self.close_all(account_id, symbol)
+    
+    async def cancel_all(
+        self,
+        account_id: Optional[str] = None,
+        symbol: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Cancel all open orders (optionally filtered by symbol)
+        
+        Args:
+            account_id: Account ID
+            symbol: Optional symbol filter
+        
+        Returns:
+            {"cancelled": n, "failed": n, "results": [per-order result]}
+        """
+        if symbol:
+            orders, contract_id = await asyncio.gather(
+                self.get_orders(account_id, status="open"),
+                self.get_contract_id(symbol)
+            )
+            orders = [o for o in orders if o.get("contractId") == contract_id]
+        else:
+            orders = await self.get_orders(account_id, status="open")
         
-        return {"closed": len(results), "positions": results}
+        results = await self._bulk(
+            "cancel",
+            (o.get("id") or o.get("orderId") for o in orders if is_working_order(o)),
+            self.cancel_order
+        )
+        return self._summarize("cancelled", results)
     
-    def route_order(
+    async def route_order(
         self,
         account_id: str,
         symbol: str,
@@ -482,7 +501,7 @@ class ProjectXClient:
             Order dictionary
         """
         order_type = "limit" if entry else "market"
-        return self.place_order(
+        return await self.place_order(
             account_id=account_id,
             symbol=symbol,
             side=action,
@@ -496,7 +515,7 @@ class ProjectXClient:
     
     # Risk Management
     
-    def get_risk_limits(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_risk_limits(self, account_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get risk limits for account
         
@@ -506,12 +525,12 @@ class ProjectXClient:
         Returns:
             Risk limits dictionary
         """
-        account = self.get_account(account_id)
+        account = await self.get_account(account_id)
         return account.get("riskLimits", {})
     
     # Portfolio Management
     
-    def get_portfolio(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_portfolio(self, account_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get portfolio summary
         
@@ -521,8 +540,10 @@ class ProjectXClient:
         Returns:
             Portfolio dictionary
         """
-        account = self.get_account(account_id)
-        positions = self.get_positions(account_id)
+        account, positions = await asyncio.gather(
+            self.get_account(account_id),
+            self.get_positions(account_id)
+        )
         
         total_pnl = sum(pos.get("unrealizedPnl", 0) for pos in positions)
         
@@ -535,7 +556,7 @@ class ProjectXClient:
             "positions": len(positions)
         }
     
-    def get_equity_history(
+    async def get_equity_history(
         self,
         account_id: Optional[str] = None,
         start_date: Optional[datetime] = None,
@@ -560,5 +581,16 @@ class ProjectXClient:
         if end_date:
             params["endDate"] = end_date.isoformat()
         
-        response = self._request("GET", "/equity/history", params=params)
+        response = await self._request("GET", "/equity/history", params=params)
         return response.get("history", [])
+
+
+class ProjectXClient(SyncBrokerClient):
+    """
+    Blocking ProjectX client for scripts
+    
+    Same methods and arguments as AsyncProjectXClient, run on a private
+    event loop.
+    """
+    
+    async_client_class = AsyncProjectXClient
@@ -1,4 +1,4 @@
 """TradeLocker SDK"""
-from .tradelocker_client import TradeLockerClient
+from .tradelocker_client import AsyncTradeLockerClient, TradeLockerClient
 
-__all__ = ["TradeLockerClient"]
+__all__ = ["AsyncTradeLockerClient", "TradeLockerClient"]
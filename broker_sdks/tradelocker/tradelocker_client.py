@@ -7,19 +7,20 @@ Aligned with official TradeLocker API documentation:
 - https://api.tradelocker.com/brand-api/socket/docs/ (WebSocket)
 """
 
-import requests
-import json
-import os
+import asyncio
 from typing import Optional, Dict, List, Any
-from datetime import datetime
 import logging
 
+import httpx
+
+from ..base import AsyncBrokerClient, SyncBrokerClient, is_working_order
+
 logger = logging.getLogger(__name__)
 
 
-class TradeLockerClient:
+class AsyncTradeLockerClient(AsyncBrokerClient):
     """
-    TradeLocker REST API Client
+    TradeLocker REST API Client (async)
     
     Official API Base URLs:
     - Demo: https://demo.tradelocker.com
@@ -30,13 +31,16 @@ class TradeLockerClient:
     - Or JWT token in Authorization header
     """
     
+    name = "TradeLocker"
+    
     def __init__(
         self,
         server: str,
         api_key: Optional[str] = None,
         account_id: Optional[str] = None,
         acc_num: Optional[int] = None,
-        environment: str = "demo"
+        environment: str = "demo",
+        client: Optional[httpx.AsyncClient] = None
     ):
         """
         Initialize TradeLocker client
@@ -47,66 +51,37 @@ class TradeLockerClient:
             account_id: Account ID
             acc_num: Account number
             environment: "demo" or "live"
+            client: Shared httpx client (optional, a private pool is used otherwise)
         """
-        self.server = server
-        self.api_key = api_key
-        self.account_id = account_id
-        self.acc_num = acc_num
-        self.environment = environment
-        
         # Base URL based on server
         if "demo" in server.lower():
-            self.base_url = f"https://demo.tradelocker.com"
+            base_url = "https://demo.tradelocker.com"
         elif "live" in server.lower():
-            self.base_url = f"https://live.tradelocker.com"
+            base_url = "https://live.tradelocker.com"
         else:
-            self.base_url = f"https://{server}"
+            base_url = f"https://{server}"
         
-        self.session = requests.Session()
-        if self.api_key:
-            self.session.headers.update({"X-API-Key": self.api_key})
-    
-    def _request(
-        self,
-        method: str,
-        endpoint: str,
-        data: Optional[Dict] = None,
-        params: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """Make HTTP request to TradeLocker API"""
-        url = f"{self.base_url}{endpoint}"
-        
-        try:
-            if method.upper() == "GET":
-                response = self.session.get(url, params=params, timeout=10)
-            elif method.upper() == "POST":
-                response = self.session.post(url, json=data, timeout=10)
-            elif method.upper() == "PUT":
-                response = self.session.put(url, json=data, timeout=10)
-            elif method.upper() == "DELETE":
-                response = self.session.delete(url, timeout=10)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"TradeLocker API error: {e}")
-            raise
+        super().__init__(base_url, headers={"X-API-Key": api_key} if api_key else None, client=client)
+        
+        self.server = server
+        self.api_key = api_key
+        self.account_id = account_id
+        self.acc_num = acc_num
+        self.environment = environment
     
     # Account Management
     
-    def list_accounts(self) -> List[Dict[str, Any]]:
+    async def list_accounts(self) -> List[Dict[str, Any]]:
         """
         List all accounts for the authenticated user
         
         Returns:
             List of account dictionaries with id, accNum, name, balance, equity, margin, status
         """
-        response = self._request("GET", "/api/v1/accounts")
+        response = await self._request("GET", "/api/v1/accounts")
         return response.get("accounts", [])
     
-    def get_account(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_account(self, account_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get account information
         
@@ -120,22 +95,22 @@ class TradeLockerClient:
         if not acc_id:
             raise ValueError("Account ID required")
         
-        response = self._request("GET", f"/api/v1/accounts/{acc_id}")
+        response = await self._request("GET", f"/api/v1/accounts/{acc_id}")
         return response
     
-    def get_account_balance(self, account_id: Optional[str] = None) -> float:
+    async def get_account_balance(self, account_id: Optional[str] = None) -> float:
         """Get account balance"""
-        account = self.get_account(account_id)
+        account = await self.get_account(account_id)
         return account.get("balance", 0.0)
     
-    def get_account_equity(self, account_id: Optional[str] = None) -> float:
+    async def get_account_equity(self, account_id: Optional[str] = None) -> float:
         """Get account equity"""
-        account = self.get_account(account_id)
+        account = await self.get_account(account_id)
         return account.get("equity", 0.0)
     
     # Instrument/Symbol Management
     
-    def get_instruments(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def get_instruments(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get available instruments
         
@@ -149,10 +124,10 @@ class TradeLockerClient:
         if symbol:
             params["symbol"] = symbol
         
-        response = self._request("GET", "/api/v1/instruments", params=params)
+        response = await self._request("GET", "/api/v1/instruments", params=params)
         return response.get("instruments", [])
     
-    def resolve_symbol(self, symbol: str) -> Dict[str, Any]:
+    async def resolve_symbol(self, symbol: str) -> Dict[str, Any]:
         """
         Resolve symbol to instrument details
         
@@ -162,14 +137,14 @@ class TradeLockerClient:
         Returns:
             Instrument dictionary with contract details
         """
-        instruments = self.get_instruments(symbol=symbol)
+        instruments = await self.get_instruments(symbol=symbol)
         if not instruments:
             raise ValueError(f"Symbol not found: {symbol}")
         return instruments[0]
     
     # Order Management
     
-    def place_order(
+    async def place_order(
         self,
         symbol: str,
         side: str,  # "buy" or "sell"
@@ -227,10 +202,10 @@ class TradeLockerClient:
         if trailing_step:
             order_data["trailingStep"] = trailing_step
         
-        response = self._request("POST", "/api/v1/orders", data=order_data)
+        response = await self._request("POST", "/api/v1/orders", data=order_data)
         return response
     
-    def modify_order(
+    async def modify_order(
         self,
         order_id: str,
         price: Optional[float] = None,
@@ -266,10 +241,10 @@ class TradeLockerClient:
         if trailing_stop is not None:
             update_data["trailingStop"] = trailing_stop
         
-        response = self._request("PUT", f"/api/v1/orders/{order_id}", data=update_data)
+        response = await self._request("PUT", f"/api/v1/orders/{order_id}", data=update_data)
         return response
     
-    def cancel_order(self, order_id: str) -> Dict[str, Any]:
+    async def cancel_order(self, order_id: str) -> Dict[str, Any]:
         """
         Cancel an order
         
@@ -279,10 +254,10 @@ class TradeLockerClient:
         Returns:
             Cancellation confirmation
         """
-        response = self._request("DELETE", f"/api/v1/orders/{order_id}")
+        response = await self._request("DELETE", f"/api/v1/orders/{order_id}")
         return response
     
-    def get_orders(
+    async def get_orders(
         self,
         account_id: Optional[str] = None,
         status: Optional[str] = None  # "pending", "filled", "cancelled", "rejected"
@@ -305,12 +280,12 @@ class TradeLockerClient:
         if status:
             params["status"] = status
         
-        response = self._request("GET", "/api/v1/orders", params=params)
+        response = await self._request("GET", "/api/v1/orders", params=params)
         return response.get("orders", [])
     
     # Position Management
     
-    def get_positions(
+    async def get_positions(
         self,
         account_id: Optional[str] = None,
         symbol: Optional[str] = None
@@ -333,10 +308,10 @@ class TradeLockerClient:
         if symbol:
             params["symbol"] = symbol
         
-        response = self._request("GET", "/api/v1/positions", params=params)
+        response = await self._request("GET", "/api/v1/positions", params=params)
         return response.get("positions", [])
     
-    def close_position(
+    async def close_position(
         self,
         position_id: str,
         quantity: Optional[float] = None  # None = full close, float = partial close
@@ -355,37 +330,82 @@ class TradeLockerClient:
         if quantity:
             close_data["quantity"] = quantity
         
-        response = self._request("POST", f"/api/v1/positions/{position_id}/close", data=close_data)
+        response = await self._request("POST", f"/api/v1/positions/{position_id}/close", data=close_data)
         return response
     
-    def close_all_positions(
+    async def close_all(
         self,
         account_id: Optional[str] = None,
         symbol: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Close all positions (optionally filtered by symbol)
+        Flatten all positions (optionally filtered by symbol)
+        
+        Uses the close-all DELETE /api/v1/positions endpoint, falling back
+        to concurrent per-position closes.
         
         Args:
             account_id: Account ID (uses self.account_id if not provided)
             symbol: Optional symbol filter
         
         Returns:
-            Closure confirmation with list of closed positions
+            {"closed": n, "failed": n, "results": [per-position result], "positions": [...]}
+        """
+        positions = await self.get_positions(account_id, symbol)
+        results = await self._bulk(
+            "close",
+            (p["id"] for p in positions),
+            self.close_position,
+            native=lambda ids: self._request("DELETE", "/api/v1/positions", params=self._scope(account_id, symbol))
+        )
+        summary = self._summarize("closed", results)
+        summary["positions"] = [r["result"] for r in results if r["ok"]]
+        return summary
+    
+    async def close_all_positions(
+        self,
+        account_id: Optional[str] = None,
+        symbol: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Close all positions (optionally filtered by symbol), see close_all"""
+        return await self.close_all(account_id, symbol)
+    
+    async def cancel_all(
+        self,
+        account_id: Optional[str] = None,
+        symbol: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        positions = self.get_positions(account_id, symbol)
-        results = []
+        Cancel all pending orders (optionally filtered by symbol)
         
-        for position in positions:
-            try:
-                result = self.close_position(position["id"])
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error closing position {position['id']}: {e}")
+        Uses the cancel-all DELETE /api/v1/orders endpoint, falling back to
+        concurrent per-order cancels.
         
-        return {"closed": len(results), "positions": results}
+        Args:
+            account_id: Account ID (uses self.account_id if not provided)
+            symbol: Optional symbol filter
+        
+        Returns:
+            {"cancelled": n, "failed": n, "results": [per-order result]}
+        """
+        orders = await self.get_orders(account_id, status="pending")
+        if symbol:
+            orders = [o for o in orders if o.get("symbol") == symbol]
+        results = await self._bulk(
+            "cancel",
+            (o["id"] for o in orders if is_working_order(o)),
+            self.cancel_order,
+            native=lambda ids: self._request("DELETE", "/api/v1/orders", params=self._scope(account_id, symbol))
+        )
+        return self._summarize("cancelled", results)
+    
+    def _scope(self, account_id: Optional[str], symbol: Optional[str]) -> Dict[str, Any]:
+        params = {"accountId": account_id or self.account_id}
+        if symbol:
+            params["symbol"] = symbol
+        return params
     
-    def set_trailing_stop(
+    async def set_trailing_stop(
         self,
         position_id: str,
         trailing_stop: float,
@@ -406,12 +426,12 @@ class TradeLockerClient:
         if trailing_step:
             update_data["trailingStep"] = trailing_step
         
-        response = self._request("PUT", f"/api/v1/positions/{position_id}", data=update_data)
+        response = await self._request("PUT", f"/api/v1/positions/{position_id}", data=update_data)
         return response
     
     # Portfolio/Portfolio Management
     
-    def get_portfolio(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_portfolio(self, account_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get portfolio summary (balance, equity, margin, PnL)
         
@@ -421,8 +441,10 @@ class TradeLockerClient:
         Returns:
             Portfolio dictionary
         """
-        account = self.get_account(account_id)
-        positions = self.get_positions(account_id)
+        account, positions = await asyncio.gather(
+            self.get_account(account_id),
+            self.get_positions(account_id)
+        )
         
         total_pnl = sum(pos.get("unrealizedPnl", 0) for pos in positions)
         
@@ -436,14 +458,14 @@ class TradeLockerClient:
             "positions": len(positions)
         }
     
-    def get_pnl(self, account_id: Optional[str] = None) -> float:
+    async def get_pnl(self, account_id: Optional[str] = None) -> float:
         """Get total PnL (unrealized)"""
-        portfolio = self.get_portfolio(account_id)
+        portfolio = await self.get_portfolio(account_id)
         return portfolio.get("unrealizedPnl", 0.0)
     
     # Market Data (if available via REST)
     
-    def get_market_data(self, symbol: str) -> Dict[str, Any]:
+    async def get_market_data(self, symbol: str) -> Dict[str, Any]:
         """
         Get current market data for symbol
         
@@ -453,12 +475,12 @@ class TradeLockerClient:
         Returns:
             Market data dictionary (bid, ask, last, etc.)
         """
-        response = self._request("GET", f"/api/v1/market-data/{symbol}")
+        response = await self._request("GET", f"/api/v1/market-data/{symbol}")
         return response
     
     # Helper Methods
     
-    def calculate_lot_size(self, symbol: str, risk_amount: float, stop_loss_pips: float) -> float:
+    async def calculate_lot_size(self, symbol: str, risk_amount: float, stop_loss_pips: float) -> float:
         """
         Calculate lot size based on risk
         
@@ -472,10 +494,21 @@ class TradeLockerClient:
         """
         # This is a simplified calculation - actual implementation depends on
         # contract specifications and pip values
-        instrument = self.resolve_symbol(symbol)
+        instrument = await self.resolve_symbol(symbol)
         pip_value = instrument.get("pipValue", 0.0001)
         contract_size = instrument.get("contractSize", 100000)
         
         # Simplified calculation
         lot_size = risk_amount / (stop_loss_pips * pip_value * contract_size)
         return round(lot_size, 2)
+
+
+class TradeLockerClient(SyncBrokerClient):
+    """
+    Blocking TradeLocker client for scripts
+    
+    Same methods and arguments as AsyncTradeLockerClient, run on a private
+    event loop.
+    """
+    
+    async_client_class = AsyncTradeLockerClient
@@ -1,4 +1,4 @@
 """Tradovate SDK"""
-from .tradovate_client import TradovateClient
+from .tradovate_client import AsyncTradovateClient, TradovateClient
 
-__all__ = ["TradovateClient"]
+__all__ = ["AsyncTradovateClient", "TradovateClient"]
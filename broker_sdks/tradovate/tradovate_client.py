@@ -8,19 +8,21 @@ Aligned with official Tradovate API documentation:
 Tradovate provides REST API and WebSocket for real-time data.
 """
 
-import requests
-import json
-import os
+import asyncio
+from datetime import datetime, timezone
 from typing import Optional, Dict, List, Any
-from datetime import datetime
 import logging
 
+import httpx
+
+from ..base import AsyncBrokerClient, SyncBrokerClient, is_working_order
+
 logger = logging.getLogger(__name__)
 
 
-class TradovateClient:
+class AsyncTradovateClient(AsyncBrokerClient):
     """
-    Tradovate REST API Client
+    Tradovate REST API Client (async)
     
     Official API Base URL:
     - Demo: https://demo.tradovate.com/api/v1
@@ -28,16 +30,19 @@ class TradovateClient:
     
     Authentication:
     - Client ID and Client Secret
-    - OAuth2 token flow
+    - OAuth2 token flow, performed on the first request
     """
     
+    name = "Tradovate"
+    
     def __init__(
         self,
         client_id: str,
         client_secret: str,
         username: Optional[str] = None,
         password: Optional[str] = None,
-        environment: str = "demo"  # "demo" or "live"
+        environment: str = "demo",  # "demo" or "live"
+        client: Optional[httpx.AsyncClient] = None
     ):
         """
         Initialize Tradovate client
@@ -48,59 +53,47 @@ class TradovateClient:
             username: Username for user authentication (optional)
             password: Password for user authentication (optional)
             environment: "demo" or "live"
+            client: Shared httpx client (optional, a private pool is used otherwise)
         """
+        # Base URL
+        if environment == "demo":
+            base_url = "https://demo.tradovate.com/api/v1"
+        else:
+            base_url = "https://api.tradovate.com/api/v1"
+        
+        super().__init__(base_url, headers={"Content-Type": "application/json"}, client=client)
+        
         self.client_id = client_id
         self.client_secret = client_secret
         self.username = username
         self.password = password
         self.environment = environment
         
-        # Base URL
-        if environment == "demo":
-            self.base_url = "https://demo.tradovate.com/api/v1"
-        else:
-            self.base_url = "https://api.tradovate.com/api/v1"
-        
-        self.session = requests.Session()
         self.access_token = None
         self.user_id = None
-        
-        # Authenticate
-        self._authenticate()
     
-    def _authenticate(self) -> None:
+    async def _authenticate(self) -> None:
         """Authenticate and get access token"""
-        try:
-            # First, get access token with client credentials
-            auth_data = {
-                "grant_type": "client_credentials",
-                "client_id": self.client_id,
-                "client_secret": self.client_secret
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/auth/accesstokenrequest",
-                json=auth_data,
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            auth_response = response.json()
-            self.access_token = auth_response.get("accessToken")
-            
-            if self.access_token:
-                self.session.headers.update({
-                    "Authorization": f"Bearer {self.access_token}",
-                    "Content-Type": "application/json"
-                })
-            
-            # If username/password provided, authenticate user
-            if self.username and self.password:
-                self._authenticate_user()
-        except Exception as e:
-            logger.warning(f"Authentication failed: {e}")
+        # First, get access token with client credentials
+        auth_data = {
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret
+        }
+        
+        auth_response = await self._request(
+            "POST", "/auth/accesstokenrequest", data=auth_data, authenticate=False
+        )
+        self.access_token = auth_response.get("accessToken")
+        
+        if self.access_token:
+            self._set_token(self.access_token, self._token_ttl(auth_response))
+        
+        # If username/password provided, authenticate user
+        if self.username and self.password:
+            await self._authenticate_user()
     
-    def _authenticate_user(self) -> None:
+    async def _authenticate_user(self) -> None:
         """Authenticate user and get user-specific token"""
         try:
             user_auth_data = {
@@ -112,66 +105,61 @@ class TradovateClient:
                 "sec": self.client_secret
             }
             
-            response = requests.post(
-                f"{self.base_url}/auth/signin",
-                json=user_auth_data,
-                timeout=10
+            user_response = await self._request(
+                "POST", "/auth/signin", data=user_auth_data, authenticate=False
             )
-            response.raise_for_status()
-            
-            user_response = response.json()
             self.user_id = user_response.get("userId")
             
             # Update token if provided
             if user_response.get("accessToken"):
                 self.access_token = user_response.get("accessToken")
-                self.session.headers.update({
-                    "Authorization": f"Bearer {self.access_token}"
-                })
+                self._set_token(self.access_token, self._token_ttl(user_response))
         except Exception as e:
             logger.warning(f"User authentication failed: {e}")
     
-    def _request(
-        self,
-        method: str,
-        endpoint: str,
-        data: Optional[Dict] = None,
-        params: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """Make HTTP request to Tradovate API"""
-        url = f"{self.base_url}{endpoint}"
-        
-        try:
-            if method.upper() == "GET":
-                response = self.session.get(url, params=params, timeout=10)
-            elif method.upper() == "POST":
-                response = self.session.post(url, json=data, timeout=10)
-            elif method.upper() == "PUT":
-                response = self.session.put(url, json=data, timeout=10)
-            elif method.upper() == "DELETE":
-                response = self.session.delete(url, timeout=10)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Tradovate API error: {e}")
-            raise
+    @staticmethod
+    def _token_ttl(auth_response: Dict[str, Any]) -> Optional[float]:
+        """Seconds until the token's expirationTime, if the response has one"""
+        expiration = auth_response.get("expirationTime")
+        if not expiration:
+            return None
+        expires_at = datetime.fromisoformat(expiration.replace("Z", "+00:00"))
+        return (expires_at - datetime.now(timezone.utc)).total_seconds()
+    
+    def _batch_outcomes(self, kind: str, item_ids: List[Any], response: Any) -> Dict[Any, Dict[str, Any]]:
+        """Per-position results from /order/liquidatepositions
+        
+        The endpoint answers with one liquidation order id per position, in
+        request order, or a failureReason for the whole batch. Any other
+        shape leaves every position unconfirmed.
+        """
+        if not isinstance(response, dict):
+            return {}
+        failure = response.get("failureReason")
+        if failure and failure != "Success":
+            error = response.get("failureText") or failure
+            return {item_id: {"ok": False, "error": error} for item_id in item_ids}
+        order_ids = response.get("orderIds")
+        if not isinstance(order_ids, list) or len(order_ids) != len(item_ids):
+            return {}
+        return {
+            item_id: {"ok": True, "result": {"positionId": item_id, "orderId": order_id}}
+            for item_id, order_id in zip(item_ids, order_ids)
+        }
     
     # Account Management
     
-    def list_accounts(self) -> List[Dict[str, Any]]:
+    async def list_accounts(self) -> List[Dict[str, Any]]:
         """
         List all accounts for the authenticated user
         
         Returns:
             List of account dictionaries
         """
-        response = self._request("GET", "/account/list")
+        response = await self._request("GET", "/account/list")
         return response if isinstance(response, list) else response.get("accounts", [])
     
-    def get_account(self, account_id: Optional[int] = None) -> Dict[str, Any]:
+    async def get_account(self, account_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Get account information
         
@@ -181,7 +169,7 @@ class TradovateClient:
         Returns:
             Account dictionary
         """
-        accounts = self.list_accounts()
+        accounts = await self.list_accounts()
         if not accounts:
             raise ValueError("No accounts found")
         
@@ -193,19 +181,19 @@ class TradovateClient:
         
         return accounts[0]
     
-    def get_account_balance(self, account_id: Optional[int] = None) -> float:
+    async def get_account_balance(self, account_id: Optional[int] = None) -> float:
         """Get account balance"""
-        account = self.get_account(account_id)
+        account = await self.get_account(account_id)
         return account.get("netLiquidation", 0.0)
     
-    def get_account_equity(self, account_id: Optional[int] = None) -> float:
+    async def get_account_equity(self, account_id: Optional[int] = None) -> float:
         """Get account equity"""
-        account = self.get_account(account_id)
+        account = await self.get_account(account_id)
         return account.get("netLiquidation", 0.0)
     
     # Instrument Management
     
-    def get_contracts(
+    async def get_contracts(
         self,
         symbol: Optional[str] = None,
         product_id: Optional[int] = None
@@ -226,10 +214,10 @@ class TradovateClient:
         if product_id:
             params["productId"] = product_id
         
-        response = self._request("GET", "/contract/list", params=params)
+        response = await self._request("GET", "/contract/list", params=params)
         return response if isinstance(response, list) else response.get("contracts", [])
     
-    def get_contract(self, symbol: str) -> Dict[str, Any]:
+    async def get_contract(self, symbol: str) -> Dict[str, Any]:
         """
         Get contract details for symbol
         
@@ -239,19 +227,19 @@ class TradovateClient:
         Returns:
             Contract dictionary
         """
-        contracts = self.get_contracts(symbol=symbol)
+        contracts = await self.get_contracts(symbol=symbol)
         if not contracts:
             raise ValueError(f"Contract not found: {symbol}")
         return contracts[0]
     
-    def get_products(self) -> List[Dict[str, Any]]:
+    async def get_products(self) -> List[Dict[str, Any]]:
         """Get all products"""
-        response = self._request("GET", "/product/list")
+        response = await self._request("GET", "/product/list")
         return response if isinstance(response, list) else response.get("products", [])
     
     # Order Management
     
-    def place_order(
+    async def place_order(
         self,
         account_id: int,
         contract_id: int,
@@ -293,10 +281,10 @@ class TradovateClient:
         if bracket_orders:
             order_data["bracketOrders"] = bracket_orders
         
-        response = self._request("POST", "/order/placeorder", data=order_data)
+        response = await self._request("POST", "/order/placeorder", data=order_data)
         return response
     
-    def modify_order(
+    async def modify_order(
         self,
         order_id: int,
         price: Optional[float] = None,
@@ -320,10 +308,10 @@ class TradovateClient:
         if quantity is not None:
             update_data["quantity"] = quantity
         
-        response = self._request("POST", "/order/modifyorder", data=update_data)
+        response = await self._request("POST", "/order/modifyorder", data=update_data)
         return response
     
-    def cancel_order(self, order_id: int) -> Dict[str, Any]:
+    async def cancel_order(self, order_id: int) -> Dict[str, Any]:
         """
         Cancel an order
         
@@ -334,10 +322,10 @@ class TradovateClient:
             Cancellation confirmation
         """
         cancel_data = {"orderId": order_id}
-        response = self._request("POST", "/order/cancelorder", data=cancel_data)
+        response = await self._request("POST", "/order/cancelorder", data=cancel_data)
         return response
     
-    def get_orders(
+    async def get_orders(
         self,
         account_id: Optional[int] = None,
         status: Optional[str] = None
@@ -358,12 +346,12 @@ class TradovateClient:
         if status:
             params["status"] = status
         
-        response = self._request("GET", "/order/list", params=params)
+        response = await self._request("GET", "/order/list", params=params)
         return response if isinstance(response, list) else response.get("orders", [])
     
     # Position Management
     
-    def get_positions(
+    async def get_positions(
         self,
         account_id: Optional[int] = None,
         contract_id: Optional[int] = None
@@ -384,10 +372,10 @@ class TradovateClient:
         if contract_id:
             params["contractId"] = contract_id
         
-        response = self._request("GET", "/position/list", params=params)
+        response = await self._request("GET", "/position/list", params=params)
         return response if isinstance(response, list) else response.get("positions", [])
     
-    def close_position(
+    async def close_position(
         self,
         position_id: int,
         quantity: Optional[int] = None  # None = full close
@@ -406,42 +394,81 @@ class TradovateClient:
         if quantity:
             close_data["quantity"] = quantity
         
-        response = self._request("POST", "/order/closeposition", data=close_data)
+        response = await self._request("POST", "/order/closeposition", data=close_data)
         return response
     
-    def close_all_positions(
+    async def close_all(
         self,
         account_id: Optional[int] = None,
         symbol: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Close all positions (optionally filtered by symbol)
+        Flatten all positions (optionally filtered by symbol)
+        
+        Uses the batch /order/liquidatepositions endpoint, falling back to
+        concurrent per-position closes.
         
         Args:
             account_id: Account ID
             symbol: Optional symbol filter
         
         Returns:
-            Closure confirmation
+            {"closed": n, "failed": n, "results": [per-position result], "positions": [...]}
         """
-        positions = self.get_positions(account_id)
-        
         if symbol:
-            contract = self.get_contract(symbol)
-            contract_id = contract.get("id")
-            positions = [p for p in positions if p.get("contractId") == contract_id]
+            positions, contract = await asyncio.gather(
+                self.get_positions(account_id),
+                self.get_contract(symbol)
+            )
+            positions = [p for p in positions if p.get("contractId") == contract.get("id")]
+        else:
+            positions = await self.get_positions(account_id)
+        
+        results = await self._bulk(
+            "close",
+            (p["id"] for p in positions),
+            self.close_position,
+            native=lambda ids: self._request(
+                "POST", "/order/liquidatepositions", data={"positionIds": ids, "admin": False}
+            )
+        )
+        summary = self._summarize("closed", results)
+        summary["positions"] = [r["result"] for r in results if r["ok"]]
+        return summary
+    
+    async def close_all_positions(
+        self,
+        account_id: Optional[int] = None,
+        symbol: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Close all positions (optionally filtered by symbol), see close_all"""
+        return await self.close_all(account_id, symbol)
+    
+    async def cancel_all(
+        self,
+        account_id: Optional[int] = None,
+        symbol: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Cancel all working orders (optionally filtered by symbol)
+        
+        Args:
+            account_id: Account ID
+            symbol: Optional symbol filter
         
-        results = []
-        for position in positions:
-            try:
-                result = self.close_position(position["id"])
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error closing position {position['id']}: {e}")
+        Returns:
+            {"cancelled": n, "failed": n, "results": [per-order result]}
+        """
+        orders = await self.get_orders(account_id)
+        orders = [o for o in orders if is_working_order(o)]
+        if symbol:
+            contract = await self.get_contract(symbol)
+            orders = [o for o in orders if o.get("contractId") == contract.get("id")]
         
-        return {"closed": len(results), "positions": results}
+        results = await self._bulk("cancel", (o["id"] for o in orders), self.cancel_order)
+        return self._summarize("cancelled", results)
     
-    def set_trailing_stop(
+    async def set_trailing_stop(
         self,
         position_id: int,
         trailing_stop: float
@@ -457,14 +484,13 @@ class TradovateClient:
             Updated position dictionary
         """
         # Tradovate uses bracket orders for trailing stops
-        position = self.get_positions()[0]  # Get position details
         # This would need to be implemented via bracket order modification
         # For now, return a placeholder
         return {"status": "trailing_stop_set", "positionId": position_id}
     
     # Bracket Orders / OCO
     
-    def place_bracket_order(
+    async def place_bracket_order(
         self,
         account_id: int,
         contract_id: int,
@@ -507,7 +533,7 @@ class TradovateClient:
                 "stopPrice": stop_loss
             })
         
-        return self.place_order(
+        return await self.place_order(
             account_id=account_id,
             contract_id=contract_id,
             order_type="Market" if not entry_price else "Limit",
@@ -519,7 +545,7 @@ class TradovateClient:
     
     # Portfolio Management
     
-    def get_portfolio(self, account_id: Optional[int] = None) -> Dict[str, Any]:
+    async def get_portfolio(self, account_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Get portfolio summary
         
@@ -529,8 +555,10 @@ class TradovateClient:
         Returns:
             Portfolio dictionary
         """
-        account = self.get_account(account_id)
-        positions = self.get_positions(account_id)
+        account, positions = await asyncio.gather(
+            self.get_account(account_id),
+            self.get_positions(account_id)
+        )
         
         total_pnl = sum(pos.get("unrealizedPnl", 0) for pos in positions)
         
@@ -544,7 +572,7 @@ class TradovateClient:
     
     # Market Data
     
-    def get_market_data(self, contract_id: int) -> Dict[str, Any]:
+    async def get_market_data(self, contract_id: int) -> Dict[str, Any]:
         """
         Get current market data for contract
         
@@ -554,5 +582,16 @@ class TradovateClient:
         Returns:
             Market data dictionary
         """
-        response = self._request("GET", f"/md/getquotes", params={"contractId": contract_id})
+        response = await self._request("GET", "/md/getquotes", params={"contractId": contract_id})
         return response
+
+
+class TradovateClient(SyncBrokerClient):
+    """
+    Blocking Tradovate client for scripts
+    
+    Same methods and arguments as AsyncTradovateClient, run on a private
+    event loop.
+    """
+    
+    async_client_class = AsyncTradovateClient
@@ -1,4 +1,4 @@
 """TruForex SDK"""
-from .truforex_client import TruForexClient
+from .truforex_client import AsyncTruForexClient, TruForexClient
 
-__all__ = ["TruForexClient"]
+__all__ = ["AsyncTruForexClient", "TruForexClient"]
@@ -6,19 +6,20 @@ Aligned with MT4/MT5 REST API patterns and TruForex backend implementation.
 TruForex uses MT4/MT5 platforms with a REST API bridge/backend.
 """
 
-import requests
-import json
 import os
 from typing import Optional, Dict, List, Any
-from datetime import datetime
 import logging
 
+import httpx
+
+from ..base import AsyncBrokerClient, SyncBrokerClient
+
 logger = logging.getLogger(__name__)
 
 
-class TruForexClient:
+class AsyncTruForexClient(AsyncBrokerClient):
     """
-    TruForex MT4/MT5 Backend Client
+    TruForex MT4/MT5 Backend Client (async)
     
     This client communicates with the TruForex backend which bridges
     to MT4/MT5 platforms via REST API.
@@ -27,11 +28,14 @@ class TruForexClient:
     Default: http://localhost:5017
     """
     
+    name = "TruForex"
+    
     def __init__(
         self,
         api_key: str,
         base_url: Optional[str] = None,
-        platform: str = "MT4"  # "MT4" or "MT5"
+        platform: str = "MT4",  # "MT4" or "MT5"
+        client: Optional[httpx.AsyncClient] = None
     ):
         """
         Initialize TruForex client
@@ -40,76 +44,61 @@ class TruForexClient:
             api_key: API key for authentication
             base_url: Backend base URL (defaults to env var or localhost:5017)
             platform: Platform type ("MT4" or "MT5")
+            client: Shared httpx client (optional, a private pool is used otherwise)
         """
+        super().__init__(
+            base_url or os.getenv("TRUFOREX_URL", "http://localhost:5017"),
+            headers={
+                "X-API-Key": api_key,
+                "Content-Type": "application/json"
+            },
+            client=client
+        )
         self.api_key = api_key
         self.platform = platform
-        self.base_url = base_url or os.getenv("TRUFOREX_URL", "http://localhost:5017")
-        
-        self.session = requests.Session()
-        self.session.headers.update({
-            "X-API-Key": self.api_key,
-            "Content-Type": "application/json"
-        })
     
-    def _request(
+    async def _request(
         self,
         method: str,
         endpoint: str,
         data: Optional[Dict] = None,
-        params: Optional[Dict] = None
+        params: Optional[Dict] = None,
+        **kwargs
     ) -> Dict[str, Any]:
         """Make HTTP request to TruForex backend"""
-        url = f"{self.base_url}{endpoint}"
-        
         # Add API key to params if not in headers (for GET requests)
         if params is None:
             params = {}
         if "api_key" not in params:
             params["api_key"] = self.api_key
         
-        try:
-            if method.upper() == "GET":
-                response = self.session.get(url, params=params, timeout=10)
-            elif method.upper() == "POST":
-                response = self.session.post(url, json=data, timeout=10)
-            elif method.upper() == "PUT":
-                response = self.session.put(url, json=data, timeout=10)
-            elif method.upper() == "DELETE":
-                response = self.session.delete(url, timeout=10)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"TruForex API error: {e}")
-            raise
+        return await super()._request(method, endpoint, data=data, params=params, **kwargs)
     
     # User Management
     
-    def verify_user(self) -> Dict[str, Any]:
+    async def verify_user(self) -> Dict[str, Any]:
         """
         Verify user and get user information
         
         Returns:
             User dictionary with username, platform, server, account_login
         """
-        response = self._request("GET", "/users/verify")
+        response = await self._request("GET", "/users/verify")
         return response
     
-    def heartbeat(self) -> Dict[str, Any]:
+    async def heartbeat(self) -> Dict[str, Any]:
         """
         Send heartbeat to keep connection alive
         
         Returns:
             Status dictionary
         """
-        response = self._request("GET", "/heartbeat")
+        response = await self._request("GET", "/heartbeat")
         return response
     
     # Signal Management (for MT4/MT5 EA polling)
     
-    def get_signal(self, symbol: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    async def get_signal(self, symbol: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Get pending signal for MT4/MT5 EA
         
@@ -124,14 +113,14 @@ class TruForexClient:
         if symbol:
             params["symbol"] = symbol
         
-        response = self._request("GET", endpoint, params=params)
+        response = await self._request("GET", endpoint, params=params)
         
         if response.get("status") == "no_signal":
             return None
         
         return response
     
-    def enqueue_signal(
+    async def enqueue_signal(
         self,
         symbol: str,
         action: str,  # "buy", "sell", "close", "partial_close", "trail"
@@ -199,10 +188,10 @@ class TruForexClient:
         
         # API key can be in header (already set) or body
         # Backend checks header first, then body
-        response = self._request("POST", "/webhook", data=signal_data)
+        response = await self._request("POST", "/webhook", data=signal_data)
         return response
     
-    def report_execution(
+    async def report_execution(
         self,
         symbol: str,
         action: str,
@@ -250,19 +239,18 @@ class TruForexClient:
         }
         
         # Backend expects form data, not JSON
-        url = f"{self.base_url}/execution_report"
-        response = requests.post(
-            url,
+        response = await self.session.post(
+            f"{self.base_url}/execution_report",
             data=execution_data,  # Form data, not json=
             headers={"X-API-Key": self.api_key},
-            timeout=10
+            timeout=self.timeout
         )
         response.raise_for_status()
         return response.json()
     
     # Order Management (via signals)
     
-    def place_order(
+    async def place_order(
         self,
         symbol: str,
         side: str,
@@ -291,7 +279,7 @@ class TruForexClient:
         Returns:
             Signal queued confirmation
         """
-        return self.enqueue_signal(
+        return await self.enqueue_signal(
             symbol=symbol,
             action=side,
             quantity=quantity,
@@ -302,7 +290,7 @@ class TruForexClient:
             sl=stop_loss
         )
     
-    def close_position(
+    async def close_position(
         self,
         symbol: str,
         quantity: Optional[float] = None  # None = full close
@@ -329,13 +317,13 @@ class TruForexClient:
             action = "close"  # Full close
             qty = 0.0  # Backend interprets 0 as full close
         
-        return self.enqueue_signal(
+        return await self.enqueue_signal(
             symbol=symbol,
             action=action,
             quantity=qty
         )
     
-    def modify_order(
+    async def modify_order(
         self,
         symbol: str,
         order_id: Optional[str] = None,
@@ -367,7 +355,7 @@ class TruForexClient:
             "symbol": symbol
         }
     
-    def set_trailing_stop(
+    async def set_trailing_stop(
         self,
         symbol: str,
         trailing_stop: Optional[float] = None,
@@ -401,10 +389,10 @@ class TruForexClient:
         if trailing_step is not None:
             signal_data["trailingStep"] = float(trailing_step)
         
-        response = self._request("POST", "/webhook", data=signal_data)
+        response = await self._request("POST", "/webhook", data=signal_data)
         return response
     
-    def partial_close(
+    async def partial_close(
         self,
         symbol: str,
         quantity: float
@@ -419,11 +407,11 @@ class TruForexClient:
         Returns:
             Partial close confirmation
         """
-        return self.close_position(symbol, quantity)
+        return await self.close_position(symbol, quantity)
     
     # Position Queries (via backend tracking)
     
-    def get_open_positions(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def get_open_positions(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get open positions (tracked by backend)
         
@@ -467,3 +455,14 @@ class TruForexClient:
         """
         lot_size = risk_amount / (stop_loss_pips * pip_value)
         return round(lot_size, 2)
+
+
+class TruForexClient(SyncBrokerClient):
+    """
+    Blocking TruForex client for scripts
+    
+    Same methods and arguments as AsyncTruForexClient, run on a private
+    event loop.
+    """
+    
+    async_client_class = AsyncTruForexClient
@@ -0,0 +1,67 @@
+"""
+Benchmark WebSocket wire formats for Unified Trading Engine.
+Reports encode and decode cost and bytes on the wire per message for JSON,
+MessagePack and CBOR on typical position, quote and topic messages.
+
+Usage: python scripts/bench_ws_encoding.py [iterations]
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.ws_fanout import available_formats, encode, loads
+
+
+def _position(i):
+    return {
+        "kind": "position", "broker": "tradovate", "account_id": f"DEMO{i % 5}", "ts": 1718000000.123 + i,
+        "position_id": f"P{i}", "symbol": ("ES", "NQ", "CL", "GC")[i % 4], "size": float(i % 7 - 3),
+        "avg_price": 5000.25 + i, "unrealized_pnl": 125.5 - i, "realized_pnl": 0.0, "closed": False
+    }
+
+
+MESSAGES = {
+    "position_update": {"type": "position_update", "data": _position(1)},
+    "quote_delta": {
+        "type": "delta", "topic": "symbol:ES", "seq": 1042,
+        "changes": [{"id": "quote:tradovate::ES", "bid": 5000.25, "ask": 5000.5, "last": 5000.25}]
+    },
+    "pnl_delta_50": {
+        "type": "delta", "topic": "account:DEMO1", "seq": 77,
+        "changes": [{"id": f"position:tradovate:DEMO1:P{i}", "unrealized_pnl": 10.25 * i} for i in range(50)]
+    },
+    "snapshot_200": {
+        "type": "snapshot", "topic": "broker:tradovate", "seq": 0,
+        "data": [{"id": f"position:tradovate:DEMO{i % 5}:P{i}", **_position(i)} for i in range(200)]
+    }
+}
+
+
+def _per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    formats = available_formats()
+    print(f"Formats: {', '.join(formats)} ({iterations} iterations each)")
+    print(f"{'message':<16} {'format':<8} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    for name, message in MESSAGES.items():
+        for fmt in formats:
+            # A fresh Message per call so every iteration really serializes
+            payload = encode(message).frame(fmt).payload
+            encode_us = _per_call(lambda: encode(message).frame(fmt), iterations)
+            decode_us = _per_call(lambda: loads(payload, fmt), iterations)
+            size = len(payload.encode()) if isinstance(payload, str) else len(payload)
+            print(f"{name:<16} {fmt:<8} {size:>8} {encode_us:>10.1f} {decode_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Test the account directory.
+Tests owner lookups by broker account id and primary key, account topic
+authorization, and keeping the last good table when a reload fails.
+"""
+
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.account_directory import AccountDirectory
+
+
+class FakeAccounts:
+    """Serves (pk, broker account id, user id) rows, or fails"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.fail = False
+
+    async def load(self):
+        if self.fail:
+            raise ConnectionError("database down")
+        return self.rows
+
+
+class TestAccountDirectory:
+    """Test ownership lookups and topic authorization."""
+
+    @pytest.mark.asyncio
+    async def test_owner_lookups(self):
+        accounts = FakeAccounts([(1, "A1", 10), (2, "B7", 20)])
+        directory = AccountDirectory(accounts.load)
+        assert directory.owner("A1") is None  # nothing routed before the first load
+        assert await directory.refresh()
+        assert directory.owner("A1") == 10 and directory.owner("B7") == 20
+        assert directory.owner("missing") is None and directory.owner(None) is None
+        assert directory.owner_by_pk(2) == 20
+
+    @pytest.mark.asyncio
+    async def test_account_topics_only_for_own_accounts(self):
+        directory = AccountDirectory(FakeAccounts([(1, "A1", 10), (2, "B7", 20)]).load)
+        await directory.refresh()
+        assert directory.authorize(10, "account:A1")
+        assert directory.authorize(10, "account:1")  # strategy signals carry the primary key
+        assert not directory.authorize(10, "account:B7")
+        assert not directory.authorize(10, "account:2")
+        assert directory.authorize(10, "symbol:ES")
+
+    @pytest.mark.asyncio
+    async def test_failed_reload_keeps_last_table(self):
+        accounts = FakeAccounts([(1, "A1", 10)])
+        directory = AccountDirectory(accounts.load)
+        await directory.refresh()
+        accounts.fail = True
+        assert not await directory.refresh()
+        assert directory.owner("A1") == 10
+        assert directory.get_metrics()["refresh_errors"] == 1
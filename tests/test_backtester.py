@@ -0,0 +1,123 @@
+"""
+Test the backtester.
+Tests simulated fills and costs, Trade-shaped results, look-ahead-free
+replay, and agreement between the event-driven and vectorized paths.
+"""
+
+import pytest
+import sys
+import os
+
+np = pytest.importorskip("numpy")
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import indicators
+from app.services.backtester import (
+    Backtest,
+    SimulatedExecutor,
+    ma_cross_positions,
+    sweep_ma_cross,
+    vectorized_backtest,
+)
+
+START = 1700006400.0
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(11)
+    return 100 + np.cumsum(rng.normal(0, 1, 400))
+
+
+class TestSimulatedExecutor:
+    """Test fills, netting and protective exits."""
+
+    @pytest.mark.asyncio
+    async def test_round_trip_books_net_trade(self):
+        executor = SimulatedExecutor(initial_balance=1000.0, commission=1.0, slippage=0.5, contract_size=10.0)
+        executor.set_price("ES", 100.0, START)
+        result = await executor.execute_signal({"action": "buy", "symbol": "ES", "quantity": 2})
+        assert result["result"]["fill_price"] == 100.5
+        assert executor.equity == pytest.approx(1000.0 - 2 * 0.5 * 10 - 2.0)
+
+        executor.set_price("ES", 110.0, START + 60)
+        await executor.execute_signal({"action": "close", "symbol": "ES"})
+        trade = executor.trades[0]
+        assert trade["type"] == "buy" and trade["volume"] == 2
+        assert trade["close_price"] == 109.5
+        assert trade["commission"] == pytest.approx(4.0)
+        assert trade["profit"] == pytest.approx((109.5 - 100.5) * 2 * 10 - 4.0)
+        assert executor.balance == pytest.approx(1000.0 + trade["profit"])
+        assert await executor.get_positions() == []
+
+    @pytest.mark.asyncio
+    async def test_reversal_limits_and_stops(self):
+        executor = SimulatedExecutor()
+        executor.set_price("NQ", 50.0, START)
+        await executor.place_order("NQ", "buy", 1)
+        await executor.place_order("NQ", "sell", 3)
+        assert executor.trades[0]["profit"] == 0.0
+        positions = await executor.get_positions()
+        assert positions[0]["side"] == "sell" and positions[0]["size"] == 2
+
+        order = await executor.place_order("NQ", "buy", 2, "limit", price=45.0)
+        assert order["status"] == "working"
+        executor.set_price("NQ", 44.0, START + 1)
+        assert executor.positions == {} and executor.trades[-1]["close_price"] == 45.0
+
+        await executor.place_order("NQ", "buy", 1, stop_loss=40.0)
+        executor.set_price("NQ", 39.0, START + 2)
+        assert executor.positions == {} and executor.trades[-1]["profit"] == pytest.approx(-5.0)
+
+
+class TestBacktest:
+    """Test event-driven replay against the vectorized fast path."""
+
+    @pytest.mark.asyncio
+    async def test_history_never_looks_ahead(self):
+        series = {
+            "A": {"ts": [START, START + 2], "close": [1.0, 2.0]},
+            "B": {"ts": [START + 1], "bid": [9.0], "ask": [11.0], "last": [np.nan]}
+        }
+        backtest = Backtest(SimulatedExecutor(), series)
+        seen = []
+
+        async def step(symbol):
+            seen.append((symbol, backtest.history(symbol).tolist(), backtest.history("A", bars=2)))
+
+        result = await backtest.run(step)
+        assert seen[0] == ("A", [1.0], None)
+        assert seen[1] == ("B", [10.0], None)
+        assert seen[2][1] == [1.0, 2.0]
+        assert result.ts.tolist() == [START, START + 1, START + 2]
+
+    @pytest.mark.asyncio
+    async def test_event_driven_ma_cross_matches_vectorized(self, closes):
+        costs = {"initial_balance": 10000.0, "commission": 0.5, "slippage": 0.1, "contract_size": 2.0}
+        ts = START + 60 * np.arange(len(closes))
+        backtest = Backtest(SimulatedExecutor(**costs), {"ES": {"ts": ts, "close": closes}})
+
+        async def step(symbol):
+            history = backtest.history(symbol, bars=21)
+            if history is None:
+                return
+            cross = indicators.crossover(indicators.sma(history, 5), indicators.sma(history, 20))[-1]
+            if cross:
+                await backtest.execute({"symbol": symbol, "action": "BUY" if cross > 0 else "SELL", "volume": 1.0})
+
+        result = await backtest.run(step)
+        equity, fills = vectorized_backtest(closes, ma_cross_positions(closes, [5], [20]), **costs)
+        assert result.metrics["fills"] == fills[0] > 0
+        assert np.allclose(result.equity, equity[0])
+        assert result.to_dict()["metrics"]["trades"] == len(result.trades)
+
+    def test_sweep_ranks_pairs(self, closes):
+        serial = sweep_ma_cross(closes, [3, 5, 10], [10, 20], processes=1, chunk_size=2, commission=0.1)
+        assert [(r["fast_period"], r["slow_period"]) for r in serial if r["fast_period"] == 10] == [(10, 20)]
+        assert len(serial) == 5
+        assert [r["net_pnl"] for r in serial] == sorted((r["net_pnl"] for r in serial), reverse=True)
+
+        pooled = sweep_ma_cross(closes, [3, 5, 10], [10, 20], processes=2, chunk_size=2, commission=0.1)
+        assert pooled == serial
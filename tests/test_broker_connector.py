@@ -0,0 +1,95 @@
+"""
+Test parallel broker initialization.
+Tests per-broker deadlines, lazy connect, retry backoff and readiness
+reporting.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+import time
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.broker_connector import BrokerConnector
+
+
+class FakeBroker:
+    """Initializes after a delay with a fixed outcome"""
+
+    def __init__(self, delay=0.0, success=True):
+        self.delay = delay
+        self.success = success
+        self.initialized = 0
+        self.disconnected = 0
+
+    async def initialize(self):
+        self.initialized += 1
+        await asyncio.sleep(self.delay)
+        return self.success
+
+    async def disconnect(self):
+        self.disconnected += 1
+
+
+class TestBrokerConnector:
+    """Test connector startup and readiness."""
+
+    @pytest.mark.asyncio
+    async def test_brokers_connect_in_parallel_with_deadline(self):
+        brokers = {
+            "mt4": FakeBroker(delay=0.05),
+            "mt5": FakeBroker(delay=0.05),
+            "tradovate": FakeBroker(delay=10),
+        }
+        connector = BrokerConnector(brokers, connect_timeout=0.2)
+
+        started = time.monotonic()
+        results = await connector.initialize()
+        assert time.monotonic() - started < 1.0
+
+        assert results == {"mt4": True, "mt5": True, "tradovate": False}
+        readiness = connector.readiness()
+        assert readiness["mt4"]["ready"]
+        assert readiness["tradovate"]["state"] == "failed"
+        assert "timed out" in readiness["tradovate"]["error"]
+        assert brokers["tradovate"].disconnected == 1
+
+    @pytest.mark.asyncio
+    async def test_lazy_broker_connects_once_on_first_use(self):
+        broker = FakeBroker(delay=0.01)
+        connector = BrokerConnector({"mt4": broker}, lazy=True)
+        ready_hooks = []
+
+        async def on_ready(name):
+            ready_hooks.append(name)
+
+        connector.on_ready.append(on_ready)
+        assert await connector.initialize() == {}
+        assert connector.readiness()["mt4"]["state"] == "idle"
+
+        results = await asyncio.gather(*(connector.ensure_ready("mt4") for _ in range(3)))
+        assert results == [True, True, True]
+        assert broker.initialized == 1
+        assert ready_hooks == ["mt4"]
+
+    @pytest.mark.asyncio
+    async def test_failed_broker_retries_after_backoff(self):
+        broker = FakeBroker(success=False)
+        connector = BrokerConnector({"projectx": broker}, retry_backoff=60)
+        await connector.initialize()
+
+        assert not await connector.ensure_ready("projectx")
+        assert broker.initialized == 1
+
+        connector.retry_backoff = 0
+        broker.success = True
+        assert await connector.ensure_ready("projectx")
+        assert connector.is_ready("projectx")
+
+    @pytest.mark.asyncio
+    async def test_unknown_broker_is_not_ready(self):
+        connector = BrokerConnector({})
+        assert not await connector.ensure_ready("nope")
@@ -0,0 +1,259 @@
+"""
+Test the async broker SDK clients.
+Tests lazy authentication, failed sign-in, background token renewal, token refresh on 401, bulk close/cancel/modify
+with batch endpoints and bounded fan-out, and the blocking facade.
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broker_sdks.tradovate import AsyncTradovateClient, TradovateClient
+from broker_sdks.tradelocker import AsyncTradeLockerClient
+from broker_sdks.truforex import AsyncTruForexClient
+
+
+class FakeTradovate:
+    """Records requests and answers like the Tradovate REST API"""
+
+    def __init__(self, batch=False, batch_response=None):
+        self.requests = []
+        self.tokens_issued = 0
+        self.valid_token = None
+        self.previous_token = None
+        self.batch = batch
+        self.batch_response = batch_response
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.auth_failures = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+        if path.endswith("/auth/accesstokenrequest"):
+            await asyncio.sleep(0.01)
+            if self.auth_failures:
+                self.auth_failures -= 1
+                return httpx.Response(503, json={"error": "unavailable"})
+            self.tokens_issued += 1
+            self.previous_token, self.valid_token = self.valid_token, f"token-{self.tokens_issued}"
+            return httpx.Response(200, json={
+                "accessToken": self.valid_token,
+                "expirationTime": (datetime.now(timezone.utc) + timedelta(minutes=90)).isoformat()
+            })
+        if request.headers.get("authorization") not in (f"Bearer {self.valid_token}", f"Bearer {self.previous_token}"):
+            return httpx.Response(401, json={"error": "expired"})
+        if path.endswith("/position/list"):
+            return httpx.Response(200, json=[{"id": 1}, {"id": 2}, {"id": 3}])
+        if path.endswith("/order/liquidatepositions"):
+            if not self.batch:
+                return httpx.Response(404)
+            if self.batch_response is not None:
+                return httpx.Response(200, json=self.batch_response)
+            return httpx.Response(200, json={"orderIds": [100 + p for p in json.loads(request.content)["positionIds"]]})
+        if path.endswith("/order/closeposition"):
+            position_id = json.loads(request.content)["positionId"]
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            if position_id == 2:
+                return httpx.Response(500, json={"error": "rejected"})
+            return httpx.Response(200, json={"positionId": position_id})
+        if path.endswith("/order/list"):
+            return httpx.Response(200, json=[
+                {"id": 10, "ordStatus": "Working"},
+                {"id": 11, "ordStatus": "Filled"},
+                {"id": 12, "ordStatus": "Working"}
+            ])
+        if path.endswith("/order/cancelorder") or path.endswith("/order/modifyorder"):
+            return httpx.Response(200, json=json.loads(request.content))
+        return httpx.Response(200, json=[{"id": 7, "netLiquidation": 1000.0}])
+
+
+class TestAsyncClients:
+    """Test the async clients against mock transports."""
+
+    @pytest.mark.asyncio
+    async def test_authenticates_lazily_once(self):
+        api = FakeTradovate()
+        client = AsyncTradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+        assert api.requests == []
+
+        balances = await asyncio.gather(*(client.get_account_balance() for _ in range(5)))
+        assert balances == [1000.0] * 5
+        assert api.tokens_issued == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_token_is_refreshed(self):
+        api = FakeTradovate()
+        client = AsyncTradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+        await client.list_accounts()
+
+        stale = client._auth_headers
+        api.valid_token = api.previous_token = "rotated"
+        assert await client.list_accounts()
+        assert api.tokens_issued == 2
+
+        # A request still in flight on the old token gets its 401 late and reuses the new one
+        await client._sign_in(rejected=stale)
+        assert api.tokens_issued == 2
+        assert client._auth_headers == {"Authorization": "Bearer token-2"}
+
+    @pytest.mark.asyncio
+    async def test_failed_sign_in_raises_and_is_retried(self):
+        api = FakeTradovate()
+        api.auth_failures = 1
+        client = AsyncTradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+
+        # Concurrent callers share the one failed attempt
+        results = await asyncio.gather(*(client.list_accounts() for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+        assert len([r for r in api.requests if r.url.path.endswith("/accesstokenrequest")]) == 1
+        assert not client._authenticated
+
+        assert await client.list_accounts()
+        assert api.tokens_issued == 1
+
+    @pytest.mark.asyncio
+    async def test_unauthorized_without_token_signs_in_again(self):
+        api = FakeTradovate()
+        client = AsyncTradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+        # Signed in but the broker issued no token
+        client._authenticated = True
+
+        assert await client.list_accounts()
+        assert api.tokens_issued == 1
+        assert api.requests[-1].headers["authorization"] == "Bearer token-1"
+
+    @pytest.mark.asyncio
+    async def test_token_near_expiry_renews_in_background(self):
+        api = FakeTradovate()
+        client = AsyncTradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+        await client.list_accounts()
+        client.refresh_margin = 2 * 3600
+
+        # The request goes out on the current token while renewal runs alongside
+        await client.list_accounts()
+        assert api.requests[-1].headers["authorization"] == "Bearer token-1"
+        await client._refresh_task
+        assert api.tokens_issued == 2
+        client.refresh_margin = 300
+        await client.list_accounts()
+        assert api.requests[-1].headers["authorization"] == "Bearer token-2"
+
+    @pytest.mark.asyncio
+    async def test_close_all_falls_back_to_bounded_fan_out(self):
+        api = FakeTradovate()
+        client = AsyncTradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+        client.bulk_concurrency = 2
+
+        result = await client.close_all_positions()
+        assert result["closed"] == 2
+        assert result["failed"] == 1
+        assert [p["positionId"] for p in result["positions"]] == [1, 3]
+        assert [r["ok"] for r in result["results"]] == [True, False, True]
+        assert api.max_in_flight == 2
+
+        # The missing batch endpoint is not retried
+        await client.close_all()
+        batch_calls = [r for r in api.requests if r.url.path.endswith("/liquidatepositions")]
+        assert len(batch_calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_close_all_uses_batch_endpoint(self):
+        api = FakeTradovate(batch=True)
+        client = AsyncTradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+
+        result = await client.close_all()
+        assert result["closed"] == 3
+        assert result["positions"][0] == {"positionId": 1, "orderId": 101}
+        assert not any(r.url.path.endswith("/closeposition") for r in api.requests)
+
+    @pytest.mark.asyncio
+    async def test_batch_response_maps_to_per_item_status(self):
+        api = FakeTradovate(batch=True, batch_response={"failureReason": "RiskCheck", "failureText": "blocked"})
+        client = AsyncTradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+        result = await client.close_all()
+        assert (result["closed"], result["failed"], result["unknown"]) == (0, 3, 0)
+        assert {r["error"] for r in result["results"]} == {"blocked"}
+
+        # Fewer order ids than positions: nothing can be confirmed
+        api.batch_response = {"orderIds": [101]}
+        result = await client.close_all()
+        assert (result["closed"], result["failed"], result["unknown"]) == (0, 3, 3)
+
+    @pytest.mark.asyncio
+    async def test_default_batch_mapping_reports_unlisted_items_unknown(self):
+        def handler(request):
+            if request.method == "DELETE":
+                return httpx.Response(200, json={"orders": [
+                    {"orderId": "o1", "status": "cancelled"},
+                    {"orderId": "o2", "status": "rejected"}
+                ]})
+            return httpx.Response(200, json={"orders": [
+                {"id": "o1", "status": "pending"}, {"id": "o2", "status": "pending"}, {"id": "o3", "status": "pending"}
+            ]})
+
+        async with AsyncTradeLockerClient("demo", api_key="k", account_id="A1",
+                                          client=httpx.AsyncClient(transport=httpx.MockTransport(handler))) as client:
+            result = await client.cancel_all()
+        assert [(r["id"], r["ok"], r.get("unknown", False)) for r in result["results"]] == [
+            ("o1", True, False), ("o2", False, False), ("o3", False, True)
+        ]
+        assert (result["cancelled"], result["failed"], result["unknown"]) == (1, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_cancel_all_and_modify_all(self):
+        api = FakeTradovate()
+        client = AsyncTradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+
+        cancelled = await client.cancel_all()
+        assert cancelled["cancelled"] == 2
+        assert [r["id"] for r in cancelled["results"]] == [10, 12]
+
+        modified = await client.modify_all([
+            {"order_id": 10, "price": 101.5},
+            {"order_id": 12, "quantity": 3}
+        ])
+        assert modified["modified"] == 2
+        assert modified["results"][1]["result"] == {"orderId": 12, "quantity": 3}
+
+    @pytest.mark.asyncio
+    async def test_key_only_clients_skip_sign_in(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, json={"status": "ok"})
+
+        transport = httpx.MockTransport(handler)
+        async with AsyncTradeLockerClient("demo", api_key="k", account_id="A1",
+                                          client=httpx.AsyncClient(transport=transport)) as tradelocker:
+            await tradelocker.get_account()
+        async with AsyncTruForexClient("k", base_url="http://bridge",
+                                       client=httpx.AsyncClient(transport=transport)) as truforex:
+            await truforex.report_execution("EURUSD", "buy", 0.1, "success")
+
+        assert seen[0].url.path == "/api/v1/accounts/A1"
+        assert seen[0].headers["x-api-key"] == "k"
+        assert seen[1].headers["content-type"] == "application/x-www-form-urlencoded"
+
+
+class TestSyncFacade:
+    """Test the blocking wrapper used by scripts."""
+
+    def test_sync_client_matches_async_api(self):
+        api = FakeTradovate()
+        with TradovateClient("cid", "secret", client=httpx.AsyncClient(transport=httpx.MockTransport(api.handler))) as client:
+            assert client.get_account_equity() == 1000.0
+            assert client.close_all_positions()["closed"] == 2
+            assert client.access_token == "token-1"
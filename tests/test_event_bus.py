@@ -0,0 +1,116 @@
+"""
+Test the broker event bus.
+Tests normalization of broker payloads into typed records, fan-out to
+kind-filtered subscribers, drop-oldest bounding and consumer isolation.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.event_bus import (
+    AccountEvent, EventBus, FillEvent, OrderEvent, PositionEvent, normalize_event
+)
+
+
+class TestNormalizeEvent:
+    """Test broker payloads map onto the typed records."""
+
+    def test_tradovate_order_and_fill(self):
+        order = normalize_event("tradovate", "order", {
+            "e": "order", "id": 55, "accountId": 7, "action": "Buy",
+            "ordStatus": "Working", "orderQty": 2, "price": 4500.25, "timestamp": 1700000000000
+        })
+        assert isinstance(order, OrderEvent)
+        assert (order.order_id, order.account_id, order.side, order.status) == ("55", "7", "buy", "Working")
+        assert order.quantity == 2.0 and order.price == 4500.25
+        assert order.ts == 1700000000.0
+
+        fill = normalize_event("tradovate", "trade", {
+            "e": "fill", "id": 9, "orderId": 55, "accountId": 7, "action": "Sell",
+            "qty": 1, "price": 4501.0, "realizedPnl": 12.5, "commission": 1.2
+        })
+        assert isinstance(fill, FillEvent)
+        assert (fill.fill_id, fill.order_id, fill.side) == ("9", "55", "sell")
+        assert fill.realized_pnl == 12.5 and fill.commission == 1.2
+
+    def test_enveloped_position_and_close(self):
+        position = normalize_event("projectx", "position", {
+            "type": "position_update",
+            "data": {"id": 3, "accountId": "A1", "symbol": "NQ", "side": "short", "size": 2,
+                     "avgPrice": 18000, "unrealizedPnl": -40}
+        })
+        assert isinstance(position, PositionEvent)
+        assert (position.position_id, position.symbol, position.size) == ("3", "NQ", -2.0)
+        assert position.unrealized_pnl == -40.0 and not position.closed
+
+        closed = normalize_event("tradelocker", "position_close", {
+            "type": "ClosePosition", "positionId": 3, "accNum": 1, "symbol": "EURUSD", "profit": 25
+        })
+        assert closed.closed and closed.size == 0.0
+        assert closed.realized_pnl == 25.0
+        assert closed.to_dict()["kind"] == "position"
+
+    def test_account_and_unknown_types(self):
+        account = normalize_event("tradelocker", "account", {
+            "type": "AccountStatus", "accountId": 1, "balance": "1000.5", "equity": 990, "freeMargin": 800
+        })
+        assert isinstance(account, AccountEvent)
+        assert (account.balance, account.equity, account.free_margin) == (1000.5, 990.0, 800.0)
+        assert normalize_event("tradovate", "resync", {"gap_seconds": 3}) is None
+
+
+class TestEventBus:
+    """Test fan-out and backpressure."""
+
+    @pytest.mark.asyncio
+    async def test_one_record_fans_out_by_kind(self):
+        bus = EventBus()
+        everything = bus.subscribe("persistence")
+        orders = bus.subscribe("risk", kinds=["order"])
+
+        order = bus.publish_raw("tradovate", "order", {"id": 1, "accountId": 7})
+        bus.publish_raw("tradovate", "account", {"accountId": 7, "balance": 10})
+
+        assert await orders.get() is order
+        assert len(orders) == 0
+        assert await everything.get() is order
+        assert (await everything.get()).kind == "account"
+        assert bus.get_metrics()["published"]["order"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_drops_oldest(self):
+        bus = EventBus()
+        slow = bus.subscribe("slow", maxsize=2)
+        for order_id in range(5):
+            bus.publish_raw("projectx", "order", {"id": order_id})
+
+        assert [slow.get_nowait().order_id for _ in range(2)] == ["3", "4"]
+        assert slow.get_nowait() is None
+        metrics = bus.get_metrics()["subscribers"]["slow"]
+        assert metrics["dropped"] == 3
+        assert metrics["delivered"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failing_consumer_keeps_consuming(self):
+        bus = EventBus()
+        seen = []
+
+        async def handler(event):
+            if event.order_id == "1":
+                raise ValueError("boom")
+            seen.append(event.order_id)
+
+        bus.add_consumer("ui", handler, kinds=["order"])
+        for order_id in range(3):
+            bus.publish_raw("tradovate", "order", {"id": order_id})
+        await asyncio.sleep(0.01)
+
+        assert seen == ["0", "2"]
+        assert bus.consumer_errors == 1
+        await bus.close()
+        assert bus.get_metrics()["subscribers"] == {}
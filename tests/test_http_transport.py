@@ -0,0 +1,114 @@
+"""
+Test the shared broker HTTP transport registry.
+Tests per-host pooling, connection reuse across clients, timeout budgets
+and keep-warm against a local keep-alive server.
+"""
+
+import pytest
+import pytest_asyncio
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.http_transport import TransportRegistry, origin_of
+
+
+async def _serve(reader, writer):
+    """Minimal HTTP/1.1 keep-alive responder"""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            if length:
+                await reader.readexactly(length)
+            body = b"" if head.startswith(b"HEAD") else b"{}"
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: application/json\r\n\r\n" + body)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def server_url():
+    server = await asyncio.start_server(_serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    server.close()
+    await server.wait_closed()
+
+
+class TestTransportRegistry:
+    """Test shared pools and budgets."""
+
+    def test_origin_of(self):
+        assert origin_of("https://demo.tradovateapi.com/v1") == "https://demo.tradovateapi.com"
+        assert origin_of("http://localhost:8080/api") == "http://localhost:8080"
+
+    def test_timeout_budgets(self):
+        registry = TransportRegistry(timeouts={
+            "default": {"total": 30.0},
+            "order": {"total": 10.0, "connect": 2.0}
+        })
+        order = registry.timeout("order")
+        assert order.connect == 2.0
+        assert order.read == 10.0
+        assert registry.timeout("unknown").read == 30.0
+
+    def test_plain_http_hosts_stay_on_http1(self):
+        registry = TransportRegistry(http2=True)
+        assert not registry.transport_for("http://localhost:8080").http2
+
+    @pytest.mark.asyncio
+    async def test_clients_share_one_pool_per_host(self, server_url):
+        registry = TransportRegistry()
+        first = registry.client(server_url + "/api", headers={"x-broker": "mt4"})
+        second = registry.client(server_url + "/other")
+
+        assert (await first.get("/accounts")).status_code == 200
+        await first.aclose()
+        assert (await second.post("/orders", json={"qty": 1})).status_code == 200
+        assert (await second.get("/positions")).status_code == 200
+
+        metrics = registry.get_metrics()["hosts"][server_url]
+        assert len(registry.transports) == 1
+        assert metrics["requests"] == 3
+        assert metrics["connections_opened"] == 1
+        assert metrics["idle_connections"] == 1
+        assert metrics["http_versions"] == {"HTTP/1.1": 3}
+
+        await second.aclose()
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_keepwarm_is_opt_in_per_broker(self, server_url):
+        registry = TransportRegistry(keepwarm_interval=0.02, keepwarm_brokers=["mt4"])
+        client = registry.client(server_url, broker="tradovate")
+        await client.get("/")
+        await registry.start()
+        await asyncio.sleep(0.1)
+
+        assert registry.keepwarm_pings == 0
+        assert registry.get_metrics()["hosts"][server_url]["requests"] == 1
+        await client.aclose()
+        await registry.close()
+
+    @pytest.mark.asyncio
+    async def test_keepwarm_pings_idle_hosts(self, server_url):
+        registry = TransportRegistry(keepwarm_interval=0.02, keepwarm_brokers=["MT4"])
+        client = registry.client(server_url, broker="mt4")
+        await client.get("/")
+        await registry.start()
+        await asyncio.sleep(0.1)
+
+        assert registry.keepwarm_pings >= 1
+        assert registry.get_metrics()["hosts"][server_url]["connections_opened"] == 1
+        await client.aclose()
+        await registry.close()
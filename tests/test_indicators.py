@@ -0,0 +1,122 @@
+"""
+Test the indicator library.
+Tests the vectorized indicators against straightforward loops, per-row
+parameter grids, and agreement of the incremental variants.
+"""
+
+import pytest
+import sys
+import os
+
+np = pytest.importorskip("numpy")
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import indicators
+
+
+def _loop_ema(values, alpha):
+    out = [values[0]]
+    for value in values[1:]:
+        out.append(out[-1] + alpha * (value - out[-1]))
+    return np.array(out)
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(7)
+    return 100 + np.cumsum(rng.normal(0, 1, 600))
+
+
+class TestVectorized:
+    """Test whole-history indicators."""
+
+    def test_sma_and_ema_match_loops(self, closes):
+        sma = indicators.sma(closes, 10)
+        assert np.isnan(sma[:9]).all()
+        assert np.allclose(sma[9:], np.convolve(closes, np.ones(10) / 10, "valid"))
+        # Long periods span several closed-form blocks
+        for period in (10, 200):
+            assert np.allclose(indicators.ema(closes, period), _loop_ema(closes, 2 / (period + 1)))
+
+    def test_parameter_grid_rows(self, closes):
+        block = np.vstack([closes, closes * 2])
+        ema = indicators.ema(block, [10, 20])
+        assert np.allclose(ema[1], _loop_ema(closes * 2, 2 / 21))
+        sma = indicators.sma(block, [5, 30])
+        assert np.allclose(sma[0, 4:], np.convolve(closes, np.ones(5) / 5, "valid"))
+        assert np.isnan(sma[1, :29]).all()
+
+    def test_rsi_atr_bollinger_vwap(self, closes):
+        rsi = indicators.rsi(closes, 14)
+        assert np.isnan(rsi[0])
+        assert ((rsi[1:] >= 0) & (rsi[1:] <= 100)).all()
+        assert indicators.rsi(np.arange(20.0), 14)[-1] == 100.0
+
+        high, low = closes + 1, closes - 1
+        assert np.allclose(indicators.atr(high, low, closes, 14)[:1], [2.0])
+
+        middle, upper, lower = indicators.bollinger(closes, 20, 2.0)
+        assert np.allclose(upper[19:] - middle[19:], 2 * np.array([closes[i - 19:i + 1].std() for i in range(19, 600)]))
+
+        price, volume = np.array([10.0, 20.0, 30.0, 40.0]), np.array([1.0, 1.0, 2.0, 2.0])
+        assert np.allclose(indicators.vwap(price, volume), [10.0, 15.0, 22.5, 170.0 / 6])
+        assert indicators.vwap(price, volume, [True, False, True, False]).tolist() == [10.0, 15.0, 30.0, 35.0]
+
+    def test_crossover_ignores_warmup_and_touches(self):
+        fast = np.array([np.nan, 1.0, 2.0, 2.0, 3.0, 1.0, 2.0, 3.0])
+        slow = np.array([np.nan, 2.0, 2.0, 1.0, 2.0, 2.0, 2.0, 2.0])
+        assert indicators.crossover(fast, slow).tolist() == [0, 0, 0, 1, 0, -1, 0, 1]
+
+    def test_ma_cross_grid_shape(self, closes):
+        grid = indicators.ma_cross_grid(np.vstack([closes, closes[::-1]]), [5, 10, 20], [20, 30, 50])
+        assert grid.shape == (6, 600)
+        assert np.array_equal(grid[1], indicators.crossover(indicators.sma(closes, 10), indicators.sma(closes, 30)))
+
+    def test_resample_ohlcv(self):
+        bars = indicators.resample_ohlcv([0, 10, 59, 60, 130], [1.0, 3.0, 2.0, 5.0, 4.0], [1, 1, 1, 2, 3], 60)
+        assert bars["ts"].tolist() == [0, 60, 120]
+        assert bars["high"].tolist() == [3.0, 5.0, 4.0]
+        assert bars["close"].tolist() == [2.0, 5.0, 4.0]
+        assert bars["volume"].tolist() == [3.0, 2.0, 3.0]
+
+
+class TestIncremental:
+    """Test per-tick updates agree with the vectorized forms."""
+
+    def test_rolling_matches_vectorized(self, closes):
+        sma = indicators.RollingSMA([10, 20])
+        ema = indicators.RollingEMA([10, 20])
+        rsi = indicators.RollingRSI(14)
+        rolling_sma, rolling_ema, rolling_rsi = [], [], []
+        for close in closes:
+            rolling_sma.append(sma.update(close))
+            rolling_ema.append(ema.update(close))
+            rolling_rsi.append(rsi.update(close)[0])
+
+        block = np.vstack([closes, closes])
+        assert np.allclose(np.array(rolling_sma).T, indicators.sma(block, [10, 20]), equal_nan=True)
+        assert np.allclose(np.array(rolling_ema).T, indicators.ema(block, [10, 20]))
+        assert np.allclose(rolling_rsi, indicators.rsi(closes, 14), equal_nan=True)
+
+    def test_rolling_atr_bollinger_crossover(self, closes):
+        atr, bands = indicators.RollingATR(14), indicators.RollingBollinger(20)
+        fast, slow, cross = indicators.RollingSMA(5), indicators.RollingSMA(20), indicators.RollingCrossover()
+        rolling_atr, rolling_upper, rolling_cross = [], [], []
+        for close in closes:
+            rolling_atr.append(atr.update(close + 1, close - 1, close)[0])
+            rolling_upper.append(bands.update(close)[1][0])
+            rolling_cross.append(cross.update(fast.update(close), slow.update(close))[0])
+
+        assert np.allclose(rolling_atr, indicators.atr(closes + 1, closes - 1, closes, 14))
+        assert np.allclose(rolling_upper, indicators.bollinger(closes, 20)[1], equal_nan=True)
+        expected = indicators.crossover(indicators.sma(closes, 5), indicators.sma(closes, 20))
+        assert rolling_cross == expected.tolist()
+
+    def test_rolling_vwap_resets(self):
+        vwap = indicators.RollingVWAP()
+        vwap.update(10.0, 1.0)
+        assert vwap.update(20.0, 1.0)[0] == 15.0
+        vwap.reset()
+        assert vwap.update(30.0, 2.0)[0] == 30.0
@@ -0,0 +1,196 @@
+"""
+Test the market data service.
+Tests quote normalization (including Tradovate contract ids), shared
+upstream subscriptions, expiry of streamed quotes, conflated watches and
+the REST fallback for brokers without a quote stream.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+import time
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.brokers.tradovate_executor import TradovateExecutor
+from app.services.market_data import MarketDataService, Quote, normalize_quote
+
+
+class StreamingBroker:
+    """Records upstream quote subscriptions"""
+
+    streams_quotes = True
+
+    def __init__(self):
+        self.subscribed = []
+        self.unsubscribed = []
+
+    async def subscribe_quotes(self, symbol):
+        self.subscribed.append(symbol)
+
+    async def unsubscribe_quotes(self, symbol):
+        self.unsubscribed.append(symbol)
+
+
+class RestBroker:
+    """Serves quotes over REST only"""
+
+    streams_quotes = False
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get_quote(self, symbol):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"bid": 1.1, "ask": 1.2}
+
+
+class ContractSession:
+    """Answers Tradovate contract lookups"""
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return [{"contractId": 1234}]
+
+    async def get(self, url):
+        assert url == "/contract/find?symbol=ES"
+        return self.Response()
+
+
+class TestNormalizeQuote:
+    """Test broker quote payloads."""
+
+    def test_flat_and_tradovate_entries(self):
+        quote = normalize_quote("projectx", {"type": "quote", "data": {"symbol": "NQ", "bid": 100, "ask": 100.5}})
+        assert (quote.symbol, quote.bid, quote.ask, quote.mid) == ("NQ", 100.0, 100.5, 100.25)
+
+        entries = {"Bid": {"price": 4500.0, "size": 3}, "Offer": {"price": 4500.25}, "Trade": {"price": 4500.0}}
+        md = normalize_quote("tradovate", {
+            "contractId": 1234, "symbol": "ES", "timestamp": "2023-11-14T22:13:20Z", "entries": entries
+        })
+        assert (md.symbol, md.bid, md.ask, md.last, md.ts) == ("ES", 4500.0, 4500.25, 4500.0, 1700000000.0)
+        # A contract id alone is never taken for the symbol
+        assert normalize_quote("tradovate", {"contractId": 1234, "entries": entries}) is None
+
+    @pytest.mark.asyncio
+    async def test_tradovate_quotes_are_filed_under_the_symbol(self):
+        executor = TradovateExecutor()
+        executor.session = ContractSession()
+        await executor.subscribe_quotes("ES")
+        entries = {"Bid": {"price": 4500.0}, "Offer": {"price": 4500.25}}
+        await executor._process_websocket_message({"e": "md", "d": {"quotes": [
+            {"contractId": 1234, "entries": entries},
+            {"contractId": 999, "entries": entries}
+        ]}})
+        assert list(executor.last_quotes) == ["ES"]
+        assert executor.last_quotes["ES"].bid == 4500.0
+
+    def test_payload_without_prices_is_ignored(self):
+        assert normalize_quote("projectx", {"symbol": "NQ"}) is None
+        assert normalize_quote("projectx", {"bid": 1.0}) is None
+
+
+class TestMarketDataService:
+    """Test the latest-quote table and subscriptions."""
+
+    @pytest.mark.asyncio
+    async def test_accounts_share_one_upstream_subscription(self):
+        broker = StreamingBroker()
+        service = MarketDataService({"tradovate": broker})
+
+        assert await service.subscribe("tradovate", "ES", "account-1")
+        assert await service.subscribe("tradovate", "ES", "account-2")
+        assert broker.subscribed == ["ES"]
+
+        await service.unsubscribe("tradovate", "ES", "account-1")
+        assert broker.unsubscribed == []
+        await service.unsubscribe("tradovate", "ES", "account-2")
+        assert broker.unsubscribed == ["ES"]
+
+    @pytest.mark.asyncio
+    async def test_streamed_quotes_are_read_in_place(self):
+        service = MarketDataService({"tradovate": StreamingBroker()}, max_age=0.0, stream_max_age=120.0)
+        await service.subscribe("tradovate", "ES", "risk")
+        quote = Quote("tradovate", "ES", 4500.0, 4500.25, ts=time.time() - 60)
+        service.handle_quote("tradovate", quote)
+
+        # A subscribed symbol's quote outlives max_age, up to stream_max_age
+        assert service.latest("tradovate", "ES") is quote
+        assert await service.get_quote("tradovate", "ES") is quote
+
+    @pytest.mark.asyncio
+    async def test_streamed_quotes_expire(self):
+        broker = StreamingBroker()
+        broker.stream = type("Stream", (), {"is_live": True})()
+        service = MarketDataService({"tradovate": broker}, stream_max_age=30.0)
+        await service.subscribe("tradovate", "ES", "risk")
+        service.handle_quote("tradovate", Quote("tradovate", "ES", 4500.0, 4500.25, ts=time.time() - 60))
+        # Too old, and never refetched over REST for a streamed symbol
+        assert service.latest("tradovate", "ES") is None
+        assert await service.get_quote("tradovate", "ES") is None
+        assert service.rest_fetches == 0
+
+        service.handle_quote("tradovate", Quote("tradovate", "ES", 4500.0, 4500.25, ts=time.time()))
+        assert service.latest("tradovate", "ES") is not None
+        broker.stream.is_live = False
+        assert service.latest("tradovate", "ES") is None
+
+    @pytest.mark.asyncio
+    async def test_watch_conflates_to_latest(self):
+        service = MarketDataService({"tradovate": StreamingBroker()})
+        watch = await service.watch("strategy", "tradovate", ["ES", "NQ"])
+        for price in (1.0, 2.0, 3.0):
+            service.handle_quote("tradovate", Quote("tradovate", "ES", price, price + 0.25, ts=time.time()))
+        service.handle_quote("tradovate", Quote("tradovate", "NQ", 10.0, 10.5, ts=time.time()))
+
+        changed = await watch.get()
+        assert changed["ES"].bid == 3.0
+        assert changed["NQ"].bid == 10.0
+        assert watch.conflated == 2
+
+        await service.unwatch("strategy")
+        assert service.get_metrics()["upstream_subscriptions"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rest_fallback_is_single_flight_and_cached(self):
+        broker = RestBroker()
+        service = MarketDataService({"mt4": broker}, max_age=60.0)
+
+        quotes = await asyncio.gather(*(service.get_quote("mt4", "EURUSD") for _ in range(5)))
+        assert broker.calls == 1
+        assert all(quote.bid == 1.1 for quote in quotes)
+        assert not await service.subscribe("mt4", "EURUSD", "risk")
+
+        await service.get_quote("mt4", "EURUSD")
+        assert broker.calls == 1
+        service.max_age = 0.0
+        await service.get_quote("mt4", "EURUSD")
+        assert broker.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_track_keeps_owner_symbols_subscribed(self):
+        broker = StreamingBroker()
+        service = MarketDataService({"tradovate": broker, "mt4": RestBroker()})
+
+        service.track("positions", {("tradovate", "ES"), ("tradovate", "NQ"), ("mt4", "EURUSD")})
+        service.track("strategies", {("tradovate", "ES")})
+        await asyncio.sleep(0.01)
+        assert sorted(broker.subscribed) == ["ES", "NQ"]
+
+        # The newest set wins; ES stays up while strategies still need it
+        service.track("positions", {("tradovate", "CL")})
+        service.track("positions", {("tradovate", "NQ")})
+        await asyncio.sleep(0.01)
+        assert broker.unsubscribed == []
+        service.track("positions", set())
+        await asyncio.sleep(0.01)
+        assert broker.unsubscribed == ["NQ"]
+
+        await service.stop()
+        assert broker.unsubscribed == ["NQ", "ES"]
+        assert service.get_metrics()["upstream_subscriptions"] == 0
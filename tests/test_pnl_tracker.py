@@ -0,0 +1,162 @@
+"""
+Test the daily P&L tracker.
+Tests incremental aggregation from broker events, one realized source per
+broker, session rollover, loss-limit checks and Redis snapshot round trips.
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.pnl_tracker import AccountPnL, PnLTracker
+
+
+class FakeRedis:
+    """Stores hashes in memory"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    async def hset_many(self, name, mapping, expire=None):
+        self.hashes.setdefault(name, {}).update(mapping)
+        return True
+
+    async def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+
+class TestAccountPnL:
+    """Test running P&L arithmetic."""
+
+    def test_fills_and_position_marks(self):
+        pnl = AccountPnL("2026-01-05")
+        assert pnl.add_fill(-50.0, "f1")
+        assert not pnl.add_fill(-50.0, "f1")
+        pnl.set_position("p1", unrealized=-30.0)
+        pnl.set_position("p1", unrealized=-20.0)
+        assert pnl.daily_pnl == -70.0
+
+        pnl.close_position("p1", realized=-25.0)
+        assert pnl.unrealized == 0.0
+        assert pnl.realized == -75.0
+        assert pnl.trades == 2
+
+    def test_roll_carries_open_pnl_as_baseline(self):
+        pnl = AccountPnL("2026-01-05")
+        pnl.add_fill(100.0)
+        pnl.set_position("p1", unrealized=40.0)
+        pnl.roll("2026-01-06")
+
+        assert pnl.daily_pnl == 0.0
+        pnl.set_position("p1", unrealized=10.0)
+        assert pnl.daily_pnl == -30.0
+
+    def test_roll_keeps_position_realized_baseline(self):
+        pnl = AccountPnL("2026-01-05")
+        pnl.set_position("p1", realized=100.0)
+        pnl.roll("2026-01-06")
+
+        pnl.set_position("p1", realized=100.0)
+        assert pnl.daily_pnl == 0.0
+        pnl.set_position("p1", realized=120.0)
+        assert pnl.realized == 20.0
+
+    def test_drawdown_from_session_peak(self):
+        pnl = AccountPnL("2026-01-05")
+        pnl.add_fill(200.0)
+        pnl.add_fill(-150.0)
+        assert pnl.peak == 200.0
+        assert pnl.drawdown == 150.0
+
+
+class TestPnLTracker:
+    """Test event handling, limits and snapshots."""
+
+    def test_session_boundary(self):
+        tracker = PnLTracker(FakeRedis(), session_reset_hour=22)
+        assert tracker.session_for(datetime(2026, 1, 6, 21, 59, tzinfo=timezone.utc)) == "2026-01-05"
+        assert tracker.session_for(datetime(2026, 1, 6, 22, 0, tzinfo=timezone.utc)) == "2026-01-06"
+
+    def test_events_feed_limits(self):
+        tracker = PnLTracker(FakeRedis(), max_daily_loss=100.0)
+        tracker.handle_broker_event("tradovate", "trade", {"d": {"accountId": 7, "fillId": 1, "realizedPnl": -60, "commission": 2}})
+        tracker.handle_broker_event("tradovate", "trade", {"d": {"accountId": 7, "fillId": 1, "realizedPnl": -60}})
+        assert tracker.check("tradovate", "7")["passed"]
+
+        tracker.handle_broker_event("tradovate", "position", {"accountId": 7, "id": 3, "unrealizedPnl": -40})
+        result = tracker.check("tradovate", "7")
+        assert not result["passed"]
+        assert "Daily loss" in result["error"]
+        assert tracker.check("tradovate", "8")["passed"]
+
+    def test_one_realized_source_per_broker(self):
+        tracker = PnLTracker(FakeRedis())
+        # Fills reported first: the position stream's cumulative realized is ignored
+        tracker.handle_broker_event("tradovate", "trade", {"accountId": 7, "fillId": 1, "realizedPnl": -60})
+        tracker.handle_broker_event("tradovate", "position", {"accountId": 7, "id": 3, "realizedPnl": -60, "unrealizedPnl": 0})
+        tracker.handle_broker_event("tradovate", "position_close", {"accountId": 7, "id": 3, "realizedPnl": -60})
+        assert tracker.get_account("tradovate", "7").realized == -60.0
+
+        # Positions reported first: fills only count as trades
+        tracker.handle_broker_event("tradelocker", "position", {"accountId": 2, "positionId": "P1", "realizedPnl": -30})
+        tracker.handle_broker_event("tradelocker", "trade", {"accountId": 2, "tradeId": "t1", "pnl": -30})
+        pnl = tracker.get_account("tradelocker", "2")
+        assert (pnl.realized, pnl.trades) == (-30.0, 1)
+        assert tracker.get_metrics()["realized_sources"] == {"tradovate": "fills", "tradelocker": "positions"}
+
+    def test_drawdown_limit(self):
+        tracker = PnLTracker(FakeRedis(), max_drawdown=50.0)
+        tracker.handle_broker_event("projectx", "trade", {"accountId": 1, "tradeId": "a", "pnl": 80})
+        tracker.handle_broker_event("projectx", "trade", {"accountId": 1, "tradeId": "b", "pnl": -55})
+        assert not tracker.check("projectx", "1")["passed"]
+
+    def test_sync_positions_from_rest(self):
+        tracker = PnLTracker(FakeRedis())
+        tracker.sync_positions("mt4", "1", [SimpleNamespace(id="1", unrealized_pnl=-12.5)])
+        assert tracker.get_account("mt4", "1").daily_pnl == -12.5
+        tracker.sync_positions("mt4", "1", [])
+        assert tracker.get_account("mt4", "1").unrealized == 0.0
+
+    def test_event_and_rest_snapshot_share_position_key(self):
+        tracker = PnLTracker(FakeRedis())
+        tracker.handle_broker_event("tradelocker", "position", {"accountId": 2, "positionId": "P1", "unrealizedPnl": -40})
+        # Position models carry both a database id and the broker's position_id
+        tracker.sync_positions("tradelocker", "2", [SimpleNamespace(id=9, position_id="P1", unrealized_pnl=-30.0)])
+        assert tracker.get_account("tradelocker", "2").unrealized == -30.0
+
+    @pytest.mark.asyncio
+    async def test_snapshots_round_trip(self):
+        redis = FakeRedis()
+        tracker = PnLTracker(redis, snapshot_interval=3600)
+        tracker.handle_broker_event("tradovate", "trade", {"accountId": 7, "fillId": 1, "realizedPnl": -60})
+        tracker.handle_broker_event("tradovate", "position", {"accountId": 7, "id": 3, "unrealizedPnl": -15})
+        assert await tracker.flush() == 1
+        assert await tracker.flush() == 0
+
+        restored = PnLTracker(redis, snapshot_interval=3600)
+        await restored.start()
+        pnl = restored.get_account("tradovate", "7")
+        assert pnl.daily_pnl == -75.0
+
+        # Live marks replace the restored open P&L instead of adding to it
+        restored.handle_broker_event("tradovate", "position", {"accountId": 7, "id": 3, "unrealizedPnl": -5})
+        assert pnl.daily_pnl == -65.0
+        await restored.stop()
+
+    @pytest.mark.asyncio
+    async def test_restored_position_realized_is_not_booked_again(self):
+        redis = FakeRedis()
+        tracker = PnLTracker(redis, snapshot_interval=3600)
+        tracker.handle_broker_event("tradelocker", "position", {"accountId": 2, "positionId": "P1", "realizedPnl": -30})
+        await tracker.flush()
+
+        restored = PnLTracker(redis, snapshot_interval=3600)
+        await restored.start()
+        restored.handle_broker_event("tradelocker", "position", {"accountId": 2, "positionId": "P1", "realizedPnl": -40})
+        assert restored.get_account("tradelocker", "2").realized == -40.0
+        await restored.stop()
@@ -0,0 +1,138 @@
+"""
+Test the live position book.
+Tests incremental exposure from streamed events, REST loading,
+reconciliation and reporting of the symbols with open positions.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.position_book import AccountBook, PositionBook, normalize_position
+
+
+class FakeBroker:
+    """Serves REST positions and counts calls"""
+
+    def __init__(self, positions):
+        self.positions = positions
+        self.calls = 0
+
+    async def get_positions(self, account_id=None):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return list(self.positions)
+
+
+class TestAccountBook:
+    """Test incremental exposure bookkeeping."""
+
+    def test_apply_updates_gross_and_net(self):
+        book = AccountBook()
+        book.apply("1", "EURUSD", 2.0)
+        book.apply("2", "EURUSD", -0.5)
+        assert book.exposure("EURUSD") == 2.5
+        assert book.net_exposure("EURUSD") == 1.5
+
+        book.apply("1", "EURUSD", 1.0)
+        assert book.exposure("EURUSD") == 1.5
+
+        book.remove("1")
+        book.remove("2")
+        assert book.exposure("EURUSD") == 0.0
+        assert book.gross == {}
+
+    def test_replace_reports_drift(self):
+        book = AccountBook()
+        book.apply("1", "ES", 1.0)
+        assert book.replace([("1", "ES", 1.0), ("2", "NQ", -2.0)]) == 1
+        assert book.exposure("NQ") == 2.0
+
+    def test_normalize_rest_and_stream_shapes(self):
+        rest = SimpleNamespace(id="9", symbol="GBPUSD", side="short", size=1.5)
+        assert normalize_position(rest) == ("9", "GBPUSD", -1.5)
+        stream = {"id": 4, "contract": {"symbol": "ESZ5"}, "netPos": -3}
+        assert normalize_position(stream) == ("4", "ESZ5", -3.0)
+        assert normalize_position({"id": 1}) is None
+
+
+class TestPositionBook:
+    """Test loading, streaming updates and reconciliation."""
+
+    @pytest.mark.asyncio
+    async def test_loads_once_then_serves_from_memory(self):
+        broker = FakeBroker([SimpleNamespace(id="1", symbol="EURUSD", side="long", size=1.0)])
+        positions = PositionBook({"mt4": broker})
+
+        books = await asyncio.gather(*(positions.get_book("mt4", "7") for _ in range(3)))
+        assert books[0] is books[1] is books[2]
+        assert books[0].exposure("EURUSD") == 1.0
+        assert broker.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_events_update_book(self):
+        broker = FakeBroker([])
+        positions = PositionBook({"tradovate": broker})
+        book = await positions.get_book("tradovate", "7")
+
+        positions.handle_broker_event("tradovate", "position", {"e": "position", "d": {"id": 1, "accountId": 7, "contract": {"symbol": "ES"}, "netPos": 2}})
+        assert book.exposure("ES") == 2.0
+
+        positions.handle_broker_event("tradovate", "position_close", {"accountId": 7, "positionId": 1})
+        assert book.exposure("ES") == 0.0
+        assert positions.events_applied == 2
+        assert broker.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_fill_marks_stale_and_reconciles(self):
+        broker = FakeBroker([])
+        positions = PositionBook({"tradovate": broker})
+        book = await positions.get_book("tradovate", "7")
+
+        broker.positions = [{"id": "1", "symbol": "NQ", "netPos": 1}]
+        positions.handle_broker_event("tradovate", "trade", {"accountId": 7, "qty": 1})
+        assert book.stale
+        await asyncio.sleep(0.01)
+
+        assert not book.stale
+        assert book.exposure("NQ") == 1.0
+        assert positions.drift_corrections == 1
+        await positions.stop()
+
+    @pytest.mark.asyncio
+    async def test_stream_resync_reloads_broker_books(self):
+        broker = FakeBroker([])
+        positions = PositionBook({"tradovate": broker})
+        book = await positions.get_book("tradovate", "7")
+
+        broker.positions = [{"id": "1", "symbol": "ES", "netPos": 2}]
+        positions.handle_broker_event("tradovate", "resync", {"gap_seconds": 4.2})
+        await asyncio.sleep(0.01)
+
+        assert broker.calls == 2
+        assert book.exposure("ES") == 2.0
+        await positions.stop()
+
+    @pytest.mark.asyncio
+    async def test_untracked_accounts_are_ignored(self):
+        positions = PositionBook({"tradovate": FakeBroker([])})
+        positions.handle_broker_event("tradovate", "position", {"accountId": 1, "id": 1, "symbol": "ES", "netPos": 1})
+        assert positions.books == {}
+
+    @pytest.mark.asyncio
+    async def test_open_symbol_changes_are_reported(self):
+        reported = []
+        positions = PositionBook({"tradovate": FakeBroker([{"id": "1", "symbol": "ES", "netPos": 1}])}, on_symbols=reported.append)
+        await positions.get_book("tradovate", "7")
+        assert reported == [{("tradovate", "ES")}]
+
+        # Size changes on an already open symbol are not reported
+        positions.handle_broker_event("tradovate", "position", {"accountId": 7, "id": "1", "symbol": "ES", "netPos": 3})
+        positions.handle_broker_event("tradovate", "position", {"accountId": 7, "id": "2", "symbol": "NQ", "netPos": -1})
+        positions.handle_broker_event("tradovate", "position_close", {"accountId": 7, "positionId": "1"})
+        assert reported[1:] == [{("tradovate", "ES"), ("tradovate", "NQ")}, {("tradovate", "NQ")}]
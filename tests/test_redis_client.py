@@ -0,0 +1,93 @@
+"""
+Test the asyncio Redis client.
+Tests write coalescing into pipelines and batch helpers without a live server.
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.cache.redis_client import RedisClient
+
+
+class FakePipeline:
+    """Records queued commands and returns canned results on execute."""
+
+    def __init__(self, log):
+        self.log = log
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+        return queue
+
+    async def execute(self, raise_on_error=True):
+        self.log.append(list(self.commands))
+        return [True] * len(self.commands)
+
+
+@pytest.fixture
+def client():
+    redis_client = RedisClient()
+    redis_client.round_trips = []
+    redis_client.redis_client = MagicMock()
+    redis_client.redis_client.pipeline = lambda transaction=False: FakePipeline(redis_client.round_trips)
+    redis_client.pipeline_writes = True
+    return redis_client
+
+
+class TestRedisWriteCoalescing:
+    """Test pipelined write batching."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_share_one_round_trip(self, client):
+        results = await asyncio.gather(
+            client.set("signal:1", {"status": "pending"}, expire=60),
+            client.set("signal:2", {"status": "executed"}, expire=60),
+            client.publish("signals", {"id": 1}),
+        )
+
+        assert results == [True, True, True]
+        assert len(client.round_trips) == 1
+        commands = [command for command, _, _ in client.round_trips[0]]
+        assert commands == ["set", "set", "publish"]
+        _, args, kwargs = client.round_trips[0][0]
+        assert json.loads(args[1]) == {"status": "pending"}
+        assert kwargs == {"ex": 60}
+
+    @pytest.mark.asyncio
+    async def test_sequential_writes_flush_separately(self, client):
+        await client.set("a", 1)
+        await client.set("b", 2)
+        assert len(client.round_trips) == 2
+
+    @pytest.mark.asyncio
+    async def test_hset_many_pipelines_hset_and_expire(self, client):
+        assert await client.hset_many("positions:1", {"EURUSD": 1.5}, expire=30)
+        commands = [command for command, _, _ in client.round_trips[0]]
+        assert commands == ["hset", "expire"]
+
+    @pytest.mark.asyncio
+    async def test_mget_decodes_and_fills_missing(self, client):
+        client.redis_client.mget = AsyncMock(return_value=[json.dumps({"a": 1}), None])
+        assert await client.mget(["x", "y"]) == [{"a": 1}, None]
+
+    @pytest.mark.asyncio
+    async def test_disconnected_client_is_noop(self):
+        redis_client = RedisClient()
+        redis_client.redis_client = None
+        assert await redis_client.set("k", 1) is False
+        assert await redis_client.mget(["k"]) == [None]
@@ -0,0 +1,135 @@
+"""
+Test the broker reference data cache.
+Tests TTL expiry, single-flight loading, background refresh and
+invalidation from streamed broker events.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.reference_cache import TTLCache, BrokerReferenceCache
+
+
+class FakeBroker:
+    """Counts remote lookups"""
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.symbol_calls = 0
+        self.account_calls = 0
+
+    async def get_symbols(self):
+        self.symbol_calls += 1
+        await asyncio.sleep(0)
+        return self.symbols
+
+    async def get_account_info(self, account_id):
+        self.account_calls += 1
+        return {"id": account_id} if account_id != "missing" else None
+
+
+class TestTTLCache:
+    """Test TTL expiry and loading."""
+
+    def test_entries_expire(self):
+        cache = TTLCache(ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=0)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+    def test_evicts_when_full(self):
+        cache = TTLCache(ttl=60, max_entries=2)
+        cache.set("a", 1, ttl=10)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        assert len(cache) == 2
+        assert cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self):
+        cache = TTLCache(ttl=60)
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+        assert results == ["value"] * 5
+        assert len(calls) == 1
+        assert await cache.get_or_load("k", loader) == "value"
+        assert cache.get_metrics()["hits"] == 1
+
+
+class TestBrokerReferenceCache:
+    """Test symbol and account caching for validation."""
+
+    @pytest.mark.asyncio
+    async def test_symbol_lookups_hit_memory_after_first_load(self):
+        broker = FakeBroker(["EURUSD", "GBPUSD"])
+        cache = BrokerReferenceCache({"mt4": broker})
+
+        assert await cache.has_symbol("mt4", "EURUSD")
+        assert not await cache.has_symbol("mt4", "XAUUSD")
+        assert broker.symbol_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_previous_symbols(self):
+        broker = FakeBroker(["EURUSD"])
+        cache = BrokerReferenceCache({"mt4": broker})
+        await cache.get_symbols("mt4")
+
+        broker.symbols = []
+        assert not await cache.refresh_symbols("mt4")
+        assert await cache.has_symbol("mt4", "EURUSD")
+
+        broker.symbols = ["USDJPY"]
+        assert await cache.refresh_symbols("mt4")
+        assert await cache.has_symbol("mt4", "USDJPY")
+
+    @pytest.mark.asyncio
+    async def test_background_refresh(self):
+        broker = FakeBroker(["EURUSD"])
+        cache = BrokerReferenceCache({"mt4": broker}, refresh_interval=0.01)
+        await cache.get_symbols("mt4")
+        await cache.start()
+        await asyncio.sleep(0.05)
+        await cache.stop()
+        assert broker.symbol_calls > 1
+        assert cache.refreshes >= 1
+
+    @pytest.mark.asyncio
+    async def test_account_events_invalidate_account(self):
+        broker = FakeBroker([])
+        cache = BrokerReferenceCache({"tradovate": broker}, account_ttl=60)
+
+        await cache.get_account("tradovate", "7")
+        await cache.get_account("tradovate", "8")
+        assert broker.account_calls == 2
+
+        cache.handle_broker_event("tradovate", "order", {"accountId": 7})
+        await cache.get_account("tradovate", "7")
+        assert broker.account_calls == 2
+
+        cache.handle_broker_event("tradovate", "position", {"accountId": 7})
+        await cache.get_account("tradovate", "7")
+        await cache.get_account("tradovate", "8")
+        assert broker.account_calls == 3
+
+        cache.handle_broker_event("tradovate", "account", {"type": "AccountStatus"})
+        assert len(cache.accounts) == 0
+
+    @pytest.mark.asyncio
+    async def test_missing_account_is_not_cached(self):
+        broker = FakeBroker([])
+        cache = BrokerReferenceCache({"mt5": broker})
+        assert await cache.get_account("mt5", "missing") is None
+        assert await cache.get_account("mt5", "missing") is None
+        assert broker.account_calls == 2
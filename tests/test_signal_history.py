@@ -0,0 +1,85 @@
+"""
+Test signal and webhook history reads.
+Tests the async session path against aiosqlite and the mapping of the
+Signal and WebhookLog columns to history records.
+"""
+
+import pytest
+import pytest_asyncio
+import sys
+import os
+from datetime import datetime
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import Base
+from app.models.models import Signal, SignalSource, WebhookLog
+import app.services.signal_processor as signal_processor_module
+from app.services.signal_processor import signal_processor
+
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'history.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(signal_processor_module, "get_async_session", factory)
+    yield factory
+    await engine.dispose()
+
+
+class TestSignalHistory:
+    """Test history queries through async sessions."""
+
+    @pytest.mark.asyncio
+    async def test_signal_history_maps_columns(self, sessions):
+        async with sessions() as db:
+            db.add_all([
+                Signal(
+                    signal_id="sig_old", source=SignalSource.TRADINGVIEW, symbol="ES", action="buy",
+                    volume=1.0, status="pending", created_at=datetime(2024, 1, 1)
+                ),
+                Signal(
+                    signal_id="sig_new", source=SignalSource.API, symbol="NQ", action="sell",
+                    volume=2.0, price=18000.0, status="executed", strategy_id="ma_cross",
+                    signal_data={"broker": "tradovate", "account_id": "A1"},
+                    created_at=datetime(2024, 1, 2), processed_at=datetime(2024, 1, 2, 0, 0, 1)
+                )
+            ])
+            await db.commit()
+
+        history = await signal_processor.get_signal_history(limit=10)
+        assert [record["id"] for record in history] == ["sig_new", "sig_old"]
+        newest = history[0]
+        assert newest["broker"] == "tradovate" and newest["account_id"] == "A1"
+        assert (newest["source"], newest["volume"], newest["status"]) == ("api", 2.0, "executed")
+        assert newest["strategy_id"] == "ma_cross"
+        assert newest["processed_at"] == "2024-01-02T00:00:01"
+        assert history[1]["broker"] is None and history[1]["processed_at"] is None
+
+        assert len(await signal_processor.get_signal_history(limit=1)) == 1
+
+    @pytest.mark.asyncio
+    async def test_webhook_history_maps_columns(self, sessions):
+        async with sessions() as db:
+            db.add(WebhookLog(
+                webhook_id="wh_1", source="tradingview", payload="{}", source_ip="10.0.0.1",
+                response_status=200, processed=True, processing_time_ms=12, created_at=datetime(2024, 1, 1)
+            ))
+            await db.commit()
+
+        history = await signal_processor.get_webhook_history()
+        assert history == [{
+            "id": "wh_1",
+            "source": "tradingview",
+            "source_ip": "10.0.0.1",
+            "response_status": 200,
+            "processed": True,
+            "error_message": None,
+            "processing_time_ms": 12,
+            "created_at": "2024-01-01T00:00:00"
+        }]
@@ -0,0 +1,249 @@
+"""
+Test the bounded signal ingestion pipeline.
+Tests queueing, worker concurrency, load shedding, latency metrics and
+per-account execution lanes with slots reserved at admission.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.signal_pipeline import (
+    SignalPipeline, LatencyHistogram, PipelineFullError, PipelineUnavailableError
+)
+from app.services.execution_lanes import ExecutionLanes, LaneFullError
+
+
+class TestLatencyHistogram:
+    """Test latency histogram bucketing and quantiles."""
+
+    def test_observe_and_snapshot(self):
+        histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 5
+        assert snapshot["buckets"] == {"0.01": 1, "0.1": 3, "1.0": 4, "+Inf": 5}
+        assert snapshot["p50"] == 0.1
+        assert snapshot["max"] == 5.0
+
+    def test_empty_histogram(self):
+        histogram = LatencyHistogram()
+        assert histogram.quantile(0.99) == 0.0
+        assert histogram.snapshot()["avg"] == 0.0
+
+
+class TestSignalPipeline:
+    """Test pipeline workers and backpressure."""
+
+    @pytest.mark.asyncio
+    async def test_submit_before_start_is_unavailable(self):
+        pipeline = SignalPipeline(asyncio.sleep, max_size=1, worker_count=1)
+        with pytest.raises(PipelineUnavailableError):
+            pipeline.submit(0)
+
+    @pytest.mark.asyncio
+    async def test_processes_items_with_workers(self):
+        processed = []
+
+        async def handler(item):
+            await asyncio.sleep(0)
+            processed.append(item)
+
+        pipeline = SignalPipeline(handler, max_size=10, worker_count=3)
+        await pipeline.start()
+        for i in range(10):
+            pipeline.submit(i)
+        await pipeline.stop()
+
+        assert sorted(processed) == list(range(10))
+        metrics = pipeline.get_metrics()
+        assert metrics["processed"] == 10
+        assert metrics["queue_depth"] == 0
+        assert metrics["stages"]["queue_wait"]["count"] == 10
+        assert not pipeline.is_running
+
+    @pytest.mark.asyncio
+    async def test_sheds_load_when_full(self):
+        release = asyncio.Event()
+
+        async def handler(item):
+            await release.wait()
+
+        pipeline = SignalPipeline(handler, max_size=2, worker_count=1)
+        await pipeline.start()
+
+        pipeline.submit("a")
+        await asyncio.sleep(0)  # worker takes "a"
+        pipeline.submit("b")
+        pipeline.submit("c")
+        with pytest.raises(PipelineFullError):
+            pipeline.submit("d")
+
+        assert pipeline.metrics.shed == 1
+        assert pipeline.get_metrics()["queue_depth"] == 2
+        assert pipeline.retry_after() >= 1
+
+        release.set()
+        await pipeline.stop()
+        assert pipeline.metrics.processed == 3
+
+    @pytest.mark.asyncio
+    async def test_handler_errors_do_not_kill_workers(self):
+        async def handler(item):
+            if item == "bad":
+                raise ValueError("boom")
+
+        pipeline = SignalPipeline(handler, max_size=5, worker_count=1)
+        await pipeline.start()
+        pipeline.submit("bad")
+        pipeline.submit("good")
+        await pipeline.stop()
+
+        assert pipeline.metrics.failed == 1
+        assert pipeline.metrics.processed == 1
+
+
+class TestExecutionLanes:
+    """Test per-(broker, account) execution lanes."""
+
+    @pytest.mark.asyncio
+    async def test_lane_runs_in_fifo_order(self):
+        lanes = ExecutionLanes()
+        order = []
+
+        async def task(value, delay):
+            await asyncio.sleep(delay)
+            order.append(value)
+            return value
+
+        futures = [
+            lanes.submit("mt5", "1", task, 1, 0.02),
+            lanes.submit("mt5", "1", task, 2, 0.0),
+            lanes.submit("mt5", "1", task, 3, 0.01),
+        ]
+        assert await asyncio.gather(*futures) == [1, 2, 3]
+        assert order == [1, 2, 3]
+        await lanes.stop()
+
+    @pytest.mark.asyncio
+    async def test_stalled_lane_does_not_block_others(self):
+        lanes = ExecutionLanes()
+        release = asyncio.Event()
+
+        async def stalled():
+            await release.wait()
+            return "tradovate"
+
+        async def fast():
+            return "mt5"
+
+        slow_future = lanes.submit("tradovate", "42", stalled)
+        fast_future = lanes.submit("mt5", "7", fast)
+
+        assert await asyncio.wait_for(fast_future, timeout=1) == "mt5"
+        assert not slow_future.done()
+        assert lanes.get_metrics()["by_lane"]["tradovate:42"]["in_flight"] == 1
+
+        release.set()
+        assert await slow_future == "tradovate"
+        await lanes.stop()
+
+    @pytest.mark.asyncio
+    async def test_lane_depth_limit_and_broker_concurrency(self):
+        lanes = ExecutionLanes(broker_concurrency={"mt4": 3}, max_depth=1)
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+
+        lanes.submit("tradelocker", "1", blocked)
+        await asyncio.sleep(0.01)  # worker takes the first call
+        lanes.submit("tradelocker", "1", blocked)
+        with pytest.raises(LaneFullError):
+            lanes.submit("tradelocker", "1", blocked)
+
+        assert lanes.get_lane("mt4", "1").concurrency == 3
+        assert lanes.get_lane("tradelocker", "1").concurrency == 1
+
+        release.set()
+        await lanes.stop()
+
+    @pytest.mark.asyncio
+    async def test_reserved_slots_hold_capacity(self):
+        lanes = ExecutionLanes(max_depth=1, idle_timeout=0.01)
+
+        async def task():
+            return True
+
+        lane = lanes.reserve("mt4", "1")
+        with pytest.raises(LaneFullError):
+            lanes.reserve("mt4", "1")
+        with pytest.raises(LaneFullError):
+            lanes.submit("mt4", "1", task)
+        assert await lane.submit(task, reserved=True)
+        assert lane.reserved == 0
+
+        # A released reservation lets an otherwise idle lane be reaped
+        await asyncio.sleep(0.05)
+        lanes.reserve("mt4", "2").release()
+        assert lanes.get_metrics()["lanes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_webhooks_past_lane_capacity_are_refused_at_admission(self, monkeypatch):
+        from app.models.pydantic_schemas import WebhookRequest
+        from app.services.signal_processor import signal_processor
+
+        release = asyncio.Event()
+
+        async def blocked(item):
+            await release.wait()
+
+        lanes = ExecutionLanes(max_depth=1)
+        pipeline = SignalPipeline(blocked, max_size=10, worker_count=1)
+        monkeypatch.setattr(signal_processor, "lanes", lanes)
+        monkeypatch.setattr(signal_processor, "pipeline", pipeline)
+        await pipeline.start()
+
+        def webhook(account):
+            return WebhookRequest(
+                source="tradingview",
+                payload={"ticker": "ES", "action": "buy", "broker": "mt4", "account": account}
+            )
+
+        await signal_processor.admit_webhook(webhook("1"))
+        with pytest.raises(LaneFullError):
+            await signal_processor.admit_webhook(webhook("1"))
+        await signal_processor.admit_webhook(webhook("2"))
+        assert pipeline.metrics.accepted == 2
+
+        release.set()
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_idle_lane_is_reaped(self):
+        lanes = ExecutionLanes(idle_timeout=0.01)
+
+        async def task():
+            return True
+
+        assert await lanes.submit("mt4", "1", task)
+        await asyncio.sleep(0.05)
+        assert lanes.get_metrics()["lanes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_task_exception_propagates_to_caller(self):
+        lanes = ExecutionLanes()
+
+        async def failing():
+            raise RuntimeError("rejected")
+
+        with pytest.raises(RuntimeError):
+            await lanes.submit("mt4", "1", failing)
+        assert lanes.get_lane("mt4", "1").failed == 1
+        await lanes.stop()
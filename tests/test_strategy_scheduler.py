@@ -0,0 +1,358 @@
+"""
+Test the central strategy scheduler.
+Tests the timer wheel, one evaluation per (strategy, symbol) bar shared by
+every subscribed account, config caching with invalidation, pooled
+evaluation, the leader lease and closed-bar price history.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+np = pytest.importorskip("numpy")
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.leader_lease import RELEASE_SCRIPT, RENEW_SCRIPT, LeaderLease
+from app.services.indicators import ma_cross_latest
+from app.services.strategy_scheduler import GroupEvaluator, StrategyScheduler, StrategySubscription, TimerWheel
+
+START = 1700006400.0
+
+
+def _subscription(account_id, symbol="ES", fast=5, slow=20, interval="1m", paused=False):
+    params = {"symbol": symbol, "fast_period": fast, "slow_period": slow, "interval": interval}
+    return StrategySubscription("ma_cross", account_id, "tradovate", symbol, interval, params, paused)
+
+
+def _crossing_closes():
+    # A slow decline then a jump: every fast average crosses above its slow one on the last bar
+    return np.concatenate([np.linspace(110.0, 100.0, 40), [150.0]])
+
+
+class FakeSource:
+    """Subscription rows and price history standing in for the DB and tick store."""
+
+    def __init__(self, subscriptions):
+        self.rows = list(subscriptions)
+        self.loads = []
+        self.history_calls = []
+        self.signals = []
+
+    async def load(self, strategy_id=None, account_id=None):
+        self.loads.append((strategy_id, account_id))
+        return [
+            s for s in self.rows
+            if strategy_id in (None, s.strategy_id) and account_id in (None, s.account_id)
+        ]
+
+    def history(self, symbol, interval, bars, broker=None):
+        self.history_calls.append((symbol, interval, bars))
+        return _crossing_closes()
+
+    async def emit(self, signal):
+        self.signals.append(signal)
+
+
+class Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Keys with millisecond expiry on a shared clock, and the lease scripts."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.keys = {}
+
+    def _get(self, key):
+        value, expires_at = self.keys.get(key, (None, 0.0))
+        return value if self.clock() < expires_at else None
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and self._get(key) is not None:
+            return None
+        self.keys[key] = (value, self.clock() + px / 1000)
+        return True
+
+    async def eval(self, script, numkeys, key, token, *args):
+        if self._get(key) != token:
+            return 0
+        if script == RENEW_SCRIPT:
+            self.keys[key] = (token, self.clock() + args[0] / 1000)
+        elif script == RELEASE_SCRIPT:
+            del self.keys[key]
+        return 1
+
+
+def _scheduler(source, **options):
+    scheduler = StrategyScheduler(source.load, source.history, source.emit, **options)
+    scheduler.register("ma_cross", GroupEvaluator(
+        window=lambda params: params["slow_period"] + 1,
+        key=lambda params: (params["fast_period"], params["slow_period"]),
+        evaluate=ma_cross_latest,
+        signal=lambda subscription, cross: {"account_id": subscription.account_id, "cross": cross}
+    ))
+    return scheduler
+
+
+class TestTimerWheel:
+    """Test hashed wheel expiry."""
+
+    def test_expires_across_revolutions(self):
+        wheel = TimerWheel(tick=1.0, slots=8, now=START)
+        wheel.schedule("soon", START + 3)
+        wheel.schedule("later", START + 20)
+        wheel.schedule("past", START - 5)
+        assert wheel.advance(START + 1) == ["past"]
+        assert wheel.advance(START + 3) == ["soon"]
+        assert wheel.advance(START + 19) == []
+        assert "later" in wheel
+        assert wheel.advance(START + 25) == ["later"]
+        assert len(wheel) == 0
+
+    def test_reschedule_and_cancel(self):
+        wheel = TimerWheel(tick=1.0, slots=4, now=START)
+        wheel.schedule("a", START + 2)
+        wheel.schedule("a", START + 3)
+        assert wheel.advance(START + 2) == []
+        assert wheel.cancel("a")
+        assert wheel.advance(START + 10) == []
+
+
+class TestStrategyScheduler:
+    """Test grouped evaluation and the config cache."""
+
+    @pytest.mark.asyncio
+    async def test_one_evaluation_per_group(self):
+        accounts = [_subscription(i, fast=5 if i % 2 else 10) for i in range(1, 101)]
+        source = FakeSource(accounts + [_subscription(500, symbol="NQ")])
+        scheduler = _scheduler(source)
+        await scheduler.reload()
+        assert set(scheduler.groups) == {("ma_cross", "ES", "1m"), ("ma_cross", "NQ", "1m")}
+
+        emitted = await scheduler.evaluate(("ma_cross", "ES", "1m"))
+        assert emitted == 100
+        assert source.history_calls == [("ES", "1m", 21)]
+        assert {signal["cross"] for signal in source.signals} == {1}
+        assert scheduler.get_metrics()["evaluations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_groups_fire_on_bar_close(self):
+        source = FakeSource([_subscription(1), _subscription(2, interval="5m")])
+        scheduler = _scheduler(source, settle=1.0)
+        await scheduler.reload()
+        # Reschedule from a fixed clock instead of time.time()
+        scheduler.wheel = TimerWheel(1.0, 3600, now=START)
+        for group in scheduler.groups:
+            scheduler._schedule(group, START)
+
+        assert scheduler.run_due(START + 60) == []
+        assert scheduler.run_due(START + 61) == [("ma_cross", "ES", "1m")]
+        await asyncio.gather(*scheduler._evaluating.values())
+        assert set(scheduler.run_due(START + 301)) == {("ma_cross", "ES", "1m"), ("ma_cross", "ES", "5m")}
+        await asyncio.gather(*scheduler._evaluating.values())
+        assert scheduler.run_due(START + 302) == []
+        assert scheduler.get_metrics()["evaluations"] == 3
+        assert sorted(signal["account_id"] for signal in source.signals) == [1, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_and_invalidation(self):
+        source = FakeSource([_subscription(1)])
+        scheduler = _scheduler(source)
+        await scheduler.reload()
+
+        assert (await scheduler.get_subscription("ma_cross", 1)).symbol == "ES"
+        assert await scheduler.get_subscription("ma_cross", 2) is None
+        assert scheduler.get_metrics()["config_hits"] == 1
+        assert source.loads == [(None, None), ("ma_cross", 2)]
+
+        source.rows = [_subscription(1, symbol="NQ")]
+        scheduler.invalidate(account_id=1)
+        assert (await scheduler.get_subscription("ma_cross", 1)).symbol == "NQ"
+        assert set(scheduler.groups) == {("ma_cross", "NQ", "1m")}
+
+        source.rows = []
+        scheduler.invalidate(strategy_id="ma_cross", account_id=1)
+        assert await scheduler.get_subscription("ma_cross", 1) is None
+        assert scheduler.groups == {}
+
+    @pytest.mark.asyncio
+    async def test_paused_subscriptions_are_not_scheduled(self):
+        source = FakeSource([_subscription(1, paused=True), _subscription(2), _subscription(3, interval="soon")])
+        scheduler = _scheduler(source)
+        await scheduler.reload()
+        assert list(scheduler.groups[("ma_cross", "ES", "1m")]) == [2]
+        assert ("ma_cross", "ES", "soon") not in scheduler.wheel
+        # Paused subscriptions still serve on-demand runs
+        assert (await scheduler.get_subscription("ma_cross", 1)).paused
+        assert scheduler.get_metrics()["paused"] == 1
+
+    @pytest.mark.asyncio
+    async def test_config_version_change_reloads(self):
+        versions = ["a"]
+
+        async def config_version():
+            return versions[-1]
+
+        source = FakeSource([_subscription(1)])
+        scheduler = _scheduler(source, config_version=config_version)
+        await scheduler.reload()
+        await scheduler._check_config_version()
+        assert scheduler._invalidated == []
+
+        versions.append("b")
+        await scheduler._check_config_version()
+        source.rows = [_subscription(1, paused=True)]
+        assert (await scheduler.get_subscription("ma_cross", 1)).paused
+        assert scheduler.groups == {}
+
+    @pytest.mark.asyncio
+    async def test_pooled_evaluation(self):
+        source = FakeSource([_subscription(1), _subscription(2, fast=3, slow=30)])
+        scheduler = _scheduler(source, workers=1)
+        await scheduler.start()
+        try:
+            assert await scheduler.evaluate(("ma_cross", "ES", "1m")) == 2
+            assert scheduler.get_metrics()["workers"] == 1
+        finally:
+            await scheduler.stop()
+
+
+class TestLeaderLease:
+    """Test that only the lease holder schedules groups."""
+
+    @pytest.mark.asyncio
+    async def test_one_holder_and_expiry(self):
+        clock = Clock()
+        redis = FakeRedis(clock)
+        first = LeaderLease(redis, "leader", ttl=15.0, clock=clock)
+        second = LeaderLease(redis, "leader", ttl=15.0, clock=clock)
+        assert await first.keep()
+        assert not await second.keep()
+
+        # Renewals are spaced ttl / 3 apart and keep the key alive
+        for _ in range(6):
+            clock.now += 5
+            assert await first.keep()
+            assert not await second.keep()
+
+        # A holder that stops renewing loses the lease once it expires
+        clock.now += 15
+        assert not first.held
+        assert await second.keep()
+        clock.now += 5
+        assert not await first.keep()
+        assert first.get_metrics()["acquired"] == 1
+
+    @pytest.mark.asyncio
+    async def test_only_the_leader_schedules(self):
+        clock = Clock()
+        redis = FakeRedis(clock)
+        source = FakeSource([_subscription(1)])
+        schedulers = [
+            _scheduler(source, lease=LeaderLease(redis, "leader", ttl=15.0, clock=clock)),
+            _scheduler(source, lease=LeaderLease(redis, "leader", ttl=15.0, clock=clock))
+        ]
+        for scheduler in schedulers:
+            await scheduler.reload()
+            await scheduler._lead()
+        assert [bool(scheduler.groups) for scheduler in schedulers] == [True, False]
+        assert [scheduler.leader for scheduler in schedulers] == [True, False]
+        assert len(schedulers[1].wheel) == 0
+        # Standbys still answer on-demand config lookups
+        assert await schedulers[1].get_subscription("ma_cross", 1) is not None
+
+        # Releasing on stop hands the schedule over at the next renewal
+        await schedulers[0].stop()
+        clock.now += 5
+        assert await schedulers[1]._lead()
+        assert set(schedulers[1].groups) == {("ma_cross", "ES", "1m")}
+        assert schedulers[1].get_metrics()["leadership_changes"] == 1
+
+
+class TestRunnerSchedule:
+    """Test that the runner keeps schedule state on the AccountStrategy row."""
+
+    @pytest.mark.asyncio
+    async def test_stop_and_start_are_stored(self, tmp_path, monkeypatch):
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from app.db.database import Base
+        from app.models.models import Account, AccountStrategy, AccountType, BrokerType, Strategy
+        import app.services.strategy_runner as strategy_runner_module
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'strategies.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            db.add_all([
+                Strategy(id=1, strategy_id="ma_cross", strategy_name="MA Cross", strategy_source="inhouse", parameters={"symbol": "ES"}),
+                Account(id=7, user_id=1, account_id="A7", broker=BrokerType.TOPSTEP, account_type=AccountType.DEMO),
+                AccountStrategy(account_id=7, strategy_id=1, is_enabled=True)
+            ])
+            await db.commit()
+
+        versions = []
+
+        async def record_version(key, value, expire=None):
+            versions.append(value)
+            return True
+
+        monkeypatch.setattr(strategy_runner_module, "get_async_session", sessions)
+        monkeypatch.setattr(strategy_runner_module.redis_client, "set", record_version)
+        runner = strategy_runner_module.StrategyRunner(signal_sink=source_sink)
+
+        # Enabling alone doesn't schedule: new subscriptions start paused
+        await runner.scheduler.reload()
+        assert (await runner.scheduler.get_subscription("ma_cross", 7)).paused
+        assert runner.scheduler.groups == {}
+
+        assert await runner.start_periodic_execution("ma_cross", 7, 60)
+        assert not (await runner.scheduler.get_subscription("ma_cross", 7)).paused
+        assert set(runner.scheduler.groups) == {("ma_cross", "ES", "60s")}
+
+        await runner.stop_periodic_execution("ma_cross", 7)
+        assert (await runner.scheduler.get_subscription("ma_cross", 7)).paused
+        assert runner.scheduler.groups == {}
+
+        assert await runner.start_periodic_execution("ma_cross", 7, 300)
+        assert (await runner.scheduler.get_subscription("ma_cross", 7)).interval == "300s"
+        assert set(runner.scheduler.groups) == {("ma_cross", "ES", "300s")}
+        assert len(versions) == 3
+
+        # A fresh process (another replica) loads the same state
+        fresh = await strategy_runner_module.StrategyRunner(signal_sink=source_sink)._load_subscriptions()
+        assert [(s.paused, s.interval) for s in fresh] == [(False, "300s")]
+        await engine.dispose()
+
+
+async def source_sink(signal):
+    return {"success": True}
+
+
+class TestRunnerHistory:
+    """Test the live runner's closes from the tick store."""
+
+    def test_forming_bar_is_excluded(self, tmp_path, monkeypatch):
+        from app.services.tick_store import TickStore
+        import app.services.strategy_runner as strategy_runner_module
+
+        store = TickStore(str(tmp_path))
+        for step in range(16):
+            # One tick every 10s; the last two fall in the bar still forming at START + 150
+            store.append_tick("tradovate:ES", START + step * 10, last=100.0 + step)
+        store.flush()
+        monkeypatch.setattr(strategy_runner_module.signal_processor, "tick_store", store)
+        monkeypatch.setattr(strategy_runner_module.time, "time", lambda: START + 150.5)
+
+        closes = strategy_runner_module.strategy_runner._price_history("ES", "1m", 2, "tradovate")
+        assert list(closes) == [105.0, 111.0]
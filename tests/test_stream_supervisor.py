@@ -0,0 +1,179 @@
+"""
+Test the broker stream supervisor.
+Tests reconnect with resubscription, gap resync, backoff for streams the
+server keeps dropping, heartbeat timeouts, bad-message isolation and lag
+metrics.
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+import os
+import time
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.stream_supervisor import StreamSupervisor, message_timestamp
+
+
+class FakeConnection:
+    """WebSocket stand-in fed from a queue; None in the queue drops the socket"""
+
+    def __init__(self, answer_pings=True):
+        self.inbox = asyncio.Queue()
+        self.sent = []
+        self.closed = False
+        self.answer_pings = answer_pings
+
+    async def recv(self):
+        message = await self.inbox.get()
+        if message is None:
+            raise ConnectionError("socket closed")
+        return message
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def ping(self):
+        pong = asyncio.get_running_loop().create_future()
+        if self.answer_pings:
+            pong.set_result(None)
+        return pong
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBroker:
+    """Hands out a fresh connection per connect() and records what arrives"""
+
+    def __init__(self, **connection_kwargs):
+        self.connection_kwargs = connection_kwargs
+        self.connections = []
+        self.received = []
+        self.resyncs = []
+
+    async def connect(self):
+        connection = FakeConnection(**self.connection_kwargs)
+        self.connections.append(connection)
+        return connection
+
+    async def on_message(self, data):
+        if data.get("bad"):
+            raise ValueError("unparseable")
+        self.received.append(data)
+
+    async def resync(self, gap):
+        self.resyncs.append(gap)
+
+
+async def _until(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+class TestStreamSupervisor:
+    """Test stream recovery."""
+
+    @pytest.mark.asyncio
+    async def test_reconnects_resubscribes_and_resyncs(self):
+        broker = FakeBroker()
+        stream = StreamSupervisor("tradovate", broker.connect, broker.on_message, resync=broker.resync,
+                                  initial_backoff=0.01, ping_interval=0)
+        stream.start()
+        await _until(lambda: stream.is_live)
+        await stream.subscribe({"op": "subscribe", "topic": "positions"})
+
+        first = broker.connections[0]
+        await first.inbox.put(json.dumps({"e": "position", "id": 1}))
+        await first.inbox.put(None)
+
+        await _until(lambda: len(broker.connections) == 2 and stream.is_live)
+        second = broker.connections[1]
+        assert first.closed
+        assert second.sent == [{"op": "subscribe", "topic": "positions"}]
+        assert len(broker.resyncs) == 1
+
+        await second.inbox.put(json.dumps({"e": "position", "id": 2}))
+        await _until(lambda: len(broker.received) == 2)
+        metrics = stream.get_metrics()
+        assert metrics["connects"] == 2
+        assert metrics["disconnects"] == 1
+        assert metrics["resyncs"] == 1
+        await stream.stop()
+        assert second.closed
+
+    @pytest.mark.asyncio
+    async def test_backoff_only_resets_after_a_stable_connection(self, monkeypatch):
+        ceilings = []
+        monkeypatch.setattr("app.core.stream_supervisor.random.uniform", lambda low, high: ceilings.append(high) or high)
+
+        class Rejecting(FakeBroker):
+            async def connect(self):
+                connection = await super().connect()
+                connection.inbox.put_nowait(None)  # accepted, then closed straight away
+                return connection
+
+        broker = Rejecting()
+        stream = StreamSupervisor("tradovate", broker.connect, broker.on_message,
+                                  initial_backoff=0.01, ping_interval=0, stable_after=60)
+        stream.start()
+        await _until(lambda: len(ceilings) >= 4)
+        await stream.stop()
+        assert ceilings[:4] == [0.01, 0.02, 0.04, 0.08]
+
+        ceilings.clear()
+        stream = StreamSupervisor("tradovate", Rejecting().connect, broker.on_message,
+                                  initial_backoff=0.01, ping_interval=0, stable_after=0)
+        stream.start()
+        await _until(lambda: len(ceilings) >= 3)
+        await stream.stop()
+        assert ceilings[:3] == [0.01, 0.01, 0.01]
+
+    @pytest.mark.asyncio
+    async def test_missed_pong_forces_reconnect(self):
+        broker = FakeBroker(answer_pings=False)
+        stream = StreamSupervisor("projectx", broker.connect, broker.on_message,
+                                  initial_backoff=0.01, ping_interval=0.02, ping_timeout=0.02)
+        stream.start()
+        await _until(lambda: len(broker.connections) >= 2)
+        assert "no pong" in stream.last_error
+        await stream.stop()
+
+    @pytest.mark.asyncio
+    async def test_silent_feed_is_treated_as_dead(self):
+        broker = FakeBroker()
+        stream = StreamSupervisor("projectx", broker.connect, broker.on_message,
+                                  initial_backoff=0.01, ping_interval=0, stale_after=0.03)
+        stream.start()
+        await _until(lambda: len(broker.connections) >= 2)
+        assert "no message" in stream.last_error
+        await stream.stop()
+
+    @pytest.mark.asyncio
+    async def test_bad_message_does_not_drop_stream(self):
+        broker = FakeBroker()
+        stream = StreamSupervisor("tradovate", broker.connect, broker.on_message, ping_interval=0)
+        stream.start()
+        await _until(lambda: stream.is_live)
+
+        connection = broker.connections[0]
+        await connection.inbox.put(json.dumps({"bad": True}))
+        await connection.inbox.put(json.dumps({"e": "fill", "timestamp": int(time.time() * 1000) - 250}))
+        await _until(lambda: len(broker.received) == 1)
+
+        metrics = stream.get_metrics()
+        assert metrics["message_errors"] == 1
+        assert metrics["connects"] == 1
+        assert metrics["lag"]["count"] == 1
+        await stream.stop()
+
+    def test_message_timestamp_formats(self):
+        assert message_timestamp({"timestamp": 1700000000}) == 1700000000.0
+        assert message_timestamp({"d": {"ts": 1700000000500}}) == 1700000000.5
+        assert message_timestamp({"time": "2023-11-14T22:13:20Z"}) == 1700000000.0
+        assert message_timestamp({"e": "order"}) is None
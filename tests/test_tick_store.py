@@ -0,0 +1,82 @@
+"""
+Test the memory-mapped tick store.
+Tests batched appends, time-range slicing over day partitions, ordering
+checks, torn-write tolerance and quote ingestion.
+"""
+
+import pytest
+import sys
+import os
+
+np = pytest.importorskip("numpy")
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.market_data import Quote
+from app.services.tick_store import TickStore
+
+DAY = 86400.0
+MIDNIGHT = 1700006400.0  # 2023-11-15T00:00:00Z
+
+
+class TestTickStore:
+    """Test columnar tick and bar storage."""
+
+    def test_range_within_a_day_is_a_view(self, tmp_path):
+        store = TickStore(str(tmp_path), flush_rows=4)
+        for i in range(10):
+            store.append_tick("ES", MIDNIGHT + i, bid=100.0 + i, ask=100.25 + i)
+        assert store.get_metrics()["rows_written"] == 8
+        store.flush()
+
+        ticks = store.ticks("ES", MIDNIGHT + 2, MIDNIGHT + 5)
+        assert ticks["ts"].tolist() == [MIDNIGHT + 2, MIDNIGHT + 3, MIDNIGHT + 4]
+        assert ticks["bid"].tolist() == [102.0, 103.0, 104.0]
+        assert np.isnan(ticks["last"]).all()
+        assert isinstance(ticks["bid"], np.memmap)
+
+    def test_range_spans_day_partitions(self, tmp_path):
+        store = TickStore(str(tmp_path))
+        for day in range(3):
+            for minute in range(3):
+                store.append_bar("NQ", "1m", MIDNIGHT + day * DAY + minute * 60, 1, 2, 0.5, day + minute, 10)
+        store.flush()
+
+        assert sorted(os.listdir(tmp_path / "bars_1m" / "NQ")) == ["2023-11-15", "2023-11-16", "2023-11-17"]
+        bars = store.bars("NQ", "1m", MIDNIGHT + 60, MIDNIGHT + 2 * DAY + 60)
+        assert bars["close"].tolist() == [1.0, 2.0, 1.0, 2.0, 3.0, 2.0]
+        chunks = list(store.iter_range("bars_1m", "NQ", MIDNIGHT, MIDNIGHT + 3 * DAY))
+        assert [len(chunk["ts"]) for chunk in chunks] == [3, 3, 3]
+
+    def test_out_of_order_rows_are_rejected_across_restarts(self, tmp_path):
+        store = TickStore(str(tmp_path))
+        assert store.append_tick("EUR/USD", MIDNIGHT + 10, last=1.1)
+        store.flush()
+
+        reopened = TickStore(str(tmp_path))
+        assert not reopened.append_tick("EUR/USD", MIDNIGHT + 5, last=1.0)
+        assert reopened.append_tick("EUR/USD", MIDNIGHT + 10, last=1.2)
+        reopened.flush()
+        assert reopened.ticks("EUR/USD", MIDNIGHT, MIDNIGHT + DAY)["last"].tolist() == [1.1, 1.2]
+        assert reopened.get_metrics()["rows_rejected"] == 1
+
+    def test_torn_append_reads_complete_rows(self, tmp_path):
+        store = TickStore(str(tmp_path))
+        store.append_tick("ES", MIDNIGHT, bid=1.0)
+        store.flush()
+        with open(tmp_path / "ticks" / "ES" / "2023-11-15" / "ts.f8", "ab") as handle:
+            handle.write(np.array([MIDNIGHT + 1], dtype="<f8").tobytes())
+
+        assert store.ticks("ES", MIDNIGHT, MIDNIGHT + DAY)["ts"].tolist() == [MIDNIGHT]
+
+    @pytest.mark.asyncio
+    async def test_quotes_are_recorded_per_broker(self, tmp_path):
+        store = TickStore(str(tmp_path))
+        await store.start()
+        store.append_quote(Quote("tradovate", "ES", 4500.0, 4500.25, 4500.0, MIDNIGHT))
+        await store.stop()
+
+        ticks = store.ticks("tradovate:ES", MIDNIGHT, MIDNIGHT + 1)
+        assert ticks["ask"].tolist() == [4500.25]
+        assert store.symbols() == ["tradovate:ES"]
@@ -0,0 +1,93 @@
+"""
+Test the broker token manager.
+Tests proactive refresh ahead of expiry, single-flight refreshes, header
+swaps on bound clients and retry after a failed refresh.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+
+import httpx
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.token_manager import TokenManager
+
+
+class FakeAuth:
+    """Issues numbered tokens with a fixed lifetime"""
+
+    def __init__(self, ttl=3600.0, delay=0.0):
+        self.ttl = ttl
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    async def fetch(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("auth down")
+        return f"token-{self.calls}", self.ttl
+
+
+class TestTokenManager:
+    """Test token refresh scheduling."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_share_one_fetch(self):
+        auth = FakeAuth(delay=0.02)
+        manager = TokenManager()
+        client = httpx.AsyncClient()
+        manager.register("tradovate", auth.fetch, clients=[client])
+
+        results = await asyncio.gather(*(manager.refresh("tradovate") for _ in range(5)))
+        assert results == [True] * 5
+        assert auth.calls == 1
+        assert client.headers["Authorization"] == "Bearer token-1"
+        assert await manager.get("tradovate") == "token-1"
+
+        await manager.close()
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_refreshes_before_expiry(self):
+        auth = FakeAuth(ttl=0.2)
+        manager = TokenManager(refresh_margin=0.15)
+        client = httpx.AsyncClient()
+        manager.register("tradovate", auth.fetch)
+        await manager.refresh("tradovate")
+        manager.bind("tradovate", client)
+        assert client.headers["Authorization"] == "Bearer token-1"
+
+        await asyncio.sleep(0.12)
+        assert auth.calls == 2
+        assert manager.current("tradovate") == "token-2"
+        assert client.headers["Authorization"] == "Bearer token-2"
+        assert manager.get_metrics()["tradovate"]["valid"]
+
+        await manager.close()
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_retries_and_keeps_token(self):
+        auth = FakeAuth()
+        manager = TokenManager(retry_backoff=0.02)
+        manager.register("tradovate", auth.fetch)
+        await manager.refresh("tradovate")
+
+        auth.fail = True
+        assert not await manager.refresh("tradovate")
+        assert manager.current("tradovate") == "token-1"
+        assert manager.get_metrics()["tradovate"]["last_error"] == "auth down"
+
+        auth.fail = False
+        await asyncio.sleep(0.05)
+        assert manager.current("tradovate") == "token-3"
+        assert manager.get_metrics()["tradovate"]["failures"] == 1
+
+        await manager.close()
+        assert manager.get_metrics() == {}
@@ -0,0 +1,152 @@
+"""
+Test write-behind batch persistence.
+Tests coalescing, batched flushes, journal replay and bad-row isolation
+against an in-process SQLite database.
+"""
+
+import pytest
+import pytest_asyncio
+import os
+import sys
+from datetime import datetime
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.services.write_behind import WriteBehindBuffer
+
+metadata = MetaData()
+signals = Table(
+    "signals",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("signal_id", String, unique=True, nullable=False),
+    Column("symbol", String, nullable=False),
+    Column("status", String),
+    Column("processed_at", DateTime),
+)
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'wb.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+    yield engine, async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def fetch_rows(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(select(signals.c.signal_id, signals.c.status).order_by(signals.c.id))
+        return [tuple(row) for row in result]
+
+
+def make_buffer(session_factory, journal_dir=None):
+    buffer = WriteBehindBuffer(session_factory, flush_interval_ms=10_000, max_batch=1000, journal_dir=journal_dir)
+    buffer.register(signals, "signal_id")
+    return buffer
+
+
+class TestWriteBehindBuffer:
+    """Test buffering and batched flushes."""
+
+    @pytest.mark.asyncio
+    async def test_update_merges_into_pending_insert(self, database):
+        _, session_factory = database
+        buffer = make_buffer(session_factory)
+
+        for i in range(50):
+            buffer.insert(signals, {"signal_id": f"s{i}", "symbol": "EURUSD", "status": "pending", "unknown": 1})
+            buffer.update(signals, f"s{i}", {"status": "executed", "processed_at": datetime.now()})
+
+        assert buffer.pending == 50
+        assert await buffer.flush()
+
+        rows = await fetch_rows(session_factory)
+        assert len(rows) == 50
+        assert {status for _, status in rows} == {"executed"}
+        assert buffer.stats["round_trips"] == 1
+        assert buffer.stats["updates_coalesced"] == 50
+
+    @pytest.mark.asyncio
+    async def test_updates_after_flush_are_batched(self, database):
+        _, session_factory = database
+        buffer = make_buffer(session_factory)
+
+        for i in range(10):
+            buffer.insert(signals, {"signal_id": f"s{i}", "symbol": "ES", "status": "pending"})
+        await buffer.flush()
+        for i in range(10):
+            buffer.update(signals, f"s{i}", {"status": "failed"})
+        await buffer.flush()
+
+        assert {status for _, status in await fetch_rows(session_factory)} == {"failed"}
+        assert buffer.stats["round_trips"] == 2
+
+    @pytest.mark.asyncio
+    async def test_journal_replays_after_crash(self, database, tmp_path):
+        _, session_factory = database
+        journal_dir = str(tmp_path / "journal")
+
+        crashed = make_buffer(session_factory, journal_dir)
+        await crashed.start()
+        crashed.insert(signals, {"signal_id": "a", "symbol": "NQ", "status": "pending"})
+        crashed.update(signals, "a", {"status": "executed", "processed_at": datetime.now()})
+        crashed.flusher.cancel()  # simulate a crash: nothing flushed, journal left behind
+        crashed.journal.close()
+
+        recovered = make_buffer(session_factory, journal_dir)
+        await recovered.start()
+        await recovered.stop()
+
+        assert await fetch_rows(session_factory) == [("a", "executed")]
+        assert recovered.journal.closed == []
+        # Both the adopted and the cleanly stopped journal directories are gone
+        assert [name for name in os.listdir(journal_dir) if name.startswith("proc-")] == []
+
+    @pytest.mark.asyncio
+    async def test_live_journal_is_not_replayed_by_another_process(self, database, tmp_path):
+        _, session_factory = database
+        journal_dir = str(tmp_path / "journal")
+
+        live = make_buffer(session_factory, journal_dir)
+        await live.start()
+        live.insert(signals, {"signal_id": "b", "symbol": "ES", "status": "pending"})
+
+        other = make_buffer(session_factory, journal_dir)
+        await other.start()
+        assert other.journal.closed == []
+        await other.stop()
+        assert await fetch_rows(session_factory) == []
+        assert os.path.exists(live.journal.current)
+
+        await live.stop()
+        assert await fetch_rows(session_factory) == [("b", "pending")]
+
+    @pytest.mark.asyncio
+    async def test_replay_of_committed_rows_is_idempotent(self, database, tmp_path):
+        _, session_factory = database
+        buffer = make_buffer(session_factory)
+        buffer.insert(signals, {"signal_id": "dup", "symbol": "CL", "status": "pending"})
+        await buffer.flush()
+        buffer.insert(signals, {"signal_id": "dup", "symbol": "CL", "status": "pending"})
+        assert await buffer.flush()
+        assert await fetch_rows(session_factory) == [("dup", "pending")]
+
+    @pytest.mark.asyncio
+    async def test_bad_row_is_isolated(self, database, tmp_path):
+        _, session_factory = database
+        buffer = make_buffer(session_factory, str(tmp_path / "journal"))
+        await buffer.start()
+
+        buffer.insert(signals, {"signal_id": "good", "symbol": "GC", "status": "pending"})
+        buffer.insert(signals, {"signal_id": "bad", "symbol": None, "status": "pending"})
+        await buffer.stop()
+
+        assert await fetch_rows(session_factory) == [("good", "pending")]
+        assert buffer.stats["rows_dropped"] == 1
+        assert os.path.exists(tmp_path / "journal" / "dead-letter.jsonl")
@@ -0,0 +1,210 @@
+"""
+Test cross-worker WebSocket delivery.
+Tests two workers sharing an in-memory pub/sub bus: interest-based
+subscriptions, serialize-once envelopes, echo suppression and the
+presence registry.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+import time
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.websocket_manager import ConnectionManager
+from app.core.ws_cluster import PresenceRegistry, WebSocketCluster, pack, unpack
+from app.core.ws_fanout import Frame
+
+
+class Bus:
+    """In-memory pub/sub shared by the fake transports."""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.published = []
+
+    def transport(self):
+        return BusTransport(self)
+
+
+class BusTransport:
+    def __init__(self, bus):
+        self.bus = bus
+        self.handler = None
+
+    async def start(self, handler):
+        self.handler = handler
+
+    async def subscribe(self, channel):
+        self.bus.subscribers.setdefault(channel, set()).add(self)
+
+    async def unsubscribe(self, channel):
+        self.bus.subscribers.get(channel, set()).discard(self)
+
+    async def publish_many(self, messages):
+        for channel, data in messages:
+            self.bus.published.append(channel)
+            for transport in list(self.bus.subscribers.get(channel, ())):
+                transport.handler(channel, data)
+
+    async def close(self):
+        for subscribers in self.bus.subscribers.values():
+            subscribers.discard(self)
+
+
+class FakeRedis:
+    """The hash and sorted-set commands the presence registry uses."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrangebyscore(self, key, low, high):
+        return [member for member, score in self.zsets.get(key, {}).items() if score >= low]
+
+    async def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = str(value)
+
+    async def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field, None)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+class FakeSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        self.frames.append(json.loads(payload))
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _settle():
+    await asyncio.sleep(0.02)
+
+
+async def _worker(bus, name, redis=None):
+    manager = ConnectionManager()
+    presence = PresenceRegistry(redis, name) if redis is not None else None
+    manager.cluster = WebSocketCluster(bus.transport(), manager.deliver, presence, worker_id=name)
+    await manager.cluster.start()
+    return manager
+
+
+class TestEnvelope:
+    """Test the transport envelope."""
+
+    def test_round_trip_keeps_payload_and_key(self):
+        origin, frame = unpack(pack("w1", Frame('{"a":1}\n', ("position_update", "p1"))))
+        assert origin == "w1" and frame == Frame('{"a":1}\n', ("position_update", "p1"))
+        assert unpack(pack("w2", Frame(b"\x00\n\x01")))[1].payload == b"\x00\n\x01"
+
+
+class TestWebSocketCluster:
+    """Test delivery across two workers."""
+
+    @pytest.mark.asyncio
+    async def test_user_message_reaches_other_worker_only_with_interest(self):
+        bus = Bus()
+        a, b = await _worker(bus, "a"), await _worker(bus, "b")
+        socket_b = FakeSocket()
+        await b.connect(socket_b, user_id=42)
+        await _settle()
+        assert bus.subscribers["ws.user.42"] == {b.cluster.transport}
+
+        await a.send_personal_message({"type": "position_update", "data": {"position_id": "p1"}}, 42)
+        await a.send_personal_message({"type": "order_update", "data": {}}, 7)
+        await _settle()
+        assert [m["type"] for m in socket_b.frames] == ["position_update"]
+        assert b.cluster.get_metrics()["received"] == 1
+
+        b.disconnect(socket_b)
+        await _settle()
+        assert not bus.subscribers["ws.user.42"]
+        for manager in (a, b):
+            await manager.cluster.stop()
+            await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_relayed_updates_reach_subscribers_as_deltas(self):
+        bus = Bus()
+        a, b = await _worker(bus, "a"), await _worker(bus, "b")
+        legacy, subscribed = FakeSocket(), FakeSocket()
+        await b.connect(legacy, user_id=42)
+        await b.connect(subscribed, user_id=42)
+        b.subscribe(subscribed, ["account:A1"])
+        await _settle()
+
+        position = {"broker": "tradovate", "account_id": "A1", "position_id": "p1", "symbol": "ES", "size": 1.0}
+        await a.notify_position_update(42, position)
+        await _settle()
+        assert [m["type"] for m in legacy.frames] == ["position_update"]
+        assert [m["type"] for m in subscribed.frames] == ["subscribed", "snapshot", "delta"]
+        assert subscribed.frames[2]["changes"][0]["id"] == "position:tradovate:A1:p1"
+        for manager in (a, b):
+            await manager.cluster.stop()
+            await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_broadcast_delivered_once_per_socket(self):
+        bus = Bus()
+        a, b = await _worker(bus, "a"), await _worker(bus, "b")
+        socket_a, socket_b = FakeSocket(), FakeSocket()
+        await a.connect(socket_a, user_id=1)
+        await b.connect(socket_b)
+
+        await a.broadcast({"type": "heartbeat"})
+        await _settle()
+        # a delivered locally and ignored its own echo from the bus
+        assert len(socket_a.frames) == 1 and len(socket_b.frames) == 1
+        assert bus.published == ["ws.broadcast"]
+        for manager in (a, b):
+            await manager.cluster.stop()
+            await manager.close()
+
+
+class TestPresenceRegistry:
+    """Test cluster-wide presence."""
+
+    @pytest.mark.asyncio
+    async def test_presence_tracks_workers_and_ignores_dead_ones(self):
+        bus, redis = Bus(), FakeRedis()
+        a, b = await _worker(bus, "a", redis), await _worker(bus, "b", redis)
+        await a.connect(FakeSocket(), user_id=5)
+        await b.connect(FakeSocket(), user_id=5)
+        await b.connect(FakeSocket(), user_id=5)
+        await _settle()
+        assert await a.cluster.presence.connections(5) == {"a": 1, "b": 2}
+
+        # b stops heartbeating without cleaning up
+        redis.zsets["ws:workers"]["b"] = time.time() - 60
+        assert await a.cluster.presence.connections(5) == {"a": 1}
+
+        await a.cluster.stop()
+        assert not await b.cluster.presence.is_online(5)
+        await b.cluster.stop()
+        for manager in (a, b):
+            await manager.close()
@@ -0,0 +1,122 @@
+"""
+Test WebSocket wire format negotiation.
+Tests JSON, MessagePack and CBOR frames, per-format serialize-once fan-out,
+epoch timestamps and decoding of binary client messages.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.websocket_manager import ConnectionManager
+from app.core.ws_fanout import CBOR, JSON, MSGPACK, Message, encode, loads, negotiate
+
+msgpack = pytest.importorskip("msgpack")
+cbor2 = pytest.importorskip("cbor2")
+
+
+class FakeSocket:
+    """Records frames and the accepted subprotocol."""
+
+    def __init__(self, subprotocols=(), query=None, incoming=()):
+        self.scope = {"subprotocols": list(subprotocols)}
+        self.query_params = query or {}
+        self.incoming = list(incoming)
+        self.subprotocol = None
+        self.frames = []
+
+    async def accept(self, subprotocol=None):
+        self.subprotocol = subprotocol
+
+    async def send_text(self, payload):
+        self.frames.append(payload)
+
+    async def send_bytes(self, payload):
+        self.frames.append(payload)
+
+    async def receive(self):
+        return self.incoming.pop(0)
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _drain():
+    await asyncio.sleep(0.01)
+
+
+class TestNegotiation:
+    """Test picking the wire format at connect time."""
+
+    def test_first_supported_subprotocol_wins(self):
+        assert negotiate(FakeSocket(["bogus", "cbor", "msgpack"])) == (CBOR, "cbor")
+
+    def test_query_parameter(self):
+        assert negotiate(FakeSocket(query={"encoding": "msgpack"})) == (MSGPACK, None)
+
+    def test_defaults_to_json(self):
+        assert negotiate(FakeSocket()) == (JSON, None)
+        assert negotiate(FakeSocket(["v2"], {"encoding": "xml"})) == (JSON, None)
+
+
+class TestMessage:
+    """Test per-format serialization of one message."""
+
+    def test_serialized_once_per_format(self):
+        message = encode({"type": "quote", "data": {"symbol": "ES", "bid": 1.5}})
+        assert message.frame(MSGPACK) is message.frame(MSGPACK)
+        assert isinstance(message.frame(MSGPACK).payload, bytes)
+        assert isinstance(message.frame(CBOR).payload, bytes)
+        assert isinstance(message.frame(JSON).payload, str)
+        assert message.frame(MSGPACK).key == ("quote", "ES")
+
+    def test_timestamps(self):
+        message = Message({"type": "heartbeat"}, ts=1700000000.25)
+        assert json.loads(message.frame(JSON).payload)["timestamp"] == "2023-11-14T22:13:20.250000"
+        assert msgpack.unpackb(message.frame(MSGPACK).payload)["timestamp"] == 1700000000250
+        assert cbor2.loads(message.frame(CBOR).payload)["timestamp"] == 1700000000250
+
+    def test_reencodes_frames_from_other_workers(self):
+        original = Message({"type": "order_update", "data": {"order_id": "o1"}}, ts=1700000000.5)
+        relayed = Message.from_frame(original.frame(JSON))
+        assert relayed.frame(JSON) is original.frame(JSON)
+        assert loads(relayed.frame(MSGPACK).payload, MSGPACK) == loads(original.frame(MSGPACK).payload, MSGPACK)
+
+
+class TestManagerFormats:
+    """Test fan-out to clients using different formats."""
+
+    @pytest.mark.asyncio
+    async def test_mixed_format_broadcast(self):
+        manager = ConnectionManager()
+        binary = FakeSocket(["msgpack"])
+        text = FakeSocket()
+        await manager.connect(binary)
+        await manager.connect(text)
+        assert binary.subprotocol == "msgpack" and text.subprotocol is None
+
+        await manager.broadcast({"type": "position_update", "data": {"position_id": "p1"}})
+        await _drain()
+        assert msgpack.unpackb(binary.frames[0])["data"] == {"position_id": "p1"}
+        assert json.loads(text.frames[0])["data"] == {"position_id": "p1"}
+        metrics = manager.get_metrics()
+        assert metrics["formats"] == {"msgpack": 1, "json": 1}
+        assert metrics["bytes_sent"] == len(binary.frames[0]) + len(text.frames[0])
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_receive_decodes_client_format(self):
+        manager = ConnectionManager()
+        socket = FakeSocket(["cbor"], incoming=[
+            {"type": "websocket.receive", "bytes": cbor2.dumps({"type": "ping"})},
+            {"type": "websocket.receive", "text": '{"type": "ping"}'}
+        ])
+        await manager.connect(socket)
+        assert await manager.receive(socket) == {"type": "ping"}
+        assert await manager.receive(socket) == {"type": "ping"}
+        await manager.close()
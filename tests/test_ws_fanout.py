@@ -0,0 +1,148 @@
+"""
+Test the WebSocket fan-out engine.
+Tests serialize-once broadcasts, per-connection queues, slow consumer
+policies and isolation of a stalled client from the others.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.websocket_manager import ConnectionManager
+from app.core.ws_fanout import CONFLATE, DISCONNECT, DROP_OLDEST, Connection, encode
+
+
+class FakeSocket:
+    """Records frames; send blocks while the gate is closed."""
+
+    def __init__(self, open_gate=True):
+        self.frames = []
+        self.closed_with = None
+        self.gate = asyncio.Event()
+        if open_gate:
+            self.gate.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        await self.gate.wait()
+        self.frames.append(payload)
+
+    async def send_bytes(self, payload):
+        await self.send_text(payload)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _drain():
+    await asyncio.sleep(0.01)
+
+
+def _position(position_id, pnl):
+    return {"type": "position_update", "data": {"position_id": position_id, "pnl": pnl}}
+
+
+class TestConnection:
+    """Test queue policies on a single connection."""
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_newest(self):
+        socket = FakeSocket(open_gate=False)
+        connection = Connection(socket, max_queue=2, policy=DROP_OLDEST)
+        for i in range(4):
+            connection.enqueue(encode({"type": "order_update", "data": {"n": i}}))
+        connection.start()
+        socket.gate.set()
+        await _drain()
+        assert [json.loads(f)["data"]["n"] for f in socket.frames] == [2, 3]
+        assert connection.dropped == 2
+        connection.discard()
+        await _drain()
+
+    @pytest.mark.asyncio
+    async def test_conflate_replaces_queued_stream_updates(self):
+        socket = FakeSocket(open_gate=False)
+        connection = Connection(socket, max_queue=10, policy=CONFLATE)
+        for pnl in range(5):
+            connection.enqueue(encode(_position("p1", pnl)))
+        connection.enqueue(encode({"type": "order_update", "data": {"order_id": "o1"}}))
+        connection.enqueue(encode(_position("p2", 9)))
+        connection.enqueue(encode(_position("p1", 99)))
+        assert connection.depth == 3
+        connection.start()
+        socket.gate.set()
+        await _drain()
+        sent = [json.loads(f) for f in socket.frames]
+        assert [m["data"].get("pnl") for m in sent] == [99, None, 9]
+        assert connection.conflated == 5
+        connection.discard()
+        await _drain()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_closes_slow_client(self):
+        socket = FakeSocket(open_gate=False)
+        closed = []
+        connection = Connection(socket, max_queue=1, policy=DISCONNECT, on_close=closed.append)
+        connection.start()
+        connection.enqueue(encode({"type": "a"}))
+        await _drain()
+        assert connection.enqueue(encode({"type": "b"}))
+        assert not connection.enqueue(encode({"type": "c"}))
+        await _drain()
+        assert closed == [connection] and socket.closed_with == 1013
+
+
+class TestConnectionManager:
+    """Test fan-out through the manager."""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_serializes_once_and_skips_stalled_client(self, monkeypatch):
+        manager = ConnectionManager(queue_size=8, policy=DROP_OLDEST)
+        fast_user, fast_anon, stalled = FakeSocket(), FakeSocket(), FakeSocket(open_gate=False)
+        await manager.connect(fast_user, user_id=1)
+        await manager.connect(fast_anon)
+        await manager.connect(stalled, user_id=2)
+
+        dumps = []
+        real_dumps = json.dumps
+        monkeypatch.setattr("app.core.ws_fanout.json.dumps", lambda *a, **k: dumps.append(1) or real_dumps(*a, **k))
+        await manager.broadcast({"type": "heartbeat"})
+        await manager.send_personal_message({"type": "signal_update", "data": {}}, 1)
+        await _drain()
+
+        assert len(dumps) == 2
+        assert [json.loads(f)["type"] for f in fast_user.frames] == ["heartbeat", "signal_update"]
+        assert len(fast_anon.frames) == 1 and stalled.frames == []
+        # The stalled writer holds the heartbeat in flight; nothing else was addressed to it
+        assert manager.get_metrics()["queued"] == 0
+
+        manager.disconnect(stalled, 2)
+        assert manager.get_connected_users() == [1]
+        assert manager.get_connection_count() == 2
+        for socket in (fast_user, fast_anon):
+            manager.disconnect(socket)
+        await _drain()
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_send_removes_connection(self):
+        manager = ConnectionManager()
+        socket = FakeSocket()
+
+        async def broken(payload):
+            raise RuntimeError("socket closed")
+
+        socket.send_text = broken
+        await manager.connect(socket, user_id=7)
+        await manager.send_to_user(7, {"type": "notification", "data": {}})
+        await _drain()
+        assert manager.get_connection_count() == 0
+        assert manager.get_connected_users() == []
+        await manager.close()
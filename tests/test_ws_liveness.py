@@ -0,0 +1,181 @@
+"""
+Test WebSocket liveness and admission control.
+Tests opting in with ping/pong, pings for idle connections, reaping of
+unresponsive ones, the connection limit and connection churn metrics.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.websocket_manager import ConnectionManager
+from app.core.ws_liveness import PING_TIMEOUT_CLOSE_CODE, LivenessMonitor
+
+
+class Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSocket:
+    """Records messages; receive() returns queued client messages."""
+
+    def __init__(self):
+        self.messages = []
+        self.incoming = []
+        self.accepted = False
+        self.closed_with = None
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, payload):
+        self.messages.append(json.loads(payload))
+
+    async def receive(self):
+        return self.incoming.pop(0)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+    def say(self, message):
+        self.incoming.append({"type": "websocket.receive", "text": json.dumps(message)})
+
+
+async def _drain():
+    await asyncio.sleep(0.01)
+
+
+def _manager(clock):
+    manager = ConnectionManager()
+    manager.liveness = LivenessMonitor(ping_interval=30.0, ping_timeout=10.0, clock=clock)
+    return manager
+
+
+class TestLiveness:
+    """Test pinging and reaping through the connection manager."""
+
+    @pytest.mark.asyncio
+    async def test_listen_only_clients_are_never_pinged(self):
+        clock = Clock()
+        manager = _manager(clock)
+        socket = FakeSocket()
+        await manager.connect(socket)
+        socket.say({"type": "subscribe", "topics": []})
+        await manager.receive(socket)
+        for _ in range(5):
+            clock.now += 60
+            assert manager.liveness.check() == 0
+        await _drain()
+        assert socket.messages == []
+        assert manager.get_connection_count() == 1
+        assert manager.liveness._task is None
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_idle_connection_is_pinged_then_reaped(self):
+        clock = Clock()
+        manager = _manager(clock)
+        socket = FakeSocket()
+        await manager.connect(socket)
+        socket.say({"type": "ping"})
+        await manager.receive(socket)
+
+        clock.now += 29
+        manager.liveness.check()
+        await _drain()
+        assert socket.messages == []
+
+        clock.now += 1
+        manager.liveness.check()
+        await _drain()
+        assert [message["type"] for message in socket.messages] == ["ping"]
+
+        clock.now += 10
+        assert manager.liveness.check() == 1
+        await _drain()
+        assert socket.closed_with == PING_TIMEOUT_CLOSE_CODE
+        assert manager.get_connection_count() == 0
+        assert manager.get_metrics()["close_reasons"] == {"ping timeout": 1}
+        # The last heartbeating connection is gone, so the tick task is stopped
+        assert manager.liveness._task is None
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_answered_ping_keeps_connection(self):
+        clock = Clock()
+        manager = _manager(clock)
+        socket = FakeSocket()
+        await manager.connect(socket)
+        socket.say({"type": "pong"})
+        await manager.receive(socket)
+
+        clock.now += 30
+        manager.liveness.check()
+        clock.now += 5
+        socket.say({"type": "pong"})
+        assert await manager.receive(socket) == {"type": "pong"}
+
+        clock.now += 5
+        assert manager.liveness.check() == 0
+        assert manager.get_connection_count() == 1
+        # Next ping only after another full interval of silence
+        clock.now += 24
+        manager.liveness.check()
+        await _drain()
+        assert [message["type"] for message in socket.messages] == ["ping"]
+        clock.now += 1
+        manager.liveness.check()
+        await _drain()
+        assert [message["type"] for message in socket.messages] == ["ping", "ping"]
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_active_clients_are_never_pinged(self):
+        clock = Clock()
+        manager = _manager(clock)
+        socket = FakeSocket()
+        await manager.connect(socket)
+        socket.say({"type": "ping"})
+        await manager.receive(socket)
+        for _ in range(10):
+            clock.now += 20
+            socket.say({"type": "subscribe", "topics": []})
+            await manager.receive(socket)
+            manager.liveness.check()
+        await _drain()
+        assert socket.messages == []
+        assert manager.liveness.pings == 0
+        await manager.close()
+
+
+class TestAdmission:
+    """Test the connection limit and churn metrics."""
+
+    @pytest.mark.asyncio
+    async def test_handshakes_past_the_limit_are_refused(self):
+        manager = ConnectionManager(max_connections=2)
+        sockets = [FakeSocket() for _ in range(3)]
+        connections = [await manager.connect(socket) for socket in sockets]
+        assert connections[2] is None
+        assert not sockets[2].accepted and sockets[2].closed_with == 1013
+
+        manager.disconnect(sockets[0])
+        assert await manager.connect(sockets[2]) is not None
+        metrics = manager.get_metrics()
+        assert (metrics["opened"], metrics["rejected"], metrics["closed"]) == (3, 1, 1)
+        assert metrics["close_reasons"] == {"client disconnected": 1}
+        # Neither client has sent ping/pong, so neither is on the liveness wheel
+        assert metrics["liveness"]["tracked"] == 0
+        await manager.close()
+        assert manager.get_metrics()["close_reasons"]["server shutdown"] == 2
@@ -0,0 +1,256 @@
+"""
+Test WebSocket topic subscriptions.
+Tests topic routing, snapshots, sequenced deltas, conflation of price and
+P&L ticks, per-user topics and their authorization, and clients without
+subscriptions still getting their own full updates.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.websocket_manager import ConnectionManager
+from app.core.ws_topics import entity_key, parse_topic, topics_for
+
+
+class FakeSocket:
+    """Records decoded messages."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        self.messages.append(json.loads(payload))
+
+    async def close(self, code=1000):
+        pass
+
+    def of_type(self, message_type):
+        return [message for message in self.messages if message["type"] == message_type]
+
+
+# The user owning account A1
+USER = 1
+
+
+async def _drain():
+    await asyncio.sleep(0.01)
+
+
+def _position(position_id="p1", size=1.0, pnl=0.0, **extra):
+    return {
+        "kind": "position", "broker": "tradovate", "account_id": "A1", "ts": 1.0,
+        "position_id": position_id, "symbol": "ES", "size": size, "avg_price": 5000.0,
+        "unrealized_pnl": pnl, "realized_pnl": 0.0, "closed": False, **extra
+    }
+
+
+async def _client(manager, topics, user_id=USER):
+    socket = FakeSocket()
+    await manager.connect(socket, user_id=user_id)
+    if topics:
+        manager.subscribe(socket, topics)
+    return socket
+
+
+class TestTopicNames:
+    """Test topic parsing and routing keys."""
+
+    def test_parse_topic(self):
+        assert parse_topic("account:A1") == "account:A1"
+        assert parse_topic("symbol:ES") == "symbol:ES"
+        assert parse_topic("nope:1") is None
+        assert parse_topic("account:") is None
+        assert parse_topic({"account": 1}) is None
+
+    def test_topics_and_entity_key(self):
+        record = _position()
+        assert set(topics_for(record)) == {"account:A1", "symbol:ES", "broker:tradovate"}
+        assert entity_key("position", record) == "position:tradovate:A1:p1"
+        assert entity_key("fill", {"fill_id": "f1"}) is None
+
+
+class TestTopicHub:
+    """Test snapshots, deltas and conflation through the connection manager."""
+
+    @pytest.mark.asyncio
+    async def test_only_matching_topics_are_delivered(self):
+        manager = ConnectionManager(tick_interval=60)
+        es = await _client(manager, ["symbol:ES"])
+        nq = await _client(manager, ["symbol:NQ"])
+        manager.publish_update("position", _position(), USER)
+        await _drain()
+        assert len(es.of_type("delta")) == 1
+        assert nq.of_type("delta") == []
+        assert nq.of_type("position_update") == []
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_then_sequenced_deltas(self):
+        manager = ConnectionManager(tick_interval=60)
+        manager.publish_update("position", _position("p1"), USER)
+        manager.publish_update("position", _position("p2", size=2.0), USER)
+        socket = await _client(manager, ["account:A1", "bogus"])
+        await _drain()
+
+        ack, snapshot = socket.messages[0], socket.messages[1]
+        assert ack == {**ack, "type": "subscribed", "topics": ["account:A1"], "rejected": ["bogus"]}
+        assert snapshot["seq"] == 0
+        assert {record["id"] for record in snapshot["data"]} == {
+            "position:tradovate:A1:p1", "position:tradovate:A1:p2"
+        }
+
+        manager.publish_update("position", _position("p1", size=3.0), USER)
+        manager.publish_update("position", _position("p2", closed=True), USER)
+        await _drain()
+        deltas = socket.of_type("delta")
+        assert [delta["seq"] for delta in deltas] == [1, 2]
+        assert deltas[0]["changes"] == [{"id": "position:tradovate:A1:p1", "size": 3.0}]
+        assert deltas[1]["changes"] == [{"id": "position:tradovate:A1:p2", "removed": True}]
+
+        # A fresh subscription sees the closed position gone
+        late = await _client(manager, ["account:A1"])
+        await _drain()
+        snapshot = late.of_type("snapshot")[0]
+        assert snapshot["seq"] == 2
+        assert [record["id"] for record in snapshot["data"]] == ["position:tradovate:A1:p1"]
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_update_sends_nothing(self):
+        manager = ConnectionManager(tick_interval=60)
+        manager.publish_update("position", _position(), USER)
+        socket = await _client(manager, ["account:A1"])
+        manager.publish_update("position", _position(ts=2.0), USER)
+        await _drain()
+        assert socket.of_type("delta") == []
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_pnl_ticks_are_conflated(self):
+        manager = ConnectionManager(tick_interval=0.05)
+        manager.publish_update("position", _position(), USER)
+        socket = await _client(manager, ["account:A1"])
+        for pnl in range(1, 21):
+            manager.publish_update("position", _position(pnl=float(pnl)), USER)
+        await _drain()
+        assert socket.of_type("delta") == []
+
+        await asyncio.sleep(0.1)
+        deltas = socket.of_type("delta")
+        assert len(deltas) == 1
+        assert deltas[0]["changes"] == [{"id": "position:tradovate:A1:p1", "unrealized_pnl": 20.0}]
+        assert manager.topics.conflated == 20
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_urgent_update_carries_pending_ticks(self):
+        manager = ConnectionManager(tick_interval=60)
+        manager.publish_update("position", _position(), USER)
+        socket = await _client(manager, ["account:A1"])
+        manager.publish_update("position", _position(pnl=5.0), USER)
+        manager.publish_update("position", _position(size=2.0, pnl=6.0), USER)
+        await _drain()
+        deltas = socket.of_type("delta")
+        assert len(deltas) == 1
+        assert deltas[0]["changes"] == [{"id": "position:tradovate:A1:p1", "unrealized_pnl": 6.0, "size": 2.0}]
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_events_and_quotes(self):
+        manager = ConnectionManager(tick_interval=60)
+        socket = await _client(manager, ["symbol:ES", "strategy:ma_cross"])
+        manager.publish_update("fill", {"kind": "fill", "broker": "tradovate", "account_id": "A1", "fill_id": "f1", "symbol": "ES"}, USER)
+        manager.topics.publish("signal", {"strategy_id": "ma_cross", "symbol": "NQ", "action": "BUY"}, USER)
+        await _drain()
+        events = socket.of_type("event")
+        assert [(event["topic"], event["kind"], event["seq"]) for event in events] == [
+            ("symbol:ES", "fill", 1), ("strategy:ma_cross", "signal", 1)
+        ]
+
+        class Quote:
+            def to_dict(self):
+                return {"broker": "tradovate", "symbol": "ES", "bid": 1.0, "ask": 1.25, "last": None}
+
+        unsubscribed = await _client(manager, [])
+        manager.publish_quote(Quote())
+        manager.topics.flush()
+        await _drain()
+        assert socket.of_type("delta")[0]["changes"][0]["id"] == "quote:tradovate::ES"
+        assert unsubscribed.messages == []
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_unsubscribed_clients_get_full_updates(self):
+        manager = ConnectionManager(tick_interval=60)
+        legacy = await _client(manager, [])
+        subscribed = await _client(manager, ["account:A1"])
+        other, anonymous = await _client(manager, [], user_id=2), await _client(manager, [], user_id=None)
+        manager.publish_update("position", _position(), USER)
+        await _drain()
+        assert legacy.of_type("position_update")[0]["data"]["position_id"] == "p1"
+        assert subscribed.of_type("position_update") == []
+        # Updates never reach other users' or anonymous connections
+        assert other.messages == [] and anonymous.messages == []
+
+        manager.unsubscribe(subscribed, ["account:A1"])
+        manager.publish_update("position", _position(size=4.0), USER)
+        await _drain()
+        assert subscribed.of_type("unsubscribed")[0]["topics"] == ["account:A1"]
+        assert len(subscribed.of_type("position_update")) == 1
+        assert manager.topics.subscribers == {}
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_topics_are_scoped_to_the_owning_user(self):
+        manager = ConnectionManager(tick_interval=60)
+        manager.publish_update("position", _position("p0"), USER)
+        owner = await _client(manager, ["symbol:ES", "broker:tradovate"])
+        other = await _client(manager, ["symbol:ES", "broker:tradovate"], user_id=2)
+        manager.publish_update("position", _position("p1"), USER)
+
+        class Quote:
+            def to_dict(self):
+                return {"broker": "tradovate", "symbol": "ES", "bid": 1.0, "ask": 1.25, "last": None}
+
+        manager.publish_quote(Quote())
+        await _drain()
+        assert [len(snapshot["data"]) for snapshot in owner.of_type("snapshot")] == [1, 1]
+        assert [snapshot["data"] for snapshot in other.of_type("snapshot")] == [[], []]
+        owner_ids = [change["id"] for delta in owner.of_type("delta") if delta["topic"] == "symbol:ES" for change in delta["changes"]]
+        other_ids = [change["id"] for delta in other.of_type("delta") if delta["topic"] == "symbol:ES" for change in delta["changes"]]
+        assert owner_ids == ["position:tradovate:A1:p1", "quote:tradovate::ES"]
+        # Shared quotes reach every subscriber, positions only their owner; seq has no gaps
+        assert other_ids == ["quote:tradovate::ES"]
+        assert [delta["seq"] for delta in other.of_type("delta")] == [1, 1]
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_topics_need_an_authorized_user(self):
+        manager = ConnectionManager(tick_interval=60)
+        manager.topics.authorize = lambda user_id, topic: topic != "account:B7"
+        anonymous = await _client(manager, ["symbol:ES"], user_id=None)
+        user = await _client(manager, ["account:A1", "account:B7"])
+        await _drain()
+        assert anonymous.messages[0]["rejected"] == ["symbol:ES"]
+        assert user.messages[0]["topics"] == ["account:A1"] and user.messages[0]["rejected"] == ["account:B7"]
+        assert manager.topics.get_metrics()["unauthorized"] == 2
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_subscription_limit_and_cleanup(self):
+        manager = ConnectionManager(tick_interval=60, max_subscriptions=2)
+        socket = await _client(manager, ["symbol:ES", "symbol:NQ", "symbol:CL"])
+        await _drain()
+        assert socket.messages[0]["rejected"] == ["symbol:CL"]
+        manager.disconnect(socket)
+        assert manager.topics.subscribers == {}
+        await manager.close()